@@ -28,6 +28,13 @@ Usage:
     --start-project       Initialize build descriptors and python project
                           structure
     --update-project      Update build descriptors and python project structure
+    --history             Print the recent builds of the project and the tasks
+                          and tests slowing down the most
+    --daemon              Run the build in a background daemon keeping the
+                          project and its plugins loaded
+    --stop-daemon         Stop the background daemon of the project
+    --import-profile      Run the build reporting the modules taking the longest
+                          to import (Python 3.7+)
     -v, --verbose         Enable verbose output
   
     Project Options:
@@ -44,6 +51,13 @@ Usage:
                           Exclude optional task dependencies
       -o, --exclude-all-optional
                           Exclude all optional task dependencies
+      -j <jobs>, --jobs=<jobs>
+                          Execute independent tasks in parallel using up to
+                          <jobs> workers
+      -w, --watch         Watch the source directories and execute the tasks
+                          again whenever files change
+      --resume            Skip the tasks completed by the previous build if the
+                          project is unchanged
       --force-exclude=<task>
                           Exclude any task dependencies (dangerous, may break
                           the build in unexpected ways)
@@ -55,3 +69,16 @@ Usage:
       -q, --quiet         Quiet mode; print only warnings and errors
       -Q, --very-quiet    Very quiet mode; print only errors
       -C, --no-color      Disable colored output
+      --trace=<file>      Write a timeline of the build to <file>
+      --trace-format=<format>
+                          Format of the timeline: chrome (trace event format,
+                          e.g. for Perfetto) or otlp (OpenTelemetry JSON),
+                          default: chrome
+      --events=<file>     Write the events of the build (tasks, actions, tests,
+                          commands and log messages) as JSON lines to <file>
+      --plan-graph=<file>
+                          Write the dependency graph of the execution plan to
+                          <file> instead of building
+      --plan-graph-format=<format>
+                          Format of the plan graph: dot (Graphviz) or json,
+                          default: dot
@@ -0,0 +1,75 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of PyBuilder
+#
+#   Copyright 2011-2015 PyBuilder Team
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+import os
+import unittest
+
+from integrationtest_support import IntegrationTestSupport
+from pybuilder.cli import StdOutLogger
+from pybuilder.composite import CompositeBuild
+from pybuilder.core import Logger
+
+
+class Test(IntegrationTestSupport):
+    def test(self):
+        self.write_build_file("""
+from pybuilder.core import use_subproject
+
+use_subproject("apps/eggs", depends_on="libs/spam")
+use_subproject("libs/spam")
+        """)
+        for directory in ("libs/spam", "apps/eggs"):
+            self.create_directory(os.path.join(directory, "src", "main", "python"))
+            self.write_file(os.path.join(directory, "build.py"), """
+import os
+
+from pybuilder.core import use_plugin, task, depends
+
+use_plugin("python.core")
+
+default_task = "write_dependencies"
+
+@task
+@depends("package")
+def write_dependencies(project):
+    dist_dir = project.expand_path("$dir_dist")
+    with open(os.path.join(dist_dir, "dependencies.txt"), "w") as dependencies_file:
+        for directory, dependency_dist_dir in project.get_property("subproject_dist_dirs").items():
+            dependencies_file.write("%s %s" % (directory, os.path.isdir(dependency_dist_dir)))
+        """)
+        reactor = self.prepare_reactor()
+
+        composite_build = CompositeBuild(StdOutLogger(threshold=Logger.DEBUG), reactor)
+        composite_build.prepare()
+        summaries = composite_build.build(jobs=2)
+
+        self.assertEqual([os.path.join("libs", "spam"), os.path.join("apps", "eggs")],
+                         list(composite_build.subprojects))
+        self.assertEqual([self.full_path("libs/spam"), self.full_path("apps/eggs")],
+                         [summary.project.basedir for summary in summaries])
+        eggs_reactor = composite_build.subprojects[os.path.join("apps", "eggs")].reactor
+        self.assertTrue("python.core" in eggs_reactor.get_plugins())
+        self.assertTrue("core" in eggs_reactor.get_plugins())
+        self.assertTrue(eggs_reactor.execution_manager.has_task("clean"))
+        self.assert_file_content("apps/eggs/target/dist/eggs-1.0.dev0/dependencies.txt",
+                                 "%s True" % os.path.join("libs", "spam"))
+
+
+if __name__ == "__main__":
+    unittest.main()
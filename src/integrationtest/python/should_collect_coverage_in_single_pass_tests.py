@@ -0,0 +1,77 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of PyBuilder
+#
+#   Copyright 2011-2015 PyBuilder Team
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+import json
+import unittest
+
+from integrationtest_support import IntegrationTestSupport
+
+
+class Test(IntegrationTestSupport):
+    def test(self):
+        self.write_build_file("""
+from pybuilder.core import use_plugin, init
+
+use_plugin("python.core")
+use_plugin("python.unittest")
+use_plugin("python.coverage")
+
+name = "spam"
+default_task = "analyze"
+
+@init
+def init(project):
+    project.set_property("coverage_single_pass", True)
+    project.set_property("coverage_threshold_warn", 0)
+        """)
+        self.create_directory("src/main/python")
+        self.write_file("src/main/python/spam.py", """
+def spam():
+    return "spam"
+
+def eggs():
+    return "eggs"
+""")
+        self.create_directory("src/unittest/python")
+        self.write_file("src/unittest/python/spam_tests.py", """
+import os
+import unittest
+
+from spam import spam
+
+
+class SpamTest(unittest.TestCase):
+    def test_spam(self):
+        with open(os.path.join(os.path.dirname(__file__), "..", "..", "..", "tests.log"), "a") as log_file:
+            log_file.write("x")
+        self.assertEqual("spam", spam())
+""")
+        reactor = self.prepare_reactor()
+        reactor.build()
+
+        self.assert_file_content("tests.log", "x")
+        self.assert_file_exists("target/reports/unittest.coverage")
+        with open(self.full_path("target/reports/coverage.json")) as report_file:
+            report = json.load(report_file)
+        self.assertEqual(["spam"], [module["module"] for module in report["module_names"]])
+        self.assertEqual([6], report["module_names"][0]["lines_not_covered"])
+
+
+if __name__ == "__main__":
+    unittest.main()
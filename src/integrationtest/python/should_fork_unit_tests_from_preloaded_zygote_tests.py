@@ -0,0 +1,72 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of PyBuilder
+#
+#   Copyright 2011-2015 PyBuilder Team
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import sys
+import unittest
+
+from integrationtest_support import IntegrationTestSupport
+from pybuilder import zygote
+
+
+class Test(IntegrationTestSupport):
+    def test(self):
+        self.write_build_file("""
+from pybuilder.core import use_plugin, init
+
+use_plugin("python.core")
+use_plugin("python.unittest")
+
+name = "spam"
+default_task = "run_unit_tests"
+
+@init
+def init(project):
+    project.set_property("unittest_preload_modules", ["zygote_heavy_dependency"])
+        """)
+        self.create_directory("lib")
+        self.write_file("lib/zygote_heavy_dependency.py", "VALUE = 'heavy'\n")
+        self.create_directory("src/main/python")
+        self.create_directory("src/unittest/python")
+        self.write_file("src/unittest/python/spam_tests.py", """
+import sys
+import unittest
+
+PRELOADED = "zygote_heavy_dependency" in sys.modules
+
+import zygote_heavy_dependency
+
+
+class Test(unittest.TestCase):
+    def test_should_start_with_preloaded_dependency(self):
+        self.assertTrue(PRELOADED)
+        self.assertEqual("heavy", zygote_heavy_dependency.VALUE)
+""")
+        sys.path.insert(0, self.full_path("lib"))
+        try:
+            self.prepare_reactor().build()
+
+            self.assertTrue("zygote_heavy_dependency" in sys.modules)
+            self.assertTrue("zygote_heavy_dependency" in zygote._preload_times)
+        finally:
+            sys.path.remove(self.full_path("lib"))
+            sys.modules.pop("zygote_heavy_dependency", None)
+            zygote._preload_times.pop("zygote_heavy_dependency", None)
+
+
+if __name__ == "__main__":
+    unittest.main()
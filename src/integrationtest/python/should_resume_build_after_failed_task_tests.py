@@ -0,0 +1,78 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of PyBuilder
+#
+#   Copyright 2011-2015 PyBuilder Team
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+import os
+import unittest
+
+from integrationtest_support import IntegrationTestSupport
+from pybuilder.errors import BuildFailedException
+
+
+class Test(IntegrationTestSupport):
+    def test(self):
+        self.write_build_file("""
+import os
+
+from pybuilder.core import use_plugin, init, task, depends
+from pybuilder.errors import BuildFailedException
+
+use_plugin("core")
+
+default_task = "verify"
+
+@init
+def init(project):
+    project.set_property("build_checkpoint_enabled", True)
+
+def count_execution(project, name):
+    with open(os.path.join(project.basedir, name + ".log"), "a") as log_file:
+        log_file.write("x")
+
+@task
+def compile(project):
+    count_execution(project, "compile")
+
+@task
+@depends("compile")
+def verify(project):
+    count_execution(project, "verify")
+    if os.path.exists(os.path.join(project.basedir, "fail")):
+        raise BuildFailedException("verify failed")
+        """)
+        self.write_file("fail", "")
+
+        reactor = self.prepare_reactor()
+        self.assertRaises(BuildFailedException, reactor.build)
+
+        os.remove(self.full_path("fail"))
+        reactor = self.prepare_reactor()
+        reactor.build(resume=True)
+
+        self.assert_file_content("compile.log", "x")
+        self.assert_file_content("verify.log", "xx")
+
+        reactor = self.prepare_reactor()
+        reactor.build()
+
+        self.assert_file_content("compile.log", "xx")
+        self.assert_file_content("verify.log", "xxx")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of PyBuilder
+#
+#   Copyright 2011-2015 PyBuilder Team
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import json
+import unittest
+
+from integrationtest_support import IntegrationTestSupport
+
+TESTS = """
+import unittest
+
+from %(module)s import value
+
+
+class Test(unittest.TestCase):
+    def test_value(self):
+        self.assertEqual("%(module)s", value())
+"""
+
+MODULE = """
+def value():
+    return "%s"
+"""
+
+
+class Test(IntegrationTestSupport):
+    def test(self):
+        self.write_build_file("""
+from pybuilder.core import use_plugin, init
+
+use_plugin("python.core")
+use_plugin("python.unittest")
+
+name = "spam"
+default_task = "run_unit_tests"
+
+@init
+def init(project):
+    project.set_property("unittest_impact_analysis", True)
+        """)
+        self.create_directory("src/main/python")
+        self.create_directory("src/unittest/python")
+        for module in ("spam", "eggs"):
+            self.write_file("src/main/python/%s.py" % module, MODULE % module)
+            self.write_file("src/unittest/python/%s_tests.py" % module, TESTS % {"module": module})
+
+        reactor = self.prepare_reactor()
+        reactor.build()
+        reactor.unload_plugin_modules()
+        self.assertEqual(["eggs_tests.Test.test_value", "spam_tests.Test.test_value"], self.reported_tests())
+
+        self.write_file("src/main/python/eggs.py", MODULE % "eggs" + "\n# changed\n")
+        self.prepare_reactor().build()
+        self.assertEqual(["eggs_tests.Test.test_value"], self.reported_tests())
+
+    def reported_tests(self):
+        with open(self.full_path("target/reports/unittest.json")) as report_file:
+            report = json.load(report_file)
+        return sorted(test["test"] for test in report["tests"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of PyBuilder
+#
+#   Copyright 2011-2015 PyBuilder Team
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import json
+import unittest
+
+from integrationtest_support import IntegrationTestSupport
+
+TESTS = """
+import unittest
+
+
+class Test(unittest.TestCase):
+    def test_%s(self):
+        pass
+"""
+
+
+class Test(IntegrationTestSupport):
+    def test(self):
+        self.write_build_file("""
+from pybuilder.core import use_plugin, init
+
+use_plugin("python.core")
+use_plugin("python.unittest")
+
+name = "spam"
+default_task = "run_unit_tests"
+
+@init
+def init(project):
+    project.set_property("unittest_shard", "2/2")
+    project.set_property("unittest_shard_durations", ["timings/*.json"])
+        """)
+        self.create_directory("src/main/python")
+        self.create_directory("src/unittest/python")
+        for module in ("spam", "eggs", "ham"):
+            self.write_file("src/unittest/python/%s_tests.py" % module, TESTS % module)
+        self.create_directory("timings")
+        self.write_file("timings/unittest.json", json.dumps({"modules": [
+            {"module": "spam_tests", "tests": 1, "time": 100},
+            {"module": "eggs_tests", "tests": 1, "time": 60},
+            {"module": "ham_tests", "tests": 1, "time": 50}]}))
+
+        self.prepare_reactor().build()
+
+        with open(self.full_path("target/reports/unittest.json")) as report_file:
+            report = json.load(report_file)
+        self.assertEqual(2, report["tests-run"])
+        self.assertEqual(["eggs_tests", "ham_tests"], sorted(module["module"] for module in report["modules"]))
+        for test in report["tests"]:
+            self.assertTrue(test["time"] >= 0)
+            self.assertTrue(test["cpu_time"] >= 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of PyBuilder
+#
+#   Copyright 2011-2015 PyBuilder Team
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+import glob
+import json
+import unittest
+
+from integrationtest_support import IntegrationTestSupport
+
+TESTS = """
+import unittest
+
+from spam import %(function)s
+
+
+class %(class_name)sTest(unittest.TestCase):
+    def test_%(function)s(self):
+        self.assertEqual("%(function)s", %(function)s())
+
+    def test_%(function)s_again(self):
+        self.assertEqual("%(function)s", %(function)s())
+"""
+
+
+class Test(IntegrationTestSupport):
+    def test(self):
+        self.write_build_file("""
+from pybuilder.core import use_plugin, init
+
+use_plugin("python.core")
+use_plugin("python.unittest")
+use_plugin("python.coverage")
+
+name = "spam"
+default_task = "analyze"
+
+@init
+def init(project):
+    project.set_property("unittest_parallel", True)
+    project.set_property("unittest_parallel_workers", 2)
+    project.set_property("coverage_single_pass", True)
+    project.set_property("coverage_threshold_warn", 0)
+        """)
+        self.create_directory("src/main/python")
+        self.write_file("src/main/python/spam.py", """
+def spam():
+    return "spam"
+
+def eggs():
+    return "eggs"
+
+def ham():
+    return "ham"
+""")
+        self.create_directory("src/unittest/python")
+        self.write_file("src/unittest/python/spam_tests.py", TESTS % {"function": "spam", "class_name": "Spam"})
+        self.write_file("src/unittest/python/eggs_tests.py", TESTS % {"function": "eggs", "class_name": "Eggs"})
+        reactor = self.prepare_reactor()
+        reactor.build()
+
+        with open(self.full_path("target/reports/unittest.json")) as report_file:
+            report = json.load(report_file)
+        self.assertEqual(4, report["tests-run"])
+        self.assertEqual(["eggs_tests.EggsTest.test_eggs", "eggs_tests.EggsTest.test_eggs_again",
+                          "spam_tests.SpamTest.test_spam", "spam_tests.SpamTest.test_spam_again"],
+                         sorted(test["test"] for test in report["tests"]))
+        self.assertEqual(2, len(glob.glob(self.full_path("target/reports/TEST-*.xml"))))
+
+        with open(self.full_path("target/reports/coverage.json")) as report_file:
+            report = json.load(report_file)
+        self.assertEqual([9], report["module_names"][0]["lines_not_covered"])
+
+
+if __name__ == "__main__":
+    unittest.main()
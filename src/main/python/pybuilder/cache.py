@@ -0,0 +1,469 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of PyBuilder
+#
+#   Copyright 2011-2015 PyBuilder Team
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""
+    The PyBuilder cache module.
+    Contains the content-addressed build cache storing the outputs of tasks by the fingerprint of their inputs,
+    optionally backed by a remote cache server (see pybuilder.cache_server).
+
+    The remote protocol consists of two namespaces below the remote URL:
+    GET/PUT /ac/<key> transfers the JSON manifest of a cache entry, GET/HEAD/PUT /cas/<digest> transfers
+    file contents addressed by their SHA-1 digest.
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+
+try:
+    from urllib2 import HTTPError, URLError
+except ImportError:
+    from urllib.error import HTTPError, URLError
+
+from pybuilder.errors import BuildCacheException
+from pybuilder.utils import basestring, mkdir
+
+DEFAULT_MAX_SIZE = 1024 * 1024 * 1024
+DEFAULT_REMOTE_TIMEOUT = 10
+
+KEY_PATTERN = re.compile(r"^[0-9a-f]{40}$")
+
+_CACHE_LOCK = threading.Lock()
+_ESTIMATED_SIZES = {}
+_UNAVAILABLE_REMOTE_URLS = set()
+
+
+def default_cache_directory():
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "pybuilder")
+
+
+def is_enabled(value):
+    if isinstance(value, basestring):
+        return value.strip().lower() in ("true", "yes", "on", "1")
+    return bool(value)
+
+
+def build_cache_for(project):
+    """
+    Returns the build cache configured for the given project or None if the build cache is disabled.
+    """
+    if not is_enabled(project.get_property("build_cache_enabled", False)):
+        return None
+
+    directory = project.get_property("build_cache_dir") or default_cache_directory()
+    max_size = int(project.get_property("build_cache_max_size") or DEFAULT_MAX_SIZE)
+    local_cache = LocalBuildCache(os.path.expanduser(directory), max_size)
+
+    remote_url = project.get_property("build_cache_remote_url")
+    if not remote_url:
+        return local_cache
+
+    remote_cache = RemoteBuildCache(remote_url,
+                                    is_enabled(project.get_property("build_cache_remote_read_only", False)),
+                                    float(project.get_property("build_cache_remote_timeout") or DEFAULT_REMOTE_TIMEOUT))
+    return TieredBuildCache(local_cache, remote_cache)
+
+
+def validate_manifest(manifest):
+    """
+    Raises a BuildCacheException unless every file of the given manifest has a digest, a name relative to and
+    below the directory it is restored to and plain permissions, as manifests are read from a cache directory
+    or server other processes and users may write to.
+    """
+    try:
+        files = manifest["files"]
+        entries = list(files.items())
+    except (TypeError, KeyError, AttributeError):
+        raise BuildCacheException("Build cache manifest lists no files")
+
+    for relative_name, entry in entries:
+        try:
+            digest, mode = entry
+        except (TypeError, ValueError):
+            raise BuildCacheException("Build cache manifest has an invalid entry for %r", relative_name)
+        if not isinstance(digest, basestring) or not KEY_PATTERN.match(digest):
+            raise BuildCacheException("Build cache manifest has an invalid digest for %r", relative_name)
+        if isinstance(mode, bool) or not isinstance(mode, int) or mode < 0 or mode & ~0o777:
+            raise BuildCacheException("Build cache manifest has an invalid mode for %r", relative_name)
+        if not _is_contained(relative_name):
+            raise BuildCacheException("Build cache manifest contains the file %r outside of the directory",
+                                      relative_name)
+
+
+def _is_contained(relative_name):
+    if not isinstance(relative_name, basestring) or not relative_name or "\0" in relative_name:
+        return False
+    if relative_name.startswith(("/", "\\")) or os.path.isabs(relative_name) or os.path.splitdrive(relative_name)[0]:
+        return False
+    normalized_name = os.path.normpath(relative_name.replace("/", os.sep))
+    return normalized_name != os.curdir and normalized_name != os.pardir and \
+        not normalized_name.startswith(os.pardir + os.sep)
+
+
+def _file_digest(file_name):
+    digest = hashlib.sha1()
+    with open(file_name, "rb") as file_handle:
+        for chunk in iter(lambda: file_handle.read(65536), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class LocalBuildCache(object):
+    """
+        A content-addressed store in a local directory.
+        Entries map a key to a manifest of files (relative path, content digest and mode) plus arbitrary metadata.
+        File contents are stored once per digest in objects/. Whenever the size of all objects exceeds max_size
+        the least recently used entries and all objects no longer referenced are removed. The size is measured
+        once per process and estimated from the objects stored since, so that storing an entry does not walk
+        the whole store.
+    """
+
+    def __init__(self, directory, max_size=DEFAULT_MAX_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+        self.entries_directory = os.path.join(directory, "entries")
+        self.objects_directory = os.path.join(directory, "objects")
+
+    def _entry_file(self, key):
+        return os.path.join(self.entries_directory, key + ".json")
+
+    def _object_file(self, digest):
+        return os.path.join(self.objects_directory, digest[:2], digest[2:])
+
+    def _write_atomically(self, target_file, write):
+        mkdir(os.path.dirname(target_file))
+        handle, temporary_file = tempfile.mkstemp(dir=os.path.dirname(target_file), prefix=".tmp")
+        try:
+            with os.fdopen(handle, "wb") as temporary:
+                write(temporary)
+            os.rename(temporary_file, target_file)
+        except Exception:
+            if os.path.exists(temporary_file):
+                os.remove(temporary_file)
+            raise
+
+    def get(self, key):
+        """
+        Returns the manifest stored under the given key or None. A manifest whose objects were evicted is a miss.
+        Raises a BuildCacheException if the manifest stored is invalid.
+        """
+        entry_file = self._entry_file(key)
+        try:
+            with open(entry_file, "r") as entry:
+                manifest = json.load(entry)
+        except (IOError, OSError, ValueError):
+            return None
+
+        validate_manifest(manifest)
+        for digest, _ in manifest["files"].values():
+            if not self.has_object(digest):
+                return None
+
+        try:
+            os.utime(entry_file, None)
+        except OSError:
+            pass
+        return manifest
+
+    def restore(self, manifest, directory):
+        """
+        Writes all files of the given manifest below the given directory.
+        """
+        validate_manifest(manifest)
+        directory = os.path.abspath(directory)
+        for relative_name, (digest, mode) in manifest["files"].items():
+            target_file = os.path.normpath(os.path.join(directory, relative_name.replace("/", os.sep)))
+            if not target_file.startswith(os.path.join(directory, "")):
+                raise BuildCacheException("Unable to restore %s since it is outside of %s", relative_name, directory)
+            if os.path.isdir(target_file):
+                shutil.rmtree(target_file)
+            mkdir(os.path.dirname(target_file))
+            shutil.copyfile(self._object_file(digest), target_file)
+            os.chmod(target_file, mode)
+
+    def has_object(self, digest):
+        return os.path.exists(self._object_file(digest))
+
+    def open_object(self, digest):
+        return open(self._object_file(digest), "rb")
+
+    def store_object(self, digest, source):
+        """
+        Stores the contents read from the given file-like object, which must match the given digest.
+        """
+
+        sizes = []
+
+        def write(target):
+            actual_digest = hashlib.sha1()
+            for chunk in iter(lambda: source.read(65536), b""):
+                actual_digest.update(chunk)
+                target.write(chunk)
+                sizes.append(len(chunk))
+            if actual_digest.hexdigest() != digest:
+                raise BuildCacheException("Contents do not match digest %s", digest)
+
+        self._write_atomically(self._object_file(digest), write)
+        with _CACHE_LOCK:
+            if self.objects_directory in _ESTIMATED_SIZES:
+                _ESTIMATED_SIZES[self.objects_directory] += sum(sizes)
+
+    def store_entry(self, key, manifest):
+        content = json.dumps(manifest, sort_keys=True).encode("utf-8")
+        self._write_atomically(self._entry_file(key), lambda target: target.write(content))
+
+    def put(self, key, directory, file_names, metadata=None):
+        """
+        Stores the given files, which must lie below the given directory, under the given key.
+        Returns the manifest stored.
+        """
+        files = {}
+        for file_name in file_names:
+            relative_name = os.path.relpath(file_name, directory)
+            if relative_name.startswith(os.pardir):
+                raise BuildCacheException("Unable to cache %s since it is outside of %s", file_name, directory)
+            digest = _file_digest(file_name)
+            if not self.has_object(digest):
+                with open(file_name, "rb") as source:
+                    self.store_object(digest, source)
+            files[relative_name.replace(os.sep, "/")] = [digest, os.stat(file_name).st_mode & 0o777]
+
+        manifest = {"files": files, "metadata": metadata or {}}
+        self.store_entry(key, manifest)
+        self.evict_if_full()
+        return manifest
+
+    def _entries_by_last_use(self):
+        if not os.path.isdir(self.entries_directory):
+            return []
+        entries = []
+        for entry_name in os.listdir(self.entries_directory):
+            if entry_name.endswith(".json"):
+                entry_file = os.path.join(self.entries_directory, entry_name)
+                try:
+                    entries.append((os.stat(entry_file).st_mtime, entry_file))
+                except OSError:
+                    pass
+        return [entry_file for _, entry_file in sorted(entries)]
+
+    def _objects(self):
+        objects = {}
+        if os.path.isdir(self.objects_directory):
+            for root, _, files in os.walk(self.objects_directory):
+                for file_name in files:
+                    if not file_name.startswith(".tmp"):
+                        object_file = os.path.join(root, file_name)
+                        objects[os.path.basename(root) + file_name] = (object_file, os.path.getsize(object_file))
+        return objects
+
+    def size(self):
+        return sum(size for _, size in self._objects().values())
+
+    def evict_if_full(self):
+        """
+        Evicts entries if the estimated size of all objects exceeds max_size.
+        """
+        with _CACHE_LOCK:
+            if self.objects_directory not in _ESTIMATED_SIZES:
+                _ESTIMATED_SIZES[self.objects_directory] = self.size()
+            estimated_size = _ESTIMATED_SIZES[self.objects_directory]
+        if estimated_size > self.max_size:
+            self.evict()
+
+    def evict(self):
+        """
+        Removes the least recently used entries until the size of all referenced objects is within max_size.
+        """
+        with _CACHE_LOCK:
+            objects = self._objects()
+            total_size = sum(size for _, size in objects.values())
+            _ESTIMATED_SIZES[self.objects_directory] = total_size
+            if total_size <= self.max_size:
+                return
+
+            entries = []
+            for entry_file in self._entries_by_last_use():
+                try:
+                    with open(entry_file, "r") as entry:
+                        manifest = json.load(entry)
+                    validate_manifest(manifest)
+                    digests = set(digest for digest, _ in manifest["files"].values())
+                except (IOError, OSError, ValueError, BuildCacheException):
+                    digests = set()
+                entries.append((entry_file, digests))
+
+            references = {}
+            for _, digests in entries:
+                for digest in digests:
+                    references[digest] = references.get(digest, 0) + 1
+            referenced_size = sum(objects[digest][1] for digest in references if digest in objects)
+
+            while entries and referenced_size > self.max_size:
+                entry_file, digests = entries.pop(0)
+                os.remove(entry_file)
+                for digest in digests:
+                    references[digest] -= 1
+                    if not references[digest]:
+                        del references[digest]
+                        if digest in objects:
+                            referenced_size -= objects[digest][1]
+
+            for digest, (object_file, _) in objects.items():
+                if digest not in references:
+                    os.remove(object_file)
+            _ESTIMATED_SIZES[self.objects_directory] = referenced_size
+
+
+class RemoteBuildCache(object):
+    """
+        A client of a remote cache server. In read-only mode nothing is ever uploaded.
+    """
+
+    def __init__(self, url, read_only=False, timeout=DEFAULT_REMOTE_TIMEOUT):
+        self.url = url.rstrip("/")
+        self.read_only = read_only
+        self.timeout = timeout
+
+    @property
+    def available(self):
+        return self.url not in _UNAVAILABLE_REMOTE_URLS
+
+    def _request(self, method, path, data=None, content_type="application/octet-stream"):
+        # The HTTP client is imported on first use, it is not needed by builds without a remote cache
+        try:
+            from urllib2 import Request, urlopen
+        except ImportError:
+            from urllib.request import Request, urlopen
+
+        request = Request(self.url + path, data=data)
+        request.get_method = lambda: method
+        if data is not None:
+            request.add_header("Content-Type", content_type)
+        try:
+            return urlopen(request, timeout=self.timeout)
+        except HTTPError:
+            raise
+        except (URLError, IOError, OSError) as e:
+            # Do not wait for an unreachable server over and over again during the build
+            _UNAVAILABLE_REMOTE_URLS.add(self.url)
+            raise BuildCacheException("Remote build cache %s is unavailable: %s", self.url, e)
+
+    def _get(self, method, path):
+        try:
+            return self._request(method, path)
+        except HTTPError as e:
+            if e.code == 404:
+                return None
+            raise BuildCacheException("Remote build cache responded to %s %s with %d", method, path, e.code)
+
+    def _put(self, path, data, content_type="application/octet-stream"):
+        try:
+            self._request("PUT", path, data, content_type).close()
+        except HTTPError as e:
+            raise BuildCacheException("Remote build cache responded to PUT %s with %d", path, e.code)
+
+    def get(self, key):
+        response = self._get("GET", "/ac/%s" % key)
+        if response is None:
+            return None
+        try:
+            manifest = json.loads(response.read().decode("utf-8"))
+        except ValueError:
+            raise BuildCacheException("Remote build cache returned an invalid manifest for %s", key)
+        finally:
+            response.close()
+        validate_manifest(manifest)
+        return manifest
+
+    def has_object(self, digest):
+        response = self._get("HEAD", "/cas/%s" % digest)
+        if response is None:
+            return False
+        response.close()
+        return True
+
+    def open_object(self, digest):
+        response = self._get("GET", "/cas/%s" % digest)
+        if response is None:
+            raise BuildCacheException("Remote build cache does not contain %s", digest)
+        return response
+
+    def put(self, key, manifest, object_store):
+        """
+        Uploads the given manifest and all contents it references that the server does not have yet,
+        reading them from the given object store.
+        """
+        if self.read_only:
+            return
+        validate_manifest(manifest)
+        for digest, _ in manifest["files"].values():
+            if not self.has_object(digest):
+                with object_store.open_object(digest) as source:
+                    self._put("/cas/%s" % digest, source.read())
+        self._put("/ac/%s" % key, json.dumps(manifest, sort_keys=True).encode("utf-8"), "application/json")
+
+
+class TieredBuildCache(object):
+    """
+        Combines a local build cache with a remote one. Entries missing locally are fetched from the remote cache
+        into the local one before being restored, entries stored locally are uploaded to the remote cache.
+    """
+
+    def __init__(self, local_cache, remote_cache):
+        self.local_cache = local_cache
+        self.remote_cache = remote_cache
+
+    def get(self, key):
+        try:
+            manifest = self.local_cache.get(key)
+        except BuildCacheException:
+            # The local entry is replaced by the remote one, if there is any
+            manifest = None
+        if manifest is not None:
+            return manifest
+
+        if not self.remote_cache.available:
+            return None
+        manifest = self.remote_cache.get(key)
+        if manifest is None:
+            return None
+
+        for digest, _ in manifest["files"].values():
+            if not self.local_cache.has_object(digest):
+                source = self.remote_cache.open_object(digest)
+                try:
+                    self.local_cache.store_object(digest, source)
+                finally:
+                    source.close()
+        self.local_cache.store_entry(key, manifest)
+        self.local_cache.evict_if_full()
+        return manifest
+
+    def restore(self, manifest, directory):
+        self.local_cache.restore(manifest, directory)
+
+    def put(self, key, directory, file_names, metadata=None):
+        manifest = self.local_cache.put(key, directory, file_names, metadata)
+        if self.remote_cache.available:
+            self.remote_cache.put(key, manifest, self.local_cache)
+        return manifest
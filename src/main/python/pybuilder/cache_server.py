@@ -0,0 +1,171 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of PyBuilder
+#
+#   Copyright 2011-2015 PyBuilder Team
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""
+    The PyBuilder cache_server module.
+    Contains a reference implementation of a remote build cache server, storing entries in a local build cache
+    directory. Run it with
+
+        python -m pybuilder.cache_server --port 8080 --directory /var/cache/pybuilder
+
+    and point builds at it with the build_cache_remote_url property.
+"""
+
+import json
+import optparse
+import os
+import sys
+from io import BytesIO
+
+try:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+except ImportError:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+
+from pybuilder import __version__
+from pybuilder.cache import DEFAULT_MAX_SIZE, KEY_PATTERN, LocalBuildCache, default_cache_directory, validate_manifest
+from pybuilder.errors import BuildCacheException
+
+
+class BuildCacheRequestHandler(BaseHTTPRequestHandler):
+    server_version = "PyBuilderCache/" + __version__
+
+    def _parse_path(self):
+        parts = self.path.strip("/").split("/")
+        if len(parts) != 2 or parts[0] not in ("ac", "cas") or not KEY_PATTERN.match(parts[1]):
+            self.send_error(404)
+            return None, None
+        return parts
+
+    def _send(self, code, content=None, content_type="application/octet-stream", length=None):
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(length if length is not None else len(content or b"")))
+        self.end_headers()
+        if content and self.command != "HEAD":
+            self.wfile.write(content)
+
+    def _send_object(self, digest):
+        storage = self.server.storage
+        if not storage.has_object(digest):
+            self.send_error(404)
+            return
+        with storage.open_object(digest) as source:
+            length = os.fstat(source.fileno()).st_size
+            self._send(200, length=length)
+            if self.command != "HEAD":
+                for chunk in iter(lambda: source.read(65536), b""):
+                    self.wfile.write(chunk)
+
+    def do_HEAD(self):
+        self.do_GET()
+
+    def do_GET(self):
+        namespace, key = self._parse_path()
+        if namespace == "cas":
+            self._send_object(key)
+        elif namespace == "ac":
+            try:
+                manifest = self.server.storage.get(key)
+            except BuildCacheException:
+                manifest = None
+            if manifest is None:
+                self.send_error(404)
+            else:
+                self._send(200, json.dumps(manifest, sort_keys=True).encode("utf-8"), "application/json")
+
+    def do_PUT(self):
+        namespace, key = self._parse_path()
+        if namespace is None:
+            return
+        if self.server.read_only:
+            self.send_error(403, "Build cache is read-only")
+            return
+
+        content = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        storage = self.server.storage
+        try:
+            if namespace == "cas":
+                if not storage.has_object(key):
+                    storage.store_object(key, BytesIO(content))
+            else:
+                manifest = json.loads(content.decode("utf-8"))
+                validate_manifest(manifest)
+                for digest, _ in manifest["files"].values():
+                    if not storage.has_object(digest):
+                        raise BuildCacheException("Missing contents %s", digest)
+                storage.store_entry(key, manifest)
+                storage.evict_if_full()
+        except (BuildCacheException, ValueError, KeyError, TypeError) as e:
+            self.send_error(400, str(e))
+            return
+        self._send(201)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            BaseHTTPRequestHandler.log_message(self, format, *args)
+
+
+class BuildCacheServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, storage, read_only=False, quiet=False):
+        HTTPServer.__init__(self, address, BuildCacheRequestHandler)
+        self.storage = storage
+        self.read_only = read_only
+        self.quiet = quiet
+
+
+def parse_options(args):
+    parser = optparse.OptionParser(usage="%prog [options]", version="%prog " + __version__)
+    parser.add_option("--host", dest="host", default="127.0.0.1", metavar="<host>",
+                      help="Address to listen on (default: %default)")
+    parser.add_option("-p", "--port", dest="port", type="int", default=8080, metavar="<port>",
+                      help="Port to listen on (default: %default)")
+    parser.add_option("-d", "--directory", dest="directory", default=os.path.join(default_cache_directory(), "server"),
+                      metavar="<directory>", help="Directory to store the cache in (default: %default)")
+    parser.add_option("--max-size", dest="max_size", type="int", default=DEFAULT_MAX_SIZE, metavar="<bytes>",
+                      help="Maximum size of the stored contents in bytes (default: %default)")
+    parser.add_option("--read-only", dest="read_only", action="store_true", default=False,
+                      help="Reject all uploads")
+    parser.add_option("-q", "--quiet", dest="quiet", action="store_true", default=False,
+                      help="Do not log requests")
+    options, _ = parser.parse_args(args=list(args))
+    return options
+
+
+def main(*args):
+    options = parse_options(args or sys.argv[1:])
+    server = BuildCacheServer((options.host, options.port),
+                              LocalBuildCache(options.directory, options.max_size),
+                              options.read_only, options.quiet)
+    sys.stderr.write("Serving build cache in %s on %s:%d%s\n" % (
+        options.directory, options.host, server.server_address[1], " (read-only)" if options.read_only else ""))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
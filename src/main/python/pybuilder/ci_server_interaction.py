@@ -55,6 +55,9 @@ class TestProxy(object):
     def fails(self, reason):
         pass
 
+    def cached(self):
+        pass
+
     def __enter__(self, *args, **kwargs):
         self.test_starts()
         return self
@@ -76,3 +79,6 @@ class TeamCityTestProxy(TestProxy):
                         self.test_name,
                         reason
                         ))
+
+    def cached(self):
+        flush_text_line("##teamcity[testMetadata testName='{0}' name='cached' value='true']".format(self.test_name))
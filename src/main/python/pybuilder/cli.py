@@ -24,22 +24,29 @@
 import datetime
 import optparse
 import sys
+import time
 import traceback
 
 import re
 
-from pybuilder import __version__
+from pybuilder import __version__, events, graph_utils, trace
+from pybuilder.composite import CompositeBuild
 from pybuilder.core import Logger
 from pybuilder.errors import PyBuilderException
 from pybuilder.execution import ExecutionManager
+from pybuilder.history import (TASK, TEST, expected_task_durations, history_for, history_properties,
+                               record_build)
 from pybuilder.reactor import Reactor
 from pybuilder.scaffolding import start_project, update_project
 from pybuilder.terminal import (BOLD, BROWN, RED, GREEN, bold, styled_text,
                                 fg, italic, print_text, print_text_line,
                                 print_error, print_error_line, draw_line)
-from pybuilder.utils import format_timestamp, get_dist_version_string
+from pybuilder.utils import Timer, as_list, format_timestamp, get_dist_version_string, odict
+from pybuilder.watch import create_watcher, wait_for_changes, watched_directories
 
 PROPERTY_OVERRIDE_PATTERN = re.compile(r'^[a-zA-Z0-9_]+=.*')
+HISTORY_REPORT_LIMIT = 10
+LOG_LEVEL_NAMES = {Logger.DEBUG: "debug", Logger.INFO: "info", Logger.WARN: "warn", Logger.ERROR: "error"}
 
 
 class CommandLineUsageException(PyBuilderException):
@@ -59,9 +66,13 @@ class StdOutLogger(Logger):
         return "[ERROR]"
 
     def _do_log(self, level, message, *arguments):
-        formatted_message = self._format_message(message, *arguments)
-        log_level = self._level_to_string(level)
-        print_text_line("{0} {1}".format(log_level, formatted_message))
+        event = events.create_event(events.LOG, level=LOG_LEVEL_NAMES.get(level, "error"),
+                                    message=self._format_message(message, *arguments))
+        events.emit_event(event)
+        print_text_line(self.render(level, event))
+
+    def render(self, level, event):
+        return "{0} {1}".format(self._level_to_string(level), event["message"])
 
 
 class ColoredStdOutLogger(StdOutLogger):
@@ -109,6 +120,30 @@ def parse_options(args):
                                               default=False,
                                               help="Update build descriptors and python project structure")
 
+    parser.add_option("--history",
+                      action="store_true",
+                      dest="history",
+                      default=False,
+                      help="Print the recent builds of the project and the tasks and tests slowing down the most")
+
+    parser.add_option("--daemon",
+                      action="store_true",
+                      dest="daemon",
+                      default=False,
+                      help="Run the build in a background daemon keeping the project and its plugins loaded")
+
+    parser.add_option("--stop-daemon",
+                      action="store_true",
+                      dest="stop_daemon",
+                      default=False,
+                      help="Stop the background daemon of the project")
+
+    parser.add_option("--import-profile",
+                      action="store_true",
+                      dest="import_profile",
+                      default=False,
+                      help="Run the build reporting the modules taking the longest to import (Python 3.7+)")
+
     parser.add_option("-v", "--verbose",
                       action="store_true",
                       dest="verbose",
@@ -149,6 +184,27 @@ def parse_options(args):
                              default=False,
                              help="Exclude all optional task dependencies")
 
+    project_group.add_option("-j", "--jobs",
+                             action="store",
+                             type="int",
+                             dest="jobs",
+                             default=1,
+                             metavar="<jobs>",
+                             help="Execute independent tasks in parallel using up to <jobs> workers")
+
+    project_group.add_option("-w", "--watch",
+                             action="store_true",
+                             dest="watch",
+                             default=False,
+                             help="Watch the source directories and execute the tasks again whenever files change")
+
+    project_group.add_option("--resume",
+                             action="store_true",
+                             dest="resume",
+                             default=False,
+                             help="Skip the tasks completed by the previous build if the project is unchanged. "
+                                  "Builds record their completed tasks when resumed or with build_checkpoint_enabled")
+
     project_group.add_option("--force-exclude",
                              action="append",
                              dest="exclude_tasks",
@@ -182,6 +238,42 @@ def parse_options(args):
                             dest="no_color",
                             default=False,
                             help="Disable colored output")
+    output_group.add_option("--trace",
+                            action="store",
+                            dest="trace_file",
+                            default=None,
+                            metavar="<file>",
+                            help="Write a timeline of the build to <file>")
+    output_group.add_option("--trace-format",
+                            action="store",
+                            type="choice",
+                            choices=list(trace.FORMATS),
+                            dest="trace_format",
+                            default=trace.CHROME_FORMAT,
+                            metavar="<format>",
+                            help="Format of the timeline: chrome (trace event format, e.g. for Perfetto) "
+                                 "or otlp (OpenTelemetry JSON), default: chrome")
+    output_group.add_option("--events",
+                            action="store",
+                            dest="events_file",
+                            default=None,
+                            metavar="<file>",
+                            help="Write the events of the build (tasks, actions, tests, commands and log messages) "
+                                 "as JSON lines to <file>")
+    output_group.add_option("--plan-graph",
+                            action="store",
+                            dest="plan_graph_file",
+                            default=None,
+                            metavar="<file>",
+                            help="Write the dependency graph of the execution plan to <file> instead of building")
+    output_group.add_option("--plan-graph-format",
+                            action="store",
+                            type="choice",
+                            choices=list(graph_utils.FORMATS),
+                            dest="plan_graph_format",
+                            default=graph_utils.DOT_FORMAT,
+                            metavar="<format>",
+                            help="Format of the plan graph: dot (Graphviz) or json, default: dot")
 
     parser.add_option_group(output_group)
 
@@ -192,6 +284,9 @@ def parse_options(args):
     if options.start_project and options.update_project:
         parser.error("%s and %s are mutually exclusive" % (start_project_option, update_project_option))
 
+    if options.jobs < 1:
+        parser.error("number of jobs must be at least 1, got %d" % options.jobs)
+
     property_overrides = {}
     for pair in options.property_overrides:
         if not PROPERTY_OVERRIDE_PATTERN.match(pair):
@@ -242,7 +337,12 @@ def print_build_summary(options, summary):
 
     task_summary = ""
     for task in summary.task_summaries:
-        task_summary += " %s [%d ms]" % (task.task, task.execution_time)
+        if task.up_to_date:
+            task_summary += " %s [up to date]" % task.task
+        elif task.from_cache:
+            task_summary += " %s [from build cache]" % task.task
+        else:
+            task_summary += " %s [%d ms]" % (task.task, task.execution_time)
 
     print_text_line("%20s:%s" % ("Tasks", task_summary))
 
@@ -275,15 +375,259 @@ def print_elapsed_time_summary(start, end):
                     (time_needed.seconds, millis))
 
 
+def save_task_graph_snapshot(snapshot, logger):
+    try:
+        snapshot.save()
+    except (IOError, OSError) as e:
+        logger.debug("Unable to save task graph snapshot: %s", e)
+
+
+def record_build_in_snapshot(snapshot, options, reactor):
+    snapshot.record_default_task(options.environments, reactor.project.default_task, options.property_overrides)
+    snapshot.record_properties(options.environments, history_properties(reactor.project), options.property_overrides)
+
+
+def update_task_graph_snapshot(options, reactor, project_modules, logger):
+    """
+    Saves the task graph snapshot after a build unless the snapshot saved before is still valid and knows
+    the default task of the build. Capturing the snapshot imports the plugins the build deferred.
+    """
+    snapshot = reactor.load_task_graph_snapshot(options.project_directory)
+    if snapshot and snapshot.has_default_task(options.environments, options.property_overrides):
+        return
+    if not snapshot:
+        try:
+            snapshot = reactor.capture_task_graph_snapshot(project_modules)
+        except Exception as e:
+            # e.g. a deferred plugin requiring a package that is not installed, which the build did not need
+            logger.debug("Unable to capture task graph snapshot: %s", e)
+            return
+    if snapshot:
+        record_build_in_snapshot(snapshot, options, reactor)
+        save_task_graph_snapshot(snapshot, logger)
+
+
+def write_trace(tracer, options, logger):
+    try:
+        tracer.write(options.trace_file, options.trace_format)
+        logger.info("Wrote build trace to %s", options.trace_file)
+    except (IOError, OSError) as e:
+        logger.error("Unable to write build trace to %s: %s", options.trace_file, e)
+
+
+def start_events(options, logger):
+    if not options.events_file:
+        return None
+    try:
+        return events.start_events(options.events_file)
+    except (IOError, OSError) as e:
+        logger.warn("Unable to write events to %s: %s", options.events_file, e)
+        return None
+
+
+def stop_events(logger):
+    event_stream = events.stop_events()
+    if event_stream.error:
+        logger.warn("Unable to write events: %s", event_stream.error)
+    elif event_stream.dropped:
+        logger.warn("Dropped %d events that could not be written in time", event_stream.dropped)
+
+
+def write_plan_graph(options, arguments, reactor, logger):
+    execution_plan = reactor.create_execution_plan(arguments, options.environments)
+    graph = reactor.execution_manager.get_plan_graph(execution_plan)
+    levels = graph.topological_levels()
+    try:
+        graph.write(options.plan_graph_file, options.plan_graph_format, reactor.project.name)
+    except (IOError, OSError) as e:
+        raise PyBuilderException("Unable to write plan graph to %s: %s", options.plan_graph_file, e)
+    logger.info("Wrote plan graph of %d tasks in %d levels with up to %d independent tasks per level to %s",
+                len(graph.nodes), len(levels), max([len(level) for level in levels] or [0]),
+                options.plan_graph_file)
+
+
+def prepare_composite_build(options, arguments, reactor, logger):
+    property_overrides = dict(options.property_overrides)
+    if options.verbose or options.debug:
+        property_overrides["verbose"] = True
+
+    composite_build = CompositeBuild(logger, reactor)
+    composite_build.prepare(tasks=arguments,
+                            property_overrides=property_overrides,
+                            exclude_optional_tasks=options.exclude_optional_tasks,
+                            exclude_tasks=options.exclude_tasks,
+                            exclude_all_optional=options.exclude_all_optional)
+    return composite_build
+
+
+def list_subproject_tasks(options, arguments, reactor, logger):
+    if options.plan_graph_file:
+        graph = CompositeBuild(logger, reactor).graph()
+        try:
+            graph.write(options.plan_graph_file, options.plan_graph_format, reactor.project.name)
+        except (IOError, OSError) as e:
+            raise PyBuilderException("Unable to write plan graph to %s: %s", options.plan_graph_file, e)
+        logger.info("Wrote graph of %d subprojects to %s", len(graph.nodes), options.plan_graph_file)
+
+    if options.list_tasks or options.list_plan_tasks:
+        composite_build = prepare_composite_build(options, arguments, reactor, logger)
+        for subproject in composite_build.subprojects.values():
+            if options.list_tasks:
+                print_list_of_tasks(subproject.reactor, quiet=options.very_quiet)
+            if options.list_plan_tasks:
+                print_plan_list_of_tasks(options, arguments, subproject.reactor, quiet=options.very_quiet)
+
+
 def print_summary(successful, summary, start, end, options, failure_message):
     print_build_status(failure_message, options, successful)
 
     if successful and summary:
-        print_build_summary(options, summary)
+        for project_summary in as_list(summary):
+            print_build_summary(options, project_summary)
 
     print_elapsed_time_summary(start, end)
 
 
+def record_build_history(reactor, composite_build, started, phase_times, successful, failure_message, options,
+                         arguments, logger):
+    if composite_build:
+        reactors = [subproject.reactor for subproject in composite_build.subprojects.values()]
+        phase_times = odict()
+    else:
+        reactors = [reactor]
+
+    for project_reactor in reactors:
+        if project_reactor.project:
+            record_build(project_reactor.project, project_reactor.execution_manager, started, phase_times,
+                         successful, failure_message, arguments, options.environments, logger)
+
+
+def print_duration_trends(title, trends):
+    trends = [trend for trend in trends if trend.growth > 0][:HISTORY_REPORT_LIMIT]
+    if not trends:
+        return
+
+    print_text_line(title)
+    column_length = length_of_longest_string([trend.name for trend in trends]) + 4
+    for trend in trends:
+        relative_growth = trend.relative_growth
+        print_text_line("{0} {1:>8} ms -> {2:>8} ms (+{3} ms{4})".format(
+            trend.name.rjust(column_length), int(trend.earlier_median), int(trend.recent_median), int(trend.growth),
+            ", +{0:.0%}".format(relative_growth) if relative_growth is not None else ""))
+
+
+def print_build_history(history, project_name):
+    builds = history.builds(HISTORY_REPORT_LIMIT, project_name)
+    if not builds:
+        print_text_line('No builds recorded for project "%s" in %s' % (project_name, history.file_name))
+        return
+
+    print_text_line('Recent builds of project "%s":' % project_name)
+    for build in builds:
+        print_text_line("{0:>8} {1} {2:<10} {3:>8} ms {4:<10} {5}".format(
+            "#%d" % build.id, format_timestamp(datetime.datetime.fromtimestamp(build.started)),
+            (build.revision or "")[:10], build.duration, "SUCCESSFUL" if build.successful else "FAILED",
+            " ".join(build.tasks)))
+
+    print_duration_trends("Tasks slowing down the most (median of the last %d builds against the %d before):" %
+                          (HISTORY_REPORT_LIMIT, HISTORY_REPORT_LIMIT),
+                          history.trends(TASK, HISTORY_REPORT_LIMIT, project_name))
+    print_duration_trends("Tests slowing down the most (median of the last %d builds against the %d before):" %
+                          (HISTORY_REPORT_LIMIT, HISTORY_REPORT_LIMIT),
+                          history.trends(TEST, HISTORY_REPORT_LIMIT, project_name))
+
+
+def print_build_histories(options, reactor, logger):
+    reactor.prepare_build(property_overrides=options.property_overrides,
+                          project_directory=options.project_directory)
+    if reactor.subprojects:
+        reactors = [subproject.reactor
+                    for subproject in prepare_composite_build(options, [], reactor, logger).subprojects.values()]
+    else:
+        reactors = [reactor]
+
+    for project_reactor in reactors:
+        project = project_reactor.project
+        project_reactor.execution_manager.execute_initializers(options.environments, logger=logger, project=project)
+        history = history_for(project)
+        if history:
+            print_build_history(history, project.name)
+        else:
+            logger.warn('Build history is disabled for project "%s"', project.name)
+
+
+def watch_build(options, arguments, logger):
+    """
+    Builds the project and executes the tasks again whenever the watched files change, until interrupted.
+    The project is loaded anew only when the build descriptor changes.
+    """
+    reactor = None
+    watcher = None
+    directories = []
+    tasks = list(arguments)
+    changed_files = set()
+    successful = True
+    try:
+        while True:
+            start = datetime.datetime.now()
+            failure_message = None
+            summary = None
+            try:
+                if reactor is None:
+                    reactor = init_reactor(logger)
+                    try:
+                        reactor.prepare_build(property_overrides=options.property_overrides,
+                                              project_directory=options.project_directory,
+                                              exclude_optional_tasks=options.exclude_optional_tasks,
+                                              exclude_tasks=options.exclude_tasks,
+                                              exclude_all_optional=options.exclude_all_optional
+                                              )
+                    except Exception:
+                        reactor = None
+                        raise
+                    if reactor.subprojects:
+                        raise PyBuilderException("Watching composite projects is not supported")
+                    if options.verbose or options.debug:
+                        reactor.project.set_property("verbose", True)
+                    tasks = list(arguments) or as_list(reactor.project.default_task)
+                    summary = reactor.build(environments=options.environments, tasks=list(tasks), jobs=options.jobs)
+                else:
+                    summary = reactor.build_affected_tasks(tasks, changed_files, jobs=options.jobs)
+                successful = True
+            except Exception as e:
+                failure_message = str(e)
+                if options.debug:
+                    traceback.print_exc(file=sys.stderr)
+                successful = False
+
+            if not options.very_quiet:
+                print_summary(successful, summary, start, datetime.datetime.now(), options, failure_message)
+
+            if reactor:
+                project_directories = watched_directories(reactor.project)
+                if watcher and project_directories != directories:
+                    watcher.close()
+                    watcher = None
+                directories = project_directories
+            if watcher is None:
+                project_descriptor = reactor.project_descriptor if reactor else Reactor.verify_project_directory(
+                    options.project_directory, "build.py")[1]
+                watcher = create_watcher(directories, [project_descriptor], logger)
+
+            logger.info("Watching %s for changes, press Ctrl-C to stop", ", ".join(directories + [project_descriptor]))
+            changed_files = wait_for_changes(watcher)
+            logger.debug("Changed files: %s", ", ".join(sorted(changed_files)))
+            if project_descriptor in changed_files:
+                if reactor:
+                    reactor.unload_plugin_modules()
+                reactor = None
+    except KeyboardInterrupt:
+        return 0 if successful else 1
+    finally:
+        if watcher:
+            watcher.close()
+
+
 def length_of_longest_string(list_of_strings):
     if len(list_of_strings) == 0:
         return 0
@@ -301,7 +645,13 @@ def task_description(task):
     return " ".join(task.description) or "<no description available>"
 
 
-def print_task_list(tasks, quiet=False):
+def format_expected_duration(task, durations):
+    if task.name not in durations:
+        return "[no history]"
+    return "[~%d ms]" % durations[task.name]
+
+
+def print_task_list(tasks, quiet=False, durations=None, critical_tasks=(), options=None):
     if quiet:
         print_text_line("\n".join([task.name + ":" + task_description(task)
                                    for task in tasks]))
@@ -313,7 +663,13 @@ def print_task_list(tasks, quiet=False):
 
     for task in tasks:
         task_name = task.name.rjust(column_length)
-        print_text_line("{0} - {1}".format(task_name, task_description(task)))
+        if durations is None:
+            print_text_line("{0} - {1}".format(task_name, task_description(task)))
+        else:
+            marker = "*" if task.name in critical_tasks else " "
+            print_styled_text_line("{0} {1} {2:>12} - {3}".format(
+                task_name, marker, format_expected_duration(task, durations), task_description(task)),
+                options, *((BOLD,) if task.name in critical_tasks else ()))
 
         if task.dependencies:
             whitespace = (column_length + 3) * " "
@@ -332,9 +688,25 @@ def print_list_of_tasks(reactor, quiet=False):
 
 def print_plan_list_of_tasks(options, arguments, reactor, quiet=False):
     execution_plan = reactor.create_execution_plan(arguments, options.environments)
-    if not quiet:
-        print_text_line('Tasks that will be executed for project "%s":' % reactor.project.name)
-    print_task_list(execution_plan, quiet)
+    if quiet:
+        print_task_list(execution_plan, quiet)
+        return
+
+    print_text_line('Tasks that will be executed for project "%s":' % reactor.project.name)
+    durations = expected_task_durations(reactor.project)
+    if not durations:
+        print_task_list(execution_plan, quiet)
+        return
+
+    graph = reactor.execution_manager.get_plan_graph(execution_plan)
+    critical_path, critical_duration = graph.critical_path(durations)
+    print_task_list(execution_plan, quiet, durations, set(critical_path), options)
+    print_text_line("Expected duration: %d ms executing one task after the other" %
+                    sum(durations.get(task.name, 0) for task in execution_plan))
+    print_text_line("Critical path (*): %d ms through %s" % (critical_duration, " -> ".join(critical_path)))
+    for jobs in sorted(set([1, 2, 4, 8, options.jobs])):
+        print_text_line("Minimum wall-clock time using %d job(s): %d ms" %
+                        (jobs, graph.minimum_duration(durations, jobs)))
 
 
 def main(*args):
@@ -347,6 +719,14 @@ def main(*args):
         print_error(e.usage)
         return 1
 
+    if options.daemon or options.stop_daemon:
+        from pybuilder import daemon
+        return daemon.main(*args)
+
+    if options.import_profile:
+        from pybuilder import importprofile
+        return importprofile.main(*args)
+
     start = datetime.datetime.now()
 
     logger = init_logger(options)
@@ -358,19 +738,56 @@ def main(*args):
     if options.update_project:
         return update_project()
 
-    if options.list_tasks or options.list_plan_tasks:
+    if options.history:
+        try:
+            print_build_histories(options, reactor, logger)
+            return 0
+        except PyBuilderException as e:
+            print_build_status(str(e), options, successful=False)
+            return 1
+
+    if options.list_tasks or options.list_plan_tasks or options.plan_graph_file:
         try:
-            reactor.prepare_build(property_overrides=options.property_overrides,
-                                  project_directory=options.project_directory,
-                                  exclude_optional_tasks=options.exclude_optional_tasks,
-                                  exclude_tasks=options.exclude_tasks,
-                                  exclude_all_optional=options.exclude_all_optional
-                                  )
+            snapshot = reactor.load_task_graph_snapshot(options.project_directory)
+            if snapshot and (options.list_tasks or arguments or
+                             snapshot.has_default_task(options.environments, options.property_overrides)):
+                reactor.prepare_build_from_snapshot(snapshot,
+                                                    project_directory=options.project_directory,
+                                                    environments=options.environments,
+                                                    property_overrides=options.property_overrides,
+                                                    exclude_optional_tasks=options.exclude_optional_tasks,
+                                                    exclude_tasks=options.exclude_tasks,
+                                                    exclude_all_optional=options.exclude_all_optional
+                                                    )
+                snapshot = None
+            else:
+                loaded_modules = set(sys.modules)
+                reactor.prepare_build(property_overrides=options.property_overrides,
+                                      project_directory=options.project_directory,
+                                      exclude_optional_tasks=options.exclude_optional_tasks,
+                                      exclude_tasks=options.exclude_tasks,
+                                      exclude_all_optional=options.exclude_all_optional
+                                      )
+                if reactor.subprojects:
+                    list_subproject_tasks(options, arguments, reactor, logger)
+                    return 0
+                reactor.load_deferred_plugins()
+                snapshot = reactor.capture_task_graph_snapshot(set(sys.modules) - loaded_modules)
+
             if options.list_tasks:
                 print_list_of_tasks(reactor, quiet=options.very_quiet)
 
             if options.list_plan_tasks:
                 print_plan_list_of_tasks(options, arguments, reactor, quiet=options.very_quiet)
+
+            if options.plan_graph_file:
+                write_plan_graph(options, arguments, reactor, logger)
+
+            if snapshot and (options.list_plan_tasks or options.plan_graph_file):
+                record_build_in_snapshot(snapshot, options, reactor)
+
+            if snapshot:
+                save_task_graph_snapshot(snapshot, logger)
             return 0
         except PyBuilderException as e:
             print_build_status(str(e), options, successful=False)
@@ -382,25 +799,59 @@ def main(*args):
         print_text_line("Build started at %s" % format_timestamp(start))
         draw_line()
 
+    if options.watch:
+        try:
+            return watch_build(options, arguments, logger)
+        except PyBuilderException as e:
+            print_build_status(str(e), options, successful=False)
+            return 1
+
     successful = True
     failure_message = None
     summary = None
+    composite_build = None
+    started = time.time()
+    phase_times = odict()
+    tracer = trace.start_tracing() if options.trace_file else None
+    event_stream = start_events(options, logger)
+    events.emit(events.BUILD_STARTED, tasks=arguments, environments=options.environments)
 
     try:
         try:
-            reactor.prepare_build(property_overrides=options.property_overrides,
-                                  project_directory=options.project_directory,
-                                  exclude_optional_tasks=options.exclude_optional_tasks,
-                                  exclude_tasks=options.exclude_tasks,
-                                  exclude_all_optional=options.exclude_all_optional
-                                  )
-
-            if options.verbose or options.debug:
-                logger.debug("Verbose output enabled.\n")
-                reactor.project.set_property("verbose", True)
-
-            summary = reactor.build(
-                environments=options.environments, tasks=arguments)
+            with trace.span("build", "build", tasks=" ".join(arguments)):
+                loaded_modules = set(sys.modules)
+                phase_timer = Timer.start()
+                reactor.prepare_build(property_overrides=options.property_overrides,
+                                      project_directory=options.project_directory,
+                                      exclude_optional_tasks=options.exclude_optional_tasks,
+                                      exclude_tasks=options.exclude_tasks,
+                                      exclude_all_optional=options.exclude_all_optional
+                                      )
+                project_modules = set(sys.modules) - loaded_modules
+
+                if options.verbose or options.debug:
+                    logger.debug("Verbose output enabled.\n")
+                    reactor.project.set_property("verbose", True)
+
+                if reactor.subprojects:
+                    composite_build = prepare_composite_build(options, arguments, reactor, logger)
+                phase_timer.stop()
+                phase_times["load"] = phase_timer.get_millis()
+
+                phase_timer = Timer.start()
+                try:
+                    if composite_build:
+                        summary = composite_build.build(environments=options.environments, tasks=arguments,
+                                                        jobs=options.jobs, resume=options.resume)
+                    else:
+                        summary = reactor.build(environments=options.environments, tasks=arguments,
+                                                jobs=options.jobs, resume=options.resume)
+                finally:
+                    phase_timer.stop()
+                    phase_times["build"] = phase_timer.get_millis()
+
+            if not composite_build:
+                update_task_graph_snapshot(options, reactor, project_modules, logger)
 
         except KeyboardInterrupt:
             raise PyBuilderException("Build aborted")
@@ -413,6 +864,14 @@ def main(*args):
 
     finally:
         end = datetime.datetime.now()
+        if tracer:
+            write_trace(trace.stop_tracing(), options, logger)
+        if event_stream:
+            events.emit(events.BUILD_FINISHED, successful=successful, failure=failure_message,
+                        duration=int((time.time() - started) * 1000))
+            stop_events(logger)
+        record_build_history(reactor, composite_build, started, phase_times, successful, failure_message,
+                             options, arguments, logger)
         if not options.very_quiet:
             print_summary(
                 successful, summary, start, end, options, failure_message)
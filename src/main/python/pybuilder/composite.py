@@ -0,0 +1,144 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of PyBuilder
+#
+#   Copyright 2011-2015 PyBuilder Team
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""
+    The PyBuilder composite module.
+    Builds the subprojects of a composite project in one process. Every subproject is loaded by a
+    reactor of its own, so projects and execution managers stay isolated, while plugin modules are
+    loaded once for all of them. Subprojects are built after the subprojects they depend on,
+    independent subprojects concurrently.
+"""
+
+import os
+
+from pybuilder.core import Logger
+from pybuilder.errors import CompositeBuildException, PyBuilderException
+from pybuilder.execution import ExecutionManager, ParallelDependencyExecutor
+from pybuilder.graph_utils import Graph, GraphHasCycles
+from pybuilder.reactor import Reactor
+from pybuilder.utils import as_list, odict
+
+SUBPROJECT_DIST_DIRS_PROPERTY = "subproject_dist_dirs"
+
+
+class SubprojectLogger(Logger):
+    """
+        Prefixes the messages logged for a subproject with its directory, as subprojects built
+        concurrently share the output.
+    """
+
+    def __init__(self, logger, directory):
+        super(SubprojectLogger, self).__init__(logger.threshold)
+        self.logger = logger
+        self.directory = directory
+
+    def _do_log(self, level, message, *arguments):
+        self.logger.log(level, "[%s] %s", self.directory, self._format_message(message, *arguments))
+
+
+class Subproject(object):
+    def __init__(self, directory, depends_on, reactor):
+        self.directory = directory
+        self.depends_on = depends_on
+        self.reactor = reactor
+
+
+class CompositeBuild(object):
+    def __init__(self, logger, reactor):
+        self.logger = logger
+        self.reactor = reactor
+        self.subprojects = odict()
+
+    def dependencies(self):
+        return odict((directory, list(subproject.depends_on)) for directory, subproject in self.subprojects.items())
+
+    def graph(self):
+        return Graph(self.reactor.subprojects)
+
+    def build_order(self):
+        """
+        Returns the directories of the subprojects in declaration order, except that every
+        subproject comes after the subprojects it depends on.
+        """
+        subprojects = self.reactor.subprojects
+        for directory, depends_on in subprojects.items():
+            for dependency in depends_on:
+                if dependency not in subprojects:
+                    raise CompositeBuildException("Subproject %s depends on unknown subproject %s",
+                                                  directory, dependency)
+        try:
+            levels = self.graph().topological_levels()
+        except GraphHasCycles as e:
+            raise CompositeBuildException("Circular subproject dependency: %s", e)
+
+        build_order = []
+        for level in levels:
+            level = set(level)
+            build_order.extend(directory for directory in subprojects if directory in level)
+        return build_order
+
+    def prepare(self,
+                tasks=None,
+                property_overrides=None,
+                exclude_optional_tasks=None,
+                exclude_tasks=None,
+                exclude_all_optional=False):
+        """
+        Loads the subprojects one after the other, as loading executes build descriptors and plugin modules.
+        For the same reason the deferred plugins the tasks need are imported here, not when building.
+        """
+        for directory in self.build_order():
+            self.logger.debug("Loading subproject %s", directory)
+            logger = SubprojectLogger(self.logger, directory)
+            reactor = Reactor(logger, ExecutionManager(logger), loaded_plugins=self.reactor.loaded_plugins)
+            reactor.prepare_build(property_overrides=property_overrides,
+                                  project_directory=os.path.join(self.reactor.project.basedir, directory),
+                                  exclude_optional_tasks=exclude_optional_tasks,
+                                  exclude_tasks=exclude_tasks,
+                                  exclude_all_optional=exclude_all_optional)
+            reactor.load_deferred_plugins(as_list(tasks or reactor.project.default_task))
+            self.subprojects[directory] = Subproject(directory, self.reactor.subprojects[directory], reactor)
+
+    def build(self, tasks=None, environments=None, jobs=1, resume=False):
+        """
+        Builds the subprojects using up to `jobs` workers, every subproject executing its tasks one after the other.
+        When resuming, every subproject skips the tasks it completed in the previous build.
+        Returns the build summaries of the subprojects in order of completion.
+        """
+        if jobs > 1:
+            self.logger.info("Building independent subprojects in parallel using up to %d jobs", jobs)
+        tasks = as_list(tasks)
+        environments = as_list(environments)
+        return ParallelDependencyExecutor(self.subprojects, self.dependencies(), jobs,
+                                          lambda subproject: self.build_subproject(subproject, tasks, environments,
+                                                                                   resume),
+                                          "pyb-subproject").execute()
+
+    def build_subproject(self, subproject, tasks, environments, resume=False):
+        project = subproject.reactor.project
+        dist_dirs = odict()
+        for dependency in subproject.depends_on:
+            dependency_project = self.subprojects[dependency].reactor.project
+            if dependency_project.has_property("dir_dist"):
+                dist_dirs[dependency] = dependency_project.expand_path("$dir_dist")
+        project.set_property(SUBPROJECT_DIST_DIRS_PROPERTY, dist_dirs)
+
+        try:
+            return subproject.reactor.build(tasks=list(tasks), environments=list(environments), resume=resume)
+        except PyBuilderException as e:
+            raise CompositeBuildException("Subproject %s failed: %s", subproject.directory, e)
@@ -27,12 +27,12 @@ import itertools
 import os
 import string
 import sys
+import threading
 from datetime import datetime
 from os.path import sep as PATH_SEPARATOR
 
 from pybuilder.errors import MissingPropertyException
-from pybuilder.pip_common import Version, InvalidVersion, SpecifierSet, InvalidSpecifier
-from pybuilder.utils import as_list
+from pybuilder.utils import as_list, basestring
 
 INITIALIZER_ATTRIBUTE = "_python_builder_initializer"
 
@@ -51,6 +51,10 @@ DEPENDENTS_ATTRIBUTE = "_python_builder_dependents"
 
 DESCRIPTION_ATTRIBUTE = "_python_builder_description"
 
+INPUTS_ATTRIBUTE = "_python_builder_inputs"
+OUTPUTS_ATTRIBUTE = "_python_builder_outputs"
+INCREMENTAL_ATTRIBUTE = "_python_builder_incremental"
+
 
 def init(*possible_callable, **additional_arguments):
     """
@@ -92,43 +96,77 @@ def init(*possible_callable, **additional_arguments):
     return do_decoration
 
 
-def task(callable_or_string=None, description=None):
+def task(callable_or_string=None, description=None, inputs=None, outputs=None, incremental=None):
     """
     Decorator for functions that should be used as tasks. Tasks are the main
     building blocks of projects.
     You can use this decorator either plain (no argument) or with
     a string argument, which overrides the default name.
+
+    Tasks may declare their inputs and outputs. A task with declared outputs is skipped
+    when neither its inputs nor its outputs have changed since its last successful execution.
+    Inputs may be globs relative to $dir_source_main_python, input_properties(...) naming
+    project properties, or outputs_of(...) naming other tasks. Outputs are globs relative to $dir_target.
+    Globs starting with a property reference (e.g. "$dir_reports/*") are relative to the project base directory.
+    Tasks whose inputs cannot be declared completely, e.g. tests depending on installed packages, name
+    the property that has to be enabled for them to be skipped or restored from the build cache as incremental.
+
+    Examples:
+
+    @task(inputs=["**/*.py", input_properties("dir_dist")], outputs="$dir_dist")
+    def some_task(): pass
+
+    @task(inputs="**", outputs="$dir_reports/tests", incremental="tests_incremental")
+    def run_tests(): pass
     """
+
+    def set_task_attributes(callable, name=None):
+        setattr(callable, TASK_ATTRIBUTE, True)
+        setattr(callable, NAME_ATTRIBUTE, name or callable.__name__)
+        if description:
+            setattr(callable, DESCRIPTION_ATTRIBUTE, description)
+        if inputs is not None:
+            setattr(callable, INPUTS_ATTRIBUTE, as_list(inputs))
+        if outputs is not None:
+            setattr(callable, OUTPUTS_ATTRIBUTE, as_list(outputs))
+        if incremental is not None:
+            setattr(callable, INCREMENTAL_ATTRIBUTE, incremental)
+        return callable
+
     if isinstance(callable_or_string, str):
-        def set_name_and_task_attribute(callable):
-            setattr(callable, TASK_ATTRIBUTE, True)
-            setattr(callable, NAME_ATTRIBUTE, callable_or_string)
-            if description:
-                setattr(callable, DESCRIPTION_ATTRIBUTE, description)
-            return callable
-
-        return set_name_and_task_attribute
-    else:
-        if not description:
-            if callable_or_string is not None:
-                setattr(callable_or_string, TASK_ATTRIBUTE, True)
-                setattr(callable_or_string, NAME_ATTRIBUTE, callable_or_string.__name__)
-                return callable_or_string
-            else:
-                def set_task_and_description_attribute(callable):
-                    setattr(callable, TASK_ATTRIBUTE, True)
-                    setattr(callable, NAME_ATTRIBUTE, callable.__name__)
-                    return callable
+        def set_name_and_task_attributes(callable):
+            return set_task_attributes(callable, callable_or_string)
 
-                return set_task_and_description_attribute
-        else:
-            def set_task_and_description_attribute(callable):
-                setattr(callable, TASK_ATTRIBUTE, True)
-                setattr(callable, NAME_ATTRIBUTE, callable.__name__)
-                setattr(callable, DESCRIPTION_ATTRIBUTE, description)
-                return callable
+        return set_name_and_task_attributes
+
+    if callable_or_string is not None:
+        return set_task_attributes(callable_or_string)
+
+    return set_task_attributes
 
-            return set_task_and_description_attribute
+
+class input_properties(object):
+    """
+    Declares the values of the named project properties as inputs of a task.
+    """
+
+    def __init__(self, *names):
+        self._names = names
+
+    def __call__(self):
+        return self._names
+
+
+class outputs_of(object):
+    """
+    Declares the outputs of the named tasks as inputs of a task.
+    """
+
+    def __init__(self, *tasks):
+        self._tasks = tasks
+
+    def __call__(self):
+        return self._tasks
 
 
 class description(object):
@@ -214,6 +252,24 @@ def use_plugin(name, version=None, plugin_module_name=None):
         reactor.require_plugin(name, version, plugin_module_name)
 
 
+def use_subproject(directory, depends_on=None):
+    """
+    Adds the project in the given directory, relative to the project directory, to a composite build.
+    A build descriptor using subprojects is not built itself; all of its subprojects are built instead,
+    every one after the subprojects named in depends_on. The expanded $dir_dist of these is available
+    to the subproject as property subproject_dist_dirs, a dictionary keyed by their directories.
+
+    Examples:
+
+    use_subproject("libs/spam")
+    use_subproject("apps/eggs", depends_on="libs/spam")
+    """
+    from pybuilder.reactor import Reactor
+    reactor = Reactor.current_instance()
+    if reactor is not None:
+        reactor.require_subproject(directory, depends_on)
+
+
 class Author(object):
     def __init__(self, name, email=None, roles=None):
         self.name = name
@@ -232,6 +288,8 @@ class Dependency(object):
         self.name = name
 
         if version:
+            from pybuilder.pip_common import Version, InvalidVersion, SpecifierSet, InvalidSpecifier
+
             try:
                 version = ">=" + str(Version(version))
                 self.version_not_a_spec = True
@@ -296,6 +354,145 @@ class RequirementsFile(object):
         return 42 * hash(self.name)
 
 
+_IMMUTABLE_PROPERTY_TYPES = (basestring, int, float, bool, type(None))
+_MAX_COMPILED_TEMPLATES = 10000
+_compiled_templates = {}
+
+
+def _compile_template(format_string):
+    """
+    Splits a format string into the literal parts and the names of the properties in between, so that it can be
+    substituted like string.Template does without parsing it again. Returns None for strings with invalid
+    placeholders, which are left to string.Template to report.
+    """
+    compiled = _compiled_templates.get(format_string)
+    if compiled is None:
+        literals = []
+        names = []
+        literal = []
+        position = 0
+        for match in string.Template.pattern.finditer(format_string):
+            literal.append(format_string[position:match.start()])
+            position = match.end()
+            name = match.group("named") or match.group("braced")
+            if name is not None:
+                literals.append("".join(literal))
+                literal = []
+                names.append(name)
+            elif match.group("escaped") is not None:
+                literal.append(string.Template.delimiter)
+            else:
+                return None
+        literal.append(format_string[position:])
+        literals.append("".join(literal))
+        compiled = (tuple(literals), tuple(names))
+
+        if len(_compiled_templates) >= _MAX_COMPILED_TEMPLATES:
+            _compiled_templates.clear()
+        _compiled_templates[format_string] = compiled
+    return compiled
+
+
+class Properties(dict):
+    """
+    The properties of a project. Expanded format strings are cached together with the names of the
+    properties they were expanded from; changing a property only invalidates the expansions using it.
+    Expansions using properties that may change in place, e.g. lists, are not cached.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(Properties, self).__init__(*args, **kwargs)
+        self._lock = threading.RLock()
+        self._version = 0
+        self._expansions = {}
+        self._dependents = {}
+
+    def __reduce__(self):
+        return self.__class__, (dict(self),)
+
+    def _invalidate(self, name):
+        with self._lock:
+            self._version += 1
+            for format_string in self._dependents.pop(name, ()):
+                self._expansions.pop(format_string, None)
+
+    def _invalidate_all(self):
+        with self._lock:
+            self._version += 1
+            self._expansions.clear()
+            self._dependents.clear()
+
+    def __setitem__(self, name, value):
+        super(Properties, self).__setitem__(name, value)
+        self._invalidate(name)
+
+    def __delitem__(self, name):
+        super(Properties, self).__delitem__(name)
+        self._invalidate(name)
+
+    def pop(self, name, *default):
+        result = super(Properties, self).pop(name, *default)
+        self._invalidate(name)
+        return result
+
+    def popitem(self):
+        name, value = super(Properties, self).popitem()
+        self._invalidate(name)
+        return name, value
+
+    def setdefault(self, name, default=None):
+        if name not in self:
+            self[name] = default
+        return self[name]
+
+    def update(self, *args, **kwargs):
+        super(Properties, self).update(*args, **kwargs)
+        self._invalidate_all()
+
+    def clear(self):
+        super(Properties, self).clear()
+        self._invalidate_all()
+
+    def expand(self, format_string):
+        """
+        Substitutes the properties in the format string, again and again until the result does not change.
+        """
+        with self._lock:
+            if format_string in self._expansions:
+                return self._expansions[format_string]
+            version = self._version
+
+        names = set()
+        cacheable = True
+        previous = None
+        result = format_string
+        while previous != result:
+            previous = result
+            compiled = _compile_template(result)
+            try:
+                if compiled is None:
+                    cacheable = False
+                    result = string.Template(result).substitute(self)
+                else:
+                    literals, template_names = compiled
+                    parts = [literals[0]]
+                    for name, literal in zip(template_names, literals[1:]):
+                        parts.append("%s" % (self[name],))
+                        parts.append(literal)
+                    names.update(template_names)
+                    result = "".join(parts)
+            except KeyError as e:
+                raise MissingPropertyException(e)
+
+        if cacheable and all(isinstance(self[name], _IMMUTABLE_PROPERTY_TYPES) for name in names):
+            with self._lock:
+                if version == self._version:
+                    self._expansions[format_string] = result
+                    for name in names:
+                        self._dependents.setdefault(name, set()).add(format_string)
+        return result
+
+
 class Project(object):
     """
     Descriptor for a project to be built. A project has a number of attributes
@@ -320,7 +517,7 @@ class Project(object):
         self.authors = []
         self.license = ""
         self.url = ""
-        self._properties = {"verbose": False}
+        self._properties = Properties(verbose=False)
         self._install_dependencies = set()
         self._build_dependencies = set()
         self._plugin_dependencies = set()
@@ -388,7 +585,8 @@ class Project(object):
     @property
     def properties(self):
         result = self._properties
-        result["basedir"] = self.basedir
+        if "basedir" not in result or result["basedir"] != self.basedir:
+            result["basedir"] = self.basedir
         return result
 
     @property
@@ -525,15 +723,7 @@ class Project(object):
         self._manifest_include(filename)
 
     def expand(self, format_string):
-        previous = None
-        result = format_string
-        while previous != result:
-            try:
-                previous = result
-                result = string.Template(result).substitute(self.properties)
-            except KeyError as e:
-                raise MissingPropertyException(e)
-        return result
+        return self.properties.expand(format_string)
 
     def expand_path(self, format_string, *additional_path_elements):
         elements = [self.basedir]
@@ -0,0 +1,527 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of PyBuilder
+#
+#   Copyright 2011-2015 PyBuilder Team
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""
+    The PyBuilder daemon module.
+    Keeps the interpreter, PyBuilder, the build descriptor and its plugins loaded in a long-lived
+    process per project, so that `pyb --daemon <tasks>` only pays for the build itself.
+
+    The daemon listens on a Unix domain socket. Every build request is executed in a fork of the
+    warm daemon process with its output streamed back to the client as newline-delimited JSON frames.
+    The daemon restarts itself whenever the build descriptor or a module imported while loading it
+    (plugins included) changes, and exits after being idle for a while.
+
+    This module is deliberately light on imports at module level, as it is the thin client, too.
+"""
+
+import errno
+import hashlib
+import json
+import os
+import select
+import socket
+import stat
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from pybuilder.errors import DaemonException
+
+DAEMON_OPTION = "--daemon"
+STOP_DAEMON_OPTION = "--stop-daemon"
+
+DEFAULT_IDLE_TIMEOUT = 3 * 60 * 60
+DEFAULT_START_TIMEOUT = 60
+CHECK_INTERVAL = 1.0
+MAX_RETRIES = 5
+
+PROJECT_DESCRIPTOR = "build.py"
+
+
+def daemon_directory():
+    """
+    Returns the directory of the sockets and logs of the daemons of the current user, below the runtime
+    directory of the user if there is one, otherwise below the temp directory.
+    """
+    runtime_directory = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_directory and os.path.isdir(runtime_directory):
+        return os.path.join(runtime_directory, "pybuilder-daemon")
+    user = os.getuid() if hasattr(os, "getuid") else os.environ.get("USERNAME", "")
+    return os.path.join(tempfile.gettempdir(), "pybuilder-daemon-%s" % user)
+
+
+def secure_daemon_directory():
+    """
+    Creates the daemon directory if necessary and returns it. Raises a DaemonException unless it is a directory
+    owned by and only accessible to the current user, as whoever controls it receives the environment of the builds.
+    """
+    directory = daemon_directory()
+    try:
+        os.mkdir(directory, 0o700)
+    except OSError as e:
+        if e.errno != errno.EEXIST:
+            raise DaemonException("Unable to create daemon directory %s: %s" % (directory, e))
+    else:
+        os.chmod(directory, 0o700)
+
+    status = os.lstat(directory)
+    if stat.S_ISLNK(status.st_mode) or not stat.S_ISDIR(status.st_mode):
+        raise DaemonException("Daemon directory %s is not a directory" % directory)
+    if hasattr(os, "getuid") and status.st_uid != os.getuid():
+        raise DaemonException("Daemon directory %s is not owned by the current user" % directory)
+    if stat.S_IMODE(status.st_mode) != 0o700:
+        raise DaemonException("Daemon directory %s is accessible to other users, expected mode 0700" % directory)
+    return directory
+
+
+def _project_key(project_directory):
+    return hashlib.sha1(os.path.abspath(project_directory).encode("utf-8")).hexdigest()[:16]
+
+
+def socket_file(project_directory):
+    # Unix socket paths are limited to about a hundred characters, hence the short key in the temp directory
+    return os.path.join(daemon_directory(), _project_key(project_directory) + ".sock")
+
+
+def log_file(project_directory):
+    return os.path.join(daemon_directory(), _project_key(project_directory) + ".log")
+
+
+def project_directory_of(args):
+    """
+    Returns the project directory given on a pyb command line without parsing all of its options.
+    """
+    project_directory = "."
+    args = list(args)
+    for index, arg in enumerate(args):
+        if arg in ("-D", "--project-directory"):
+            if index + 1 < len(args):
+                project_directory = args[index + 1]
+        elif arg.startswith("--project-directory="):
+            project_directory = arg[len("--project-directory="):]
+        elif arg.startswith("-D"):
+            project_directory = arg[2:]
+    return os.path.abspath(project_directory)
+
+
+def _send_frame(connection, frame):
+    connection.sendall((json.dumps(frame) + "\n").encode("utf-8"))
+
+
+def _read_frames(connection):
+    stream = connection.makefile("rb")
+    try:
+        while True:
+            line = stream.readline()
+            if not line:
+                return
+            yield json.loads(line.decode("utf-8"))
+    finally:
+        stream.close()
+
+
+def _write(stream, text):
+    if sys.version_info[0] < 3 and not getattr(stream, "encoding", None):
+        text = text.encode("utf-8")
+    stream.write(text)
+    stream.flush()
+
+
+def _connect(path):
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.connect(path)
+        return connection
+    except socket.error:
+        connection.close()
+        return None
+
+
+class SocketStream(object):
+    """
+    File-like replacement for sys.stdout and sys.stderr of a build running in the daemon.
+    """
+
+    encoding = "utf-8"
+
+    def __init__(self, connection, stream, tty=False):
+        self.connection = connection
+        self.stream = stream
+        self.tty = tty
+        self._lock = threading.Lock()
+
+    def write(self, text):
+        if not text:
+            return
+        if isinstance(text, bytes):
+            text = text.decode("utf-8", "replace")
+        with self._lock:
+            _send_frame(self.connection, {self.stream: text})
+
+    def writelines(self, lines):
+        for line in lines:
+            self.write(line)
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return self.tty
+
+
+def run_build(connection, request):
+    """
+    Executes the build described by the request with its output sent to the connection.
+    Runs in a fork of the daemon, so the request may freely change the process state.
+    """
+    exit_code = 1
+    sys.stdout = SocketStream(connection, "out", request.get("tty", False))
+    sys.stderr = SocketStream(connection, "err", request.get("tty", False))
+    try:
+        os.chdir(request["cwd"])
+        os.environ.clear()
+        os.environ.update(request["env"])
+
+        from pybuilder.cli import main
+        exit_code = main(*request["args"])
+    except SystemExit as e:
+        exit_code = e.code if isinstance(e.code, int) else 1
+    except Exception as e:
+        sys.stderr.write("Build daemon failed to run the build: %s\n" % e)
+    finally:
+        sys.stdout = sys.__stdout__
+        sys.stderr = sys.__stderr__
+    try:
+        _send_frame(connection, {"exit": exit_code})
+    except socket.error:
+        pass
+    return exit_code
+
+
+class BuildDaemon(object):
+    def __init__(self, project_directory, logger, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        self.project_directory = os.path.abspath(project_directory)
+        self.socket_file = socket_file(self.project_directory)
+        self.logger = logger
+        self.idle_timeout = idle_timeout
+        self.watched_files = {}
+        self.plugin_modules = []
+        self.children = set()
+        self.server = None
+
+    def watch(self, file_name):
+        try:
+            stat = os.stat(file_name)
+            self.watched_files[file_name] = (stat.st_size, stat.st_mtime)
+        except OSError:
+            self.watched_files[file_name] = None
+
+    def has_changes(self):
+        for file_name, state in self.watched_files.items():
+            try:
+                stat = os.stat(file_name)
+                current_state = (stat.st_size, stat.st_mtime)
+            except OSError:
+                current_state = None
+            if current_state != state:
+                self.logger.info("%s has changed", file_name)
+                return True
+        return False
+
+    def prewarm(self):
+        """
+        Loads the project once, so that PyBuilder, the plugins, everything imported by the build descriptor
+        and the modules the project preloads for its tests are already imported in the processes forked
+        for the builds.
+        """
+        from pybuilder.execution import ExecutionManager
+        from pybuilder.reactor import Reactor
+        from pybuilder.snapshot import module_source_file
+        from pybuilder.zygote import preload_modules, project_preload_modules
+
+        project_descriptor = os.path.join(self.project_directory, PROJECT_DESCRIPTOR)
+        loaded_modules = set(sys.modules)
+        reactor = Reactor(self.logger, ExecutionManager(self.logger))
+        try:
+            reactor.prepare_build(project_directory=self.project_directory)
+            reactor.load_deferred_plugins()
+            reactor.execution_manager.execute_initializers(logger=self.logger, project=reactor.project)
+            report = preload_modules(project_preload_modules(reactor.project), self.logger)
+            if report.imported:
+                self.logger.info("Preloaded %d modules in %.2f s", len(report.imported), report.import_time)
+        except Exception as e:
+            self.logger.warn("Unable to load %s: %s", project_descriptor, e)
+        self.plugin_modules = list(reactor.plugin_modules)
+
+        self.watch(project_descriptor)
+        for name in set(sys.modules) - loaded_modules:
+            module = sys.modules.get(name)
+            source_file = module_source_file(module) if module else None
+            if source_file:
+                self.watch(source_file)
+        self.logger.info("Loaded %s, watching %d files", project_descriptor, len(self.watched_files))
+
+    def unload_plugin_modules(self):
+        """
+        See Reactor.unload_plugin_modules, the imports of the plugins stay loaded.
+        """
+        for name in self.plugin_modules:
+            sys.modules.pop(name, None)
+
+    def bind(self):
+        secure_daemon_directory()
+
+        if os.path.exists(self.socket_file):
+            running_daemon = _connect(self.socket_file)
+            if running_daemon:
+                running_daemon.close()
+                return False
+            os.unlink(self.socket_file)
+
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self.server.bind(self.socket_file)
+        except socket.error:
+            # another daemon has been started concurrently
+            self.server.close()
+            self.server = None
+            return False
+        self.server.listen(16)
+        return True
+
+    def close(self):
+        if self.server:
+            self.server.close()
+            self.server = None
+            try:
+                os.unlink(self.socket_file)
+            except OSError:
+                pass
+
+    def reap_children(self):
+        for pid in list(self.children):
+            try:
+                finished_pid, _ = os.waitpid(pid, os.WNOHANG)
+            except OSError as e:
+                if e.errno != errno.ECHILD:
+                    raise
+                finished_pid = pid
+            if finished_pid:
+                self.children.discard(pid)
+
+    def serve(self):
+        """
+        Serves build requests until the daemon is stopped, idle or outdated.
+        Returns True if the daemon has to be restarted to pick up changes.
+        """
+        if not self.bind():
+            self.logger.info("A build daemon is already running for %s", self.project_directory)
+            return False
+        self.logger.info("Build daemon for %s listening on %s", self.project_directory, self.socket_file)
+
+        try:
+            last_activity = time.time()
+            while True:
+                self.reap_children()
+                readable, _, _ = select.select([self.server], [], [], CHECK_INTERVAL)
+                if readable:
+                    connection, _ = self.server.accept()
+                    last_activity = time.time()
+                    restart = self.handle(connection)
+                    if restart is not None:
+                        return restart
+                elif self.has_changes():
+                    return True
+                elif not self.children and time.time() - last_activity > self.idle_timeout:
+                    self.logger.info("Build daemon has been idle for %d seconds, exiting", self.idle_timeout)
+                    return False
+        finally:
+            self.close()
+
+    def handle(self, connection):
+        """
+        Handles one request. Returns None to keep serving, otherwise whether to restart.
+        """
+        try:
+            request = next(_read_frames(connection), None)
+            if not request:
+                return None
+
+            if request.get("stop"):
+                self.logger.info("Build daemon stopped by client")
+                _send_frame(connection, {"exit": 0})
+                return False
+
+            if self.has_changes():
+                _send_frame(connection, {"restart": True})
+                return True
+
+            sys.stdout.flush()
+            sys.stderr.flush()
+            pid = os.fork()
+            if pid == 0:
+                exit_code = 1
+                try:
+                    self.server.close()
+                    self.unload_plugin_modules()
+                    exit_code = run_build(connection, request)
+                finally:
+                    os._exit(exit_code)
+            self.children.add(pid)
+            self.logger.info("Building %s in process %d", " ".join(request["args"]), pid)
+            return None
+        except (socket.error, ValueError) as e:
+            self.logger.warn("Unable to handle build request: %s", e)
+            return None
+        finally:
+            connection.close()
+
+
+def run_daemon(project_directory, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+    from pybuilder.cli import StdOutLogger
+
+    logger = StdOutLogger()
+    daemon = BuildDaemon(project_directory, logger, idle_timeout)
+    daemon.prewarm()
+    if daemon.serve():
+        logger.info("Restarting build daemon to pick up changes")
+        sys.stdout.flush()
+        os.execv(sys.executable, [sys.executable, "-m", "pybuilder.daemon", daemon.project_directory])
+    return 0
+
+
+def start_daemon(project_directory):
+    secure_daemon_directory()
+
+    environment = dict(os.environ)
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    environment["PYTHONPATH"] = os.pathsep.join(
+        [package_root] + [path for path in [environment.get("PYTHONPATH")] if path])
+
+    with open(os.devnull, "rb") as stdin:
+        with open(log_file(project_directory), "ab") as log:
+            subprocess.Popen([sys.executable, "-m", "pybuilder.daemon", project_directory],
+                             stdin=stdin, stdout=log, stderr=subprocess.STDOUT,
+                             cwd=project_directory, env=environment, close_fds=True,
+                             preexec_fn=os.setsid)
+
+
+def _exchange(connection, request, project_directory):
+    """
+    Returns the exit code of the request or None if the daemon is going away without having handled it.
+    """
+    received = False
+    try:
+        _send_frame(connection, request)
+        for frame in _read_frames(connection):
+            received = True
+            if "out" in frame:
+                _write(sys.stdout, frame["out"])
+            elif "err" in frame:
+                _write(sys.stderr, frame["err"])
+            elif "exit" in frame:
+                return frame["exit"]
+            elif frame.get("restart"):
+                return None
+    except socket.error:
+        # a daemon closing its socket to restart resets the connections it has not accepted yet
+        if not received:
+            return None
+        raise DaemonException("Lost connection to build daemon, see %s" % log_file(project_directory))
+    finally:
+        connection.close()
+    if not received:
+        return None
+    raise DaemonException("Build daemon closed the connection unexpectedly, see %s" %
+                          log_file(project_directory))
+
+
+def send_request(project_directory, request, start=True, start_timeout=DEFAULT_START_TIMEOUT):
+    """
+    Sends the request to the daemon of the project directory, starting it if necessary, and
+    streams the output of the request. Returns the exit code of the request or None if there is
+    no daemon and none was to be started.
+    """
+    secure_daemon_directory()
+    path = socket_file(project_directory)
+    deadline = time.time() + start_timeout
+    waiting = False
+    retries = 0
+    while True:
+        connection = _connect(path)
+        if connection:
+            exit_code = _exchange(connection, request, project_directory)
+            if exit_code is not None:
+                return exit_code
+            retries += 1
+            if retries > MAX_RETRIES:
+                raise DaemonException("Build daemon keeps closing the connection, see %s" %
+                                      log_file(project_directory))
+            # the daemon restarts itself, so wait for it instead of starting another one
+            waiting = True
+            deadline = time.time() + start_timeout
+            continue
+
+        if not waiting:
+            if not start:
+                return None
+            start_daemon(project_directory)
+            waiting = True
+
+        if time.time() > deadline:
+            raise DaemonException("Build daemon did not start within %d seconds, see %s" %
+                                  (start_timeout, log_file(project_directory)))
+        time.sleep(0.05)
+
+
+def main(*args):
+    """
+    Command-line entrypoint of the thin client, invoked for `pyb --daemon ...` and `pyb --stop-daemon`.
+    """
+    if not args:
+        args = sys.argv[1:]
+    args = [arg for arg in args if arg != DAEMON_OPTION]
+    project_directory = project_directory_of(args)
+
+    try:
+        if not hasattr(socket, "AF_UNIX"):
+            raise DaemonException("Build daemon requires Unix domain sockets")
+
+        if STOP_DAEMON_OPTION in args:
+            send_request(project_directory, {"stop": True, "cwd": project_directory}, start=False)
+            return 0
+
+        if not os.path.isfile(os.path.join(project_directory, PROJECT_DESCRIPTOR)):
+            raise DaemonException("Project directory does not contain descriptor file: %s" %
+                                  os.path.join(project_directory, PROJECT_DESCRIPTOR))
+
+        return send_request(project_directory, {"args": args,
+                                                "cwd": os.getcwd(),
+                                                "env": dict(os.environ),
+                                                "tty": sys.stdout.isatty()})
+    except DaemonException as e:
+        sys.stderr.write("Build daemon error: %s\n" % e)
+        return 1
+    except KeyboardInterrupt:
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(run_daemon(sys.argv[1]))
@@ -0,0 +1,118 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of PyBuilder
+#
+#   Copyright 2011-2015 PyBuilder Team
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""
+    The PyBuilder descriptor module.
+    Loads build descriptors, compiling each of them only once: the code object is cached per descriptor
+    and reused as long as the content of the descriptor, its location and the interpreter are unchanged.
+    Modules imported by the descriptor, e.g. from a build support directory, are cached by the
+    interpreter itself like all other modules.
+"""
+
+import hashlib
+import marshal
+import os
+import sys
+import tempfile
+import types
+
+from pybuilder.cache import default_cache_directory
+from pybuilder.utils import mkdir
+
+CODE_CACHE_FORMAT = b"PYB1"
+KEY_LENGTH = 40
+
+
+def code_cache_file(project_descriptor):
+    descriptor_key = hashlib.sha1(os.path.abspath(project_descriptor).encode("utf-8")).hexdigest()
+    return os.path.join(default_cache_directory(), "descriptors", descriptor_key + ".code")
+
+
+def code_key(project_descriptor, source):
+    key = hashlib.sha1(os.path.abspath(project_descriptor).encode("utf-8"))
+    key.update(sys.version.encode("utf-8"))
+    key.update(source)
+    return key.hexdigest()
+
+
+def _read_cached_code(cache_file, key):
+    try:
+        with open(cache_file, "rb") as cache_handle:
+            if cache_handle.read(len(CODE_CACHE_FORMAT)) != CODE_CACHE_FORMAT:
+                return None
+            if cache_handle.read(KEY_LENGTH).decode("ascii") != key:
+                return None
+            code = marshal.load(cache_handle)
+    except (IOError, OSError, EOFError, ValueError, TypeError, UnicodeDecodeError):
+        return None
+    return code if isinstance(code, types.CodeType) else None
+
+
+def _write_cached_code(cache_file, key, code):
+    if sys.dont_write_bytecode:
+        return
+    # Written to a temporary file first, so that concurrent builds never read a partial cache file
+    try:
+        directory = os.path.dirname(cache_file)
+        mkdir(directory)
+        file_descriptor, temporary_file = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(file_descriptor, "wb") as cache_handle:
+                cache_handle.write(CODE_CACHE_FORMAT)
+                cache_handle.write(key.encode("ascii"))
+                marshal.dump(code, cache_handle)
+            os.rename(temporary_file, cache_file)
+        except Exception:
+            os.remove(temporary_file)
+            raise
+    except (IOError, OSError, ValueError):
+        pass
+
+
+def compile_descriptor(project_descriptor):
+    """
+    Returns the code object of the given build descriptor, from the cache if it is up to date.
+    """
+    with open(project_descriptor, "rb") as descriptor_handle:
+        source = descriptor_handle.read()
+
+    cache_file = code_cache_file(project_descriptor)
+    key = code_key(project_descriptor, source)
+    code = _read_cached_code(cache_file, key)
+    if code is None:
+        code = compile(source, project_descriptor, "exec", 0, True)
+        _write_cached_code(cache_file, key, code)
+    return code
+
+
+def load_descriptor(project_descriptor, module_name="build"):
+    """
+    Executes the build descriptor as module `module_name` and returns the module.
+    """
+    code = compile_descriptor(project_descriptor)
+
+    module = types.ModuleType(module_name)
+    module.__file__ = project_descriptor
+    sys.modules[module_name] = module
+    try:
+        exec(code, module.__dict__)
+    except BaseException:
+        if sys.modules.get(module_name) is module:
+            del sys.modules[module_name]
+        raise
+    return module
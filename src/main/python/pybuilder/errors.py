@@ -128,3 +128,15 @@ class InternalException(PyBuilderException):
 class DependenciesNotResolvedException(InternalException):
     def __init__(self):
         super(DependenciesNotResolvedException, self).__init__("Dependencies have not been resolved.")
+
+
+class BuildCacheException(PyBuilderException):
+    pass
+
+
+class DaemonException(PyBuilderException):
+    pass
+
+
+class CompositeBuildException(PyBuilderException):
+    pass
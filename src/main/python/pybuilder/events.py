@@ -0,0 +1,196 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of PyBuilder
+#
+#   Copyright 2011-2015 PyBuilder Team
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""
+    The PyBuilder events module.
+    Publishes structured build events (builds, tasks, actions, tests, commands and log messages) to sinks
+    like a JSON lines file. Events are queued and written by a background thread; when the bounded queue is
+    full, events are dropped and counted instead of blocking the build.
+"""
+
+import json
+import os
+import threading
+import time
+
+try:
+    from queue import Queue, Full, Empty
+except ImportError:
+    from Queue import Queue, Full, Empty
+
+BUILD_STARTED = "build_started"
+BUILD_FINISHED = "build_finished"
+TASK_STARTED = "task_started"
+TASK_FINISHED = "task_finished"
+ACTION_STARTED = "action_started"
+ACTION_FINISHED = "action_finished"
+TEST_FINISHED = "test_finished"
+COMMAND_STARTED = "command_started"
+COMMAND_FINISHED = "command_finished"
+LOG = "log"
+EVENTS_DROPPED = "events_dropped"
+
+DEFAULT_QUEUE_SIZE = 10000
+
+_STOP = object()
+_stream = None
+
+
+def create_event(kind, **fields):
+    event = {"event": kind,
+             "time": time.time(),
+             "pid": os.getpid(),
+             "thread": threading.current_thread().name}
+    event.update(fields)
+    return event
+
+
+class JsonLinesSink(object):
+    """
+        Writes every event as a JSON object on a line of its own.
+    """
+
+    def __init__(self, file_name):
+        self.file_name = file_name
+        self._file = open(file_name, "w")
+
+    def write(self, events):
+        for event in events:
+            self._file.write(json.dumps(event, default=str, sort_keys=True))
+            self._file.write("\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class EventStream(object):
+    """
+        Hands the events emitted by any thread to the sinks on a background writer thread.
+    """
+
+    def __init__(self, sinks, queue_size=DEFAULT_QUEUE_SIZE):
+        self.sinks = sinks
+        self.dropped = 0
+        self.error = None
+        self._queue = Queue(queue_size)
+        self._lock = threading.Lock()
+        self._writer = threading.Thread(target=self._write, name="pyb-events")
+        self._writer.daemon = True
+        self._writer.start()
+
+    def emit(self, event):
+        try:
+            self._queue.put_nowait(event)
+        except Full:
+            with self._lock:
+                self.dropped += 1
+
+    def _write(self):
+        stopped = False
+        while not stopped:
+            events = [self._queue.get()]
+            try:
+                while True:
+                    events.append(self._queue.get_nowait())
+            except Empty:
+                pass
+            if _STOP in events:
+                stopped = True
+                events = [event for event in events if event is not _STOP]
+            for sink in self.sinks:
+                try:
+                    sink.write(events)
+                except (IOError, OSError, TypeError, ValueError) as e:
+                    self.error = e
+
+    def close(self):
+        """
+        Writes the events still queued, reporting how many had to be dropped, and closes the sinks.
+        """
+        if self.dropped:
+            self._queue.put(create_event(EVENTS_DROPPED, count=self.dropped))
+        self._queue.put(_STOP)
+        self._writer.join()
+        for sink in self.sinks:
+            sink.close()
+
+
+class _CollectingStream(object):
+    """
+        Keeps the events emitted in a forked process, which the parent emits to its stream.
+    """
+
+    def __init__(self):
+        self.events = []
+
+    def emit(self, event):
+        self.events.append(event)
+
+
+def start_events(file_name, queue_size=DEFAULT_QUEUE_SIZE):
+    global _stream
+    _stream = EventStream([JsonLinesSink(file_name)], queue_size)
+    return _stream
+
+
+def stop_events():
+    global _stream
+    stream = _stream
+    _stream = None
+    if stream:
+        stream.close()
+    return stream
+
+
+def events_enabled():
+    return _stream is not None
+
+
+def emit(kind, **fields):
+    """
+    Emits an event of the given kind with the given fields if events are enabled.
+    """
+    stream = _stream
+    if stream is not None:
+        stream.emit(create_event(kind, **fields))
+
+
+def emit_event(event):
+    stream = _stream
+    if stream is not None:
+        stream.emit(event)
+
+
+def emit_all(events):
+    stream = _stream
+    if stream is not None:
+        for event in events:
+            stream.emit(event)
+
+
+def collect_events_in_fork():
+    """
+    Replaces the stream inherited by a forked process, whose writer thread does not exist in the fork,
+    with one collecting the events. Returns the collecting stream, or None if events are disabled.
+    """
+    global _stream
+    if _stream is None:
+        return None
+    _stream = _CollectingStream()
+    return _stream
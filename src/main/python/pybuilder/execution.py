@@ -23,13 +23,16 @@
     order regarding dependencies.
 """
 
-import copy
+import heapq
 import inspect
 import re
 import sys
+import threading
 import traceback
 import types
 
+from pybuilder import events
+from pybuilder.cache import is_enabled
 from pybuilder.errors import (CircularTaskDependencyException,
                               DependenciesNotResolvedException,
                               InvalidNameException,
@@ -38,7 +41,9 @@ from pybuilder.errors import (CircularTaskDependencyException,
                               NoSuchTaskException,
                               RequiredTaskExclusionException)
 from pybuilder.graph_utils import Graph, GraphHasCycles
-from pybuilder.utils import as_list, Timer, odict
+from pybuilder.incremental import TaskUpToDateCheck
+from pybuilder.trace import span
+from pybuilder.utils import as_list, Timer, odict, OrderedSet
 
 if sys.version_info[0] < 3:  # if major is less than 3
     from .excp_util_2 import raise_exception
@@ -97,7 +102,8 @@ class Executable(object):
                 raise ValueError("Invalid parameter '%s' for %s %s" % (parameter, self.__class__.__name__, self.name))
             arguments.append(argument_dict[parameter])
 
-        self.callable(*arguments)
+        with span(self.name, self.__class__.__name__.lower(), source=self.source):
+            self.callable(*arguments)
 
 
 class Action(Executable):
@@ -136,11 +142,22 @@ class TaskDependency(object):
 
 
 class Task(object):
-    def __init__(self, name, callable, dependencies=None, description=""):
+    def __init__(self, name, callable, dependencies=None, description="", inputs=None, outputs=None,
+                 incremental=None):
         self.name = name
         self.executables = [Executable(name, callable, description)]
         self.dependencies = as_list(dependencies)
         self.description = [description]
+        self.inputs = as_list(inputs)
+        self.outputs = as_list(outputs)
+        # Properties that have to be enabled for the task to be incremental
+        self.incremental_properties = as_list(incremental) if incremental is not None else []
+        # Executables taking no arguments (i.e. the lifecycle phases of the core plugin) cannot do any work
+        # that would have to be declared
+        if outputs is None and self.executables[0].parameters:
+            self.undeclared_sources = [self.executables[0].source]
+        else:
+            self.undeclared_sources = []
 
     def __eq__(self, other):
         if isinstance(other, Task):
@@ -158,10 +175,21 @@ class Task(object):
             return self.name < other.name
         return self.name < other
 
+    @property
+    def incremental(self):
+        return bool(self.outputs) and not self.undeclared_sources
+
+    def is_incremental(self, project):
+        return self.incremental and all(is_enabled(project.get_property(name)) for name in self.incremental_properties)
+
     def extend(self, task):
         self.executables += task.executables
         self.dependencies += task.dependencies
         self.description += task.description
+        self.inputs += task.inputs
+        self.outputs += task.outputs
+        self.incremental_properties += task.incremental_properties
+        self.undeclared_sources += task.undeclared_sources
 
     def execute(self, logger, argument_dict):
         for executable in self.executables:
@@ -183,10 +211,22 @@ class Initializer(Executable):
 
 
 class TaskExecutionSummary(object):
-    def __init__(self, task, number_of_actions, execution_time):
+    def __init__(self, task, number_of_actions, execution_time, up_to_date=False, from_cache=False,
+                 action_times=None):
         self.task = task
         self.number_of_actions = number_of_actions
         self.execution_time = execution_time
+        self.up_to_date = up_to_date
+        self.from_cache = from_cache
+        self.action_times = action_times if action_times is not None else odict()
+
+    @property
+    def status(self):
+        if self.up_to_date:
+            return "up_to_date"
+        if self.from_cache:
+            return "from_cache"
+        return "executed"
 
 
 class ExecutionManager(object):
@@ -204,15 +244,36 @@ class ExecutionManager(object):
         self._initializers = []
 
         self._dependencies_resolved = False
-        self._actions_executed = []
-        self._tasks_executed = []
-        self._current_task = None
+        self._actions_executed = OrderedSet()
+        self._actions_running = {}
+        self._tasks_executed = OrderedSet()
+        self._task_summaries = []
+        self.checkpoint = None
+        self._execution_lock = threading.RLock()
+        self._thread_state = threading.local()
         self._current_execution_plan = None
 
         self._exclude_optional_tasks = []
         self._exclude_tasks = []
         self._exclude_all_optional = False
 
+    @property
+    def _current_task(self):
+        return getattr(self._thread_state, "current_task", None)
+
+    @_current_task.setter
+    def _current_task(self, task):
+        self._thread_state.current_task = task
+
+    @property
+    def _current_execution_plan(self):
+        return self.__current_execution_plan
+
+    @_current_execution_plan.setter
+    def _current_execution_plan(self, execution_plan):
+        self.__current_execution_plan = execution_plan
+        self._current_execution_plan_task_names = set(task.name for task in execution_plan or [])
+
     @property
     def initializers(self):
         return self._initializers
@@ -221,10 +282,28 @@ class ExecutionManager(object):
     def tasks(self):
         return list(self._tasks.values())
 
+    @property
+    def actions(self):
+        return list(self._actions.values())
+
     @property
     def task_names(self):
         return sorted(self._tasks.keys())
 
+    @property
+    def pending_task_dependencies(self):
+        """
+        The names of the tasks that have been declared as dependents but have not been registered yet.
+        """
+        return list(self._dependencies_pending_tasks)
+
+    @property
+    def task_summaries(self):
+        """
+        The summaries of all tasks executed so far, in order of completion.
+        """
+        return list(self._task_summaries)
+
     def register_initializer(self, initializer):
         self.logger.debug("Registering initializer '%s'", initializer.name)
         self._initializers.append(initializer)
@@ -254,8 +333,8 @@ class ExecutionManager(object):
                 self.get_task(name).dependencies.extend(self._dependencies_pending_tasks[name])
                 del self._dependencies_pending_tasks[name]
 
-    def execute_initializers(self, environments=None, **keyword_arguments):
-        for initializer in self._initializers:
+    def execute_initializers(self, environments=None, initializers=None, **keyword_arguments):
+        for initializer in self._initializers if initializers is None else initializers:
             if not initializer.is_applicable(environments):
                 message = "Not going to execute initializer '%s' from '%s' as environments do not match."
                 self.logger.debug(message, initializer.name, initializer.source)
@@ -270,6 +349,29 @@ class ExecutionManager(object):
             raise DependenciesNotResolvedException()
 
     def execute_task(self, task, **keyword_arguments):
+        with span(task.name, "task") as task_span:
+            events.emit(events.TASK_STARTED, task=task.name)
+            timer = Timer.start()
+            try:
+                summary = self._execute_task(task, **keyword_arguments)
+            except Exception as e:
+                if self.checkpoint:
+                    self.checkpoint.task_failed(task.name)
+                timer.stop()
+                events.emit(events.TASK_FINISHED, task=task.name, status="failed", duration=timer.get_millis(),
+                            failure=str(e))
+                raise
+            if self.checkpoint:
+                self.checkpoint.task_completed(task.name)
+            task_span.set_attribute("up_to_date", summary.up_to_date)
+            task_span.set_attribute("from_cache", summary.from_cache)
+            events.emit(events.TASK_FINISHED, task=task.name, status=summary.status,
+                        duration=summary.execution_time, actions=summary.number_of_actions)
+            with self._execution_lock:
+                self._task_summaries.append(summary)
+            return summary
+
+    def _execute_task(self, task, **keyword_arguments):
         self.assert_dependencies_resolved()
 
         self.logger.debug("Executing task '%s'",
@@ -277,11 +379,15 @@ class ExecutionManager(object):
 
         timer = Timer.start()
         number_of_actions = 0
+        action_times = odict()
 
         self._current_task = task
 
         suppressed_errors = []
         task_error = None
+        up_to_date = False
+        from_cache = False
+        up_to_date_check = self._create_up_to_date_check(task, keyword_arguments)
 
         has_teardown_tasks = False
         after_actions = self._execute_after[task.name]
@@ -292,10 +398,17 @@ class ExecutionManager(object):
 
         try:
             for action in self._execute_before[task.name]:
-                if self.execute_action(action, keyword_arguments):
+                if self.execute_action(action, keyword_arguments, action_times):
                     number_of_actions += 1
 
-            task.execute(self.logger, keyword_arguments)
+            if up_to_date_check and up_to_date_check.is_up_to_date():
+                self.logger.info("Task '%s' is up to date", task.name)
+                up_to_date = True
+            elif up_to_date_check and up_to_date_check.restore_from_cache():
+                self.logger.info("Task '%s' restored from build cache", task.name)
+                from_cache = True
+            else:
+                task.execute(self.logger, keyword_arguments)
         except:
             if not has_teardown_tasks:
                 raise
@@ -305,7 +418,7 @@ class ExecutionManager(object):
         for action in after_actions:
             try:
                 if not task_error or action.teardown:
-                    if self.execute_action(action, keyword_arguments):
+                    if self.execute_action(action, keyword_arguments, action_times):
                         number_of_actions += 1
             except:
                 if not has_teardown_tasks:
@@ -323,22 +436,64 @@ class ExecutionManager(object):
                               "".join(traceback.format_exception(action_error[0], action_error[1], action_error[2])))
         if task_error:
             raise_exception(task_error[1], task_error[2])
+        if up_to_date_check:
+            up_to_date_check.record()
         self._current_task = None
-        if task not in self._tasks_executed:
-            self._tasks_executed.append(task)
+        with self._execution_lock:
+            self._tasks_executed.add(task)
 
         timer.stop()
-        return TaskExecutionSummary(task.name, number_of_actions, timer.get_millis())
+        return TaskExecutionSummary(task.name, number_of_actions, timer.get_millis(), up_to_date, from_cache,
+                                    action_times)
+
+    def _create_up_to_date_check(self, task, arguments):
+        project = arguments.get("project")
+        if project is None or not task.is_incremental(project) or not project.has_property("dir_target"):
+            return None
+
+        # A task executed again within the same build (e.g. to collect coverage) has to actually run
+        if task in self._tasks_executed:
+            return None
+
+        return TaskUpToDateCheck(project, task, self, self.logger)
+
+    def execute_action(self, action, arguments, action_times=None):
+        while True:
+            with self._execution_lock:
+                if action.only_once and action in self._actions_executed:
+                    message = "Action %s has been executed before and is marked as only_once, so will not be executed again"
+                    self.logger.debug(message, action.name)
+                    return False
+                running = self._actions_running.get(action) if action.only_once else None
+                if running is None:
+                    if action.only_once:
+                        self._actions_running[action] = threading.Event()
+                    break
+            # A concurrently running task executes the action, it is executed here only if that fails
+            running.wait()
 
-    def execute_action(self, action, arguments):
-        if action.only_once and action in self._actions_executed:
-            message = "Action %s has been executed before and is marked as only_once, so will not be executed again"
-            self.logger.debug(message, action.name)
-            return False
+        try:
+            self.logger.debug("Executing action '%s' from '%s' before task", action.name, action.source)
+            events.emit(events.ACTION_STARTED, action=action.name, source=action.source)
+            timer = Timer.start()
+            try:
+                action.execute(arguments)
+            except Exception as e:
+                timer.stop()
+                events.emit(events.ACTION_FINISHED, action=action.name, successful=False, duration=timer.get_millis(),
+                            failure=str(e))
+                raise
+            timer.stop()
+            with self._execution_lock:
+                self._actions_executed.add(action)
+        finally:
+            if action.only_once:
+                with self._execution_lock:
+                    self._actions_running.pop(action).set()
 
-        self.logger.debug("Executing action '%s' from '%s' before task", action.name, action.source)
-        action.execute(arguments)
-        self._actions_executed.append(action)
+        events.emit(events.ACTION_FINISHED, action=action.name, successful=True, duration=timer.get_millis())
+        if action_times is not None:
+            action_times[action.name] = timer.get_millis()
         return True
 
     def execute_execution_plan(self, execution_plan, **keyword_arguments):
@@ -354,6 +509,48 @@ class ExecutionManager(object):
 
         return summaries
 
+    def execute_execution_plan_in_parallel(self, execution_plan, jobs, **keyword_arguments):
+        """
+        Executes the execution plan on a pool of up to `jobs` worker threads.
+        A task is started as soon as all of its dependencies contained in the plan have been executed,
+        so independent branches of the dependency graph run concurrently.
+        Returns the task execution summaries in order of completion.
+        """
+        self.assert_dependencies_resolved()
+
+        if jobs <= 1 or len(execution_plan) <= 1:
+            return self.execute_execution_plan(execution_plan, **keyword_arguments)
+
+        self._current_execution_plan = execution_plan
+        try:
+            return ParallelDependencyExecutor(odict((task.name, task) for task in execution_plan),
+                                              self.get_plan_dependencies(execution_plan),
+                                              jobs,
+                                              lambda task: self.execute_task(task, **keyword_arguments)).execute()
+        finally:
+            self._current_execution_plan = None
+
+    def get_plan_dependencies(self, execution_plan):
+        """
+        Returns a dictionary mapping the name of every task of the plan to the names of
+        the tasks of the same plan it has to wait for.
+        """
+        self.assert_dependencies_resolved()
+
+        plan_task_names = set(task.name for task in execution_plan)
+        plan_dependencies = odict()
+        for task in execution_plan:
+            plan_dependencies[task.name] = [dependency.name for dependency in self._task_dependencies[task.name]
+                                            if dependency.name in plan_task_names]
+        return plan_dependencies
+
+    def get_plan_graph(self, execution_plan):
+        """
+        Returns the graph of the dependencies between the tasks of the plan, with edges
+        pointing from every task to the tasks it has to wait for.
+        """
+        return Graph(self.get_plan_dependencies(execution_plan))
+
     def get_task(self, name):
         name = name.name if isinstance(name, TaskDependency) else name
         if not self.has_task(name):
@@ -365,14 +562,15 @@ class ExecutionManager(object):
         return name in self._tasks
 
     def _collect_transitive_tasks(self, task, visited=None):
-        if not visited:
+        if visited is None:
             visited = set()
-        if task in visited:
-            return visited
-        visited.add(task)
-        dependencies = [dependency for dependency in self._task_dependencies[task.name]]
-        for dependency in dependencies:
-            self._collect_transitive_tasks(dependency.task, visited)
+        pending = [task]
+        while pending:
+            task = pending.pop()
+            if task in visited:
+                continue
+            visited.add(task)
+            pending.extend(self._tasks[dependency.name] for dependency in self._task_dependencies[task.name])
         return visited
 
     def collect_all_transitive_tasks(self, task_names):
@@ -380,7 +578,7 @@ class ExecutionManager(object):
 
         all_tasks = set()
         for task_name in task_names:
-            all_tasks.update(self._collect_transitive_tasks(self.get_task(task_name)))
+            self._collect_transitive_tasks(self.get_task(task_name), all_tasks)
         return all_tasks
 
     def build_execution_plan(self, task_names):
@@ -396,8 +594,9 @@ class ExecutionManager(object):
         except GraphHasCycles as cycles:
             raise CircularTaskDependencyException(str(cycles))
 
+        enqueued_task_names = set()
         for task_name in as_list(task_names):
-            self._enqueue_task(execution_plan, task_name)
+            self._enqueue_task(execution_plan, task_name, enqueued_task_names)
         return execution_plan
 
     def build_shortest_execution_plan(self, task_names):
@@ -407,13 +606,17 @@ class ExecutionManager(object):
         tasks you've already executed
         """
         execution_plan = self.build_execution_plan(task_names)
-        shortest_plan = copy.copy(execution_plan)
-        for executed_task in self._tasks_executed:
-            candidate_task = shortest_plan[0]
-            if candidate_task.name not in task_names and candidate_task == executed_task:
-                shortest_plan.pop(0)
+        requested_task_names = set(as_task_name_list(task_names))
+        with self._execution_lock:
+            tasks_executed = list(self._tasks_executed)
+        skipped = 0
+        for executed_task in tasks_executed:
+            candidate_task = execution_plan[skipped]
+            if candidate_task.name not in requested_task_names and candidate_task == executed_task:
+                skipped += 1
             else:
                 break
+        shortest_plan = execution_plan[skipped:]
 
         if self._current_task and self._current_task in shortest_plan:
             raise CircularTaskDependencyException("Task '%s' attempted to invoke tasks %s, "
@@ -421,18 +624,71 @@ class ExecutionManager(object):
                                                   (self._current_task, task_names, shortest_plan))
         return shortest_plan
 
-    def _enqueue_task(self, execution_plan, task_name):
-        task = self.get_task(task_name)
+    def skip_completed_tasks(self, execution_plan, completed_task_names):
+        """
+        Returns the execution plan without the tasks completed by a previous build, like
+        build_shortest_execution_plan does for the tasks executed before in this process.
+        A completed task is only skipped if all of its dependencies in the plan are skipped as well.
+        The skipped tasks count as executed for shortest execution plans.
+        """
+        completed_task_names = set(completed_task_names)
+        plan_dependencies = self.get_plan_dependencies(execution_plan)
+        skipped = set()
+        for task in execution_plan:
+            if task.name in completed_task_names and all(dependency in skipped
+                                                         for dependency in plan_dependencies[task.name]):
+                skipped.add(task.name)
+
+        skipped_tasks = [task for task in execution_plan if task.name in skipped]
+        if skipped_tasks:
+            self.logger.info("Skipping tasks completed by the previous build: %s",
+                             ", ".join(task.name for task in skipped_tasks))
+        with self._execution_lock:
+            self._tasks_executed.extend(skipped_tasks)
+        return [task for task in execution_plan if task.name not in skipped]
+
+    def mark_tasks_outdated(self, task_names):
+        """
+        Forgets that the named tasks and the actions attached to them have been executed, so that shortest
+        execution plans include them again, their up-to-date checks apply and their only_once actions run again.
+        """
+        with self._execution_lock:
+            task_names = set(as_task_name_list(task_names))
+            self._tasks_executed = OrderedSet(task for task in self._tasks_executed if task.name not in task_names)
+            for task_name in task_names:
+                for action in self._execute_before.get(task_name, []) + self._execute_after.get(task_name, []):
+                    self._actions_executed.discard(action)
+
+    def _enqueue_task(self, execution_plan, task_name, enqueued_task_names=None):
+        """
+        Appends the task to the plan after its dependencies (depth-first, in declaration order),
+        skipping the tasks whose names are in enqueued_task_names.
+        """
+        if enqueued_task_names is None:
+            enqueued_task_names = set(task.name for task in execution_plan)
 
-        if task in execution_plan:
+        task = self.get_task(task_name)
+        if task.name in enqueued_task_names:
             return
 
-        for dependency in self._task_dependencies[task.name]:
-            if self._should_omit_dependency(task, dependency):
-                continue
-            self._enqueue_task(execution_plan, dependency.name)
-
-        execution_plan.append(task)
+        # A stack of tasks with the iterators over their remaining dependencies, so that deep graphs
+        # do not exhaust the recursion limit
+        visiting = set([task.name])
+        stack = [(task, iter(self._task_dependencies[task.name]))]
+        while stack:
+            task, dependencies = stack[-1]
+            for dependency in dependencies:
+                if dependency.name in enqueued_task_names or dependency.name in visiting or \
+                        self._should_omit_dependency(task, dependency):
+                    continue
+                visiting.add(dependency.name)
+                stack.append((self._tasks[dependency.name], iter(self._task_dependencies[dependency.name])))
+                break
+            else:
+                stack.pop()
+                visiting.discard(task.name)
+                enqueued_task_names.add(task.name)
+                execution_plan.append(task)
 
     def _should_omit_dependency(self, task, dependency):
         if dependency.optional:
@@ -464,25 +720,26 @@ class ExecutionManager(object):
             self._execute_after[task.name] = []
             self._task_dependencies[task.name] = []
 
+            task_dependencies = self._task_dependencies[task.name]
+            dependency_indices = {}
             for d in task.dependencies:
-                add_dependency = True
                 if not self.has_task(d):
                     raise MissingTaskDependencyException(task.name, d)
-                task_dependencies = self._task_dependencies[task.name]
-                for index, existing_dependency in enumerate(task_dependencies):
-                    if existing_dependency.name == d.name:
-                        if existing_dependency.optional != d.optional:
-                            if existing_dependency.optional:
-                                task_dependencies[index] = TaskDependency(existing_dependency.name)
-                                self.logger.debug("Converting optional dependency '%s' of task '%s' into required",
-                                                  existing_dependency, task.name)
-                            else:
-                                self.logger.debug(
-                                    "Ignoring '%s' as optional dependency of task '%s' - already required",
-                                    existing_dependency, task.name)
-                        add_dependency = False
-                if add_dependency:
-                    self._task_dependencies[task.name].append(TaskDependency(self.get_task(d), d.optional))
+                index = dependency_indices.get(d.name)
+                if index is not None:
+                    existing_dependency = task_dependencies[index]
+                    if existing_dependency.optional != d.optional:
+                        if existing_dependency.optional:
+                            task_dependencies[index] = TaskDependency(self.get_task(existing_dependency.name))
+                            self.logger.debug("Converting optional dependency '%s' of task '%s' into required",
+                                              existing_dependency, task.name)
+                        else:
+                            self.logger.debug(
+                                "Ignoring '%s' as optional dependency of task '%s' - already required",
+                                existing_dependency, task.name)
+                else:
+                    dependency_indices[d.name] = len(task_dependencies)
+                    task_dependencies.append(TaskDependency(self.get_task(d), d.optional))
                     self.logger.debug("Adding '%s' as a dependency of task '%s'", d, task.name)
 
         for action in self._actions.values():
@@ -501,8 +758,101 @@ class ExecutionManager(object):
         self._dependencies_resolved = True
 
     def is_task_in_current_execution_plan(self, task_name):
-        if self._current_execution_plan:
-            for task in self._current_execution_plan:
-                if task.name == task_name:
-                    return True
-        return False
+        return task_name in self._current_execution_plan_task_names
+
+    def is_task_executed(self, task_name):
+        with self._execution_lock:
+            return any(task.name == task_name for task in self._tasks_executed)
+
+
+class ParallelDependencyExecutor(object):
+    """
+        Executes items on a bounded number of worker threads respecting the dependencies between them.
+        Items are given as an ordered dictionary mapping names to items, dependencies as a dictionary
+        mapping the name of every item to the names of the items it has to wait for. Every item is passed to
+        the given callable, which returns its summary.
+        Ready items are always started in the given order. After the first failure no further
+        items are started; items that are already running are allowed to finish and the failure is re-raised.
+    """
+
+    def __init__(self, items, dependencies, jobs, execute_item, worker_name="pyb-worker"):
+        self.items = items
+        self.jobs = min(jobs, len(items))
+        self.execute_item = execute_item
+        self.worker_name = worker_name
+
+        self._condition = threading.Condition()
+        self._summaries = []
+        self._failure = None
+        self._running = 0
+
+        self._index = dict((name, index) for index, name in enumerate(items))
+        self._pending_dependencies = {}
+        self._dependents = dict((name, []) for name in items)
+        self._ready = []
+        for name in items:
+            item_dependencies = dependencies[name]
+            self._pending_dependencies[name] = len(item_dependencies)
+            for dependency in item_dependencies:
+                self._dependents[dependency].append(name)
+            if not item_dependencies:
+                heapq.heappush(self._ready, (self._index[name], name))
+        self._remaining = len(items)
+
+    def execute(self):
+        workers = []
+        for worker_number in range(self.jobs):
+            worker = threading.Thread(target=self._work, name="%s-%d" % (self.worker_name, worker_number + 1))
+            worker.daemon = True
+            workers.append(worker)
+            worker.start()
+
+        for worker in workers:
+            while worker.is_alive():
+                worker.join(0.1)
+
+        if self._failure:
+            raise_exception(self._failure[1], self._failure[2])
+
+        return self._summaries
+
+    def _next_item(self):
+        with self._condition:
+            while True:
+                if self._failure or not self._remaining:
+                    return None
+                if self._ready:
+                    _, name = heapq.heappop(self._ready)
+                    self._running += 1
+                    return name
+                self._condition.wait()
+
+    def _item_completed(self, name, summary):
+        with self._condition:
+            self._running -= 1
+            self._remaining -= 1
+            self._summaries.append(summary)
+            for dependent in self._dependents[name]:
+                self._pending_dependencies[dependent] -= 1
+                if not self._pending_dependencies[dependent]:
+                    heapq.heappush(self._ready, (self._index[dependent], dependent))
+            self._condition.notify_all()
+
+    def _item_failed(self, exc_info):
+        with self._condition:
+            self._running -= 1
+            if not self._failure:
+                self._failure = exc_info
+            self._condition.notify_all()
+
+    def _work(self):
+        while True:
+            name = self._next_item()
+            if name is None:
+                return
+            try:
+                summary = self.execute_item(self.items[name])
+            except:  # NOQA
+                self._item_failed(sys.exc_info())
+                return
+            self._item_completed(name, summary)
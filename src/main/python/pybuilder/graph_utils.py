@@ -19,6 +19,12 @@
 A module containing utilities for operations on a directed graph
 """
 
+import json
+
+DOT_FORMAT = "dot"
+JSON_FORMAT = "json"
+FORMATS = (DOT_FORMAT, JSON_FORMAT)
+
 
 class GraphHasCycles(Exception):
     """
@@ -27,17 +33,58 @@ class GraphHasCycles(Exception):
     pass
 
 
+def _successors(graph, node):
+    try:
+        return graph[node]
+    except KeyError:
+        return ()
+
+
+def _quote(name):
+    return '"%s"' % str(name).replace("\\", "\\\\").replace('"', '\\"')
+
+
 class Graph(object):
     """
         A graph using an edge dictionary as an internal representation.
+        Strongly connected components and reachability are computed once and cached,
+        so the edges must not be changed after the first query.
     """
 
     def __init__(self, edges):
         self.edges = edges
+        self._nodes = None
+        self._components = None
+        self._bits = None
+        self._reachable = None
+
+    @property
+    def nodes(self):
+        """
+        All nodes of the graph, the ones with outgoing edges first, in order of appearance.
+        """
+        if self._nodes is None:
+            nodes = list(self.edges)
+            seen = set(nodes)
+            for node in list(nodes):
+                for successor in _successors(self.edges, node):
+                    if successor not in seen:
+                        seen.add(successor)
+                        nodes.append(successor)
+            self._nodes = nodes
+        return self._nodes
+
+    def successors(self, node):
+        return _successors(self.edges, node)
+
+    def strongly_connected_components(self):
+        if self._components is None:
+            self._components = tarjan_scc(self.edges)
+        return self._components
 
     def assert_no_cycles_present(self, include_trivial_cycles=True):
         cycles = []
-        components = tarjan_scc(self.edges)
+        components = self.strongly_connected_components()
         for component in components:
             if len(component) > 1:
                 cycles.append(component)
@@ -65,48 +112,231 @@ class Graph(object):
             error_message += "\tThese nodes form a cycle : " + str(cycle) + "\n"
         return GraphHasCycles(error_message)
 
+    def _reachability(self):
+        """
+        Computes the nodes reachable from every node as bit masks over the nodes, visiting the
+        strongly connected components in the order Tarjan's algorithm emits them, i.e. every
+        component after all the components it reaches.
+        """
+        if self._reachable is None:
+            bits = dict((node, 1 << position) for position, node in enumerate(self.nodes))
+            reachable = {}
+            for component in self.strongly_connected_components():
+                mask = 0
+                for node in component:
+                    for successor in _successors(self.edges, node):
+                        mask |= bits[successor] | reachable.get(successor, 0)
+                if len(component) > 1:
+                    for node in component:
+                        mask |= bits[node]
+                for node in component:
+                    reachable[node] = mask
+            self._bits = bits
+            self._reachable = reachable
+        return self._reachable
+
+    def is_reachable(self, source, target):
+        """
+        Returns True if a path leads from source to target. When the edges point from tasks to their
+        dependencies, this answers whether target is upstream of source.
+        """
+        reachable = self._reachability()
+        return source in reachable and target in self._bits and bool(reachable[source] & self._bits[target])
+
+    def reachable_from(self, node):
+        """
+        Returns the nodes reachable from the given node, in node order.
+        """
+        mask = self._reachability().get(node, 0)
+        return [candidate for candidate in self.nodes if mask & self._bits[candidate]]
+
+    def topological_levels(self):
+        """
+        Partitions the nodes of an acyclic graph into levels: the nodes without successors form level 0,
+        every other node belongs to the level after the highest level of its successors. The nodes of one
+        level do not depend on each other, so the size of a level is the parallelism available at that point.
+        """
+        self.assert_no_cycles_present()
+
+        level_of = {}
+        for component in self.strongly_connected_components():
+            node = component[0]
+            level_of[node] = max([level_of[successor] + 1 for successor in _successors(self.edges, node)] or [0])
+
+        levels = []
+        for node in self.nodes:
+            while len(levels) <= level_of[node]:
+                levels.append([])
+            levels[level_of[node]].append(node)
+        return levels
+
+    def transitive_reduction(self):
+        """
+        Returns the graph of an acyclic graph without the edges implied by other paths, e.g.
+        without a -> c if a -> b and b -> c.
+        """
+        self.assert_no_cycles_present()
+
+        reachable = self._reachability()
+        reduced_edges = {}
+        for node in self.nodes:
+            successors = []
+            implied = 0
+            for successor in _successors(self.edges, node):
+                if successor not in successors:
+                    successors.append(successor)
+                    implied |= reachable[successor]
+            reduced_edges[node] = [successor for successor in successors if not implied & self._bits[successor]]
+        return Graph(reduced_edges)
+
+    def critical_path(self, weights):
+        """
+        Returns the heaviest path through an acyclic graph and its weight, given the weights of the nodes
+        (nodes without weight weigh 0). When the edges point from tasks to their dependencies and the weights
+        are task durations, this is the chain of tasks bounding the build time however many tasks run in
+        parallel, listed in order of execution.
+        """
+        self.assert_no_cycles_present()
+
+        path_weight = {}
+        next_node = {}
+        for component in self.strongly_connected_components():
+            node = component[0]
+            heaviest = None
+            for successor in _successors(self.edges, node):
+                if heaviest is None or path_weight[successor] > path_weight[heaviest]:
+                    heaviest = successor
+            next_node[node] = heaviest
+            path_weight[node] = weights.get(node, 0) + (path_weight[heaviest] if heaviest is not None else 0)
+
+        if not path_weight:
+            return [], 0
+
+        node = max(self.nodes, key=lambda candidate: path_weight[candidate])
+        weight = path_weight[node]
+        path = []
+        while node is not None:
+            path.append(node)
+            node = next_node[node]
+        path.reverse()
+        return path, weight
+
+    def minimum_duration(self, weights, jobs):
+        """
+        Returns the lower bound of the time needed to process all nodes of an acyclic graph with the given
+        weights using `jobs` workers: the weight of the critical path or the total weight evenly shared by
+        the workers, whichever is larger.
+        """
+        _, critical_weight = self.critical_path(weights)
+        total_weight = sum(weights.get(node, 0) for node in self.nodes)
+        return max(critical_weight, -(-total_weight // jobs))
+
+    def to_dict(self):
+        """
+        Returns a JSON serializable description of an acyclic graph with its topological levels, marking
+        the edges removed by the transitive reduction as redundant.
+        """
+        levels = self.topological_levels()
+        reduced = self.transitive_reduction()
+        nodes = []
+        for level, level_nodes in enumerate(levels):
+            for node in level_nodes:
+                nodes.append({"name": node, "level": level})
+        edges = []
+        for node in self.nodes:
+            required = reduced.successors(node)
+            for successor in required:
+                edges.append({"from": node, "to": successor, "redundant": False})
+            redundant = []
+            for successor in self.successors(node):
+                if successor not in required and successor not in redundant:
+                    redundant.append(successor)
+                    edges.append({"from": node, "to": successor, "redundant": True})
+        return {"nodes": nodes,
+                "edges": edges,
+                "levels": levels,
+                "width": max([len(level_nodes) for level_nodes in levels] or [0]),
+                "depth": len(levels)}
+
+    def to_dot(self, name="graph"):
+        """
+        Returns the graph in the DOT language of Graphviz with the nodes of a topological level on the same rank
+        and the redundant edges dashed.
+        """
+        description = self.to_dict()
+        lines = ["digraph %s {" % _quote(name), "    rankdir=BT;", "    node [shape=box];"]
+        for level, level_nodes in enumerate(description["levels"]):
+            lines.append("    subgraph %s {" % _quote("level_%d" % level))
+            lines.append("        rank=same;")
+            for node in level_nodes:
+                lines.append("        %s;" % _quote(node))
+            lines.append("    }")
+        for edge in description["edges"]:
+            attributes = " [style=dashed, color=gray]" if edge["redundant"] else ""
+            lines.append("    %s -> %s%s;" % (_quote(edge["from"]), _quote(edge["to"]), attributes))
+        lines.append("}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, file_name, graph_format=DOT_FORMAT, name="graph"):
+        with open(file_name, "w") as graph_file:
+            if graph_format == JSON_FORMAT:
+                json.dump(self.to_dict(), graph_file, indent=2)
+            else:
+                graph_file.write(self.to_dot(name))
+
 
 def tarjan_scc(graph):
     """
     Tarjan's partitioning algorithm for finding strongly connected components in a graph.
+    The depth-first search keeps its own stack of nodes and successor iterators, so that
+    long chains of nodes do not exhaust the recursion limit. A component is returned only
+    after all components reachable from it.
     """
 
-    index_counter = [0]
+    index_counter = 0
     stack = []
+    on_stack = set()
     lowlinks = {}
     index = {}
     result = []
 
-    def strongconnect(node):
-        index[node] = index_counter[0]
-        lowlinks[node] = index_counter[0]
-        index_counter[0] += 1
-        stack.append(node)
+    for root in graph:
+        if root in index:
+            continue
 
-        try:
-            successors = graph[node]
-        except Exception:
-            successors = []
-        for successor in successors:
-            if successor not in lowlinks:
-                strongconnect(successor)
-                lowlinks[node] = min(lowlinks[node], lowlinks[successor])
-            elif successor in stack:
-                lowlinks[node] = min(lowlinks[node], index[successor])
-
-        if lowlinks[node] == index[node]:
-            connected_component = []
-
-            while True:
-                successor = stack.pop()
-                connected_component.append(successor)
-                if successor == node:
+        index[root] = lowlinks[root] = index_counter
+        index_counter += 1
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(_successors(graph, root)))]
+
+        while work:
+            node, successors = work[-1]
+            for successor in successors:
+                if successor not in index:
+                    index[successor] = lowlinks[successor] = index_counter
+                    index_counter += 1
+                    stack.append(successor)
+                    on_stack.add(successor)
+                    work.append((successor, iter(_successors(graph, successor))))
                     break
-            component = tuple(connected_component)
-            result.append(component)
+                elif successor in on_stack:
+                    lowlinks[node] = min(lowlinks[node], index[successor])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlinks[parent] = min(lowlinks[parent], lowlinks[node])
+
+                if lowlinks[node] == index[node]:
+                    connected_component = []
 
-    for node in graph:
-        if node not in lowlinks:
-            strongconnect(node)
+                    while True:
+                        successor = stack.pop()
+                        on_stack.discard(successor)
+                        connected_component.append(successor)
+                        if successor == node:
+                            break
+                    result.append(tuple(connected_component))
 
     return result
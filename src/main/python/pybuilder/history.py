@@ -0,0 +1,340 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of PyBuilder
+#
+#   Copyright 2011-2015 PyBuilder Team
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""
+    The PyBuilder history module.
+    Records every build of a project in an SQLite database: the durations of the build phases, tasks,
+    actions and tests together with the outcome and the VCS revision, so that the development of
+    build durations can be followed over time.
+"""
+
+import json
+import os
+
+try:
+    import sqlite3
+except ImportError:
+    sqlite3 = None
+
+from pybuilder.cache import is_enabled
+from pybuilder.errors import PyBuilderException
+from pybuilder.utils import mkdir, odict
+from pybuilder.vcs import current_revision
+
+DEFAULT_MAX_BUILDS = 1000
+DEFAULT_TREND_WINDOW = 10
+
+PHASE = "phase"
+TASK = "task"
+ACTION = "action"
+TEST = "test"
+
+EXECUTED = "executed"
+UP_TO_DATE = "up_to_date"
+FROM_CACHE = "from_cache"
+PASSED = "passed"
+FAILED = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS builds (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    project TEXT,
+    started REAL,
+    duration INTEGER,
+    successful INTEGER,
+    failure TEXT,
+    revision TEXT,
+    tasks TEXT,
+    environments TEXT
+);
+CREATE TABLE IF NOT EXISTS durations (
+    build_id INTEGER,
+    category TEXT,
+    name TEXT,
+    duration INTEGER,
+    status TEXT
+);
+CREATE INDEX IF NOT EXISTS durations_by_build ON durations (build_id);
+"""
+
+
+def history_for(project):
+    """
+    Returns the build history configured for the given project or None if it is disabled.
+    """
+    if sqlite3 is None or not is_enabled(project.get_property("build_history_enabled", False)):
+        return None
+    history_file = _history_file(project)
+    if not history_file:
+        return None
+    return BuildHistory(history_file, int(project.get_property("build_history_max_builds") or DEFAULT_MAX_BUILDS))
+
+
+def _history_file(project):
+    history_file = project.get_property("build_history_file")
+    if not history_file:
+        return None
+    history_file = os.path.expanduser(project.expand(history_file))
+    if os.path.isabs(history_file):
+        return history_file
+    return project.expand_path(history_file)
+
+
+def history_properties(project):
+    """
+    Returns the properties configuring the build history of the project with the history file expanded,
+    so that they can be restored without the other properties of the project.
+    """
+    return {"build_history_enabled": is_enabled(project.get_property("build_history_enabled", False)),
+            "build_history_file": _history_file(project),
+            "build_history_max_builds": project.get_property("build_history_max_builds")}
+
+
+def expected_task_durations(project, builds=DEFAULT_TREND_WINDOW):
+    """
+    Returns a dictionary mapping the names of the tasks executed in the recent builds of the project to their
+    median duration, which is empty if the build history is disabled or cannot be read.
+    """
+    history = history_for(project)
+    if not history:
+        return odict()
+    try:
+        return history.median_durations(TASK, builds, project.name)
+    except sqlite3.Error:
+        return odict()
+
+
+def median(values):
+    values = sorted(values)
+    if not values:
+        return None
+    middle = len(values) // 2
+    if len(values) % 2:
+        return values[middle]
+    return (values[middle - 1] + values[middle]) / 2.0
+
+
+def reported_test_durations(reports_directory, since):
+    """
+    Returns the durations of the tests found in the JSON reports written to the given directory since
+    the given time, which list their tests with name and time like the integration test report does.
+    """
+    durations = []
+    try:
+        report_names = sorted(os.listdir(reports_directory))
+    except OSError:
+        return durations
+
+    for report_name in report_names:
+        report_file = os.path.join(reports_directory, report_name)
+        if not report_name.endswith(".json") or os.path.getmtime(report_file) < since:
+            continue
+        try:
+            with open(report_file, "r") as report_handle:
+                report = json.load(report_handle)
+        except (IOError, OSError, ValueError):
+            continue
+        if not isinstance(report, dict) or not isinstance(report.get("tests"), list):
+            continue
+        suite = report_name[:-len(".json")]
+        for test in report["tests"]:
+            if isinstance(test, dict) and "test" in test and "time" in test:
+                durations.append((TEST, "%s:%s" % (suite, test["test"]), int(test["time"]),
+                                  FROM_CACHE if test.get("cached") else
+                                  PASSED if test.get("success", True) else FAILED))
+    return durations
+
+
+def task_durations(task_summaries):
+    durations = []
+    for summary in task_summaries:
+        durations.append((TASK, summary.task, summary.execution_time, summary.status))
+        for action, action_time in summary.action_times.items():
+            durations.append((ACTION, action, action_time, EXECUTED))
+    return durations
+
+
+def record_build(project, execution_manager, started, phase_times, successful, failure, tasks, environments,
+                 logger):
+    """
+    Records a build of the given project in its history, if enabled. The duration of the build is the sum of
+    the phase times, or of the task times if no phases are given. Tests are taken from the reports written
+    during the build. Failing to record the build is logged, but does not fail the build.
+    """
+    history = history_for(project)
+    if not history:
+        return
+
+    task_summaries = execution_manager.task_summaries
+    durations = [(PHASE, phase, phase_time, None) for phase, phase_time in phase_times.items()]
+    durations.extend(task_durations(task_summaries))
+    if project.has_property("dir_reports"):
+        durations.extend(reported_test_durations(project.expand_path("$dir_reports"), started))
+    duration = sum(phase_times.values()) or sum(summary.execution_time for summary in task_summaries)
+
+    try:
+        history.record(project.name, started, duration, successful, failure,
+                       current_revision(project.basedir), tasks, environments, durations)
+        logger.debug("Recorded build in history %s", history.file_name)
+    except (sqlite3.Error, IOError, OSError, PyBuilderException) as e:
+        logger.warn("Unable to record build in history %s: %s", history.file_name, e)
+
+
+class BuildRecord(object):
+    def __init__(self, id, project, started, duration, successful, failure, revision, tasks, environments):
+        self.id = id
+        self.project = project
+        self.started = started
+        self.duration = duration
+        self.successful = bool(successful)
+        self.failure = failure
+        self.revision = revision
+        self.tasks = tasks.split() if tasks else []
+        self.environments = environments.split() if environments else []
+
+
+class DurationTrend(object):
+    """
+        The median durations of a task, action or test in the recent builds and in the builds before.
+    """
+
+    def __init__(self, category, name, recent, earlier):
+        self.category = category
+        self.name = name
+        self.recent_median = median(recent)
+        self.earlier_median = median(earlier)
+        self.samples = len(recent) + len(earlier)
+
+    @property
+    def growth(self):
+        if self.recent_median is None or self.earlier_median is None:
+            return 0
+        return self.recent_median - self.earlier_median
+
+    @property
+    def relative_growth(self):
+        if not self.earlier_median:
+            return None
+        return float(self.growth) / self.earlier_median
+
+
+class BuildHistory(object):
+    """
+        The SQLite database recording the builds of a project. The database may be shared between
+        projects and processes; only the most recent max_builds builds are kept.
+    """
+
+    def __init__(self, file_name, max_builds=DEFAULT_MAX_BUILDS):
+        self.file_name = file_name
+        self.max_builds = max_builds
+
+    def exists(self):
+        return os.path.exists(self.file_name)
+
+    def _connect(self):
+        mkdir(os.path.dirname(self.file_name))
+        connection = sqlite3.connect(self.file_name, timeout=30)
+        connection.executescript(SCHEMA)
+        return connection
+
+    def record(self, project_name, started, duration, successful, failure, revision, tasks, environments,
+               durations):
+        """
+        Records a build with durations given as tuples of category, name, duration in milliseconds and status.
+        Returns the id of the build.
+        """
+        connection = self._connect()
+        try:
+            with connection:
+                cursor = connection.execute(
+                    "INSERT INTO builds (project, started, duration, successful, failure, revision, tasks, "
+                    "environments) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (project_name, started, duration, 1 if successful else 0, failure, revision,
+                     " ".join(tasks or []), " ".join(environments or [])))
+                build_id = cursor.lastrowid
+                connection.executemany(
+                    "INSERT INTO durations (build_id, category, name, duration, status) VALUES (?, ?, ?, ?, ?)",
+                    [(build_id,) + tuple(duration) for duration in durations])
+                connection.execute(
+                    "DELETE FROM durations WHERE build_id IN "
+                    "(SELECT id FROM builds ORDER BY id DESC LIMIT -1 OFFSET ?)", (self.max_builds,))
+                connection.execute(
+                    "DELETE FROM builds WHERE id IN (SELECT id FROM builds ORDER BY id DESC LIMIT -1 OFFSET ?)",
+                    (self.max_builds,))
+            return build_id
+        finally:
+            connection.close()
+
+    def builds(self, limit=DEFAULT_TREND_WINDOW, project_name=None):
+        """
+        Returns the most recent builds, the latest first.
+        """
+        if not self.exists():
+            return []
+        connection = self._connect()
+        try:
+            rows = connection.execute(
+                "SELECT id, project, started, duration, successful, failure, revision, tasks, environments "
+                "FROM builds WHERE ? IS NULL OR project = ? ORDER BY id DESC LIMIT ?",
+                (project_name, project_name, limit)).fetchall()
+        finally:
+            connection.close()
+        return [BuildRecord(*row) for row in rows]
+
+    def durations(self, category, builds=DEFAULT_TREND_WINDOW, project_name=None):
+        """
+        Returns a dictionary mapping the names of the tasks, actions or tests of the given category to lists
+        of their durations in the most recent builds, the latest first. Tasks that did not have to be
+        executed are left out, as their durations do not tell how long they take.
+        """
+        return self._durations_by_name(category, [build.id for build in self.builds(builds, project_name)])
+
+    def _durations_by_name(self, category, build_ids):
+        durations = odict()
+        if not build_ids:
+            return durations
+        connection = self._connect()
+        try:
+            rows = connection.execute(
+                "SELECT name, duration FROM durations WHERE category = ? AND build_id IN (%s) "
+                "AND (status IS NULL OR status NOT IN (?, ?)) ORDER BY build_id DESC" % ", ".join("?" * len(build_ids)),
+                [category] + list(build_ids) + [UP_TO_DATE, FROM_CACHE]).fetchall()
+        finally:
+            connection.close()
+        for name, duration in rows:
+            durations.setdefault(name, []).append(duration)
+        return durations
+
+    def median_durations(self, category, builds=DEFAULT_TREND_WINDOW, project_name=None):
+        """
+        Returns a dictionary mapping names to their median duration in the most recent builds.
+        """
+        return odict((name, median(durations))
+                     for name, durations in self.durations(category, builds, project_name).items())
+
+    def trends(self, category, window=DEFAULT_TREND_WINDOW, project_name=None):
+        """
+        Compares the median durations in the last `window` builds with the ones in the `window` builds before.
+        Returns the trends, the fastest growing first.
+        """
+        build_ids = [build.id for build in self.builds(2 * window, project_name)]
+        recent = self._durations_by_name(category, build_ids[:window])
+        earlier = self._durations_by_name(category, build_ids[window:])
+
+        trends = [DurationTrend(category, name, durations, earlier.get(name, [])) for name, durations in recent.items()]
+        return sorted(trends, key=lambda trend: -trend.growth)
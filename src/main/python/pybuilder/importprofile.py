@@ -0,0 +1,111 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of PyBuilder
+#
+#   Copyright 2011-2015 PyBuilder Team
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""
+    The PyBuilder import profile module.
+    Runs `pyb --import-profile <arguments>` as `pyb <arguments>` in a child interpreter started with
+    `-X importtime` and prints the modules that took the longest to import, plugins included.
+"""
+
+import os
+import re
+import subprocess
+import sys
+
+IMPORT_PROFILE_OPTION = "--import-profile"
+DEFAULT_LIMIT = 25
+
+IMPORT_TIME_PATTERN = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)\s*$")
+
+CHILD_COMMAND = "import sys; from pybuilder.cli import main; sys.exit(main(*sys.argv[1:]))"
+
+
+class ImportTime(object):
+    """
+        The time spent importing a module in microseconds, on its own and including the modules it imported.
+    """
+
+    def __init__(self, module, self_time, cumulative_time, depth):
+        self.module = module
+        self.self_time = self_time
+        self.cumulative_time = cumulative_time
+        self.depth = depth
+
+
+def parse_import_times(lines):
+    """
+    Returns the import times reported by `-X importtime` in the given lines and the lines that are not
+    part of the report, i.e. the actual error output of the child.
+    """
+    import_times = []
+    other_lines = []
+    for line in lines:
+        match = IMPORT_TIME_PATTERN.match(line.rstrip("\r\n"))
+        if match:
+            self_time, cumulative_time, indentation, module = match.groups()
+            import_times.append(ImportTime(module, int(self_time), int(cumulative_time), len(indentation) // 2))
+        elif not line.startswith("import time:"):
+            other_lines.append(line)
+    return import_times, other_lines
+
+
+def format_import_profile(import_times, limit=DEFAULT_LIMIT):
+    total = sum(import_time.self_time for import_time in import_times)
+    slowest = sorted(import_times, key=lambda import_time: -import_time.self_time)[:limit]
+
+    lines = ["Imported %d modules in %.3f seconds, the %d slowest:" % (len(import_times), total / 1e6, len(slowest)),
+             "%10s %12s  %s" % ("self [ms]", "cumul. [ms]", "module")]
+    for import_time in slowest:
+        lines.append("%10.1f %12.1f  %s" % (import_time.self_time / 1e3, import_time.cumulative_time / 1e3,
+                                            import_time.module))
+    return "\n".join(lines) + "\n"
+
+
+def profile_imports(args):
+    """
+    Runs pyb with the given arguments in a child interpreter reporting its import times.
+    Returns the exit code of the child and the import times.
+    """
+    environment = dict(os.environ)
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    environment["PYTHONPATH"] = os.pathsep.join(
+        [package_root] + [path for path in [environment.get("PYTHONPATH")] if path])
+
+    child = subprocess.Popen([sys.executable, "-X", "importtime", "-c", CHILD_COMMAND] + list(args),
+                             stderr=subprocess.PIPE, env=environment, universal_newlines=True)
+    _, error_output = child.communicate()
+    import_times, other_lines = parse_import_times(error_output.splitlines(True))
+    sys.stderr.write("".join(other_lines))
+    return child.returncode, import_times
+
+
+def main(*args):
+    """
+    Command-line entrypoint invoked for `pyb --import-profile ...`.
+    """
+    if not args:
+        args = sys.argv[1:]
+    args = [arg for arg in args if arg != IMPORT_PROFILE_OPTION]
+
+    if sys.version_info < (3, 7):
+        sys.stderr.write("Import profile requires Python 3.7 or later, as it is based on -X importtime\n")
+        return 1
+
+    exit_code, import_times = profile_imports(args)
+    sys.stdout.write("\n" + format_import_profile(import_times))
+    return exit_code
@@ -0,0 +1,479 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of PyBuilder
+#
+#   Copyright 2011-2015 PyBuilder Team
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""
+    The PyBuilder incremental module.
+    Determines whether a task with declared inputs and outputs is up to date,
+    i.e. whether neither its inputs nor its outputs have changed since its last
+    successful execution.
+    Also checkpoints the tasks completed by a build, so that the next build can resume after them.
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import re
+import shutil
+import sys
+import threading
+
+from pybuilder import __version__
+from pybuilder.cache import build_cache_for
+from pybuilder.core import input_properties, outputs_of
+from pybuilder.errors import BuildCacheException
+from pybuilder.utils import mkdir
+
+_STATE_FILE_LOCK = threading.Lock()
+_WILDCARD_PATTERN = re.compile(r"[*?\[]")
+_COMPILED_FILE_SUFFIXES = (".pyc", ".pyo")
+_OBJECT_ADDRESS_PATTERN = re.compile(r" at 0x[0-9a-fA-F]+")
+
+
+def task_state_file(project):
+    return project.expand_path("$dir_target", ".pybuilder", "task_state.json")
+
+
+def checkpoint_file(project):
+    return project.expand_path("$dir_target", ".pybuilder", "checkpoint.json")
+
+
+def checkpoint_files_file(project):
+    return project.expand_path("$dir_target", ".pybuilder", "checkpoint_files.json")
+
+
+def read_task_states(state_file):
+    if not os.path.exists(state_file):
+        return {}
+    try:
+        with open(state_file, "r") as state:
+            return json.load(state)
+    except ValueError:
+        return {}
+
+
+def update_task_state(state_file, task_name, task_state):
+    with _STATE_FILE_LOCK:
+        task_states = read_task_states(state_file)
+        task_states[task_name] = task_state
+        mkdir(os.path.dirname(state_file))
+        with open(state_file, "w") as state:
+            json.dump(task_states, state, indent=1, sort_keys=True)
+
+
+def glob_to_regex(glob):
+    """
+    Translates a glob into a regular expression matching relative paths.
+    "**" matches any number of directories (including none), "*" and "?" do not cross directories.
+    """
+    regex = ""
+    index = 0
+    while index < len(glob):
+        if glob.startswith("**/", index):
+            regex += "(?:.*/)?"
+            index += 3
+        elif glob.startswith("**", index):
+            regex += ".*"
+            index += 2
+        elif glob[index] == "*":
+            regex += "[^/]*"
+            index += 1
+        elif glob[index] == "?":
+            regex += "[^/]"
+            index += 1
+        else:
+            regex += re.escape(glob[index])
+            index += 1
+    return re.compile("^" + regex + "$")
+
+
+def _is_ignored(relative_path, ignore_compiled):
+    for part in relative_path.split("/"):
+        if part.startswith(".") or part == "__pycache__":
+            return True
+    return ignore_compiled and relative_path.endswith(_COMPILED_FILE_SUFFIXES)
+
+
+def _walk_files(directory):
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for file_name in sorted(files):
+            absolute_path = os.path.join(root, file_name)
+            yield absolute_path, os.path.relpath(absolute_path, directory).replace(os.sep, "/")
+
+
+def _split_glob(pattern):
+    parts = pattern.replace(os.sep, "/").split("/")
+    for index, part in enumerate(parts):
+        if _WILDCARD_PATTERN.search(part):
+            return "/".join(parts[:index]) or "/", glob_to_regex("/".join(parts[index:]))
+    return pattern, None
+
+
+def expand_glob(pattern, ignore_compiled=False):
+    """
+    Returns all files matching an absolute glob. A pattern without wildcards matches the file
+    it names or, if it names a directory, all files below that directory.
+    Hidden files and __pycache__ directories never match, compiled bytecode only if ignore_compiled is False.
+    """
+    root, relative_glob = _split_glob(pattern)
+
+    if os.path.isfile(root):
+        return [root]
+    if not os.path.isdir(root):
+        return []
+
+    return [absolute_path for absolute_path, relative_path in _walk_files(root)
+            if not _is_ignored(relative_path, ignore_compiled) and (relative_glob is None or relative_glob.match(relative_path))]
+
+
+def matches_glob(pattern, file_name, ignore_compiled=False):
+    """
+    Returns whether expand_glob(pattern) covers the given absolute file name, even if the file does not exist.
+    """
+    root, relative_glob = _split_glob(pattern)
+    root = os.path.normpath(root.replace("/", os.sep))
+    file_name = os.path.normpath(file_name)
+    if file_name == root:
+        return relative_glob is None
+    relative_path = os.path.relpath(file_name, root).replace(os.sep, "/")
+    if relative_path == ".." or relative_path.startswith("../"):
+        return False
+    if _is_ignored(relative_path, ignore_compiled):
+        return False
+    return relative_glob is None or relative_glob.match(relative_path) is not None
+
+
+def file_digest(file_name):
+    digest = hashlib.sha1()
+    with open(file_name, "rb") as file_handle:
+        for chunk in iter(lambda: file_handle.read(65536), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def property_digest(value):
+    # Functions, e.g. the runner of the unit tests, are created anew by every build
+    return json.dumps(value, sort_keys=True, default=_stable_property_value)
+
+
+def _is_below(path, directories):
+    for directory in directories:
+        if path == directory or path.startswith(directory.rstrip(os.sep) + os.sep):
+            return True
+    return False
+
+
+def implementation_digest(executable):
+    """
+    Returns a digest identifying the implementation of the given executable, i.e. the contents of its module.
+    """
+    try:
+        source_file = inspect.getsourcefile(executable.callable)
+    except TypeError:
+        source_file = None
+    if not source_file or not os.path.isfile(source_file):
+        return executable.source
+    return file_digest(source_file)
+
+
+class TaskUpToDateCheck(object):
+    """
+        Fingerprints the declared inputs and outputs of a task and compares them with the
+        fingerprint recorded after the last successful execution of the task.
+        Input files are fingerprinted by content; a file whose size and modification time did not change
+        since the last execution reuses its recorded digest.
+        If the build cache is enabled the outputs of the task are stored in the cache under a key derived from
+        the fingerprint of its inputs and can be restored from there instead of executing the task.
+    """
+
+    def __init__(self, project, task, execution_manager, logger=None):
+        self.project = project
+        self.task = task
+        self.execution_manager = execution_manager
+        self.logger = logger
+        self.state_file = task_state_file(project)
+        self.build_cache = build_cache_for(project)
+        self.restored_metadata = None
+        self._previous_state = None
+        self._input_files = None
+        self._inputs_digest = None
+
+    def _expand(self, pattern, default_directory):
+        if not pattern.startswith("$"):
+            pattern = default_directory + "/" + pattern
+        return self.project.expand_path(pattern)
+
+    def _relative(self, file_name):
+        return os.path.relpath(file_name, self.project.basedir).replace(os.sep, "/")
+
+    def output_patterns(self, task=None):
+        task = task or self.task
+        return [self._expand(output, "$dir_target") for output in task.outputs]
+
+    def _classify_inputs(self):
+        source_patterns = []
+        upstream_output_patterns = []
+        properties = []
+        for declared_input in self.task.inputs:
+            if isinstance(declared_input, input_properties):
+                properties.extend(declared_input())
+            elif isinstance(declared_input, outputs_of):
+                for task_name in declared_input():
+                    upstream_output_patterns.extend(self.output_patterns(self.execution_manager.get_task(task_name)))
+            else:
+                source_patterns.append(self._expand(declared_input, "$dir_source_main_python"))
+        return source_patterns, upstream_output_patterns, properties
+
+    def is_affected_by(self, file_names):
+        """
+        Returns whether any of the given files, changed or removed, is a declared source input of the task.
+        """
+        source_patterns = self._classify_inputs()[0]
+        return any(matches_glob(pattern, file_name, ignore_compiled=True)
+                   for pattern in source_patterns for file_name in file_names)
+
+    def _files_state(self, patterns, excluded_directories=(), ignore_compiled=False):
+        previous_files = (self._previous_state or {}).get("files", {})
+        files = {}
+        for pattern in patterns:
+            for file_name in expand_glob(pattern, ignore_compiled):
+                if file_name in files or _is_below(file_name, excluded_directories):
+                    continue
+                stat = os.stat(file_name)
+                previous = previous_files.get(file_name)
+                if previous and previous[0] == stat.st_size and previous[1] == stat.st_mtime:
+                    digest = previous[2]
+                else:
+                    digest = file_digest(file_name)
+                files[file_name] = [stat.st_size, stat.st_mtime, digest]
+        return files
+
+    def _fingerprint_inputs(self):
+        source_patterns, upstream_output_patterns, properties = self._classify_inputs()
+        output_directories = [pattern for pattern in self.output_patterns() if not _WILDCARD_PATTERN.search(pattern)]
+        self._input_files = self._files_state(source_patterns, output_directories, ignore_compiled=True)
+        self._input_files.update(self._files_state(upstream_output_patterns, output_directories))
+
+        digest = hashlib.sha1()
+        digest.update(__version__.encode("utf-8"))
+        for executable in self.task.executables:
+            digest.update(implementation_digest(executable).encode("utf-8"))
+        for name in sorted(set(properties)):
+            digest.update(("%s=%s" % (name, property_digest(self.project.get_property(name)))).encode("utf-8"))
+        for file_name in sorted(self._input_files):
+            digest.update(("%s:%s" % (self._relative(file_name), self._input_files[file_name][2])).encode("utf-8"))
+        return digest.hexdigest()
+
+    def _fingerprint_outputs(self):
+        return dict((file_name, state[2]) for file_name, state in
+                    self._files_state(self.output_patterns()).items())
+
+    def _inputs(self):
+        if self._inputs_digest is None:
+            self._inputs_digest = self._fingerprint_inputs()
+        return self._inputs_digest
+
+    def cache_key(self):
+        """
+        Returns the key of the outputs of the task in the build cache. In addition to the fingerprint of
+        the inputs it covers the task, the location of its outputs and the interpreter.
+        """
+        digest = hashlib.sha1()
+        digest.update(self.task.name.encode("utf-8"))
+        digest.update(self._inputs().encode("utf-8"))
+        digest.update(sys.version.encode("utf-8"))
+        for pattern in self.output_patterns():
+            digest.update(self._relative(pattern).encode("utf-8"))
+        return digest.hexdigest()
+
+    def is_up_to_date(self):
+        self._previous_state = read_task_states(self.state_file).get(self.task.name)
+        self._inputs_digest = self._fingerprint_inputs()
+
+        if not self._previous_state:
+            return False
+        if self._previous_state.get("inputs") != self._inputs_digest:
+            return False
+        return self._previous_state.get("outputs") == self._fingerprint_outputs()
+
+    def _remove_outputs(self):
+        for pattern in self.output_patterns():
+            if not _WILDCARD_PATTERN.search(pattern) and os.path.isdir(pattern):
+                shutil.rmtree(pattern)
+            else:
+                for file_name in expand_glob(pattern):
+                    os.remove(file_name)
+
+    def restore_from_cache(self):
+        """
+        Replaces the outputs of the task with the ones stored in the build cache.
+        Returns True if the build cache contained outputs for the current inputs of the task.
+        """
+        if not self.build_cache:
+            return False
+
+        try:
+            manifest = self.build_cache.get(self.cache_key())
+        except (BuildCacheException, IOError, OSError) as e:
+            self._warn("Unable to look up task '%s' in build cache: %s", self.task.name, e)
+            return False
+        if manifest is None:
+            return False
+
+        self._remove_outputs()
+        try:
+            self.build_cache.restore(manifest, self.project.basedir)
+        except (BuildCacheException, IOError, OSError) as e:
+            # e.g. an object evicted by another build meanwhile, the task is executed instead
+            self._warn("Unable to restore outputs of task '%s' from build cache: %s", self.task.name, e)
+            try:
+                self._remove_outputs()
+            except (IOError, OSError):
+                pass
+            return False
+        self.restored_metadata = manifest["metadata"]
+        return True
+
+    def record(self, metadata=None):
+        """
+        Records the fingerprint of the inputs and outputs of the task after its successful execution and stores
+        its outputs in the build cache unless they have just been restored from there.
+        """
+        outputs = self._fingerprint_outputs()
+        update_task_state(self.state_file, self.task.name, {"inputs": self._inputs(),
+                                                            "files": self._input_files,
+                                                            "outputs": outputs})
+
+        if self.build_cache and self.restored_metadata is None:
+            try:
+                self.build_cache.put(self.cache_key(), self.project.basedir, outputs, metadata)
+            except (BuildCacheException, IOError, OSError) as e:
+                self._warn("Unable to store outputs of task '%s' in build cache: %s", self.task.name, e)
+
+    def _warn(self, message, *arguments):
+        if self.logger:
+            self.logger.warn(message, *arguments)
+
+
+def _stable_property_value(value):
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=repr)
+    return _OBJECT_ADDRESS_PATTERN.sub("", repr(value))
+
+
+class BuildCheckpoint(object):
+    """
+        Records the tasks a build completed together with a fingerprint of the project properties and of the
+        files in the source directories and the build descriptor. A build resuming from the checkpoint skips
+        the tasks completed by the previous build if the fingerprint is unchanged.
+        Properties the skipped tasks set while executing are not restored.
+        The size, modification time and digest of every fingerprinted file are written once per build to
+        a file of their own, so that recording a completed task does not rewrite them.
+    """
+
+    def __init__(self, project, project_descriptor=None, logger=None):
+        self.project = project
+        self.project_descriptor = project_descriptor
+        self.logger = logger
+        self.checkpoint_file = checkpoint_file(project)
+        self.files_file = checkpoint_files_file(project)
+        self.fingerprint = None
+        self.completed_tasks = []
+        self.failed_task = None
+        self._files = {}
+        self._lock = threading.Lock()
+
+    def _source_patterns(self):
+        patterns = [self.project.expand_path("$%s" % name) for name in sorted(self.project.properties)
+                    if name.startswith("dir_source_") and self.project.get_property(name)]
+        if self.project_descriptor:
+            patterns.append(self.project_descriptor)
+        return patterns
+
+    def _fingerprint(self, previous_files):
+        files = {}
+        for pattern in self._source_patterns():
+            for file_name in expand_glob(pattern, ignore_compiled=True):
+                if file_name in files:
+                    continue
+                stat = os.stat(file_name)
+                previous = previous_files.get(file_name)
+                if previous and previous[0] == stat.st_size and previous[1] == stat.st_mtime:
+                    digest = previous[2]
+                else:
+                    digest = file_digest(file_name)
+                files[file_name] = [stat.st_size, stat.st_mtime, digest]
+
+        digest = hashlib.sha1()
+        digest.update(__version__.encode("utf-8"))
+        for name in sorted(self.project.properties):
+            value = json.dumps(self.project.get_property(name), sort_keys=True, default=_stable_property_value)
+            digest.update(("%s=%s" % (name, value)).encode("utf-8"))
+        for file_name in sorted(files):
+            digest.update(("%s:%s" % (file_name, files[file_name][2])).encode("utf-8"))
+        return digest.hexdigest(), files
+
+    def begin(self, resume=False):
+        """
+        Fingerprints the project and starts a new checkpoint. When resuming and the fingerprint is the one
+        of the previous checkpoint, the tasks completed before are kept and their names are returned.
+        """
+        previous = read_task_states(self.checkpoint_file)
+        self.fingerprint, self._files = self._fingerprint(read_task_states(self.files_file))
+
+        if resume and previous.get("fingerprint") == self.fingerprint:
+            self.completed_tasks = list(previous.get("tasks", []))
+            if previous.get("failed"):
+                self._info("Resuming build after task '%s' failed", previous["failed"])
+        elif resume and not previous:
+            self._info("Not resuming build as the previous build recorded no checkpoint")
+        elif resume:
+            self._info("Not resuming build as the project changed since the previous build")
+        self._write(self.files_file, self._files)
+        self._save()
+        return list(self.completed_tasks)
+
+    def task_completed(self, task_name):
+        with self._lock:
+            if task_name not in self.completed_tasks:
+                self.completed_tasks.append(task_name)
+            self._save()
+
+    def task_failed(self, task_name):
+        with self._lock:
+            self.failed_task = task_name
+            self._save()
+
+    def _save(self):
+        self._write(self.checkpoint_file, {"fingerprint": self.fingerprint,
+                                           "tasks": self.completed_tasks,
+                                           "failed": self.failed_task})
+
+    def _write(self, file_name, content):
+        try:
+            mkdir(os.path.dirname(file_name))
+            with open(file_name, "w") as checkpoint:
+                json.dump(content, checkpoint, indent=1, sort_keys=True)
+        except (IOError, OSError) as e:
+            if self.logger:
+                self.logger.warn("Unable to write build checkpoint %s: %s", file_name, e)
+
+    def _info(self, message, *arguments):
+        if self.logger:
+            self.logger.info(message, *arguments)
@@ -21,11 +21,6 @@ import re
 import sys
 
 from pybuilder.core import Dependency, RequirementsFile
-from pybuilder.pip_common import (Version,
-                                  SpecifierSet,
-                                  search_packages_info,
-                                  pip_working_set_init,
-                                  _pip_disallows_insecure_packages_by_default)
 from pybuilder.utils import execute_command, as_list
 
 PIP_EXEC_STANZA = [sys.executable, "-m", "pip.__main__"]
@@ -130,6 +125,14 @@ def as_pip_install_target(mixed):
     return arguments
 
 
+# The pip internals wrapped by pybuilder.pip_common take longer to import than the rest of PyB,
+# so they are imported on first use rather than by every build
+def _pip_disallows_insecure_packages_by_default():
+    from pybuilder.pip_common import _pip_disallows_insecure_packages_by_default
+
+    return _pip_disallows_insecure_packages_by_default()
+
+
 def get_package_version(mixed, logger=None):
     def normalize_dependency_package(mixed):
         if isinstance(mixed, RequirementsFile):
@@ -141,6 +144,8 @@ def get_package_version(mixed, logger=None):
         else:
             return mixed
 
+    from pybuilder.pip_common import search_packages_info, pip_working_set_init
+
     package_query = [normalized_package for normalized_package in
                      (normalize_dependency_package(p) for p in as_list(mixed)) if normalized_package]
     pip_working_set_init()
@@ -153,6 +158,8 @@ def version_satisfies_spec(spec, version):
         return True
     if not version:
         return False
+    from pybuilder.pip_common import Version, SpecifierSet
+
     if not isinstance(spec, SpecifierSet):
         spec = SpecifierSet(spec)
     if not isinstance(version, Version):
@@ -166,6 +173,8 @@ def should_update_package(version):
         False otherwise
     """
     if version:
+        from pybuilder.pip_common import SpecifierSet
+
         if not isinstance(version, SpecifierSet):
             version_specifier = SpecifierSet(version)
         else:
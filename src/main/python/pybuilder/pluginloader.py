@@ -29,16 +29,26 @@ from pybuilder.errors import (MissingPluginException,
                               IncompatiblePluginException,
                               UnspecifiedPluginNameException,
                               )
-from pybuilder.pip_utils import (Version, pip_install, version_satisfies_spec, should_update_package)
+from pybuilder.pip_utils import pip_install, version_satisfies_spec, should_update_package
 from pybuilder.utils import read_file
 
 PYPI_PLUGIN_PROTOCOL = "pypi:"
 VCS_PLUGIN_PROTOCOL = "vcs:"
 
-if pyb_version == "${dist_version}":  # This is the case of PyB bootstrap
-    PYB_VERSION = Version('0.0.1.dev0')
-else:
-    PYB_VERSION = Version(pyb_version)
+# Parsed on first use, as parsing the version imports pip
+PYB_VERSION = None
+
+
+def _pyb_version():
+    global PYB_VERSION
+    if PYB_VERSION is None:
+        from pybuilder.pip_common import Version
+
+        if pyb_version == "${dist_version}":  # This is the case of PyB bootstrap
+            PYB_VERSION = Version('0.0.1.dev0')
+        else:
+            PYB_VERSION = Version(pyb_version)
+    return PYB_VERSION
 
 
 class PluginLoader(object):
@@ -200,5 +210,5 @@ def _load_plugin(plugin_module_name, plugin_name):
 
 def _check_plugin_version(plugin_module, plugin_name):
     if hasattr(plugin_module, "pyb_version") and plugin_module.pyb_version:
-        if not version_satisfies_spec(plugin_module.pyb_version, PYB_VERSION):
-            raise IncompatiblePluginException(plugin_name, plugin_module.pyb_version, PYB_VERSION)
+        if not version_satisfies_spec(plugin_module.pyb_version, _pyb_version()):
+            raise IncompatiblePluginException(plugin_name, plugin_module.pyb_version, _pyb_version())
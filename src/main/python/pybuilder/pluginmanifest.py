@@ -0,0 +1,157 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of PyBuilder
+#
+#   Copyright 2011-2015 PyBuilder Team
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""
+    The PyBuilder pluginmanifest module.
+    Describes the tasks and actions a plugin contributes without importing it, so that the reactor
+    can defer loading the plugin until one of them is part of the execution plan.
+"""
+
+import copy
+import os
+
+from pybuilder.execution import TaskDependency
+from pybuilder.utils import as_list
+
+
+def _as_task_dependencies(items):
+    return [item if isinstance(item, TaskDependency) else TaskDependency(item) for item in as_list(items or [])]
+
+
+class ManifestTask(object):
+    def __init__(self, name, description="", dependencies=None, dependents=None):
+        self.name = name
+        self.description = description
+        self.dependencies = _as_task_dependencies(dependencies)
+        self.dependents = _as_task_dependencies(dependents)
+
+
+class ManifestAction(object):
+    """
+        An action that has to be executed whenever one of the tasks it is attached to is.
+        Actions that only support the tasks of their own plugin, like checks for the tools the
+        tasks run, are not part of the manifest.
+    """
+
+    def __init__(self, name, before=None, after=None):
+        self.name = name
+        self.before = as_list(before or [])
+        self.after = as_list(after or [])
+
+
+class PluginManifest(object):
+    """
+        The tasks and triggering actions of a plugin together with the plugins it requires and
+        the property defaults and plugin dependencies its initializers declare. The defaults are
+        applied in place of the initializers for as long as the plugin is not loaded, so that
+        build descriptors can refer to the properties of the plugin either way. A default derived
+        from the project is given as a function of the project.
+    """
+
+    def __init__(self, requires=None, tasks=None, actions=None, properties=None, plugin_dependencies=None):
+        self.requires = as_list(requires or [])
+        self.tasks = as_list(tasks or [])
+        self.actions = as_list(actions or [])
+        self.properties = properties or {}
+        self.plugin_dependencies = as_list(plugin_dependencies or [])
+
+    @property
+    def task_names(self):
+        return [task.name for task in self.tasks]
+
+    def dependency_edges(self):
+        """
+        Returns the names of the tasks every task contributed by the plugin depends on, including
+        the tasks that depend on a contributed task through its dependents.
+        """
+        edges = {}
+        for task in self.tasks:
+            edges.setdefault(task.name, []).extend(dependency.name for dependency in task.dependencies)
+            for dependent in task.dependents:
+                edges.setdefault(dependent.name, []).append(task.name)
+        return edges
+
+    def is_needed_by(self, task_names):
+        """
+        Returns True if a task or a triggering action of the plugin is part of a plan consisting of the given tasks.
+        """
+        for name in self.task_names:
+            if name in task_names:
+                return True
+        for action in self.actions:
+            for name in action.before + action.after:
+                if name in task_names:
+                    return True
+        return False
+
+    def initialize(self, project):
+        for name in sorted(self.properties):
+            default = self.properties[name]
+            project.set_property_if_unset(name, default(project) if callable(default) else copy.deepcopy(default))
+        for dependency in self.plugin_dependencies:
+            project.plugin_depends_on(dependency)
+
+
+BUILTIN_PLUGIN_MANIFESTS = {
+    "python.coverage": PluginManifest(
+        requires=["python.core", "analysis"],
+        actions=[ManifestAction("verify_coverage", after=["analyze", "verify"])],
+        properties={"coverage_threshold_warn": 70,
+                    "coverage_branch_threshold_warn": 0,
+                    "coverage_branch_partial_threshold_warn": 0,
+                    "coverage_break_build": True,
+                    "coverage_reload_modules": None,
+                    "coverage_reset_modules": False,
+                    "coverage_exceptions": [],
+                    "coverage_fork": None,
+                    "coverage_single_pass": False},
+        plugin_dependencies=["coverage"]),
+    "python.flake8": PluginManifest(
+        requires=["python.core"],
+        tasks=[ManifestTask("analyze", dependencies=["prepare"])],
+        properties={"flake8_break_build": False,
+                    "flake8_max_line_length": 120,
+                    "flake8_include_patterns": None,
+                    "flake8_exclude_patterns": None,
+                    "flake8_include_test_sources": False,
+                    "flake8_include_scripts": False},
+        plugin_dependencies=["flake8"]),
+    "python.pdoc": PluginManifest(
+        requires=["core"],
+        tasks=[ManifestTask("compile_docs", "Generates HTML documentation tree with pdoc",
+                            dependencies=["compile_sources", "verify"],
+                            dependents=[TaskDependency("publish", True)])],
+        properties={"pdoc_command_args": ["--html", "--all-submodules", "--overwrite", "--external-links"],
+                    "pdoc_source": "$dir_source_main_python",
+                    "pdoc_output_dir": "$dir_target/pdocs",
+                    "pdoc_module_name": None},
+        plugin_dependencies=["pdoc"]),
+    "python.sphinx": PluginManifest(
+        requires=["core"],
+        tasks=[ManifestTask("sphinx_generate_documentation", "Generates documentation with sphinx",
+                            dependencies=["prepare"]),
+               ManifestTask("sphinx_quickstart", "starts a new sphinx project", dependencies=["prepare"])],
+        properties={"sphinx_source_dir": "docs",
+                    "sphinx_output_dir": os.path.join("docs", "_build", ""),
+                    "sphinx_config_path": "docs",
+                    "sphinx_doc_author": lambda project: ", ".join(author.name for author in project.authors),
+                    "sphinx_doc_builder": "html",
+                    "sphinx_project_name": lambda project: project.name,
+                    "sphinx_project_version": lambda project: project.version},
+        plugin_dependencies=["sphinx"]),
+}
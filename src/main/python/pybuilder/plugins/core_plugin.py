@@ -20,6 +20,8 @@ import os
 import shutil
 from os.path import join
 
+from pybuilder.cache import DEFAULT_MAX_SIZE
+from pybuilder.history import DEFAULT_MAX_BUILDS
 from pybuilder.core import init, task, description, depends, optional
 from pybuilder.pip_utils import get_package_version, version_satisfies_spec, pip_install, as_pip_install_target
 from pybuilder.utils import safe_log_file_name
@@ -31,6 +33,18 @@ def init(project):
     project.set_property("dir_reports", join("$dir_target", "reports"))
     project.set_property("dir_logs", join("$dir_target", "logs"))
 
+    project.set_property_if_unset("build_cache_enabled", False)
+    project.set_property_if_unset("build_cache_dir", None)
+    project.set_property_if_unset("build_cache_max_size", DEFAULT_MAX_SIZE)
+    project.set_property_if_unset("build_cache_remote_url", None)
+    project.set_property_if_unset("build_cache_remote_read_only", False)
+
+    project.set_property_if_unset("build_checkpoint_enabled", False)
+
+    project.set_property_if_unset("build_history_enabled", True)
+    project.set_property_if_unset("build_history_file", join("$dir_target", "build_history.db"))
+    project.set_property_if_unset("build_history_max_builds", DEFAULT_MAX_BUILDS)
+
     def write_report(file, *content):
         with open(project.expand_path("$dir_reports", file), "w") as report_file:
             report_file.writelines(content)
@@ -59,6 +73,10 @@ def prepare(project, logger):
         logger.debug("Creating reports directory %s", reports_directory)
         os.mkdir(reports_directory)
 
+    if not project.plugin_dependencies:
+        # Looking up the installed versions imports pip, which builds without plugin dependencies never need
+        return
+
     plugin_dependency_versions = get_package_version(project.plugin_dependencies, logger)
     for plugin_dependency in project.plugin_dependencies:
         logger.debug("Processing plugin dependency %s" % plugin_dependency)
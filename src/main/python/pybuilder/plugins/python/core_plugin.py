@@ -20,7 +20,7 @@ import os
 import re
 import shutil
 
-from pybuilder.core import init, task, description, use_plugin
+from pybuilder.core import init, task, description, use_plugin, input_properties
 
 HIDDEN_FILE_NAME_PATTERN = re.compile(r'^\..*$')
 
@@ -73,7 +73,9 @@ def init_python_directories(project):
     project.list_scripts = list_scripts
 
 
-@task
+@task(inputs=["**", "$" + SCRIPTS_SOURCES_PROPERTY + "/**",
+              input_properties(DISTRIBUTION_PROPERTY, SCRIPTS_TARGET_PROPERTY)],
+      outputs="$" + DISTRIBUTION_PROPERTY)
 @description("Package a python application.")
 def package(project, logger):
     init_dist_target(project, logger)
@@ -25,9 +25,13 @@ except ImportError as e:
 
 import os
 from distutils import sysconfig
-from pybuilder.core import init, after, use_plugin
+from pybuilder.cache import build_cache_for
+from pybuilder.core import init, after, use_plugin, input_properties
+from pybuilder.execution import Task
+from pybuilder.incremental import TaskUpToDateCheck
 from pybuilder.utils import discover_modules, render_report, fork_process, is_windows
 from pybuilder.errors import BuildFailedException
+from pybuilder.plugins.python.coverage_plugin_helper import COVERED_TASKS_AFTER, coverage_data_file, create_coverage
 
 use_plugin("python.core")
 use_plugin("analysis")
@@ -45,16 +49,21 @@ def init_coverage_properties(project):
     project.set_property_if_unset("coverage_reset_modules", False)
     project.set_property_if_unset("coverage_exceptions", [])
     project.set_property_if_unset("coverage_fork", None)  # deprecated, unused
+    project.set_property_if_unset("coverage_single_pass", False)
 
 
-@after(("analyze", "verify"), only_once=True)
+@after(COVERED_TASKS_AFTER, only_once=True)
 def verify_coverage(project, logger, reactor):
+    if project.get_property("coverage_single_pass"):
+        data_file = coverage_data_file(project, "unittest")
+        if reactor.execution_manager.is_task_executed("run_unit_tests") and os.path.exists(data_file):
+            report_coverage(project, logger, "coverage", "coverage", data_file)
+            return
+        logger.info("No coverage collected by the unit tests, running them again to collect coverage")
     run_coverage(project, logger, reactor, "coverage", "coverage", "run_unit_tests")
 
 
-def run_coverage(project, logger, reactor, execution_prefix, execution_name, target_task, shortest_plan=False):
-    logger.info("Collecting coverage information")
-
+def _warn_about_properties(project, logger, execution_prefix):
     if project.get_property("%s_fork" % execution_prefix) is not None:
         logger.warn(
             "%s_fork is deprecated, coverage always runs in its own fork", execution_prefix)
@@ -70,17 +79,67 @@ def run_coverage(project, logger, reactor, execution_prefix, execution_name, tar
         logger.warn("%s_branch_partial_threshold_warn is 0 and partial branch coverage will not be checked",
                     execution_prefix)
 
+
+def run_coverage(project, logger, reactor, execution_prefix, execution_name, target_task, shortest_plan=False):
+    logger.info("Collecting coverage information")
+    _warn_about_properties(project, logger, execution_prefix)
+
+    coverage_check = _create_coverage_check(project, logger, reactor, execution_prefix, target_task)
+    if coverage_check and coverage_check.restore_from_cache():
+        logger.info("Restored %s from build cache", execution_name)
+        exit_code = coverage_check.restored_metadata.get("exit_code")
+    else:
+        logger.debug("Forking process to do %s analysis", execution_name)
+        exit_code, _ = fork_process(logger,
+                                    target=do_coverage,
+                                    args=(
+                                        project, logger, reactor, execution_prefix, execution_name,
+                                        target_task, shortest_plan))
+        if coverage_check:
+            coverage_check.record({"exit_code": exit_code})
+    _check_exit_code(project, execution_prefix, execution_name, exit_code)
+
+
+def report_coverage(project, logger, execution_prefix, execution_name, data_file):
+    """
+    Reports the coverage collected by the tests in the given data file without running them again.
+    """
+    logger.info("Analyzing coverage information collected by the tests")
+    _warn_about_properties(project, logger, execution_prefix)
+
     logger.debug("Forking process to do %s analysis", execution_name)
     exit_code, _ = fork_process(logger,
-                                target=do_coverage,
-                                args=(
-                                    project, logger, reactor, execution_prefix, execution_name,
-                                    target_task, shortest_plan))
+                                target=do_coverage_report,
+                                args=(project, logger, execution_prefix, execution_name, data_file))
+    _check_exit_code(project, execution_prefix, execution_name, exit_code)
+
+
+def _check_exit_code(project, execution_prefix, execution_name, exit_code):
     if exit_code and project.get_property("%s_break_build" % execution_prefix):
         raise BuildFailedException(
             "Forked %s process indicated failure with error code %d" % (execution_name, exit_code))
 
 
+def _create_coverage_check(project, logger, reactor, execution_prefix, target_task):
+    """
+    Coverage is cacheable if its target task is, as its reports depend on the same inputs plus its own properties.
+    """
+    if not build_cache_for(project):
+        return None
+
+    target = reactor.execution_manager.get_task(target_task)
+    if not target.is_incremental(project):
+        return None
+
+    properties = input_properties(*["%s_%s" % (execution_prefix, name) for name in
+                                    ("threshold_warn", "branch_threshold_warn", "branch_partial_threshold_warn",
+                                     "exceptions", "reset_modules")])
+    coverage_task = Task(execution_prefix, do_coverage, inputs=target.inputs + [properties],
+                         outputs=["$dir_reports/%s" % execution_prefix, "$dir_reports/%s.json" % execution_prefix])
+    coverage_task.executables += target.executables
+    return TaskUpToDateCheck(project, coverage_task, reactor.execution_manager, logger)
+
+
 def do_coverage(project, logger, reactor, execution_prefix, execution_name, target_task, shortest_plan):
     """
     This function MUST ALWAYS execute in a fork.
@@ -113,8 +172,26 @@ def do_coverage(project, logger, reactor, execution_prefix, execution_name, targ
     finally:
         _stop_coverage(project, coverage)
 
+    _report_covered_modules(project, logger, execution_prefix, execution_name, coverage, module_names, True)
+
+
+def do_coverage_report(project, logger, execution_prefix, execution_name, data_file):
+    """
+    This function MUST ALWAYS execute in a fork, as it imports the modules the tests did not import to report them.
+    """
+    sys.path.insert(0, project.expand_path("$dir_source_main_python"))
+    module_names = _discover_modules_to_cover(project)
+
+    coverage = create_coverage(project, data_file)
+    coverage.load()
+
+    _report_covered_modules(project, logger, execution_prefix, execution_name, coverage, module_names, False)
+
+
+def _report_covered_modules(project, logger, execution_prefix, execution_name, coverage, module_names,
+                            imported_by_tests):
     module_exceptions = project.get_property("%s_exceptions" % execution_prefix)
-    modules = _list_all_covered_modules(logger, module_names, module_exceptions)
+    modules = _list_all_covered_modules(logger, module_names, module_exceptions, imported_by_tests)
 
     failure = _build_coverage_report(project, logger, execution_name, execution_prefix, coverage, modules)
     if failure:
@@ -133,7 +210,7 @@ def _stop_coverage(project, coverage):
     project.set_property('__running_coverage', False)
 
 
-def _list_all_covered_modules(logger, module_names, modules_exceptions):
+def _list_all_covered_modules(logger, module_names, modules_exceptions, imported_by_tests=True):
     modules = []
     for module_name in module_names:
         if module_name in modules_exceptions:
@@ -142,7 +219,8 @@ def _list_all_covered_modules(logger, module_names, modules_exceptions):
         try:
             module = sys.modules[module_name]
         except KeyError:
-            logger.warn("Module '%s' was not imported by the covered tests", module_name)
+            if imported_by_tests:
+                logger.warn("Module '%s' was not imported by the covered tests", module_name)
             try:
                 module = __import__(module_name)
             except SyntaxError as e:
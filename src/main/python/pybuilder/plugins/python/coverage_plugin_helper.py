@@ -0,0 +1,97 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of PyBuilder
+#
+#   Copyright 2011-2015 PyBuilder Team
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+"""
+    Collects the coverage of the unit tests while they run, so that the coverage plugin only has to
+    analyze the collected data instead of running the unit tests a second time.
+    Other plugins may import this module, as it does not apply any plugins.
+"""
+
+import os
+
+COVERED_TASKS_AFTER = ("analyze", "verify")
+
+
+def coverage_data_file(project, execution_prefix):
+    return project.expand_path("$dir_reports/%s.coverage" % execution_prefix)
+
+
+def collects_coverage(project, reactor):
+    """
+    Returns True if the unit tests have to collect the coverage data for the coverage plugin: the coverage
+    is collected in a single pass and is going to be verified in this build, but is not already being
+    collected by the coverage plugin running the unit tests itself.
+    """
+    if not project.get_property("coverage_single_pass") or project.get_property("__running_coverage"):
+        return False
+    return any(reactor.execution_manager.is_task_in_current_execution_plan(task_name)
+               for task_name in COVERED_TASKS_AFTER)
+
+
+def create_coverage(project, data_file, data_suffix=None):
+    from coverage import coverage as coverage_factory
+
+    return coverage_factory(data_file=data_file, data_suffix=data_suffix, cover_pylib=False, branch=True,
+                            source=[project.expand_path("$dir_source_main_python")])
+
+
+def discard_coverage_data(project, execution_prefix):
+    """
+    Removes the coverage data collected by a previous run of the tests, which does not match the current one.
+    """
+    data_file = coverage_data_file(project, execution_prefix)
+    if os.path.exists(data_file):
+        os.remove(data_file)
+    return data_file
+
+
+def start_collecting_coverage(project, execution_prefix, data_suffix=None):
+    """
+    Starts collecting coverage data. Processes collecting the data of one run of the tests in parallel save
+    it with distinct data suffixes, to be combined afterwards.
+    """
+    if data_suffix is None:
+        coverage = create_coverage(project, discard_coverage_data(project, execution_prefix))
+        coverage.erase()
+    else:
+        # Coverage.erase() would bind the collected data to the unsuffixed data file
+        data_file = coverage_data_file(project, execution_prefix)
+        if os.path.exists(data_file + "." + data_suffix):
+            os.remove(data_file + "." + data_suffix)
+        coverage = create_coverage(project, data_file, data_suffix)
+    coverage.start()
+    return coverage
+
+
+def stop_collecting_coverage(coverage):
+    coverage.stop()
+    coverage.save()
+
+
+def combine_coverage_data(project, execution_prefix, data_suffixes):
+    """
+    Combines the coverage data saved with the given data suffixes into the data of the tests.
+    """
+    data_file = discard_coverage_data(project, execution_prefix)
+    data_files = [data_file + "." + data_suffix for data_suffix in data_suffixes
+                  if os.path.exists(data_file + "." + data_suffix)]
+    coverage = create_coverage(project, data_file)
+    if data_files:
+        coverage.combine(data_files)
+    coverage.save()
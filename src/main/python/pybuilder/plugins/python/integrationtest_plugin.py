@@ -16,7 +16,6 @@
 #   See the License for the specific language governing permissions and
 #   limitations under the License.
 
-import multiprocessing
 import os
 import sys
 
@@ -80,6 +79,8 @@ def run_integration_tests_sequentially(project, logger):
 
 
 def run_integration_tests_in_parallel(project, logger):
+    import multiprocessing
+
     logger.info("Running integration tests in parallel")
     tests = multiprocessing.Queue()
     reports = ConsumingQueue()
@@ -252,6 +253,8 @@ def run_single_test(logger, project, reports_dir, test, output_test_names=True):
 class ConsumingQueue(object):
 
     def __init__(self):
+        import multiprocessing
+
         self._items = []
         self._queue = multiprocessing.Queue()
 
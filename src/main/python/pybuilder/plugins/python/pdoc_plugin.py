@@ -23,7 +23,7 @@
 """
 import os
 
-from pybuilder.core import task, init, depends, dependents, optional, after, use_plugin
+from pybuilder.core import task, init, depends, dependents, optional, after, use_plugin, input_properties
 from pybuilder.errors import BuildFailedException
 from pybuilder.utils import assert_can_execute, execute_command
 
@@ -55,7 +55,9 @@ def pdoc_prepare(project, logger):
         os.mkdir(pdoc_output_dir)
 
 
-@task("compile_docs", "Generates HTML documentation tree with pdoc")
+@task("compile_docs", "Generates HTML documentation tree with pdoc",
+      inputs=["$pdoc_source/**", input_properties("pdoc_command_args", "pdoc_module_name")],
+      outputs=["$pdoc_output_dir", "$dir_reports/pdoc"])
 @depends("compile_sources", "verify")
 @dependents(optional("publish"))
 def pdoc_compile_docs(project, logger):
@@ -32,6 +32,7 @@ def init_pytddmon_plugin(project):
 @description('Start monitoring tests.')
 def pytddmon(project, logger):
     import os
+    logger.warn("The pytddmon plugin is deprecated, please use 'pyb --watch run_unit_tests'")
     unittest_directory = project.get_property('dir_source_unittest_python')
     environment = os.environ.copy()
     python_path_relative_to_basedir = project.get_property('dir_source_main_python')
@@ -26,6 +26,7 @@ from pybuilder.core import NAME_ATTRIBUTE
 from pybuilder.core import after
 from pybuilder.core import depends
 from pybuilder.core import init
+from pybuilder.core import input_properties
 from pybuilder.core import task
 from pybuilder.core import use_plugin
 from pybuilder.errors import BuildFailedException
@@ -96,7 +97,10 @@ def run_sphinx_build(build_command, task_name, logger, project):
         raise BuildFailedException("Sphinx build command failed. See %s for details.", log_file)
 
 
-@task("sphinx_generate_documentation", "Generates documentation with sphinx")
+@task("sphinx_generate_documentation", "Generates documentation with sphinx",
+      inputs=["$sphinx_source_dir/**", "$sphinx_config_path/**", "**",
+              input_properties("sphinx_doc_builder", "sphinx_project_name", "sphinx_project_version")],
+      outputs="$sphinx_output_dir")
 @depends("prepare")
 def sphinx_generate(project, logger):
     """Runs sphinx-build against rst sources for the given project.
@@ -0,0 +1,304 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of PyBuilder
+#
+#   Copyright 2011-2015 PyBuilder Team
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""
+    Selects the test modules affected by changed files from the import graph of the test and production
+    sources, which is derived from their syntax trees without importing them. The imports of every file
+    are cached by the content of the file. Changes to other files of the source directories or to the
+    properties influencing the tests have an unknown impact, so all test modules are selected then.
+    Other plugins may import this module, as it does not apply any plugins.
+"""
+
+import ast
+import json
+import os
+
+from pybuilder.cache import is_enabled
+from pybuilder.graph_utils import Graph
+from pybuilder.incremental import expand_glob, file_digest, property_digest
+from pybuilder.plugins.python.test_result_cache_plugin_helper import fingerprinted_properties
+from pybuilder.utils import discover_files_matching, mkdir
+from pybuilder.vcs import changed_files as vcs_changed_files
+
+GIT_CHANGES = "git"
+STATE_CHANGES = "state"
+CHANGE_SOURCES = (GIT_CHANGES, STATE_CHANGES)
+
+
+def impact_state_file(project, execution_prefix):
+    return project.expand_path("$dir_target", ".pybuilder", "%s_impact.json" % execution_prefix)
+
+
+def module_name_of(source_directory, file_name):
+    module_name = os.path.relpath(file_name, source_directory)[:-len(".py")].replace(os.sep, ".")
+    if module_name == "__init__":
+        return None
+    if module_name.endswith(".__init__"):
+        module_name = module_name[:-len(".__init__")]
+    return module_name
+
+
+def source_modules(source_directory):
+    """
+    Returns a dictionary mapping the names of the modules found in the given directory to their files.
+    """
+    modules = {}
+    for file_name in discover_files_matching(source_directory, "*.py"):
+        module_name = module_name_of(source_directory, file_name)
+        if module_name:
+            modules[module_name] = os.path.abspath(file_name)
+    return modules
+
+
+def parse_imports(source, module_name, is_package=False):
+    """
+    Returns the names of the modules imported by the given source, relative imports resolved.
+    `from package import name` imports both, as name may be a module.
+    """
+    package = module_name if is_package else module_name.rpartition(".")[0]
+    imports = set()
+    for node in ast.walk(ast.parse(source)):
+        if isinstance(node, ast.Import):
+            imports.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            base = node.module or ""
+            if node.level:
+                parts = package.split(".") if package else []
+                parts = parts[:len(parts) - node.level + 1] if node.level > 1 else parts
+                base = ".".join(part for part in parts + [base] if part)
+            if base:
+                imports.add(base)
+            imports.update("%s.%s" % (base, alias.name) if base else alias.name
+                           for alias in node.names if alias.name != "*")
+    return sorted(imports)
+
+
+class ImportGraph(object):
+    """
+        The modules of the given source directories with the modules they import. The imports of a file
+        are taken from the given file states, a dictionary mapping files to their size, modification
+        time, digest and imports, as long as the file has the same content. The other files of the
+        source directories are part of the file states without imports.
+    """
+
+    def __init__(self, source_directories, file_states=None):
+        self.source_directories = [os.path.abspath(directory) for directory in source_directories]
+        self.modules = {}
+        for source_directory in self.source_directories:
+            for module_name, file_name in source_modules(source_directory).items():
+                self.modules.setdefault(module_name, file_name)
+
+        previous_states = file_states or {}
+        self.file_states = {}
+        edges = {}
+        for module_name, file_name in self.modules.items():
+            imports = self._imports_of(module_name, file_name, previous_states.get(file_name))
+            edges[module_name] = sorted(set(known_module for imported in imports
+                                            for known_module in self._known_modules(imported)
+                                            if known_module != module_name))
+        self.graph = Graph(edges)
+
+        for source_directory in self.source_directories:
+            for file_name in expand_glob(source_directory, ignore_compiled=True):
+                if not file_name.endswith(".py"):
+                    self._digest_of(file_name, previous_states.get(file_name))
+
+    def _digest_of(self, file_name, previous_state):
+        stat = os.stat(file_name)
+        if previous_state and previous_state[0] == stat.st_size and previous_state[1] == stat.st_mtime:
+            self.file_states[file_name] = previous_state
+            return previous_state[2]
+        self.file_states[file_name] = [stat.st_size, stat.st_mtime, file_digest(file_name), []]
+        return self.file_states[file_name][2]
+
+    def _imports_of(self, module_name, file_name, previous_state):
+        stat = os.stat(file_name)
+        if previous_state and previous_state[0] == stat.st_size and previous_state[1] == stat.st_mtime:
+            self.file_states[file_name] = previous_state
+            return previous_state[3]
+
+        digest = file_digest(file_name)
+        if previous_state and previous_state[2] == digest:
+            imports = previous_state[3]
+        else:
+            with open(file_name, "rb") as source_file:
+                source = source_file.read()
+            try:
+                imports = parse_imports(source, module_name, os.path.basename(file_name) == "__init__.py")
+            except SyntaxError:
+                imports = []
+        self.file_states[file_name] = [stat.st_size, stat.st_mtime, digest, imports]
+        return imports
+
+    def _known_modules(self, imported):
+        """
+        Returns the modules of the graph executed by importing the given module, i.e. the module
+        and its packages.
+        """
+        parts = imported.split(".")
+        return [name for name in (".".join(parts[:length]) for length in range(1, len(parts) + 1))
+                if name in self.modules]
+
+    def digests(self):
+        return dict((file_name, state[2]) for file_name, state in self.file_states.items())
+
+    def module_of_file(self, file_name):
+        for module_name, module_file in self.modules.items():
+            if module_file == file_name:
+                return module_name
+        return None
+
+    def dependencies(self, module_name):
+        """
+        Returns the modules imported by the given module, directly or transitively, and the module itself.
+        """
+        return set([module_name] + self.graph.reachable_from(module_name))
+
+    def imports(self, module_name):
+        """
+        Returns the names imported by the given module as written, including modules no longer found.
+        """
+        return self.file_states[self.modules[module_name]][3]
+
+
+def import_graph(project, execution_prefix, source_directories):
+    """
+    Returns the import graph of the given source directories, reusing and updating the imports cached
+    for the files of the project.
+    """
+    state_file = impact_state_file(project, execution_prefix)
+    impact_state = read_impact_state(state_file)
+    graph = ImportGraph(source_directories, impact_state.get("files"))
+    impact_state["files"] = graph.file_states
+    write_impact_state(state_file, impact_state)
+    return graph
+
+
+def read_impact_state(state_file):
+    if not os.path.exists(state_file):
+        return {}
+    try:
+        with open(state_file, "r") as state:
+            return json.load(state)
+    except ValueError:
+        return {}
+
+
+def write_impact_state(state_file, impact_state):
+    mkdir(os.path.dirname(state_file))
+    with open(state_file, "w") as state:
+        json.dump(impact_state, state)
+
+
+def run_state(project, execution_prefix, graph):
+    """
+    Returns the state of a run, the digests of the files of the graph and of the properties influencing the tests.
+    """
+    return {"files": graph.digests(),
+            "properties": property_digest(fingerprinted_properties(project, execution_prefix))}
+
+
+def changed_files_since(graph, passed_digests):
+    """
+    Returns the files of the graph whose content differs from the digests recorded after the last
+    successful run, and the recorded files which no longer exist.
+    """
+    digests = graph.digests()
+    changed = [file_name for file_name, digest in digests.items() if passed_digests.get(file_name) != digest]
+    changed.extend(file_name for file_name in passed_digests if file_name not in digests)
+    return sorted(changed)
+
+
+def affected_test_modules(graph, test_modules, changed_files):
+    """
+    Returns the test modules importing a changed module directly or transitively, or None if a changed
+    file is not a Python module of the source directories, so that its impact is unknown.
+    """
+    changed_modules = set()
+    for file_name in changed_files:
+        module_name = graph.module_of_file(file_name)
+        if module_name is None:
+            source_directory = [directory for directory in graph.source_directories
+                                if file_name.startswith(os.path.join(directory, ""))]
+            if not file_name.endswith(".py") or not source_directory:
+                return None
+            # a deleted module affects the modules still importing it
+            module_name = module_name_of(source_directory[0], file_name)
+        changed_modules.add(module_name)
+
+    affected = []
+    for test_module in test_modules:
+        dependencies = graph.dependencies(test_module)
+        imported = set(name for module_name in dependencies for name in graph.imports(module_name))
+        if dependencies & changed_modules or imported & changed_modules:
+            affected.append(test_module)
+    return affected
+
+
+def select_affected_tests(project, logger, execution_prefix, test_modules, graph):
+    """
+    Returns the test modules affected by the changes since the last successful run or compared to git HEAD,
+    as configured, or all test modules if a full run is forced or the changes cannot be determined.
+    Also returns the state of the run, to be recorded by record_successful_run.
+    """
+    impact_state = read_impact_state(impact_state_file(project, execution_prefix))
+    state = run_state(project, execution_prefix, graph)
+    if is_enabled(project.get_property("%s_impact_full_run" % execution_prefix, False)):
+        logger.info("Running all test modules, as a full run is forced")
+        return test_modules, state
+
+    change_source = project.get_property("%s_impact_changes" % execution_prefix) or STATE_CHANGES
+    if change_source == GIT_CHANGES:
+        changed_files = vcs_changed_files(project.basedir, project.get_property("%s_impact_git_base" %
+                                                                                execution_prefix) or "HEAD")
+        if changed_files is None:
+            logger.warn("Running all test modules, as the changed files cannot be determined with git")
+            return test_modules, state
+    elif change_source == STATE_CHANGES:
+        passed = impact_state.get("passed")
+        if not isinstance(passed, dict) or "files" not in passed:
+            logger.info("Running all test modules, as no previous run succeeded")
+            return test_modules, state
+        if passed.get("properties") != state["properties"]:
+            logger.info("Running all test modules, as properties influencing the tests changed")
+            return test_modules, state
+        changed_files = changed_files_since(graph, passed["files"])
+    else:
+        logger.warn("Running all test modules, as '%s' is no source of changes, expected one of %s",
+                    change_source, ", ".join(CHANGE_SOURCES))
+        return test_modules, state
+
+    changed_files = [os.path.abspath(file_name) for file_name in changed_files]
+    affected = affected_test_modules(graph, test_modules, changed_files)
+    if affected is None:
+        logger.info("Running all test modules, as files other than Python modules of the sources changed")
+        return test_modules, state
+
+    logger.info("Running %d of %d test modules affected by %d changed file(s)",
+                len(affected), len(test_modules), len(changed_files))
+    return affected, state
+
+
+def record_successful_run(project, execution_prefix, state):
+    """
+    Records the state of the run after the tests passed, as the state the next run is compared to.
+    """
+    state_file = impact_state_file(project, execution_prefix)
+    impact_state = read_impact_state(state_file)
+    impact_state["passed"] = state
+    write_impact_state(state_file, impact_state)
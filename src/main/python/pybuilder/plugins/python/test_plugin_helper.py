@@ -16,6 +16,7 @@
 #   See the License for the specific language governing permissions and
 #   limitations under the License.
 
+from pybuilder import events
 from pybuilder.errors import BuildFailedException
 from pybuilder.utils import render_report
 from pybuilder.ci_server_interaction import test_proxy_for
@@ -36,6 +37,8 @@ class ReportsProcessor(object):
             if not report['success']:
                 self.tests_failed += 1
             self.tests_executed += 1
+            events.emit(events.TEST_FINISHED, suite="integrationtest", test=report['test'],
+                        successful=bool(report['success']), duration=report.get('time'))
 
     @property
     def test_report(self):
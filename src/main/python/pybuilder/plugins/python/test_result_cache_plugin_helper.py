@@ -0,0 +1,162 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of PyBuilder
+#
+#   Copyright 2011-2015 PyBuilder Team
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""
+    Caches the outcome of test modules that passed, keyed by a fingerprint of the module, the modules it
+    imports from the sources, the interpreter and the properties influencing the tests. A module with the
+    fingerprint of a passing run is reported from the cache instead of being executed again.
+    Modules installed outside the source directories are not part of the fingerprint.
+    Other plugins may import this module, as it does not apply any plugins.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sys
+
+from pybuilder.utils import mkdir
+
+
+def result_cache_file(project, execution_prefix):
+    return project.expand_path("$dir_target", ".pybuilder", "%s_results.json" % execution_prefix)
+
+
+def fingerprint(graph, test_module, properties):
+    """
+    Returns the fingerprint of the given test module from the digests of the modules it imports directly or
+    transitively, the interpreter and the given properties, a list of property names and values.
+    """
+    key = hashlib.sha1()
+    key.update(sys.executable.encode("utf-8"))
+    key.update(sys.version.encode("utf-8"))
+    digests = graph.digests()
+    for module_name in sorted(graph.dependencies(test_module)):
+        key.update(("%s=%s\n" % (module_name, digests[graph.modules[module_name]])).encode("utf-8"))
+    for name, value in properties:
+        key.update(("%s=%r\n" % (name, value)).encode("utf-8"))
+    return key.hexdigest()
+
+
+def fingerprinted_properties(project, execution_prefix):
+    names = ["%s_test_method_prefix" % execution_prefix]
+    names.extend(project.get_property("%s_result_cache_properties" % execution_prefix) or [])
+    return [(name, project.get_property(name)) for name in names]
+
+
+def read_result_cache(cache_file):
+    if not os.path.exists(cache_file):
+        return {}
+    try:
+        with open(cache_file, "r") as cache:
+            results = json.load(cache)
+    except ValueError:
+        return {}
+    return results if isinstance(results, dict) else {}
+
+
+def write_result_cache(cache_file, results):
+    mkdir(os.path.dirname(cache_file))
+    with open(cache_file, "w") as cache:
+        json.dump(results, cache)
+
+
+class TestResultCache(object):
+    """
+        The cached outcomes of the passing test modules of an execution prefix, e.g. unittest.
+    """
+
+    def __init__(self, project, execution_prefix, graph):
+        self.cache_file = result_cache_file(project, execution_prefix)
+        self.results = read_result_cache(self.cache_file)
+        self.graph = graph
+        self.properties = fingerprinted_properties(project, execution_prefix)
+        self.fingerprints = {}
+
+    def fingerprint(self, test_module):
+        if test_module not in self.fingerprints:
+            self.fingerprints[test_module] = fingerprint(self.graph, test_module, self.properties)
+        return self.fingerprints[test_module]
+
+    def cached_tests(self, test_module):
+        """
+        Returns the tests of the given module reported by its last run, if it passed with the same fingerprint,
+        as dictionaries with the id of the test and its duration, else None.
+        """
+        cached = self.results.get(test_module)
+        if not cached or test_module not in self.graph.modules or cached.get("fingerprint") != self.fingerprint(
+                test_module):
+            return None
+        return cached["tests"]
+
+    def partition(self, test_modules):
+        """
+        Splits the given test modules into the ones to execute and a dictionary mapping the cached ones to
+        their tests.
+        """
+        executed = []
+        cached = {}
+        for test_module in test_modules:
+            cached_tests = self.cached_tests(test_module)
+            if cached_tests is None:
+                executed.append(test_module)
+            else:
+                cached[test_module] = cached_tests
+        return executed, cached
+
+    def record(self, executed_modules, result):
+        """
+        Caches the executed modules that passed and forgets the ones that did not, so that they always run again.
+        """
+        failed_tests = [_test_id(test) for test, _ in result.errors + result.failures]
+        failed_tests.extend(_test_id(test) for test in getattr(result, "unexpectedSuccesses", []))
+        test_timers = getattr(result, "test_timers", {})
+        tests_by_module = dict((test_module, []) for test_module in executed_modules)
+        for test in getattr(result, "test_names", []):
+            test_module = module_of_test(_test_id(test), executed_modules)
+            timer = test_timers.get(test)
+            if test_module:
+                tests_by_module[test_module].append({"test": _test_id(test),
+                                                     "time": timer.get_millis() if timer else 0,
+                                                     "cpu_time": timer.get_cpu_millis() if timer else 0})
+
+        # e.g. errors of the loader, which might have prevented the tests of any module from running
+        unattributed_failures = [test_id for test_id in failed_tests
+                                 if not any(_mentions_module(test_id, test_module) for test_module in executed_modules)]
+        for test_module in executed_modules:
+            if (unattributed_failures or test_module not in self.graph.modules or
+                    any(_mentions_module(test_id, test_module) for test_id in failed_tests)):
+                self.results.pop(test_module, None)
+            else:
+                self.results[test_module] = {"fingerprint": self.fingerprint(test_module),
+                                             "tests": tests_by_module[test_module]}
+        write_result_cache(self.cache_file, self.results)
+
+
+def module_of_test(test_id, test_modules):
+    matching = [test_module for test_module in test_modules if test_id.startswith(test_module + ".")]
+    return max(matching, key=len) if matching else None
+
+
+def _mentions_module(test_id, test_module):
+    # failing fixtures are reported as e.g. "setUpClass (module.Class)"
+    return re.search(r"(^|[ (])%s($|[.)])" % re.escape(test_module), test_id) is not None
+
+
+def _test_id(test):
+    return test.id() if hasattr(test, "id") else str(test)
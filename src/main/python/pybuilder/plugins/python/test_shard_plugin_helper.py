@@ -0,0 +1,114 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of PyBuilder
+#
+#   Copyright 2011-2015 PyBuilder Team
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""
+    Splits test modules into shards of about the same duration, so that the shards can run on separate
+    CI nodes. The modules are packed greedily, the longest first, by the durations recorded in the reports
+    of previous runs, or by their file size when they have no recorded duration.
+    Every node has to split the modules alike, i.e. all nodes have to be given the same reports.
+    Other plugins may import this module, as it does not apply any plugins.
+"""
+
+import glob
+import json
+import os
+
+from pybuilder.errors import BuildFailedException
+
+
+def parse_shard(shard):
+    """
+    Returns the one-based index and the number of shards of a shard given as "index/count", e.g. "3/8".
+    """
+    try:
+        index, count = [int(part) for part in str(shard).split("/")]
+    except ValueError:
+        raise BuildFailedException("Invalid shard '%s', expected e.g. '3/8' to run the third of eight shards" % shard)
+    if count < 1 or not 1 <= index <= count:
+        raise BuildFailedException("Invalid shard '%s', the index has to be between 1 and the number of shards"
+                                   % shard)
+    return index, count
+
+
+def recorded_module_durations(report_files):
+    """
+    Returns a dictionary mapping test modules to their wall time in milliseconds as recorded in the given
+    reports. Modules found in several reports take the duration of the last one.
+    """
+    durations = {}
+    for report_file in report_files:
+        try:
+            with open(report_file, "r") as report_handle:
+                report = json.load(report_handle)
+        except (IOError, OSError, ValueError):
+            continue
+        if not isinstance(report, dict):
+            continue
+        for module in report.get("modules") or []:
+            if isinstance(module, dict) and "module" in module and "time" in module:
+                durations[module["module"]] = module["time"]
+    return durations
+
+
+def module_weights(module_files, durations):
+    """
+    Returns the weights of the given modules, a dictionary mapping them to their files, as their recorded
+    durations. Modules without a duration are weighted by their file size, scaled by the time per byte of the
+    modules with a duration.
+    """
+    sizes = dict((module, os.path.getsize(file_name) if os.path.exists(file_name) else 0)
+                 for module, file_name in module_files.items())
+    timed = [module for module in module_files if module in durations]
+    timed_size = sum(sizes[module] for module in timed)
+    millis_per_byte = float(sum(durations[module] for module in timed)) / timed_size if timed_size else 1.0
+    return dict((module, durations[module] if module in durations else sizes[module] * millis_per_byte)
+                for module in module_files)
+
+
+def split_into_shards(weights, count):
+    """
+    Packs the modules into the given number of shards, each module into the shard with the least weight so
+    far, the heaviest module first. Returns the modules of every shard in the order of their names.
+    """
+    shards = [[] for _ in range(count)]
+    loads = [0] * count
+    for module in sorted(weights, key=lambda module: (-weights[module], module)):
+        lightest = min(range(count), key=lambda shard: (loads[shard], shard))
+        shards[lightest].append(module)
+        loads[lightest] += weights[module]
+    return [sorted(shard) for shard in shards]
+
+
+def select_shard(project, logger, execution_prefix, test_dir, test_modules):
+    """
+    Returns the test modules of the shard configured as property <execution_prefix>_shard, balanced by the
+    durations recorded in the reports matching the patterns of property <execution_prefix>_shard_durations.
+    """
+    index, count = parse_shard(project.get_property("%s_shard" % execution_prefix))
+    report_files = sorted(set(report_file
+                              for pattern in project.get_property("%s_shard_durations" % execution_prefix) or []
+                              for report_file in glob.glob(project.expand_path(pattern))))
+    durations = recorded_module_durations(report_files)
+    module_files = dict((module, os.path.join(test_dir, *module.split(".")) + ".py") for module in test_modules)
+    weights = module_weights(module_files, durations)
+    shard = split_into_shards(weights, count)[index - 1]
+
+    logger.info("Running shard %d of %d with %d of %d test modules, weighted by %d recorded durations",
+                index, count, len(shard), len(test_modules), len([module for module in test_modules
+                                                                  if module in durations]))
+    return [module for module in test_modules if module in shard]
@@ -23,19 +23,41 @@ try:
 except ImportError as e:
     from io import StringIO
 
+try:
+    from queue import Empty
+except ImportError:
+    from Queue import Empty
+
 import sys
 import unittest
 
-from pybuilder.core import init, task, description, use_plugin
+from pybuilder import events
+from pybuilder.cache import is_enabled
+from pybuilder.core import init, task, description, use_plugin, input_properties
 from pybuilder.errors import BuildFailedException
-from pybuilder.utils import discover_modules_matching, render_report, fork_process
+from pybuilder.utils import discover_modules_matching, render_report, fork_process, is_windows, odict, Timer
+from pybuilder.zygote import preload_module_names, preload_modules
 from pybuilder.ci_server_interaction import test_proxy_for
 from pybuilder.terminal import print_text_line
+from pybuilder.plugins.python.coverage_plugin_helper import (collects_coverage,
+                                                             combine_coverage_data,
+                                                             discard_coverage_data,
+                                                             start_collecting_coverage,
+                                                             stop_collecting_coverage)
+from pybuilder.plugins.python.test_impact_plugin_helper import (import_graph,
+                                                                record_successful_run,
+                                                                select_affected_tests)
+from pybuilder.plugins.python.test_result_cache_plugin_helper import TestResultCache
+from pybuilder.plugins.python.test_shard_plugin_helper import select_shard
 from types import MethodType, FunctionType
 from functools import reduce
 
 use_plugin("python.core")
 
+MODULE_GRANULARITY = "module"
+CLASS_GRANULARITY = "class"
+GRANULARITIES = (MODULE_GRANULARITY, CLASS_GRANULARITY)
+
 
 @init
 def init_test_source_directory(project):
@@ -50,25 +72,55 @@ def init_test_source_directory(project):
     project.set_property_if_unset("unittest_module_glob", "*_tests")
     project.set_property_if_unset("unittest_file_suffix", None)  # deprecated, use unittest_module_glob.
     project.set_property_if_unset("unittest_test_method_prefix", None)
+    # skip unchanged tests, changes of installed packages, the interpreter or the environment are not detected
+    project.set_property_if_unset("unittest_incremental", False)
+    project.set_property_if_unset("unittest_parallel", False)
+    project.set_property_if_unset("unittest_parallel_granularity", MODULE_GRANULARITY)
+    project.set_property_if_unset("unittest_parallel_workers", None)  # defaults to the number of CPUs
+    project.set_property_if_unset("unittest_impact_analysis", False)
+    project.set_property_if_unset("unittest_impact_changes", "state")  # or "git"
+    project.set_property_if_unset("unittest_impact_git_base", "HEAD")
+    project.set_property_if_unset("unittest_impact_full_run", False)
+    project.set_property_if_unset("unittest_result_cache", False)
+    # names of further properties influencing the tests, a change invalidates the results and the impact state
+    project.set_property_if_unset("unittest_result_cache_properties", [])
+    project.set_property_if_unset("unittest_slowest_tests", 10)
+    project.set_property_if_unset("unittest_shard", None)  # e.g. "3/8" to run the third of eight shards
+    project.set_property_if_unset("unittest_shard_durations", [])  # reports of previous runs, see select_shard
+    # third-party modules to import before forking, lines of project modules imported early escape coverage
+    project.set_property_if_unset("unittest_preload_modules", [])
     project.set_property_if_unset("unittest_runner", (
         lambda stream: __import__("xmlrunner").XMLTestRunner(output=project.expand_path("$dir_target/reports"),
                                                              stream=stream), "_make_result"))
 
 
-@task
+@task(inputs=["**", "$dir_source_unittest_python/**",
+              input_properties("unittest_module_glob", "unittest_file_suffix", "unittest_test_method_prefix",
+                               "unittest_parallel", "unittest_parallel_granularity", "unittest_parallel_workers",
+                               "unittest_impact_analysis", "unittest_impact_changes", "unittest_impact_git_base",
+                               "unittest_impact_full_run", "unittest_result_cache", "unittest_result_cache_properties",
+                               "unittest_slowest_tests", "unittest_shard", "unittest_shard_durations",
+                               "unittest_preload_modules", "unittest_runner", "coverage_single_pass")],
+      outputs=["$dir_reports/unittest", "$dir_reports/unittest.json", "$dir_reports/TEST-*.xml",
+               "$dir_reports/unittest.coverage"],
+      incremental="unittest_incremental")
 @description("Runs unit tests based on Python's unittest module")
-def run_unit_tests(project, logger):
-    run_tests(project, logger, "unittest", "unit tests")
+def run_unit_tests(project, logger, reactor):
+    collect_coverage = collects_coverage(project, reactor)
+    if not collect_coverage:
+        discard_coverage_data(project, "unittest")
+    run_tests(project, logger, "unittest", "unit tests", collect_coverage=collect_coverage)
 
 
-def run_tests(project, logger, execution_prefix, execution_name):
+def run_tests(project, logger, execution_prefix, execution_name, collect_coverage=False):
     logger.info("Running %s", execution_name)
     if not project.get_property('__running_coverage'):
+        preload_test_dependencies(project, logger, execution_prefix, execution_name)
         logger.debug("Forking process to run %s", execution_name)
         exit_code, _ = fork_process(logger,
                                     target=do_run_tests,
                                     args=(
-                                        project, logger, execution_prefix, execution_name))
+                                        project, logger, execution_prefix, execution_name, collect_coverage))
         if exit_code:
             raise BuildFailedException(
                 "Forked %s process indicated failure with error code %d" % (execution_name, exit_code))
@@ -76,7 +128,24 @@ def run_tests(project, logger, execution_prefix, execution_name):
         do_run_tests(project, logger, execution_prefix, execution_name)
 
 
-def do_run_tests(project, logger, execution_prefix, execution_name):
+def preload_test_dependencies(project, logger, execution_prefix, execution_name):
+    """
+    Imports the modules of property <execution_prefix>_preload_modules in the build process, which thus becomes
+    the zygote the test process is forked from, and reports the import time saved by earlier preloads.
+    """
+    module_names = preload_module_names(project.get_property("%s_preload_modules" % execution_prefix))
+    if not module_names:
+        return
+    report = preload_modules(module_names, logger)
+    if report.imported:
+        logger.info("Preloaded %d modules for %s in %.2f s", len(report.imported), execution_name,
+                    report.import_time)
+    if report.preloaded:
+        logger.info("Forking %s with %d preloaded modules, saving %.2f s of imports", execution_name,
+                    len(report.preloaded), report.saved_time)
+
+
+def do_run_tests(project, logger, execution_prefix, execution_name, collect_coverage=False):
     test_dir = _register_test_and_source_path_and_return_test_dir(project, sys.path, execution_prefix)
 
     file_suffix = project.get_property("%s_file_suffix" % execution_prefix)
@@ -94,23 +163,47 @@ def do_run_tests(project, logger, execution_prefix, execution_name):
     logger.info("Executing %s from Python modules in %s", execution_name, test_dir)
     logger.debug("Including files matching '%s'", module_glob)
 
+    selected_modules, impact_state, result_cache, cached_tests = _select_test_modules(
+        project, logger, execution_prefix, execution_name, test_dir, module_glob, collect_coverage)
+
     try:
         test_method_prefix = project.get_property("%s_test_method_prefix" % execution_prefix)
         runner_generator = project.get_property("%s_runner" % execution_prefix)
-        result, console_out = execute_tests_matching(runner_generator, logger, test_dir, module_glob,
-                                                     test_method_prefix)
-
-        if result.testsRun == 0:
+        if collect_coverage:
+            logger.debug("Collecting coverage of %s", execution_name)
+        if project.get_property("%s_parallel" % execution_prefix) and not is_windows():
+            result, console_out = execute_tests_in_parallel(project, logger, runner_generator, test_dir, module_glob,
+                                                            test_method_prefix, execution_prefix, collect_coverage,
+                                                            selected_modules)
+        else:
+            coverage = start_collecting_coverage(project, execution_prefix) if collect_coverage else None
+            try:
+                result, console_out = execute_tests_matching(runner_generator, logger, test_dir, module_glob,
+                                                             test_method_prefix, selected_modules)
+            finally:
+                if coverage:
+                    stop_collecting_coverage(coverage)
+
+        result.cached_tests = [dict(test, module=test_module)
+                               for test_module in sorted(cached_tests) for test in cached_tests[test_module]]
+        if result.testsRun == 0 and not result.cached_tests:
             logger.warn("No %s executed.", execution_name)
+        elif result.cached_tests:
+            logger.info("Executed %d %s, %d reported from the result cache", result.testsRun, execution_name,
+                        len(result.cached_tests))
         else:
             logger.info("Executed %d %s", result.testsRun, execution_name)
 
         write_report(execution_prefix, project, logger, result, console_out)
+        if result_cache:
+            result_cache.record(selected_modules, result)
 
         if not result.wasSuccessful():
             raise BuildFailedException("There were %d error(s) and %d failure(s) in %s"
                                        % (len(result.errors), len(result.failures), execution_name))
         logger.info("All %s passed.", execution_name)
+        if impact_state is not None:
+            record_successful_run(project, execution_prefix, impact_state)
     except ImportError as e:
         import traceback
 
@@ -122,18 +215,68 @@ def do_run_tests(project, logger, execution_prefix, execution_name):
         raise BuildFailedException("Unable to execute %s." % execution_name)
 
 
+def _select_test_modules(project, logger, execution_prefix, execution_name, test_dir, module_glob, collect_coverage):
+    """
+    Returns the test modules to execute, or None for all of them, the state of the sources to record
+    after a successful run of the affected modules, the result cache and the tests reported from it by module.
+    """
+    shard = project.get_property("%s_shard" % execution_prefix)
+    impact_analysis = is_enabled(project.get_property("%s_impact_analysis" % execution_prefix))
+    use_result_cache = is_enabled(project.get_property("%s_result_cache" % execution_prefix))
+    if collect_coverage or project.get_property("__running_coverage"):
+        if shard:
+            raise BuildFailedException("Unable to measure the coverage of shard %s of the %s, "
+                                       "as it covers only part of them" % (shard, execution_name))
+        if impact_analysis or use_result_cache:
+            logger.info("Executing all %s, as their coverage is measured", execution_name)
+        return None, None, None, {}
+    if not shard and not impact_analysis and not use_result_cache:
+        return None, None, None, {}
+
+    selected_modules = discover_modules_matching(test_dir, module_glob)
+    if shard:
+        selected_modules = select_shard(project, logger, execution_prefix, test_dir, selected_modules)
+    if not impact_analysis and not use_result_cache:
+        return selected_modules, None, None, {}
+
+    graph = import_graph(project, execution_prefix, [project.expand_path("$dir_source_main_python"), test_dir])
+    impact_state = result_cache = None
+    cached_tests = {}
+    if impact_analysis:
+        selected_modules, impact_state = select_affected_tests(project, logger, execution_prefix,
+                                                               selected_modules, graph)
+    if use_result_cache:
+        result_cache = TestResultCache(project, execution_prefix, graph)
+        selected_modules, cached_tests = result_cache.partition(selected_modules)
+        if cached_tests:
+            logger.info("Reporting %d test modules from the result cache, as they passed unchanged",
+                        len(cached_tests))
+    return selected_modules, impact_state, result_cache, cached_tests
+
+
 def execute_tests(runner_generator, logger, test_source, suffix, test_method_prefix=None):
     return execute_tests_matching(runner_generator, logger, test_source, "*{0}".format(suffix), test_method_prefix)
 
 
-def execute_tests_matching(runner_generator, logger, test_source, file_glob, test_method_prefix=None):
+def execute_tests_matching(runner_generator, logger, test_source, file_glob, test_method_prefix=None,
+                           selected_modules=None):
+    tests = _load_tests_matching(test_source, file_glob, test_method_prefix, selected_modules)
+    return _run_tests(runner_generator, logger, tests)
+
+
+def _load_tests_matching(test_source, file_glob, test_method_prefix=None, selected_modules=None):
+    test_modules = discover_modules_matching(test_source, file_glob)
+    if selected_modules is not None:
+        test_modules = [test_module for test_module in test_modules if test_module in selected_modules]
+    loader = unittest.defaultTestLoader
+    if test_method_prefix:
+        loader.testMethodPrefix = test_method_prefix
+    return loader.loadTestsFromNames(test_modules)
+
+
+def _run_tests(runner_generator, logger, tests):
     output_log_file = StringIO()
     try:
-        test_modules = discover_modules_matching(test_source, file_glob)
-        loader = unittest.defaultTestLoader
-        if test_method_prefix:
-            loader.testMethodPrefix = test_method_prefix
-        tests = loader.loadTestsFromNames(test_modules)
         result = _instrument_runner(runner_generator, logger, _create_runner(runner_generator, output_log_file)).run(
             tests)
         return result, output_log_file.getvalue()
@@ -141,6 +284,243 @@ def execute_tests_matching(runner_generator, logger, test_source, file_glob, tes
         output_log_file.close()
 
 
+def _flatten(tests):
+    if isinstance(tests, unittest.TestSuite):
+        for test in tests:
+            for flat_test in _flatten(test):
+                yield flat_test
+    else:
+        yield tests
+
+
+def split_tests(tests, granularity=MODULE_GRANULARITY):
+    """
+    Splits the loaded tests into shards of the tests of one module or of one class, keeping the order in
+    which they were loaded, so that the fixtures of modules and classes are set up once per shard.
+    """
+    if granularity not in GRANULARITIES:
+        raise BuildFailedException("Unknown granularity '%s' of parallel tests, expected one of %s"
+                                   % (granularity, ", ".join(GRANULARITIES)))
+    shards = []
+    shard_of = {}
+    for test in _flatten(tests):
+        test_class = test.__class__
+        key = test_class.__module__
+        if granularity == CLASS_GRANULARITY:
+            key += "." + test_class.__name__
+        if key not in shard_of:
+            shard_of[key] = len(shards)
+            shards.append([])
+        shards[shard_of[key]].append(test)
+    return [unittest.TestSuite(shard) for shard in shards]
+
+
+class ReportedTest(object):
+    """
+        A test run by a worker process, as reported to the process merging the results.
+    """
+
+    def __init__(self, name, test_id, module=None):
+        self.name = name
+        self.test_id = test_id
+        self.module = module
+
+    def id(self):
+        return self.test_id
+
+    def __str__(self):
+        return self.name
+
+
+class ReportedTimer(object):
+    def __init__(self, millis, cpu_millis=None):
+        self.end_time = millis
+        self.millis = millis
+        self.cpu_millis = cpu_millis
+
+    def get_millis(self):
+        return self.millis
+
+    def get_cpu_millis(self):
+        return self.cpu_millis
+
+
+class MergedTestResult(object):
+    """
+        The results of the shards of a parallel test run, in the order of the shards, providing what
+        the reports need of a unittest.TestResult.
+    """
+
+    def __init__(self):
+        self.testsRun = 0
+        self.errors = []
+        self.failures = []
+        self.skipped = []
+        self.expectedFailures = []
+        self.unexpectedSuccesses = []
+        self.test_names = []
+        self.test_timers = {}
+        self.failed_test_names_and_reasons = {}
+
+    def add_shard_report(self, shard_report):
+        reported_tests = {}
+        for name, test_id, module, millis, cpu_millis, failure_reason in shard_report["tests"]:
+            test = reported_tests[test_id] = ReportedTest(name, test_id, module)
+            self.test_names.append(test)
+            if millis is not None:
+                self.test_timers[test] = ReportedTimer(millis, cpu_millis)
+            if failure_reason is not None:
+                self.failed_test_names_and_reasons[test] = failure_reason
+
+        def reported(test_id, name=None):
+            return reported_tests.get(test_id) or ReportedTest(name or test_id, test_id)
+
+        self.testsRun += shard_report["tests_run"]
+        self.errors.extend((reported(test_id, name), traceback) for name, test_id, traceback in shard_report["errors"])
+        self.failures.extend((reported(test_id, name), traceback)
+                             for name, test_id, traceback in shard_report["failures"])
+        self.skipped.extend((reported(test_id), reason) for test_id, reason in shard_report["skipped"])
+        self.expectedFailures.extend((reported(test_id), None) for test_id in shard_report["expected_failures"])
+        self.unexpectedSuccesses.extend(reported(test_id) for test_id in shard_report["unexpected_successes"])
+
+    def wasSuccessful(self):
+        return not self.errors and not self.failures and not self.unexpectedSuccesses
+
+
+def _shard_report(shard, result, console_out, collected_events):
+    def test_ids(tests):
+        return [_test_id(test) for test in tests]
+
+    test_timers = getattr(result, "test_timers", {})
+    failed_test_names_and_reasons = getattr(result, "failed_test_names_and_reasons", {})
+    tests = []
+    for test in getattr(result, "test_names", []):
+        timer = test_timers.get(test)
+        stopped = timer and timer.end_time is not None
+        tests.append((str(test), _test_id(test), _test_module(test),
+                      timer.get_millis() if stopped else None,
+                      timer.get_cpu_millis() if stopped else None,
+                      failed_test_names_and_reasons.get(test)))
+
+    return {"shard": shard,
+            "tests_run": result.testsRun,
+            "tests": tests,
+            "errors": [(str(test), _test_id(test), traceback) for test, traceback in result.errors],
+            "failures": [(str(test), _test_id(test), traceback) for test, traceback in result.failures],
+            "skipped": [(_test_id(test), reason) for test, reason in getattr(result, "skipped", [])],
+            "expected_failures": test_ids(test for test, _ in getattr(result, "expectedFailures", [])),
+            "unexpected_successes": test_ids(getattr(result, "unexpectedSuccesses", [])),
+            "console": console_out,
+            "events": list(collected_events.events) if collected_events else []}
+
+
+def _failed_shard_report(shard, tests, message):
+    failed_tests = list(_flatten(tests))
+    return {"shard": shard,
+            "tests_run": len(failed_tests),
+            "tests": [],
+            "errors": [(str(test), _test_id(test), message) for test in failed_tests],
+            "failures": [],
+            "skipped": [],
+            "expected_failures": [],
+            "unexpected_successes": [],
+            "console": message + "\n",
+            "events": []}
+
+
+def execute_tests_in_parallel(project, logger, runner_generator, test_source, file_glob, test_method_prefix,
+                              execution_prefix, collect_coverage=False, selected_modules=None):
+    """
+    Runs the tests split into shards of modules or classes in worker processes forked after the tests were
+    loaded. Every worker runs one shard after another until none is left. Returns the merged results of the
+    shards and their console output.
+    """
+    import multiprocessing
+
+    granularity = project.get_property("%s_parallel_granularity" % execution_prefix) or MODULE_GRANULARITY
+    workers = project.get_property("%s_parallel_workers" % execution_prefix) or multiprocessing.cpu_count()
+
+    # Lines run while the test modules are imported are collected here, as the workers only run the tests
+    coverage = start_collecting_coverage(project, execution_prefix, "loader") if collect_coverage else None
+    try:
+        shards = split_tests(_load_tests_matching(test_source, file_glob, test_method_prefix, selected_modules),
+                             granularity)
+    finally:
+        if coverage:
+            stop_collecting_coverage(coverage)
+
+    workers = max(1, min(int(workers), len(shards)))
+    logger.info("Running %d %s shards in %d worker processes", len(shards), granularity, workers)
+
+    # the largest shards first, so that no worker is left running a large one at the end
+    shard_order = sorted(range(len(shards)), key=lambda shard: -shards[shard].countTestCases())
+    next_shard = multiprocessing.Value("i", 0)
+    shard_reports = multiprocessing.Queue()
+
+    def take_shard():
+        with next_shard.get_lock():
+            position = next_shard.value
+            next_shard.value += 1
+        return shard_order[position] if position < len(shard_order) else None
+
+    def run_shards(worker):
+        collected_events = events.collect_events_in_fork()
+        worker_coverage = (start_collecting_coverage(project, execution_prefix, "worker-%d" % worker)
+                           if collect_coverage else None)
+        try:
+            shard = take_shard()
+            while shard is not None:
+                try:
+                    result, console_out = _run_tests(runner_generator, logger, shards[shard])
+                    shard_reports.put(_shard_report(shard, result, console_out, collected_events))
+                except Exception as e:
+                    shard_reports.put(_failed_shard_report(shard, shards[shard],
+                                                           "Failed to run shard: %s: %s" % (type(e).__name__, e)))
+                if collected_events:
+                    del collected_events.events[:]
+                shard = take_shard()
+        finally:
+            if worker_coverage:
+                stop_collecting_coverage(worker_coverage)
+
+    pool = []
+    for worker in range(workers):
+        process = multiprocessing.Process(target=run_shards, args=(worker,))
+        pool.append(process)
+        process.start()
+
+    reports = {}
+    while len(reports) < len(shards):
+        try:
+            shard_report = shard_reports.get(timeout=0.1)
+        except Empty:
+            if any(process.is_alive() for process in pool):
+                continue
+            try:
+                shard_report = shard_reports.get(timeout=1)
+            except Empty:
+                break
+        reports[shard_report["shard"]] = shard_report
+    for process in pool:
+        process.join()
+
+    result = MergedTestResult()
+    console_out = []
+    for shard in range(len(shards)):
+        shard_report = reports.get(shard)
+        if shard_report is None:
+            shard_report = _failed_shard_report(shard, shards[shard],
+                                                "The worker process running the shard exited before reporting it")
+        result.add_shard_report(shard_report)
+        console_out.append(shard_report["console"])
+        events.emit_all(shard_report["events"])
+
+    if collect_coverage:
+        combine_coverage_data(project, execution_prefix,
+                              ["loader"] + ["worker-%d" % worker for worker in range(workers)])
+    return result, "".join(console_out)
+
+
 def _create_runner(runner_generator, output_log_file=None):
     if (isinstance(runner_generator, list) or isinstance(runner_generator, tuple)) and len(runner_generator) > 1:
         runner_generator = runner_generator[0]
@@ -174,14 +554,24 @@ def _instrument_runner(runner_generator, logger, runner):
 
 def _instrument_result(logger, result):
     old_startTest = result.startTest
+    old_stopTest = result.stopTest
     old_addError = result.addError
     old_addFailure = result.addFailure
 
     def startTest(self, test):
         self.test_names.append(test)
+        self.test_timers[test] = Timer.start()
         self.logger.debug("starting %s", test)
         old_startTest(test)
 
+    def stopTest(self, test):
+        old_stopTest(test)
+        timer = self.test_timers.get(test)
+        if timer:
+            timer.stop()
+            events.emit(events.TEST_FINISHED, suite="unittest", test=_test_id(test),
+                        successful=test not in self.failed_test_names_and_reasons, duration=timer.get_millis())
+
     def addError(self, test, err):
         exception_type, exception, traceback = err
         self.failed_test_names_and_reasons[test] = '{0}: {1}'.format(exception_type, exception).replace('\'', '')
@@ -193,10 +583,12 @@ def _instrument_result(logger, result):
         old_addFailure(test, err)
 
     result.startTest = MethodType(startTest, result)
+    result.stopTest = MethodType(stopTest, result)
     result.addError = MethodType(addError, result)
     result.addFailure = MethodType(addFailure, result)
 
     result.test_names = []
+    result.test_timers = {}
     result.failed_test_names_and_reasons = {}
     result.logger = logger
     return result
@@ -233,13 +625,75 @@ def write_report(name, project, logger, result, console_out):
         if project.get_property("verbose"):
             print_text_line(failure[1])
 
+    test_timers = dict((test, timer) for test, timer in getattr(result, "test_timers", {}).items()
+                       if timer.end_time is not None)
+    if test_timers:
+        report["tests"] = [{"test": _test_id(test),
+                            "module": _test_module(test),
+                            "time": test_timers[test].get_millis(),
+                            "cpu_time": test_timers[test].get_cpu_millis(),
+                            "success": test not in result.failed_test_names_and_reasons}
+                           for test in result.test_names if test in test_timers]
+
+    cached_tests = getattr(result, "cached_tests", [])
+    if cached_tests:
+        report["tests-cached"] = len(cached_tests)
+        report.setdefault("tests", []).extend({"test": test["test"],
+                                               "module": test.get("module"),
+                                               "time": test["time"],
+                                               "cpu_time": test.get("cpu_time"),
+                                               "success": True,
+                                               "cached": True} for test in cached_tests)
+
+    if "tests" in report:
+        report["modules"] = module_times(report["tests"])
+        log_slowest_tests(logger, report["tests"], project.get_property("%s_slowest_tests" % name) or 0)
+
     project.write_report("%s.json" % name, render_report(report))
 
     report_to_ci_server(project, result)
 
 
+def module_times(tests):
+    """
+    Returns the number of tests and the wall and CPU time in milliseconds of every module of the given
+    reported tests, in the order of the tests.
+    """
+    modules = odict()
+    for test in tests:
+        if not test.get("module"):
+            continue
+        module = modules.setdefault(test["module"], {"module": test["module"], "tests": 0, "time": 0, "cpu_time": 0})
+        module["tests"] += 1
+        module["time"] += test["time"]
+        module["cpu_time"] += test.get("cpu_time") or 0
+    return list(modules.values())
+
+
+def log_slowest_tests(logger, tests, limit):
+    slowest = sorted((test for test in tests if not test.get("cached")), key=lambda test: -test["time"])[:limit]
+    if not slowest:
+        return
+    logger.info("The %d slowest tests (wall and CPU time):", len(slowest))
+    for test in slowest:
+        logger.info("%8d ms %8d ms  %s", test["time"], test.get("cpu_time") or 0, test["test"])
+
+
+def _test_id(test):
+    return test.id() if hasattr(test, "id") else str(test)
+
+
+def _test_module(test):
+    if isinstance(test, ReportedTest):
+        return test.module
+    return type(test).__module__
+
+
 def report_to_ci_server(project, result):
     for test_name in result.test_names:
         with test_proxy_for(project).and_test_name(test_name) as test:
             if test_name in result.failed_test_names_and_reasons:
                 test.fails(result.failed_test_names_and_reasons.get(test_name))
+    for cached_test in getattr(result, "cached_tests", []):
+        with test_proxy_for(project).and_test_name(cached_test["test"]) as test:
+            test.cached()
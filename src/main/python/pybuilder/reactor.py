@@ -22,20 +22,28 @@
     execution module.
 """
 
-import imp
 import os.path
+import sys
+import threading
 
+from pybuilder.cache import is_enabled
 from pybuilder.core import (TASK_ATTRIBUTE, DEPENDS_ATTRIBUTE, DEPENDENTS_ATTRIBUTE,
                             DESCRIPTION_ATTRIBUTE, AFTER_ATTRIBUTE,
                             BEFORE_ATTRIBUTE, INITIALIZER_ATTRIBUTE,
                             ACTION_ATTRIBUTE, ONLY_ONCE_ATTRIBUTE, TEARDOWN_ATTRIBUTE,
+                            INPUTS_ATTRIBUTE, OUTPUTS_ATTRIBUTE, INCREMENTAL_ATTRIBUTE,
                             Project, NAME_ATTRIBUTE, ENVIRONMENTS_ATTRIBUTE, optional)
+from pybuilder.descriptor import load_descriptor
 from pybuilder.errors import PyBuilderException, ProjectValidationFailedException
 from pybuilder.execution import Action, Initializer, Task, TaskDependency
+from pybuilder.incremental import BuildCheckpoint, TaskUpToDateCheck
+from pybuilder.pluginmanifest import BUILTIN_PLUGIN_MANIFESTS
 from pybuilder.pluginloader import (BuiltinPluginLoader,
                                     DispatchingPluginLoader,
                                     DownloadingPluginLoader)
-from pybuilder.utils import as_list, get_dist_version_string, basestring
+from pybuilder.snapshot import TaskGraphSnapshot
+from pybuilder.trace import span
+from pybuilder.utils import as_list, get_dist_version_string, basestring, odict
 
 
 class BuildSummary(object):
@@ -45,17 +53,25 @@ class BuildSummary(object):
 
 
 class Reactor(object):
+    """
+        The current instance is kept per thread, as subprojects are built by reactors of their own
+        in concurrent threads. Threads which never set one, e.g. the workers executing the tasks of a plan
+        in parallel, see the one set by the main thread.
+    """
     _current_instance = None
+    _thread_state = threading.local()
 
     @staticmethod
     def current_instance():
-        return Reactor._current_instance
+        return getattr(Reactor._thread_state, "current_instance", None) or Reactor._current_instance
 
     @staticmethod
     def _set_current_instance(reactor):
-        Reactor._current_instance = reactor
+        Reactor._thread_state.current_instance = reactor
+        if isinstance(threading.current_thread(), threading._MainThread):
+            Reactor._current_instance = reactor
 
-    def __init__(self, logger, execution_manager, plugin_loader=None):
+    def __init__(self, logger, execution_manager, plugin_loader=None, plugin_manifests=None, loaded_plugins=None):
         self.logger = logger
         self.execution_manager = execution_manager
         if not plugin_loader:
@@ -64,14 +80,29 @@ class Reactor(object):
                                                          DownloadingPluginLoader(self.logger))
         else:
             self.plugin_loader = plugin_loader
+        self.plugin_manifests = BUILTIN_PLUGIN_MANIFESTS if plugin_manifests is None else plugin_manifests
+        self.loaded_plugins = {} if loaded_plugins is None else loaded_plugins
         self._plugins = []
+        self._importing_plugins = []
+        self.deferred_plugins = odict()
+        self.plugin_modules = []
         self.project = None
+        self.project_descriptor = None
+        self.subprojects = odict()
+        self._dependency_exclusions = (None, None, False)
+        self._environments = []
 
     def require_plugin(self, plugin, version=None, plugin_module_name=None):
+        if self._importing_plugins:
+            self._importing_plugins[-1].append((plugin, version, plugin_module_name))
         if plugin not in self._plugins:
             try:
                 self._plugins.append(plugin)
-                self.import_plugin(plugin, version, plugin_module_name)
+                manifest = self.plugin_manifests.get(plugin) if not version and not plugin_module_name else None
+                if manifest:
+                    self.defer_plugin(plugin, manifest)
+                else:
+                    self.import_plugin(plugin, version, plugin_module_name)
             except:  # NOQA
                 self._plugins.remove(plugin)
                 raise
@@ -79,6 +110,102 @@ class Reactor(object):
     def get_plugins(self):
         return self._plugins
 
+    def require_subproject(self, directory, depends_on=None):
+        directory = os.path.normpath(directory)
+        if directory not in self.subprojects:
+            self.subprojects[directory] = []
+        self.subprojects[directory].extend(os.path.normpath(dependency) for dependency in as_list(depends_on or []))
+
+    def defer_plugin(self, plugin, manifest):
+        """
+        Postpones importing a plugin with a manifest until one of its tasks or actions is in an execution plan.
+        Until then the property defaults and plugin dependencies of the manifest take the place of its initializers.
+        """
+        self.logger.debug("Deferring plugin '%s'", plugin)
+        for required_plugin in manifest.requires:
+            self.require_plugin(required_plugin)
+        self.deferred_plugins[plugin] = manifest
+
+        def initialize_deferred_plugin(project):
+            manifest.initialize(project)
+
+        self.execution_manager.register_initializer(
+            Initializer("initialize_deferred_plugin", initialize_deferred_plugin, description=plugin))
+
+    def _plan_task_names(self, task_names):
+        """
+        Returns the names of the tasks in the plans of the given tasks, including the tasks of deferred plugins.
+        Optional dependencies count, so that no plugin a plan might need is left out.
+        """
+        edges = {}
+        for task in self.execution_manager.tasks:
+            edges.setdefault(task.name, []).extend(TaskDependency(dependency).name for dependency in task.dependencies)
+        for manifest in self.deferred_plugins.values():
+            for name, dependencies in manifest.dependency_edges().items():
+                edges.setdefault(name, []).extend(dependencies)
+
+        plan_task_names = set()
+        pending = list(as_list(task_names))
+        while pending:
+            name = pending.pop()
+            if name not in plan_task_names:
+                plan_task_names.add(name)
+                pending.extend(edges.get(name, []))
+        return plan_task_names
+
+    def _referenced_task_names(self):
+        """
+        Returns the names of the tasks the loaded tasks and actions refer to.
+        """
+        names = set(self.execution_manager.pending_task_dependencies)
+        for task in self.execution_manager.tasks:
+            names.update(TaskDependency(dependency).name for dependency in task.dependencies)
+        for action in self.execution_manager.actions:
+            names.update(action.execute_before)
+            names.update(action.execute_after)
+        return names
+
+    def load_deferred_plugins(self, tasks=None):
+        """
+        Imports the deferred plugins needed by the execution plans of the given tasks, or all of them if no tasks
+        are given, together with the deferred plugins contributing tasks the loaded tasks and actions refer to.
+        Returns the initializers of the plugins imported.
+        """
+        if not self.deferred_plugins:
+            return []
+
+        initializer_count = len(self.execution_manager.initializers)
+        imported = False
+        while self.deferred_plugins:
+            if tasks is None:
+                needed_plugins = list(self.deferred_plugins)
+            else:
+                plan_task_names = self._plan_task_names(tasks)
+                referenced_task_names = self._referenced_task_names() - set(self.execution_manager.task_names)
+                needed_plugins = [plugin for plugin, manifest in self.deferred_plugins.items()
+                                  if manifest.is_needed_by(plan_task_names) or
+                                  referenced_task_names.intersection(manifest.task_names)]
+            if not needed_plugins:
+                break
+
+            for plugin in needed_plugins:
+                if self.deferred_plugins.pop(plugin, None):
+                    self.import_plugin(plugin)
+                    imported = True
+
+        if imported:
+            self.execution_manager.resolve_dependencies(*self._dependency_exclusions)
+        return self.execution_manager.initializers[initializer_count:]
+
+    def unload_plugin_modules(self):
+        """
+        Plugins require the plugins they depend on when their module is executed, so the plugin modules
+        have to be executed anew to load a project again in the same process, unless the reactors share
+        their loaded plugins, which remember the plugins every plugin module required.
+        """
+        for name in self.plugin_modules:
+            sys.modules.pop(name, None)
+
     def get_tasks(self):
         return self.execution_manager.tasks
 
@@ -100,12 +227,14 @@ class Reactor(object):
 
         project_directory, project_descriptor = self.verify_project_directory(
             project_directory, project_descriptor)
+        self.project_descriptor = project_descriptor
 
         self.logger.debug("Loading project module from %s", project_descriptor)
 
         self.project = Project(basedir=project_directory)
 
-        self.project_module = self.load_project_module(project_descriptor)
+        with span(project_descriptor, "project"):
+            self.project_module = self.load_project_module(project_descriptor)
 
         self.apply_project_attributes()
         self.override_properties(property_overrides)
@@ -114,9 +243,57 @@ class Reactor(object):
 
         self.collect_tasks_and_actions_and_initializers(self.project_module)
 
+        self._dependency_exclusions = (exclude_optional_tasks, exclude_tasks, exclude_all_optional)
+        self.load_deferred_plugins([])
         self.execution_manager.resolve_dependencies(exclude_optional_tasks, exclude_tasks, exclude_all_optional)
 
-    def build(self, tasks=None, environments=None):
+    def load_task_graph_snapshot(self, project_directory=".", project_descriptor="build.py"):
+        project_directory, project_descriptor = self.verify_project_directory(
+            project_directory, project_descriptor)
+        return TaskGraphSnapshot.load(project_descriptor)
+
+    def capture_task_graph_snapshot(self, module_names):
+        """
+        Imports the plugins still deferred, so that the snapshot contains their tasks, and captures the task graph.
+        The snapshot depends on the given modules, the plugin modules and the modules the plugins imported.
+        Returns None for composite projects, as their tasks are the ones of the subprojects.
+        """
+        if self.subprojects:
+            return None
+        loaded_modules = set(sys.modules)
+        self.load_deferred_plugins()
+        module_names = set(module_names) | set(self.plugin_modules) | (set(sys.modules) - loaded_modules)
+        return TaskGraphSnapshot.capture(self.project_descriptor, self.project, self.execution_manager, module_names)
+
+    def prepare_build_from_snapshot(self,
+                                    snapshot,
+                                    project_directory=".",
+                                    environments=None,
+                                    property_overrides=None,
+                                    exclude_optional_tasks=None,
+                                    exclude_tasks=None,
+                                    exclude_all_optional=False):
+        """
+        Prepares the task graph from a snapshot instead of loading the project. The tasks can be listed
+        and planned, but not executed.
+        """
+        Reactor._set_current_instance(self)
+
+        project_directory, _ = self.verify_project_directory(project_directory, "build.py")
+        self.logger.debug("Using task graph snapshot of %s", project_directory)
+
+        self.project = Project(basedir=project_directory, name=snapshot.project_name)
+        if snapshot.project_version:
+            self.project.version = snapshot.project_version
+        self.project.default_task = snapshot.default_task(environments, property_overrides)
+        for name, value in snapshot.properties(environments, property_overrides).items():
+            self.project.set_property(name, value)
+        self.override_properties(property_overrides or {})
+
+        snapshot.register_tasks_and_actions(self.execution_manager)
+        self.execution_manager.resolve_dependencies(exclude_optional_tasks, exclude_tasks, exclude_all_optional)
+
+    def build(self, tasks=None, environments=None, jobs=1, resume=False):
         if not tasks:
             tasks = []
         else:
@@ -125,7 +302,19 @@ class Reactor(object):
             environments = []
 
         execution_plan = self.create_execution_plan(tasks, environments)
-        return self.build_execution_plan(tasks, execution_plan)
+
+        # Fingerprinting the project is only worth it for builds that are resumed or may be resumed later
+        checkpointing = resume or is_enabled(self.project.get_property("build_checkpoint_enabled", False))
+        if checkpointing and self.project.has_property("dir_target"):
+            checkpoint = BuildCheckpoint(self.project, self.project_descriptor, self.logger)
+            completed_tasks = checkpoint.begin(resume)
+            if completed_tasks:
+                execution_plan = self.execution_manager.skip_completed_tasks(execution_plan, completed_tasks)
+            self.execution_manager.checkpoint = checkpoint
+        elif resume:
+            self.logger.warn("Unable to resume build as the project has no target directory")
+
+        return self.build_execution_plan(tasks, execution_plan, jobs)
 
     def create_execution_plan(self, tasks, environments):
         Reactor._set_current_instance(self)
@@ -134,22 +323,34 @@ class Reactor(object):
             self.logger.info(
                 "Activated environments: %s", ", ".join(environments))
 
+        self._environments = environments
         self.execution_manager.execute_initializers(
             environments, logger=self.logger, project=self.project)
 
-        self.log_project_properties()
-
-        self.validate_project()
-
         if not len(tasks):
             if self.project.default_task:
                 tasks += as_list(self.project.default_task)
             else:
                 raise PyBuilderException("No default task given.")
 
+        self.prepare_deferred_plugins(tasks)
+
+        self.log_project_properties()
+
+        self.validate_project()
+
         return self.execution_manager.build_execution_plan(tasks)
 
-    def build_execution_plan(self, tasks, execution_plan):
+    def prepare_deferred_plugins(self, tasks):
+        """
+        Loads the deferred plugins the tasks need and executes their initializers.
+        """
+        initializers = self.load_deferred_plugins(tasks)
+        if initializers:
+            self.execution_manager.execute_initializers(
+                self._environments, initializers, logger=self.logger, project=self.project)
+
+    def build_execution_plan(self, tasks, execution_plan, jobs=1):
         self.logger.debug("Execution plan is %s", ", ".join(
             [task.name for task in execution_plan]))
 
@@ -163,15 +364,45 @@ class Reactor(object):
             list_of_tasks = ", ".join(tasks)
             self.logger.info("Going to execute tasks: %s", list_of_tasks)
 
-        task_execution_summaries = self.execution_manager.execute_execution_plan(
-            execution_plan,
-            logger=self.logger,
-            project=self.project,
-            reactor=self)
+        if jobs > 1:
+            self.logger.info("Executing independent tasks in parallel using up to %d jobs", jobs)
+            task_execution_summaries = self.execution_manager.execute_execution_plan_in_parallel(
+                execution_plan,
+                jobs,
+                logger=self.logger,
+                project=self.project,
+                reactor=self)
+        else:
+            task_execution_summaries = self.execution_manager.execute_execution_plan(
+                execution_plan,
+                logger=self.logger,
+                project=self.project,
+                reactor=self)
 
         return BuildSummary(self.project, task_execution_summaries)
 
+    def build_affected_tasks(self, tasks, changed_files, jobs=1):
+        """
+        Executes the tasks of a previous build again after the given files have changed. Like
+        build_shortest_execution_plan, prerequisites executed before are skipped unless a change
+        affects their declared inputs.
+        """
+        Reactor._set_current_instance(self)
+        tasks = as_list(tasks)
+
+        affected_tasks = [task.name for task in self.execution_manager.build_execution_plan(tasks)
+                          if task.inputs and
+                          TaskUpToDateCheck(self.project, task, self.execution_manager).is_affected_by(changed_files)]
+        self.logger.debug("Tasks affected by changes: %s", ", ".join(affected_tasks))
+        self.execution_manager.mark_tasks_outdated(affected_tasks)
+
+        execution_plan = self.execution_manager.build_shortest_execution_plan(tasks)
+        self.execution_manager.mark_tasks_outdated([task.name for task in execution_plan])
+
+        return self.build_execution_plan(tasks, execution_plan, jobs)
+
     def execute_task(self, task_name):
+        self.prepare_deferred_plugins(as_list(task_name))
         execution_plan = self.execution_manager.build_execution_plan(task_name)
 
         self.execution_manager.execute_execution_plan(execution_plan,
@@ -180,6 +411,7 @@ class Reactor(object):
                                                       reactor=self)
 
     def execute_task_shortest_plan(self, task_name):
+        self.prepare_deferred_plugins(as_list(task_name))
         execution_plan = self.execution_manager.build_shortest_execution_plan(task_name)
 
         self.execution_manager.execute_execution_plan(execution_plan,
@@ -200,8 +432,21 @@ class Reactor(object):
 
     def import_plugin(self, plugin, version=None, plugin_module_name=None):
         self.logger.debug("Loading plugin '%s'%s", plugin, " version %s" % version if version else "")
-        plugin_module = self.plugin_loader.load_plugin(self.project, plugin, version, plugin_module_name)
-        self.collect_tasks_and_actions_and_initializers(plugin_module)
+        with span(plugin, "plugin", version=version or ""):
+            key = (plugin, version, plugin_module_name)
+            if key in self.loaded_plugins:
+                plugin_module, required_plugins = self.loaded_plugins[key]
+                for required_plugin in required_plugins:
+                    self.require_plugin(*required_plugin)
+            else:
+                self._importing_plugins.append([])
+                try:
+                    plugin_module = self.plugin_loader.load_plugin(self.project, plugin, version, plugin_module_name)
+                finally:
+                    required_plugins = self._importing_plugins.pop()
+                self.loaded_plugins[key] = (plugin_module, required_plugins)
+            self.plugin_modules.append(getattr(plugin_module, "__name__", plugin))
+            self.collect_tasks_and_actions_and_initializers(plugin_module)
 
     def collect_tasks_and_actions_and_initializers(self, project_module):
         injected_task_dependencies = {}
@@ -259,7 +504,9 @@ class Reactor(object):
 
                 self.logger.debug("Found task '%s' with dependencies %s", name, task_dependencies)
                 self.execution_manager.register_task(
-                    Task(name, candidate, task_dependencies, description))
+                    Task(name, candidate, task_dependencies, description,
+                         getattr(candidate, INPUTS_ATTRIBUTE, None), getattr(candidate, OUTPUTS_ATTRIBUTE, None),
+                         getattr(candidate, INCREMENTAL_ATTRIBUTE, None)))
 
             elif getattr(candidate, ACTION_ATTRIBUTE, None):
                 before = getattr(candidate, BEFORE_ATTRIBUTE, None)
@@ -299,7 +546,7 @@ class Reactor(object):
     @staticmethod
     def load_project_module(project_descriptor):
         try:
-            return imp.load_source("build", project_descriptor)
+            return load_descriptor(project_descriptor)
         except ImportError as e:
             raise PyBuilderException(
                 "Error importing project descriptor %s: %s" % (project_descriptor, e))
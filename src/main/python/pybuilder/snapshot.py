@@ -0,0 +1,211 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of PyBuilder
+#
+#   Copyright 2011-2015 PyBuilder Team
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""
+    The PyBuilder snapshot module.
+    Persists the task graph of a project, so that tasks and execution plans can be listed
+    without loading the build descriptor and its plugins.
+
+    A snapshot is valid as long as the build descriptor, every module imported while loading it (plugins
+    included), the PyBuilder version and the interpreter are unchanged.
+"""
+
+import hashlib
+import json
+import os
+import sys
+
+from pybuilder import __version__
+from pybuilder.cache import default_cache_directory
+from pybuilder.execution import Action, Task, TaskDependency
+from pybuilder.utils import mkdir
+
+SNAPSHOT_FORMAT = 1
+
+
+def _file_digest(file_name):
+    with open(file_name, "rb") as file_handle:
+        return hashlib.sha1(file_handle.read()).hexdigest()
+
+
+def _file_state(file_name):
+    stat = os.stat(file_name)
+    return [stat.st_size, stat.st_mtime, _file_digest(file_name)]
+
+
+def _is_unchanged(file_name, state):
+    try:
+        stat = os.stat(file_name)
+    except OSError:
+        return False
+    if stat.st_size != state[0]:
+        return False
+    return stat.st_mtime == state[1] or _file_digest(file_name) == state[2]
+
+
+def module_source_file(module):
+    file_name = getattr(module, "__file__", None)
+    if not file_name:
+        return None
+    if file_name.endswith((".pyc", ".pyo")) and os.path.exists(file_name[:-1]):
+        file_name = file_name[:-1]
+    if not os.path.isfile(file_name):
+        return None
+    return os.path.abspath(file_name)
+
+
+def snapshot_file(project_descriptor):
+    descriptor_key = hashlib.sha1(os.path.abspath(project_descriptor).encode("utf-8")).hexdigest()
+    return os.path.join(default_cache_directory(), "snapshots", descriptor_key + ".json")
+
+
+def _placeholder():
+    pass
+
+
+def _build_key(environments, property_overrides):
+    key = ",".join(sorted(environments or []))
+    if property_overrides:
+        # Initializers may derive the default task and properties from overridden properties
+        key += "|" + json.dumps(property_overrides, sort_keys=True, default=repr)
+    return key
+
+
+class TaskGraphSnapshot(object):
+    def __init__(self, project_descriptor, data):
+        self.project_descriptor = project_descriptor
+        self.data = data
+
+    @staticmethod
+    def capture(project_descriptor, project, execution_manager, module_names):
+        """
+        Captures the task graph of a loaded project. The given module names are the modules
+        imported while loading the project; changes to any of them invalidate the snapshot.
+        """
+        files = {}
+        for name in module_names:
+            module = sys.modules.get(name)
+            source_file = module_source_file(module) if module else None
+            if source_file and source_file not in files:
+                files[source_file] = _file_state(source_file)
+
+        tasks = []
+        for task in execution_manager.tasks:
+            tasks.append({"name": task.name,
+                          "description": task.description,
+                          "dependencies": [[dependency.name, dependency.optional] for dependency in
+                                           task.dependencies]})
+
+        actions = []
+        for action in execution_manager.actions:
+            actions.append({"name": action.name,
+                            "description": action.description,
+                            "before": action.execute_before,
+                            "after": action.execute_after,
+                            "only_once": action.only_once,
+                            "teardown": action.teardown})
+
+        return TaskGraphSnapshot(project_descriptor,
+                                 {"format": SNAPSHOT_FORMAT,
+                                  "pybuilder": __version__,
+                                  "python": sys.version,
+                                  "descriptor": _file_state(project_descriptor),
+                                  "files": files,
+                                  "project": {"name": project.name, "version": project.version},
+                                  "default_task": project.default_task,
+                                  "default_tasks": {},
+                                  "properties": {},
+                                  "tasks": tasks,
+                                  "actions": actions})
+
+    @staticmethod
+    def load(project_descriptor):
+        """
+        Returns the snapshot of the given build descriptor or None if there is none or it is no longer valid.
+        """
+        try:
+            with open(snapshot_file(project_descriptor), "r") as snapshot:
+                data = json.load(snapshot)
+        except (IOError, OSError, ValueError):
+            return None
+
+        if (data.get("format") != SNAPSHOT_FORMAT or data.get("pybuilder") != __version__ or
+                data.get("python") != sys.version):
+            return None
+        if not _is_unchanged(project_descriptor, data["descriptor"]):
+            return None
+        for file_name, state in data["files"].items():
+            if not _is_unchanged(file_name, state):
+                return None
+        return TaskGraphSnapshot(project_descriptor, data)
+
+    def save(self):
+        file_name = snapshot_file(self.project_descriptor)
+        mkdir(os.path.dirname(file_name))
+        temporary_file = "%s.%d" % (file_name, os.getpid())
+        with open(temporary_file, "w") as snapshot:
+            json.dump(self.data, snapshot)
+        os.rename(temporary_file, file_name)
+
+    @property
+    def project_name(self):
+        return self.data["project"]["name"]
+
+    @property
+    def project_version(self):
+        return self.data["project"]["version"]
+
+    def record_default_task(self, environments, default_task, property_overrides=None):
+        """
+        Records the default task in effect after the initializers for the given environments and property
+        overrides were executed.
+        """
+        self.data["default_tasks"][_build_key(environments, property_overrides)] = default_task
+
+    def record_properties(self, environments, properties, property_overrides=None):
+        """
+        Records properties set by the initializers for the given environments and property overrides,
+        which are restored with the snapshot.
+        """
+        self.data.setdefault("properties", {})[_build_key(environments, property_overrides)] = properties
+
+    def properties(self, environments=None, property_overrides=None):
+        return self.data.get("properties", {}).get(_build_key(environments, property_overrides), {})
+
+    def has_default_task(self, environments, property_overrides=None):
+        return _build_key(environments, property_overrides) in self.data["default_tasks"]
+
+    def default_task(self, environments=None, property_overrides=None):
+        return self.data["default_tasks"].get(_build_key(environments, property_overrides),
+                                              self.data["default_task"])
+
+    def register_tasks_and_actions(self, execution_manager):
+        """
+        Registers placeholders of all tasks and actions of the snapshot. The placeholders cannot be executed.
+        """
+        for task_data in self.data["tasks"]:
+            task = Task(task_data["name"], _placeholder,
+                        [TaskDependency(name, optional) for name, optional in task_data["dependencies"]])
+            task.description = list(task_data["description"])
+            execution_manager.register_task(task)
+
+        for action_data in self.data["actions"]:
+            execution_manager.register_action(Action(action_data["name"], _placeholder,
+                                                     action_data["before"], action_data["after"],
+                                                     action_data["description"], action_data["only_once"],
+                                                     action_data["teardown"]))
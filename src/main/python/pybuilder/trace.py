@@ -0,0 +1,238 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of PyBuilder
+#
+#   Copyright 2011-2015 PyBuilder Team
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""
+    The PyBuilder trace module.
+    Records a timeline of spans (plugin loading, initializers, actions, task executables, forked processes
+    and commands) during a build and exports it in the Chrome trace event format or as OTLP JSON.
+"""
+
+import binascii
+import json
+import os
+import threading
+import time
+
+CHROME_FORMAT = "chrome"
+OTLP_FORMAT = "otlp"
+FORMATS = (CHROME_FORMAT, OTLP_FORMAT)
+
+_tracer = None
+
+
+def _random_id(length):
+    return binascii.hexlify(os.urandom(length)).decode("ascii")
+
+
+class Span(object):
+    def __init__(self, tracer, name, category, attributes):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.attributes = attributes
+        self.span_id = None
+        self.parent_id = None
+        self.start_time = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def __enter__(self):
+        self.span_id = _random_id(8)
+        self.parent_id = self.tracer._enter(self.span_id)
+        self.start_time = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        end_time = time.time()
+        self.tracer._exit(self.span_id)
+        if exc_type is not None:
+            self.attributes["error"] = "%s: %s" % (exc_type.__name__, exc_value)
+        current_thread = threading.current_thread()
+        self.tracer.record({"name": self.name,
+                            "category": self.category,
+                            "span_id": self.span_id,
+                            "parent_id": self.parent_id,
+                            "start": self.start_time,
+                            "end": end_time,
+                            "pid": os.getpid(),
+                            "tid": current_thread.ident,
+                            "thread_name": current_thread.name,
+                            "attributes": self.attributes})
+        return False
+
+
+class _NullSpan(object):
+    def set_attribute(self, key, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer(object):
+    """
+        Collects finished spans. Spans nest per thread; spans started on a thread without an open span become
+        children of the outermost span open on any thread, so that spans of worker threads and forked children
+        attach to the build they belong to.
+    """
+
+    def __init__(self):
+        self.trace_id = _random_id(16)
+        self.pid = os.getpid()
+        self.spans = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._root_id = None
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _enter(self, span_id):
+        stack = self._stack()
+        if stack:
+            parent_id = stack[-1]
+        else:
+            parent_id = self._root_id
+            if parent_id is None:
+                self._root_id = span_id
+        stack.append(span_id)
+        return parent_id
+
+    def _exit(self, span_id):
+        stack = self._stack()
+        if stack and stack[-1] == span_id:
+            stack.pop()
+        if self._root_id == span_id:
+            self._root_id = None
+
+    def record(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def mark(self):
+        return len(self.spans)
+
+    def spans_since(self, mark):
+        with self._lock:
+            return self.spans[mark:]
+
+    def add_spans(self, spans):
+        with self._lock:
+            self.spans.extend(spans)
+
+    def to_chrome_trace(self):
+        events = []
+        processes = set()
+        threads = set()
+        for span in self.spans:
+            if span["pid"] not in processes:
+                processes.add(span["pid"])
+                process_name = "pyb" if span["pid"] == self.pid else "pyb (forked)"
+                events.append({"name": "process_name", "ph": "M", "pid": span["pid"],
+                               "args": {"name": process_name}})
+            if (span["pid"], span["tid"]) not in threads:
+                threads.add((span["pid"], span["tid"]))
+                events.append({"name": "thread_name", "ph": "M", "pid": span["pid"], "tid": span["tid"],
+                               "args": {"name": span["thread_name"]}})
+            events.append({"name": span["name"],
+                           "cat": span["category"],
+                           "ph": "X",
+                           "ts": int(span["start"] * 1000000),
+                           "dur": int((span["end"] - span["start"]) * 1000000),
+                           "pid": span["pid"],
+                           "tid": span["tid"],
+                           "args": span["attributes"]})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def to_otlp_json(self):
+        from pybuilder import __version__
+
+        def attribute(key, value):
+            if isinstance(value, bool):
+                return {"key": key, "value": {"boolValue": value}}
+            if isinstance(value, int):
+                return {"key": key, "value": {"intValue": str(value)}}
+            return {"key": key, "value": {"stringValue": str(value)}}
+
+        spans = []
+        for span in self.spans:
+            otlp_span = {"traceId": self.trace_id,
+                         "spanId": span["span_id"],
+                         "name": span["name"],
+                         "kind": 1,
+                         "startTimeUnixNano": str(int(span["start"] * 1000000000)),
+                         "endTimeUnixNano": str(int(span["end"] * 1000000000)),
+                         "attributes": [attribute("pybuilder.category", span["category"]),
+                                        attribute("process.pid", span["pid"]),
+                                        attribute("thread.name", span["thread_name"])] +
+                                       [attribute(key, value) for key, value in sorted(span["attributes"].items())]}
+            if span["parent_id"]:
+                otlp_span["parentSpanId"] = span["parent_id"]
+            if "error" in span["attributes"]:
+                otlp_span["status"] = {"code": 2, "message": span["attributes"]["error"]}
+            spans.append(otlp_span)
+
+        return {"resourceSpans": [{"resource": {"attributes": [attribute("service.name", "pybuilder")]},
+                                   "scopeSpans": [{"scope": {"name": "pybuilder", "version": __version__},
+                                                   "spans": spans}]}]}
+
+    def write(self, file_name, trace_format=CHROME_FORMAT):
+        if trace_format == OTLP_FORMAT:
+            content = self.to_otlp_json()
+        else:
+            content = self.to_chrome_trace()
+        with open(file_name, "w") as trace_file:
+            json.dump(content, trace_file)
+
+
+def start_tracing():
+    global _tracer
+    _tracer = Tracer()
+    return _tracer
+
+
+def stop_tracing():
+    global _tracer
+    tracer = _tracer
+    _tracer = None
+    return tracer
+
+
+def current_tracer():
+    return _tracer
+
+
+def span(name, category, **attributes):
+    """
+    Returns a context manager recording a span with the given name, category and attributes
+    if tracing is enabled.
+    """
+    tracer = _tracer
+    if tracer is None:
+        return _NULL_SPAN
+    return Span(tracer, name, category, attributes)
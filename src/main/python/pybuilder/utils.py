@@ -31,20 +31,16 @@ import sys
 import tempfile
 import time
 import traceback
-from multiprocessing import Process
 from subprocess import Popen, PIPE
 
-try:
-    from multiprocessing import SimpleQueue
-except ImportError:
-    from multiprocessing.queues import SimpleQueue
-
 try:
     basestring = basestring
 except NameError:
     basestring = str
 
+from pybuilder import events
 from pybuilder.errors import MissingPrerequisiteException, PyBuilderException
+from pybuilder.trace import current_tracer, span
 
 if sys.version_info[0] < 3:  # if major is less than 3
     from .excp_util_2 import raise_exception, is_string
@@ -164,17 +160,29 @@ def execute_command(command_and_arguments, outfile_name=None, env=None, cwd=None
     if error_file_name is None and outfile_name:
         error_file_name = outfile_name + ".err"
 
+    if isinstance(command_and_arguments, basestring):
+        command_line = command_and_arguments
+    else:
+        command_line = " ".join(command_and_arguments)
+
     out_file = open(outfile_name, "w") if outfile_name else None
     try:
         error_file = open(error_file_name, "w") if error_file_name else None
         try:
-            process = Popen(command_and_arguments,
-                            stdout=out_file,
-                            stderr=error_file,
-                            env=env,
-                            cwd=cwd,
-                            shell=shell)
-            return process.wait()
+            with span(command_line.split(" ", 1)[0], "command", command=command_line) as command_span:
+                events.emit(events.COMMAND_STARTED, command=command_line, cwd=cwd)
+                started = time.time()
+                process = Popen(command_and_arguments,
+                                stdout=out_file,
+                                stderr=error_file,
+                                env=env,
+                                cwd=cwd,
+                                shell=shell)
+                exit_code = process.wait()
+                command_span.set_attribute("exit_code", exit_code)
+                events.emit(events.COMMAND_FINISHED, command=command_line, exit_code=exit_code,
+                            duration=int((time.time() - started) * 1000))
+                return exit_code
         finally:
             if error_file:
                 error_file.close()
@@ -217,16 +225,32 @@ class Timer(object):
 
     def __init__(self):
         self.start_time = time.time()
+        self.start_cpu_time = cpu_time()
         self.end_time = None
+        self.end_cpu_time = None
 
     def stop(self):
         self.end_time = time.time()
+        self.end_cpu_time = cpu_time()
 
     def get_millis(self):
         if self.end_time is None:
             raise PyBuilderException("Timer is running.")
         return int((self.end_time - self.start_time) * 1000)
 
+    def get_cpu_millis(self):
+        if self.end_cpu_time is None:
+            raise PyBuilderException("Timer is running.")
+        return int((self.end_cpu_time - self.start_cpu_time) * 1000)
+
+
+def cpu_time():
+    """
+    Returns the user and system time spent by the current process in seconds.
+    """
+    process_times = os.times()
+    return process_times[0] + process_times[1]
+
 
 def apply_on_files(start_directory, closure, globs, *additional_closure_arguments, **keyword_closure_arguments):
     glob_expressions = list(map(lambda g: GlobExpression(g), globs))
@@ -297,16 +321,29 @@ def fork_process(logger, group=None, target=None, name=None, args=(), kwargs={})
 
         tblib.pickling_support.install()
 
+    from multiprocessing import Process
+    try:
+        from multiprocessing import SimpleQueue
+    except ImportError:
+        from multiprocessing.queues import SimpleQueue
+
     q = SimpleQueue()
+    tracer = current_tracer()
 
     def instrumented_target(*args, **kwargs):
         ex = tb = None
+        trace_mark = tracer.mark() if tracer else 0
+        collected_events = events.collect_events_in_fork()
         try:
             send_value = (target(*args, **kwargs), None, None)
         except:
             _, ex, tb = sys.exc_info()
             send_value = (None, ex, tb)
 
+        # Hand the spans and events recorded in the child to the parent
+        send_value += (tracer.spans_since(trace_mark) if tracer else None,
+                       collected_events.events if collected_events else None)
+
         try:
             q.put(send_value)
         except:
@@ -314,11 +351,16 @@ def fork_process(logger, group=None, target=None, name=None, args=(), kwargs={})
             e_out = Exception(str(send_ex), send_tb, None if ex is None else str(ex), tb)
             q.put(e_out)
 
-    p = Process(group=group, target=instrumented_target, name=name, args=args, kwargs=kwargs)
-    p.start()
-    result = q.get()
-    p.join()
+    with span(getattr(target, "__name__", "fork_process"), "fork"):
+        p = Process(group=group, target=instrumented_target, name=name, args=args, kwargs=kwargs)
+        p.start()
+        result = q.get()
+        p.join()
     if isinstance(result, tuple):
+        if tracer and result[3]:
+            tracer.add_spans(result[3])
+        if result[4]:
+            events.emit_all(result[4])
         if result[1]:
             raise_exception(result[1], result[2])
         return p.exitcode, result[0]
@@ -599,6 +641,41 @@ else:
     odict = OrderedDict
 
 
+class OrderedSet(collections.MutableSet):
+    """
+    A set remembering the order its items were added in, so membership tests take constant time
+    where a list would have to be scanned. append and extend are provided for drop-in use instead of a list.
+    """
+
+    def __init__(self, iterable=()):
+        self._items = odict()
+        self.extend(iterable)
+
+    def __contains__(self, item):
+        return item in self._items
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __repr__(self):
+        return "%s(%r)" % (self.__class__.__name__, list(self))
+
+    def add(self, item):
+        self._items[item] = None
+
+    def discard(self, item):
+        self._items.pop(item, None)
+
+    append = add
+
+    def extend(self, items):
+        for item in items:
+            self.add(item)
+
+
 def is_notstr_iterable(obj):
     """Checks if obj is iterable, but not a string"""
     return not isinstance(obj, basestring) and isinstance(obj, collections.Iterable)
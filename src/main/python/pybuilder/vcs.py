@@ -22,6 +22,8 @@
 """
 
 import os
+from subprocess import Popen, PIPE
+
 from pybuilder.utils import execute_command_and_capture_output
 from pybuilder.errors import PyBuilderException
 
@@ -92,3 +94,39 @@ def count_travis():
     """ Version number dervived from commit count and travis build number. """
     return '{0}.{1}'.format(VCSRevision().count,
                             os.environ.get('TRAVIS_BUILD_NUMBER', 0))
+
+
+def current_revision(directory):
+    """
+    Returns the git commit hash or the svn revision of the given directory or None if it is not under version control.
+    """
+    for command_and_arguments in (("git", "rev-parse", "HEAD"), ("svnversion", "-n", ".")):
+        try:
+            process = Popen(command_and_arguments, stdout=PIPE, stderr=PIPE, cwd=directory)
+            stdout, _ = process.communicate()
+        except OSError:
+            continue
+        revision = stdout.decode("utf-8", "replace").strip()
+        if process.returncode == 0 and revision[:1].isalnum() and " " not in revision and revision != "exported":
+            return revision
+    return None
+
+
+def changed_files(directory, base="HEAD"):
+    """
+    Returns the absolute paths of the files below the given directory that differ from the given git revision,
+    untracked files included, or None if the directory is not part of a git repository.
+    """
+    file_names = []
+    for command_and_arguments in (("git", "diff", "--name-only", "--relative", base, "--", "."),
+                                  ("git", "ls-files", "--others", "--exclude-standard", "--", ".")):
+        try:
+            process = Popen(command_and_arguments, stdout=PIPE, stderr=PIPE, cwd=directory)
+            stdout, _ = process.communicate()
+        except OSError:
+            return None
+        if process.returncode != 0:
+            return None
+        file_names.extend(os.path.join(directory, file_name)
+                          for file_name in stdout.decode("utf-8", "replace").splitlines() if file_name)
+    return [os.path.abspath(file_name) for file_name in file_names]
@@ -0,0 +1,335 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of PyBuilder
+#
+#   Copyright 2011-2015 PyBuilder Team
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""
+    The PyBuilder watch module.
+    Watches the source directories of a project for changes, using inotify where the C library
+    provides it and polling the directories otherwise.
+"""
+
+import errno
+import os
+import select
+import struct
+import sys
+import time
+
+from pybuilder.utils import as_list
+
+try:
+    from os import scandir
+except ImportError:
+    scandir = None
+
+try:
+    import ctypes
+    import ctypes.util
+except ImportError:
+    ctypes = None
+
+WATCHED_DIRECTORY_PROPERTIES = ("dir_source_main_python",
+                                "dir_source_unittest_python",
+                                "dir_source_integrationtest_python",
+                                "dir_source_main_scripts",
+                                "dir_source_cmdlinetest",
+                                "dir_docs",
+                                "sphinx_source_dir")
+
+DEFAULT_DEBOUNCE = 0.2
+DEFAULT_POLL_INTERVAL = 0.5
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+               IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+_EVENT_HEADER = struct.Struct("iIII")
+_IGNORED_SUFFIXES = (".pyc", ".pyo", "~")
+
+
+def watched_directories(project):
+    """
+    Returns the existing source directories the plugins of the project have registered, plus
+    the directories listed in the property "watch_directories".
+    """
+    candidates = ["$" + name for name in WATCHED_DIRECTORY_PROPERTIES if project.has_property(name)]
+    candidates += as_list(project.get_property("watch_directories", []))
+
+    directories = []
+    for path in [project.expand_path(candidate) for candidate in candidates]:
+        if os.path.isdir(path) and path not in directories:
+            directories.append(path)
+    return directories
+
+
+def is_ignored(name):
+    """
+    Hidden files, bytecode and editor backups never trigger a build.
+    """
+    return name.startswith(".") or name == "__pycache__" or name.endswith(_IGNORED_SUFFIXES)
+
+
+def _walk(directory, files):
+    """
+    Collects the size and modification time of all files below the directory.
+    """
+    if scandir is None:
+        for root, dirs, file_names in os.walk(directory):
+            dirs[:] = [name for name in dirs if not is_ignored(name)]
+            for name in file_names:
+                if not is_ignored(name):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    files[path] = (stat.st_size, stat.st_mtime)
+        return
+
+    try:
+        entries = list(scandir(directory))
+    except OSError:
+        return
+    for entry in entries:
+        if is_ignored(entry.name):
+            continue
+        try:
+            if entry.is_dir():
+                _walk(entry.path, files)
+            else:
+                stat = entry.stat()
+                files[entry.path] = (stat.st_size, stat.st_mtime)
+        except OSError:
+            continue
+
+
+class PollingWatcher(object):
+    def __init__(self, directories, files=(), interval=DEFAULT_POLL_INTERVAL):
+        self.directories = list(directories)
+        self.files = list(files)
+        self.interval = interval
+        self._state = self._scan()
+
+    def _scan(self):
+        state = {}
+        for directory in self.directories:
+            _walk(directory, state)
+        for file_name in self.files:
+            try:
+                stat = os.stat(file_name)
+                state[file_name] = (stat.st_size, stat.st_mtime)
+            except OSError:
+                pass
+        return state
+
+    def wait(self, timeout=None):
+        """
+        Returns the files created, changed or removed since the last call, waiting at most timeout seconds
+        (forever if None) for a change.
+        """
+        deadline = time.time() + timeout if timeout is not None else None
+        while True:
+            state = self._scan()
+            changed = set(file_name for file_name in set(state) | set(self._state)
+                          if state.get(file_name) != self._state.get(file_name))
+            self._state = state
+            if changed:
+                return changed
+
+            remaining = deadline - time.time() if deadline is not None else self.interval
+            if remaining <= 0:
+                return changed
+            time.sleep(min(self.interval, remaining))
+
+    def close(self):
+        pass
+
+
+def _load_inotify():
+    if ctypes is None or not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class InotifyWatcher(object):
+    """
+    Watches directory trees with inotify. New directories are watched as they are created.
+    Single files are watched through their directory, as editors tend to replace files they save.
+    """
+
+    def __init__(self, directories, files=(), libc=None):
+        self.libc = libc or _load_inotify()
+        if not self.libc:
+            raise OSError(errno.ENOSYS, "inotify is not available")
+        self.fd = self.libc.inotify_init1(IN_CLOEXEC)
+        if self.fd < 0:
+            self._raise_error("inotify_init1")
+
+        self.directories = list(directories)
+        self.files = set(files)
+        self._watches = {}
+        self._recursive = set()
+        try:
+            for directory in self.directories:
+                self._watch_tree(directory)
+            for file_name in self.files:
+                self._watch(os.path.dirname(file_name))
+        except OSError:
+            self.close()
+            raise
+
+    def _raise_error(self, function):
+        error = ctypes.get_errno()
+        raise OSError(error, "%s failed: %s" % (function, os.strerror(error)))
+
+    def _watch(self, directory, recursive=False):
+        path = directory.encode(sys.getfilesystemencoding() or "utf-8") if not isinstance(directory, bytes) \
+            else directory
+        watch_descriptor = self.libc.inotify_add_watch(self.fd, path, _WATCH_MASK | IN_ONLYDIR)
+        if watch_descriptor < 0:
+            self._raise_error("inotify_add_watch")
+        self._watches[watch_descriptor] = directory
+        if recursive:
+            self._recursive.add(directory)
+
+    def _watch_tree(self, directory, changed=None):
+        self._watch(directory, recursive=True)
+        for name in sorted(os.listdir(directory)):
+            path = os.path.join(directory, name)
+            if is_ignored(name):
+                continue
+            if os.path.isdir(path):
+                self._watch_tree(path, changed)
+            elif changed is not None:
+                changed.add(path)
+
+    def _read_events(self):
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except OSError as e:
+            if e.errno in (errno.EAGAIN, errno.EINTR):
+                return set()
+            raise
+
+        changed = set()
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            watch_descriptor, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + _EVENT_HEADER.size:offset + _EVENT_HEADER.size + length].rstrip(b"\0")
+            offset += _EVENT_HEADER.size + length
+
+            if mask & IN_Q_OVERFLOW:
+                # events have been lost, so everything counts as changed
+                return self._all_files()
+
+            directory = self._watches.get(watch_descriptor)
+            if mask & IN_IGNORED:
+                self._watches.pop(watch_descriptor, None)
+                continue
+            if directory is None or not name:
+                continue
+            name = name.decode(sys.getfilesystemencoding() or "utf-8", "replace")
+            if is_ignored(name):
+                continue
+
+            path = os.path.join(directory, name)
+            if directory in self._recursive:
+                if mask & IN_ISDIR:
+                    if mask & (IN_CREATE | IN_MOVED_TO) and os.path.isdir(path):
+                        self._watch_tree(path, changed)
+                    continue
+                changed.add(path)
+            elif path in self.files:
+                changed.add(path)
+        return changed
+
+    def _all_files(self):
+        files = {}
+        for directory in self.directories:
+            _walk(directory, files)
+        return set(files) | self.files
+
+    def wait(self, timeout=None):
+        """
+        Returns the files created, changed or removed since the last call, waiting at most timeout seconds
+        (forever if None) for a change.
+        """
+        deadline = time.time() + timeout if timeout is not None else None
+        while True:
+            remaining = max(0, deadline - time.time()) if deadline is not None else None
+            try:
+                readable, _, _ = select.select([self.fd], [], [], remaining)
+            except select.error as e:
+                if e.args[0] != errno.EINTR:
+                    raise
+                readable = []
+            if readable:
+                changed = self._read_events()
+                if changed:
+                    return changed
+            elif deadline is not None and time.time() >= deadline:
+                return set()
+
+    def close(self):
+        if self.fd is not None and self.fd >= 0:
+            os.close(self.fd)
+        self.fd = None
+
+
+def create_watcher(directories, files=(), logger=None):
+    """
+    Returns an inotify watcher for the directories and files if possible, a polling watcher otherwise.
+    """
+    if _load_inotify():
+        try:
+            return InotifyWatcher(directories, files)
+        except OSError as e:
+            if logger:
+                logger.warn("Unable to watch for changes with inotify, polling instead: %s", e)
+    return PollingWatcher(directories, files)
+
+
+def wait_for_changes(watcher, debounce=DEFAULT_DEBOUNCE):
+    """
+    Waits for a change and returns all files changed until no further change happened for debounce seconds,
+    so that a burst of saves triggers a single build.
+    """
+    changed = set(watcher.wait())
+    while True:
+        more = watcher.wait(debounce)
+        if not more:
+            return changed
+        changed.update(more)
@@ -0,0 +1,94 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of PyBuilder
+#
+#   Copyright 2011-2015 PyBuilder Team
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""
+    The PyBuilder zygote module.
+    Imports modules ahead of forking, so that the processes forked afterwards, e.g. to run tests, start
+    with the modules loaded instead of importing them anew. The time spent importing every preloaded
+    module is remembered and inherited by the forks, which can thus tell how much import time they
+    were saved. Long-lived processes, i.e. the build daemon and `pyb --watch`, keep the preloaded
+    modules across builds.
+    The modules to preload are given by the project properties named `<prefix>_preload_modules`.
+"""
+
+import importlib
+import sys
+import time
+
+from pybuilder.utils import as_list
+
+PRELOAD_PROPERTY_SUFFIX = "_preload_modules"
+
+_preload_times = {}
+
+
+class PreloadReport(object):
+    """
+        The modules imported by a preload and the ones already preloaded by this process or its parent,
+        with the seconds spent importing them.
+    """
+
+    def __init__(self):
+        self.imported = {}
+        self.preloaded = {}
+
+    @property
+    def import_time(self):
+        return sum(self.imported.values())
+
+    @property
+    def saved_time(self):
+        return sum(self.preloaded.values())
+
+
+def preload_modules(module_names, logger):
+    """
+    Imports the given modules unless they are loaded already. Modules that fail to import are logged
+    and left to the processes importing them later.
+    """
+    report = PreloadReport()
+    for module_name in module_names:
+        if module_name in sys.modules:
+            if module_name in _preload_times:
+                report.preloaded[module_name] = _preload_times[module_name]
+            continue
+        start = time.time()
+        try:
+            importlib.import_module(module_name)
+        except Exception as e:
+            logger.warn("Unable to preload module %s: %s", module_name, e)
+            continue
+        _preload_times[module_name] = report.imported[module_name] = time.time() - start
+    return report
+
+
+def project_preload_modules(project):
+    """
+    Returns the modules to preload named by the properties of the project ending with `_preload_modules`,
+    which are lists of module names or comma-separated module names, e.g. given with -P.
+    """
+    module_names = []
+    for name in sorted(project.properties):
+        if name.endswith(PRELOAD_PROPERTY_SUFFIX):
+            module_names.extend(preload_module_names(project.get_property(name)))
+    return [module_name for index, module_name in enumerate(module_names) if module_name not in module_names[:index]]
+
+
+def preload_module_names(value):
+    return [module_name.strip() for names in as_list(value or []) for module_name in names.split(",")
+            if module_name.strip()]
@@ -0,0 +1,163 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of PyBuilder
+#
+#   Copyright 2011-2015 PyBuilder Team
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from pybuilder.cache import HTTPError, LocalBuildCache, RemoteBuildCache, TieredBuildCache
+from pybuilder.cache_server import BuildCacheServer
+from pybuilder.errors import BuildCacheException
+
+
+class BuildCacheServerTest(unittest.TestCase):
+    read_only = False
+
+    def setUp(self):
+        self.basedir = tempfile.mkdtemp(self.__class__.__name__)
+        self.workspace = os.path.join(self.basedir, "workspace")
+        self.server_storage = LocalBuildCache(os.path.join(self.basedir, "server"))
+        self.server = BuildCacheServer(("127.0.0.1", 0), self.server_storage, self.read_only, quiet=True)
+        self.server_thread = threading.Thread(target=self.server.serve_forever, kwargs={"poll_interval": 0.05})
+        self.server_thread.start()
+        self.remote = RemoteBuildCache("http://127.0.0.1:%d/" % self.server.server_address[1])
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.server_thread.join()
+        shutil.rmtree(self.basedir)
+
+    def local_cache(self, name):
+        return LocalBuildCache(os.path.join(self.basedir, name))
+
+    def write_file(self, relative_name, content):
+        file_name = os.path.join(self.workspace, relative_name)
+        if not os.path.exists(os.path.dirname(file_name)):
+            os.makedirs(os.path.dirname(file_name))
+        with open(file_name, "w") as file_handle:
+            file_handle.write(content)
+        return file_name
+
+
+class ReadWriteBuildCacheServerTest(BuildCacheServerTest):
+    def test_should_miss_unknown_key(self):
+        self.assertEqual(None, self.remote.get("0" * 40))
+
+    def test_should_share_entries_between_agents(self):
+        spam = self.write_file("target/spam.txt", "spam")
+        TieredBuildCache(self.local_cache("first"), self.remote).put("a" * 40, self.workspace, [spam], {"any": 1})
+        os.remove(spam)
+
+        other_agent = TieredBuildCache(self.local_cache("second"), self.remote)
+        manifest = other_agent.get("a" * 40)
+        other_agent.restore(manifest, self.workspace)
+
+        self.assertEqual({"any": 1}, manifest["metadata"])
+        with open(spam) as restored:
+            self.assertEqual("spam", restored.read())
+        self.assertNotEqual(None, self.local_cache("second").get("a" * 40))
+
+    def test_should_reject_contents_not_matching_digest(self):
+        self.assertRaises(BuildCacheException, self.remote._put, "/cas/%s" % ("0" * 40), b"spam")
+
+    def test_should_reject_entry_referencing_missing_contents(self):
+        manifest = b'{"files": {"spam.txt": ["0000000000000000000000000000000000000000", 420]}, "metadata": {}}'
+
+        self.assertRaises(BuildCacheException, self.remote._put, "/ac/%s" % ("a" * 40), manifest)
+
+    def test_should_reject_entry_with_files_outside_of_directory(self):
+        digest = hashlib.sha1(b"spam").hexdigest()
+        self.remote._put("/cas/%s" % digest, b"spam")
+        manifest = ('{"files": {"../spam.txt": ["%s", 420]}, "metadata": {}}' % digest).encode("utf-8")
+
+        self.assertRaises(BuildCacheException, self.remote._put, "/ac/%s" % ("a" * 40), manifest)
+
+    def test_should_reject_malformed_manifests(self):
+        for manifest in (b'{"files": [["x", "y"]]}', b'{"files": {"spam.txt": 1}}', b'[1]', b'"spam"', b'\xff'):
+            with self.assertRaises(HTTPError) as raised:
+                self.remote._request("PUT", "/ac/%s" % ("a" * 40), manifest)
+            self.assertEqual(400, raised.exception.code)
+        self.assertEqual(None, self.server_storage.get("a" * 40))
+
+    def test_should_miss_malformed_manifest(self):
+        os.makedirs(self.server_storage.entries_directory)
+        with open(self.server_storage._entry_file("a" * 40), "w") as entry:
+            entry.write('{"files": [["x", "y"]]}')
+
+        self.assertEqual(None, self.remote.get("a" * 40))
+
+    def test_should_fetch_manifest_replacing_malformed_local_one(self):
+        spam = self.write_file("target/spam.txt", "spam")
+        TieredBuildCache(self.local_cache("first"), self.remote).put("a" * 40, self.workspace, [spam])
+        local_cache = self.local_cache("second")
+        os.makedirs(local_cache.entries_directory)
+        with open(local_cache._entry_file("a" * 40), "w") as entry:
+            entry.write('{"files": [["x", "y"]]}')
+
+        TieredBuildCache(local_cache, self.remote).get("a" * 40)
+
+        self.assertEqual(["target/spam.txt"], list(local_cache.get("a" * 40)["files"]))
+
+    def test_should_not_fetch_invalid_manifest(self):
+        digest = hashlib.sha1(b"spam").hexdigest()
+        self.remote._put("/cas/%s" % digest, b"spam")
+        # A server that does not validate the manifests it serves
+        self.server_storage.get = lambda key: {"files": {"/etc/spam": [digest, 0o4755]}, "metadata": {}}
+        local_cache = self.local_cache("local")
+
+        self.assertRaises(BuildCacheException, TieredBuildCache(local_cache, self.remote).get, "a" * 40)
+        self.assertEqual(None, local_cache.get("a" * 40))
+        self.assertFalse(local_cache.has_object(digest))
+
+    def test_should_report_existing_contents(self):
+        digest = hashlib.sha1(b"spam").hexdigest()
+        self.remote._put("/cas/%s" % digest, b"spam")
+
+        self.assertTrue(self.remote.has_object(digest))
+        self.assertFalse(self.remote.has_object("0" * 40))
+
+
+class ReadOnlyBuildCacheServerTest(BuildCacheServerTest):
+    read_only = True
+
+    def test_should_reject_uploads(self):
+        digest = hashlib.sha1(b"spam").hexdigest()
+
+        self.assertRaises(BuildCacheException, self.remote._put, "/cas/%s" % digest, b"spam")
+        self.assertFalse(self.server_storage.has_object(digest))
+
+    def test_should_not_upload_from_read_only_client(self):
+        spam = self.write_file("spam.txt", "spam")
+        self.remote.read_only = True
+
+        TieredBuildCache(self.local_cache("first"), self.remote).put("a" * 40, self.workspace, [spam])
+
+        self.assertEqual(None, self.remote.get("a" * 40))
+
+
+class UnavailableRemoteBuildCacheTest(unittest.TestCase):
+    def test_should_stop_using_unavailable_remote(self):
+        remote = RemoteBuildCache("http://127.0.0.1:1", timeout=1)
+
+        self.assertRaises(BuildCacheException, remote.get, "a" * 40)
+        self.assertFalse(remote.available)
@@ -0,0 +1,206 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of PyBuilder
+#
+#   Copyright 2011-2015 PyBuilder Team
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+import os
+import shutil
+import stat
+import tempfile
+import time
+import unittest
+
+from pybuilder.cache import LocalBuildCache, build_cache_for, default_cache_directory, validate_manifest
+from pybuilder.errors import BuildCacheException
+from test_utils import Mock, patch
+
+
+class LocalBuildCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.basedir = tempfile.mkdtemp(self.__class__.__name__)
+        self.workspace = os.path.join(self.basedir, "workspace")
+        self.cache = LocalBuildCache(os.path.join(self.basedir, "cache"), 1024)
+
+    def tearDown(self):
+        shutil.rmtree(self.basedir)
+
+    def write_file(self, relative_name, content):
+        file_name = os.path.join(self.workspace, relative_name)
+        if not os.path.exists(os.path.dirname(file_name)):
+            os.makedirs(os.path.dirname(file_name))
+        with open(file_name, "w") as file_handle:
+            file_handle.write(content)
+        return file_name
+
+    def read_file(self, relative_name):
+        with open(os.path.join(self.workspace, relative_name)) as file_handle:
+            return file_handle.read()
+
+    def test_should_miss_unknown_key(self):
+        self.assertEqual(None, self.cache.get("spam"))
+
+    def test_should_restore_stored_files_and_metadata(self):
+        spam = self.write_file("target/spam.txt", "spam")
+        script = self.write_file("target/scripts/eggs", "eggs")
+        os.chmod(script, 0o755)
+
+        self.cache.put("key", self.workspace, [spam, script], {"exit_code": 0})
+        shutil.rmtree(os.path.join(self.workspace, "target"))
+        manifest = self.cache.get("key")
+        self.cache.restore(manifest, self.workspace)
+
+        self.assertEqual({"exit_code": 0}, manifest["metadata"])
+        self.assertEqual("spam", self.read_file("target/spam.txt"))
+        self.assertEqual("eggs", self.read_file("target/scripts/eggs"))
+        self.assertTrue(os.stat(script).st_mode & stat.S_IXUSR)
+
+    def test_should_store_identical_contents_once(self):
+        spam = self.write_file("spam.txt", "same")
+        eggs = self.write_file("eggs.txt", "same")
+
+        self.cache.put("key", self.workspace, [spam, eggs])
+
+        self.assertEqual(4, self.cache.size())
+
+    def test_should_miss_when_object_is_missing(self):
+        spam = self.write_file("spam.txt", "spam")
+        self.cache.put("key", self.workspace, [spam])
+        shutil.rmtree(self.cache.objects_directory)
+
+        self.assertEqual(None, self.cache.get("key"))
+
+    def test_should_refuse_to_return_malformed_manifest(self):
+        os.makedirs(self.cache.entries_directory)
+        with open(self.cache._entry_file("key"), "w") as entry:
+            entry.write('{"files": [["x", "y"]]}')
+
+        self.assertRaises(BuildCacheException, self.cache.get, "key")
+
+    def test_should_evict_malformed_manifest(self):
+        os.makedirs(self.cache.entries_directory)
+        with open(self.cache._entry_file("malformed"), "w") as entry:
+            entry.write('{"files": [["x", "y"]]}')
+        os.utime(self.cache._entry_file("malformed"), (time.time() - 100, time.time() - 100))
+
+        self.cache.put("key", self.workspace, [self.write_file("spam", "spam" * 300)])
+
+        self.assertFalse(os.path.exists(self.cache._entry_file("malformed")))
+
+    def test_should_refuse_to_store_files_outside_of_directory(self):
+        outside = os.path.join(self.basedir, "outside.txt")
+        with open(outside, "w") as file_handle:
+            file_handle.write("outside")
+
+        self.assertRaises(BuildCacheException, self.cache.put, "key", self.workspace, [outside])
+
+    def test_should_refuse_to_restore_files_outside_of_directory(self):
+        spam = self.write_file("spam.txt", "spam")
+        manifest = self.cache.put("key", self.workspace, [spam])
+        digest, mode = manifest["files"]["spam.txt"]
+
+        for relative_name in ("../outside.txt", "target/../../outside.txt", os.path.join(self.basedir, "outside.txt")):
+            self.assertRaises(BuildCacheException, self.cache.restore,
+                              {"files": {relative_name: [digest, mode]}, "metadata": {}}, self.workspace)
+        self.assertFalse(os.path.exists(os.path.join(self.basedir, "outside.txt")))
+
+    def test_should_refuse_to_restore_files_with_special_mode(self):
+        spam = self.write_file("spam.txt", "spam")
+        digest, _ = self.cache.put("key", self.workspace, [spam])["files"]["spam.txt"]
+
+        self.assertRaises(BuildCacheException, self.cache.restore,
+                          {"files": {"eggs.txt": [digest, 0o4755]}, "metadata": {}}, self.workspace)
+        self.assertFalse(os.path.exists(os.path.join(self.workspace, "eggs.txt")))
+
+    def test_should_evict_least_recently_used_entries_when_exceeding_max_size(self):
+        for key in ("first", "second", "third"):
+            self.cache.put(key, self.workspace, [self.write_file(key, (key * 100)[:300])])
+            os.utime(self.cache._entry_file(key), (time.time() - 100, time.time() - 100))
+        self.cache.get("first")
+
+        self.cache.put("fourth", self.workspace, [self.write_file("fourth", ("fourth" * 100)[:300])])
+
+        self.assertNotEqual(None, self.cache.get("first"))
+        self.assertEqual(None, self.cache.get("second"))
+        self.assertNotEqual(None, self.cache.get("third"))
+        self.assertNotEqual(None, self.cache.get("fourth"))
+        self.assertTrue(self.cache.size() <= 1024)
+
+    def test_should_not_evict_while_estimated_size_is_within_max_size(self):
+        self.cache.put("first", self.workspace, [self.write_file("first", "first")])
+
+        with patch("pybuilder.cache.LocalBuildCache.size") as size:
+            with patch("pybuilder.cache.LocalBuildCache.evict") as evict:
+                self.cache.put("second", self.workspace, [self.write_file("second", "second")])
+
+        size.assert_not_called()
+        evict.assert_not_called()
+
+
+class ValidateManifestTest(unittest.TestCase):
+    DIGEST = "0123456789abcdef0123456789abcdef01234567"
+
+    def assert_invalid(self, files):
+        self.assertRaises(BuildCacheException, validate_manifest, {"files": files, "metadata": {}})
+
+    def test_should_accept_relative_files_with_plain_modes(self):
+        validate_manifest({"files": {"target/spam.txt": [self.DIGEST, 0o644], "eggs": [self.DIGEST, 0o755]}})
+
+    def test_should_reject_names_leaving_directory(self):
+        self.assert_invalid({"../spam.txt": [self.DIGEST, 0o644]})
+        self.assert_invalid({"target/../../spam.txt": [self.DIGEST, 0o644]})
+        self.assert_invalid({"/etc/spam.txt": [self.DIGEST, 0o644]})
+        self.assert_invalid({"": [self.DIGEST, 0o644]})
+        self.assert_invalid({".": [self.DIGEST, 0o644]})
+
+    def test_should_reject_digests_that_are_no_keys(self):
+        self.assert_invalid({"spam.txt": ["../../../etc/passwd", 0o644]})
+        self.assert_invalid({"spam.txt": [self.DIGEST.upper(), 0o644]})
+        self.assert_invalid({"spam.txt": [None, 0o644]})
+
+    def test_should_reject_modes_beyond_permissions(self):
+        self.assert_invalid({"spam.txt": [self.DIGEST, 0o4755]})
+        self.assert_invalid({"spam.txt": [self.DIGEST, -1]})
+        self.assert_invalid({"spam.txt": [self.DIGEST, "0o644"]})
+
+    def test_should_reject_malformed_manifests(self):
+        self.assertRaises(BuildCacheException, validate_manifest, {})
+        self.assertRaises(BuildCacheException, validate_manifest, {"files": ["spam.txt"]})
+        self.assert_invalid({"spam.txt": [self.DIGEST]})
+
+
+class BuildCacheForTest(unittest.TestCase):
+    def test_should_not_create_cache_when_disabled(self):
+        project = Mock()
+        project.get_property.side_effect = lambda name, default=None: {"build_cache_enabled": "false"}.get(name)
+
+        self.assertEqual(None, build_cache_for(project))
+
+    def test_should_create_cache_with_configured_directory_and_max_size(self):
+        properties = {"build_cache_enabled": "true",
+                      "build_cache_dir": "/any/cache",
+                      "build_cache_max_size": "4096"}
+        project = Mock()
+        project.get_property.side_effect = lambda name, default=None: properties.get(name, default)
+
+        cache = build_cache_for(project)
+
+        self.assertEqual("/any/cache", cache.directory)
+        self.assertEqual(4096, cache.max_size)
+
+    def test_should_use_xdg_cache_home_for_default_directory(self):
+        with patch.dict("os.environ", {"XDG_CACHE_HOME": "/any/cache/home"}):
+            self.assertEqual(os.path.join("/any/cache/home", "pybuilder"), default_cache_directory())
@@ -124,3 +124,15 @@ class TeamCityProxyTests(unittest.TestCase):
                              call("##teamcity[testFailed name='important-test' message='See details' details='booom']"),
                              call("##teamcity[testFinished name='important-test']")
                          ])
+
+    @patch('pybuilder.ci_server_interaction.flush_text_line')
+    def test_should_output_cached_test_for_teamcity(self, output):
+        with TeamCityTestProxy().and_test_name('important-test') as test:
+            test.cached()
+
+        self.assertEqual(output.call_args_list,
+                         [
+                             call("##teamcity[testStarted name='important-test']"),
+                             call("##teamcity[testMetadata testName='important-test' name='cached' value='true']"),
+                             call("##teamcity[testFinished name='important-test']")
+                         ])
@@ -16,6 +16,10 @@
 #   See the License for the specific language governing permissions and
 #   limitations under the License.
 
+import json
+import os
+import shutil
+import tempfile
 import unittest
 
 from pybuilder.cli import (parse_options,
@@ -23,8 +27,13 @@ from pybuilder.cli import (parse_options,
                            CommandLineUsageException,
                            StdOutLogger,
                            length_of_longest_string,
-                           print_list_of_tasks)
+                           print_list_of_tasks,
+                           print_plan_list_of_tasks,
+                           write_plan_graph)
 from pybuilder.core import Logger
+from pybuilder.errors import PyBuilderException
+from pybuilder.graph_utils import Graph
+from pybuilder.terminal import BOLD
 from test_utils import Mock, patch, call
 
 
@@ -111,6 +120,19 @@ class StdOutLoggerTest(unittest.TestCase):
         actual_message = self.stdout_logger._level_to_string(-1)
         self.assertEqual(actual_message, "[ERROR]")
 
+    @patch("pybuilder.cli.events.emit_event")
+    @patch("pybuilder.cli.print_text_line")
+    def test_should_print_log_message_rendered_from_emitted_event(self, print_text_line, emit_event):
+        logger = StdOutLogger(Logger.INFO)
+
+        logger.warn("spam %s", "eggs")
+
+        event = emit_event.call_args[0][0]
+        self.assertEqual("log", event["event"])
+        self.assertEqual("warn", event["level"])
+        self.assertEqual("spam eggs", event["message"])
+        print_text_line.assert_called_with("[WARN]  spam eggs")
+
 
 class ColoredStdOutLoggerTest(unittest.TestCase):
     def setUp(self):
@@ -210,6 +232,75 @@ class ParseOptionsTest(unittest.TestCase):
         self.assert_options(options, environments=["spam", "eggs"])
         self.assertEquals([], arguments)
 
+    def test_should_parse_number_of_jobs(self):
+        options, arguments = parse_options(["-j", "4", "eggs"])
+
+        self.assert_options(options)
+        self.assertEquals(4, options.jobs)
+        self.assertEquals(["eggs"], arguments)
+
+    def test_should_default_to_single_job(self):
+        options, arguments = parse_options([])
+
+        self.assertEquals(1, options.jobs)
+
+    def test_should_abort_execution_when_number_of_jobs_is_not_positive(self):
+        self.assertRaises(
+            CommandLineUsageException, parse_options, ["-j", "0"])
+
+    def test_should_parse_watch_option(self):
+        options, arguments = parse_options(["-w", "run_unit_tests"])
+
+        self.assertTrue(options.watch)
+        self.assertFalse(parse_options([])[0].watch)
+        self.assertEquals(["run_unit_tests"], arguments)
+
+    def test_should_parse_trace_options(self):
+        options, arguments = parse_options(["--trace", "trace.json", "--trace-format", "otlp"])
+
+        self.assertEquals("trace.json", options.trace_file)
+        self.assertEquals("otlp", options.trace_format)
+
+    def test_should_parse_events_option(self):
+        options, arguments = parse_options(["--events", "events.jsonl"])
+
+        self.assertEquals("events.jsonl", options.events_file)
+
+    def test_should_not_write_events_by_default(self):
+        options, arguments = parse_options([])
+
+        self.assertEquals(None, options.events_file)
+
+    def test_should_parse_import_profile_option(self):
+        options, arguments = parse_options(["--import-profile", "clean"])
+
+        self.assertTrue(options.import_profile)
+        self.assertFalse(parse_options([])[0].import_profile)
+        self.assertEquals(["clean"], arguments)
+
+    def test_should_not_trace_by_default(self):
+        options, arguments = parse_options([])
+
+        self.assertEquals(None, options.trace_file)
+        self.assertEquals("chrome", options.trace_format)
+
+    def test_should_abort_execution_when_trace_format_is_unknown(self):
+        self.assertRaises(
+            CommandLineUsageException, parse_options, ["--trace", "trace.json", "--trace-format", "spam"])
+
+    def test_should_parse_plan_graph_options(self):
+        options, arguments = parse_options(["--plan-graph", "plan.json", "--plan-graph-format", "json", "publish"])
+
+        self.assertEquals(["publish"], arguments)
+        self.assertEquals("plan.json", options.plan_graph_file)
+        self.assertEquals("json", options.plan_graph_format)
+
+    def test_should_write_plan_graph_in_dot_format_by_default(self):
+        options, arguments = parse_options(["--plan-graph", "plan.dot"])
+
+        self.assertEquals("plan.dot", options.plan_graph_file)
+        self.assertEquals("dot", options.plan_graph_format)
+
     def test_should_parse_empty_environments(self):
         options, arguments = parse_options([])
 
@@ -217,6 +308,86 @@ class ParseOptionsTest(unittest.TestCase):
         self.assertEquals([], arguments)
 
 
+class WritePlanGraphTest(unittest.TestCase):
+    def setUp(self):
+        self.basedir = tempfile.mkdtemp(self.__class__.__name__)
+        self.reactor = Mock()
+        self.reactor.project.name = "spam"
+        self.reactor.execution_manager.get_plan_graph.return_value = Graph({"publish": ["compile", "prepare"],
+                                                                            "compile": ["prepare"]})
+
+    def tearDown(self):
+        shutil.rmtree(self.basedir)
+
+    def test_should_write_plan_graph_of_execution_plan(self):
+        plan_graph_file = os.path.join(self.basedir, "plan.json")
+        options, arguments = parse_options(["--plan-graph", plan_graph_file, "--plan-graph-format", "json",
+                                            "publish"])
+        logger = Mock()
+
+        write_plan_graph(options, arguments, self.reactor, logger)
+
+        self.reactor.create_execution_plan.assert_called_with(["publish"], [])
+        with open(plan_graph_file) as graph_file:
+            self.assertEqual([["prepare"], ["compile"], ["publish"]], json.load(graph_file)["levels"])
+        self.assertTrue(logger.info.called)
+
+    def test_should_raise_exception_when_plan_graph_cannot_be_written(self):
+        options, arguments = parse_options(["--plan-graph", os.path.join(self.basedir, "missing", "plan.dot")])
+
+        self.assertRaises(PyBuilderException, write_plan_graph, options, arguments, self.reactor, Mock())
+
+
+@patch("pybuilder.cli.print_styled_text_line", return_value=None)
+@patch("pybuilder.cli.print_text_line", return_value=None)
+@patch("pybuilder.cli.expected_task_durations")
+class PlanListOfTasksTests(unittest.TestCase):
+    def setUp(self):
+        self.reactor = Mock()
+        self.reactor.project.name = "spam"
+        self.tasks = []
+        for name in ("prepare", "compile", "analyze", "publish"):
+            task = Mock()
+            task.name = name
+            task.description = []
+            task.dependencies = []
+            self.tasks.append(task)
+        self.reactor.create_execution_plan.return_value = self.tasks
+        self.reactor.execution_manager.get_plan_graph.return_value = Graph({"publish": ["compile", "analyze"],
+                                                                            "compile": ["prepare"],
+                                                                            "analyze": ["prepare"]})
+
+    def test_should_list_tasks_without_durations_when_no_history_is_recorded(
+            self, expected_task_durations, print_text_line, print_styled_text_line):
+        expected_task_durations.return_value = {}
+        options, arguments = parse_options(["-T"])
+
+        print_plan_list_of_tasks(options, arguments, self.reactor)
+
+        print_text_line.assert_has_calls([call('Tasks that will be executed for project "spam":'),
+                                          call('    prepare - <no description available>')])
+        self.assertFalse(print_styled_text_line.called)
+
+    def test_should_mark_critical_path_and_print_minimum_durations(self, expected_task_durations,
+                                                                   print_text_line, print_styled_text_line):
+        expected_task_durations.return_value = {"prepare": 10, "compile": 100, "analyze": 40}
+        options, arguments = parse_options(["-T", "-j", "3"])
+
+        print_plan_list_of_tasks(options, arguments, self.reactor)
+
+        print_styled_text_line.assert_has_calls([
+            call("    prepare *     [~10 ms] - <no description available>", options, BOLD),
+            call("    compile *    [~100 ms] - <no description available>", options, BOLD),
+            call("    analyze       [~40 ms] - <no description available>", options),
+            call("    publish * [no history] - <no description available>", options, BOLD)])
+        print_text_line.assert_has_calls([
+            call("Expected duration: 150 ms executing one task after the other"),
+            call("Critical path (*): 110 ms through prepare -> compile -> publish"),
+            call("Minimum wall-clock time using 1 job(s): 150 ms"),
+            call("Minimum wall-clock time using 2 job(s): 110 ms"),
+            call("Minimum wall-clock time using 3 job(s): 110 ms")])
+
+
 class LengthOfLongestStringTests(unittest.TestCase):
     def test_should_return_zero_when_list_is_empty(self):
         self.assertEqual(0, length_of_longest_string([]))
@@ -0,0 +1,91 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of PyBuilder
+#
+#   Copyright 2011-2015 PyBuilder Team
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+import unittest
+
+from pybuilder.composite import CompositeBuild, Subproject, SubprojectLogger
+from pybuilder.core import Logger, Project
+from pybuilder.errors import CompositeBuildException, PyBuilderException
+from pybuilder.reactor import Reactor
+from test_utils import Mock
+
+
+class CompositeBuildTest(unittest.TestCase):
+    def setUp(self):
+        self.reactor = Reactor(Mock(), Mock())
+        self.composite_build = CompositeBuild(Mock(), self.reactor)
+
+    def add_subproject(self, directory, depends_on=None, build=None):
+        self.reactor.require_subproject(directory, depends_on)
+        reactor = Mock(project=Project("/any/" + directory))
+        if build:
+            reactor.build.side_effect = build
+        self.composite_build.subprojects[directory] = Subproject(directory, self.reactor.subprojects[directory],
+                                                                 reactor)
+        return reactor
+
+    def test_should_order_subprojects_after_their_dependencies(self):
+        self.reactor.require_subproject("app", depends_on=["lib", "util"])
+        self.reactor.require_subproject("lib", depends_on="util")
+        self.reactor.require_subproject("docs")
+        self.reactor.require_subproject("util")
+
+        self.assertEqual(["docs", "util", "lib", "app"], self.composite_build.build_order())
+
+    def test_should_raise_exception_when_subproject_depends_on_unknown_subproject(self):
+        self.reactor.require_subproject("app", depends_on="lib")
+
+        self.assertRaises(CompositeBuildException, self.composite_build.build_order)
+
+    def test_should_raise_exception_when_subprojects_depend_on_each_other(self):
+        self.reactor.require_subproject("app", depends_on="lib")
+        self.reactor.require_subproject("lib", depends_on="app")
+
+        self.assertRaises(CompositeBuildException, self.composite_build.build_order)
+
+    def test_should_build_subprojects_with_dist_dirs_of_their_dependencies(self):
+        lib_reactor = self.add_subproject("lib")
+        lib_reactor.project.set_property("dir_dist", "$dir_target/dist")
+        lib_reactor.project.set_property("dir_target", "target")
+        app_reactor = self.add_subproject("app", depends_on="lib")
+
+        self.composite_build.build(["publish"], ["ci"], jobs=2)
+
+        app_reactor.build.assert_called_with(tasks=["publish"], environments=["ci"], resume=False)
+        self.assertEqual({"lib": "/any/lib/target/dist"}, app_reactor.project.get_property("subproject_dist_dirs"))
+        self.assertEqual({}, lib_reactor.project.get_property("subproject_dist_dirs"))
+
+    def test_should_not_build_dependents_of_failed_subproject(self):
+        def fail(**keyword_arguments):
+            raise PyBuilderException("spam")
+
+        self.add_subproject("lib", build=fail)
+        app_reactor = self.add_subproject("app", depends_on="lib")
+
+        self.assertRaises(CompositeBuildException, self.composite_build.build)
+        app_reactor.build.assert_not_called()
+
+
+class SubprojectLoggerTest(unittest.TestCase):
+    def test_should_prefix_messages_with_subproject_directory(self):
+        logger = Mock(threshold=Logger.INFO)
+
+        SubprojectLogger(logger, "libs/spam").info("Building %s", "spam")
+
+        logger.log.assert_called_with(Logger.INFO, "[%s] %s", "libs/spam", "Building spam")
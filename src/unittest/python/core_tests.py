@@ -24,7 +24,7 @@ from pyassert import assert_that
 
 from pybuilder.core import (Project, Logger, init, INITIALIZER_ATTRIBUTE,
                             ENVIRONMENTS_ATTRIBUTE, task, description,
-                            Dependency, RequirementsFile)
+                            Dependency, RequirementsFile, input_properties)
 from pybuilder.errors import MissingPropertyException
 from test_utils import patch
 
@@ -101,6 +101,59 @@ class ProjectTest(unittest.TestCase):
             os.path.join("/imaginary", "spam", "eggs", "foo", "bar"),
             self.project.expand_path("$spam/$eggs", "foo", "bar"))
 
+    def test_expand_should_reflect_changed_property(self):
+        self.project.set_property("spam", "spam")
+        self.project.set_property("eggs", "$spam")
+        self.assertEquals("spam", self.project.expand("$eggs"))
+
+        self.project.set_property("spam", "ham")
+        self.assertEquals("ham", self.project.expand("$eggs"))
+
+    def test_expand_should_reflect_property_changed_in_properties(self):
+        self.project.set_property("spam", "spam")
+        self.assertEquals("spam", self.project.expand("$spam"))
+
+        self.project.properties["spam"] = "ham"
+        self.assertEquals("ham", self.project.expand("$spam"))
+
+        del self.project.properties["spam"]
+        self.assertRaises(MissingPropertyException, self.project.expand, "$spam")
+
+    def test_expand_should_reflect_list_property_changed_in_place(self):
+        self.project.set_property("spam", ["spam"])
+        self.assertEquals("['spam']", self.project.expand("$spam"))
+
+        self.project.get_property("spam").append("eggs")
+        self.assertEquals("['spam', 'eggs']", self.project.expand("$spam"))
+
+    def test_expand_should_reflect_changed_basedir(self):
+        self.assertEquals("/imaginary/spam", self.project.expand("$basedir/spam"))
+
+        self.project.basedir = "/other"
+        self.assertEquals("/other/spam", self.project.expand("$basedir/spam"))
+
+    def test_expand_should_substitute_braced_placeholders(self):
+        self.project.set_property("spam", "spam")
+        self.assertEquals("spam_eggs", self.project.expand("${spam}_eggs"))
+
+    def test_expand_should_expand_escaped_placeholders_again(self):
+        self.project.set_property("spam", "spam")
+        self.project.set_property("eggs", "${spam}-$$$$spam")
+        self.assertEquals("spam-spam", self.project.expand("$eggs"))
+
+    def test_expand_should_raise_exception_when_placeholder_is_invalid(self):
+        self.assertRaises(ValueError, self.project.expand, "$1")
+
+    def test_expand_should_survive_pickling_of_project(self):
+        import pickle
+
+        self.project.set_property("spam", "spam")
+        self.project.expand("$spam")
+        project = pickle.loads(pickle.dumps(self.project))
+
+        project.set_property("spam", "eggs")
+        self.assertEquals("eggs", project.expand("$spam"))
+
     def test_should_raise_exception_when_getting_mandatory_propert_and_property_is_not_found(self):
         self.assertRaises(MissingPropertyException,
                           self.project.get_mandatory_property, "i_dont_exist")
@@ -535,6 +588,26 @@ class TaskTests(unittest.TestCase):
         self.assertEqual(task_with_description._python_builder_name, "task_with_description")
         self.assertEqual(task_with_description._python_builder_description, "any-description")
 
+    def test_should_declare_inputs_and_outputs_of_task(self):
+        properties = input_properties("any-property")
+
+        @task(inputs=["**/*.py", properties], outputs="$dir_dist")
+        def task_with_inputs_and_outputs():
+            pass
+
+        self.assertEqual(task_with_inputs_and_outputs._python_builder_task, True)
+        self.assertEqual(task_with_inputs_and_outputs._python_builder_inputs, ["**/*.py", properties])
+        self.assertEqual(task_with_inputs_and_outputs._python_builder_outputs, ["$dir_dist"])
+        self.assertEqual(properties(), ("any-property",))
+
+    def test_should_not_declare_outputs_of_task_when_none_are_given(self):
+        @task("any-task-name")
+        def task_without_outputs():
+            pass
+
+        self.assertFalse(hasattr(task_without_outputs, "_python_builder_inputs"))
+        self.assertFalse(hasattr(task_without_outputs, "_python_builder_outputs"))
+
 
 class RequirementsFileTests(unittest.TestCase):
     def test_requirements_file_should_be_equal_to_itself(self):
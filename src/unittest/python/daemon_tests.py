@@ -0,0 +1,308 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of PyBuilder
+#
+#   Copyright 2011-2015 PyBuilder Team
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import types
+import unittest
+
+from pybuilder import daemon
+from pybuilder.core import task
+from pybuilder.daemon import (BuildDaemon, SocketStream, project_directory_of, run_build, secure_daemon_directory,
+                              socket_file)
+from pybuilder.errors import DaemonException
+from test_utils import Mock, patch
+
+
+def read_frames(connection):
+    return list(daemon._read_frames(connection))
+
+
+class ProjectDirectoryOfTest(unittest.TestCase):
+    def test_should_default_to_current_directory(self):
+        self.assertEqual(os.path.abspath("."), project_directory_of(["-v", "publish"]))
+
+    def test_should_find_project_directory_options(self):
+        expected = os.path.abspath("spam")
+        self.assertEqual(expected, project_directory_of(["-D", "spam", "publish"]))
+        self.assertEqual(expected, project_directory_of(["-Dspam"]))
+        self.assertEqual(expected, project_directory_of(["--project-directory", "spam"]))
+        self.assertEqual(expected, project_directory_of(["--project-directory=spam"]))
+
+    def test_should_use_distinct_sockets_per_project(self):
+        self.assertEqual(socket_file("spam"), socket_file(os.path.abspath("spam")))
+        self.assertNotEqual(socket_file("spam"), socket_file("eggs"))
+
+
+@unittest.skipUnless(hasattr(os, "getuid"), "requires Unix")
+class SecureDaemonDirectoryTest(unittest.TestCase):
+    def setUp(self):
+        self.runtime_directory = tempfile.mkdtemp(self.__class__.__name__)
+        self.directory = os.path.join(self.runtime_directory, "pybuilder-daemon")
+        self.environment = patch.dict("os.environ", {"XDG_RUNTIME_DIR": self.runtime_directory})
+        self.environment.start()
+
+    def tearDown(self):
+        self.environment.stop()
+        shutil.rmtree(self.runtime_directory)
+
+    def test_should_create_directory_accessible_to_user_only(self):
+        self.assertEqual(self.directory, secure_daemon_directory())
+        self.assertEqual(0o700, os.stat(self.directory).st_mode & 0o777)
+        self.assertEqual(self.directory, secure_daemon_directory())
+
+    def test_should_refuse_directory_accessible_to_other_users(self):
+        os.mkdir(self.directory)
+        os.chmod(self.directory, 0o777)
+
+        self.assertRaises(DaemonException, secure_daemon_directory)
+
+    def test_should_refuse_symbolic_link(self):
+        target = os.path.join(self.runtime_directory, "target")
+        os.mkdir(target, 0o700)
+        os.symlink(target, self.directory)
+
+        self.assertRaises(DaemonException, secure_daemon_directory)
+
+    def test_should_refuse_directory_of_other_user(self):
+        os.mkdir(self.directory, 0o700)
+
+        with patch("os.getuid", return_value=os.getuid() + 1):
+            self.assertRaises(DaemonException, secure_daemon_directory)
+
+
+class SocketStreamTest(unittest.TestCase):
+    def setUp(self):
+        self.server, self.client = socket.socketpair()
+
+    def tearDown(self):
+        self.server.close()
+        self.client.close()
+
+    def test_should_send_writes_as_frames(self):
+        stream = SocketStream(self.server, "out", tty=True)
+
+        stream.write("spam")
+        stream.write("")
+        stream.writelines(["eggs\n", b"ham"])
+        self.server.close()
+
+        self.assertEqual([{"out": "spam"}, {"out": "eggs\n"}, {"out": "ham"}], read_frames(self.client))
+        self.assertTrue(stream.isatty())
+
+    def test_should_run_build_with_output_sent_to_connection(self):
+        def build(*args):
+            sys.stdout.write("building %s\n" % " ".join(args))
+            sys.stderr.write(os.environ["SPAM"])
+            return 3
+
+        with patch("pybuilder.cli.main", new_callable=lambda: build):
+            with patch("os.chdir") as chdir:
+                with patch.dict("os.environ", {}):
+                    exit_code = run_build(self.server, {"args": ["-v", "publish"],
+                                                        "cwd": "/any/directory",
+                                                        "env": {"SPAM": "eggs"}})
+        self.server.close()
+
+        self.assertEqual(3, exit_code)
+        chdir.assert_called_with("/any/directory")
+        self.assertEqual([{"out": "building -v publish\n"}, {"err": "eggs"}, {"exit": 3}],
+                         read_frames(self.client))
+        self.assertIs(sys.__stdout__, sys.stdout)
+
+
+class ExchangeTest(unittest.TestCase):
+    def setUp(self):
+        self.server, self.client = socket.socketpair()
+        self.requests = []
+
+    def tearDown(self):
+        self.server.close()
+
+    def serve(self, *frames):
+        def respond():
+            self.requests.append(next(daemon._read_frames(self.server)))
+            for frame in frames:
+                daemon._send_frame(self.server, frame)
+            self.server.close()
+
+        thread = threading.Thread(target=respond)
+        thread.start()
+        return thread
+
+    def exchange(self):
+        with patch("pybuilder.daemon._write") as write:
+            return daemon._exchange(self.client, {"args": ["publish"]}, "/any/project"), write
+
+    def test_should_stream_output_and_return_exit_code(self):
+        thread = self.serve({"out": "spam"}, {"err": "eggs"}, {"exit": 2})
+
+        exit_code, write = self.exchange()
+        thread.join()
+
+        self.assertEqual(2, exit_code)
+        self.assertEqual([{"args": ["publish"]}], self.requests)
+        write.assert_any_call(sys.stdout, "spam")
+        write.assert_any_call(sys.stderr, "eggs")
+
+    def test_should_return_none_when_daemon_restarts(self):
+        thread = self.serve({"restart": True})
+
+        exit_code, _ = self.exchange()
+        thread.join()
+
+        self.assertEqual(None, exit_code)
+
+    def test_should_return_none_when_daemon_goes_away_before_responding(self):
+        thread = self.serve()
+
+        exit_code, _ = self.exchange()
+        thread.join()
+
+        self.assertEqual(None, exit_code)
+
+    def test_should_raise_exception_when_connection_is_lost_during_build(self):
+        thread = self.serve({"out": "spam"})
+
+        self.assertRaises(DaemonException, self.exchange)
+        thread.join()
+
+
+class BuildDaemonTest(unittest.TestCase):
+    def setUp(self):
+        self.basedir = tempfile.mkdtemp(self.__class__.__name__)
+        self.descriptor = os.path.join(self.basedir, "build.py")
+        with open(self.descriptor, "w") as descriptor:
+            descriptor.write("name = 'spam'\n")
+        self.daemon = BuildDaemon(self.basedir, Mock())
+
+    def tearDown(self):
+        shutil.rmtree(self.basedir)
+
+    def test_should_detect_changed_file(self):
+        self.daemon.watch(self.descriptor)
+        self.assertFalse(self.daemon.has_changes())
+
+        with open(self.descriptor, "a") as descriptor:
+            descriptor.write("version = '1.0'\n")
+
+        self.assertTrue(self.daemon.has_changes())
+
+    def test_should_detect_created_and_removed_files(self):
+        missing_file = os.path.join(self.basedir, "missing.py")
+        self.daemon.watch(missing_file)
+        self.daemon.watch(self.descriptor)
+        self.assertFalse(self.daemon.has_changes())
+
+        os.remove(self.descriptor)
+
+        self.assertTrue(self.daemon.has_changes())
+
+    def test_should_unload_plugin_modules(self):
+        plugin_module = types.ModuleType("any_daemon_plugin")
+        plugin_module.any_task = task(lambda: None)
+        sys.modules["any_daemon_plugin"] = plugin_module
+        self.daemon.plugin_modules.append("any_daemon_plugin")
+
+        self.daemon.unload_plugin_modules()
+
+        self.assertFalse("any_daemon_plugin" in sys.modules)
+
+    def test_should_stop_when_requested(self):
+        server, client = socket.socketpair()
+        daemon._send_frame(client, {"stop": True})
+
+        self.assertEqual(False, self.daemon.handle(server))
+        self.assertEqual([{"exit": 0}], read_frames(client))
+        client.close()
+
+    def test_should_request_restart_when_files_have_changed(self):
+        server, client = socket.socketpair()
+        daemon._send_frame(client, {"args": ["publish"]})
+        self.daemon.watched_files[self.descriptor] = None
+
+        self.assertEqual(True, self.daemon.handle(server))
+        self.assertEqual([{"restart": True}], read_frames(client))
+        client.close()
+
+    def test_should_serve_builds_in_forked_process(self):
+        self.assertTrue(self.daemon.bind())
+        try:
+            connection = daemon._connect(socket_file(self.basedir))
+            daemon._send_frame(connection, {"args": ["publish"], "cwd": self.basedir, "env": {}})
+            server_connection, _ = self.daemon.server.accept()
+
+            with patch("os.fork", return_value=42):
+                self.assertEqual(None, self.daemon.handle(server_connection))
+            connection.close()
+
+            self.assertEqual(set([42]), self.daemon.children)
+            self.assertFalse(BuildDaemon(self.basedir, Mock()).bind())
+        finally:
+            self.daemon.close()
+
+        self.assertFalse(os.path.exists(socket_file(self.basedir)))
+
+    def test_should_run_build_request_in_child(self):
+        server, client = socket.socketpair()
+        daemon._send_frame(client, {"args": ["publish"], "cwd": self.basedir, "env": {}})
+        self.daemon.server = Mock()
+
+        with patch("os.fork", return_value=0):
+            with patch("os._exit", side_effect=SystemExit) as exit:
+                with patch("pybuilder.daemon.run_build", return_value=0) as build:
+                    self.assertRaises(SystemExit, self.daemon.handle, server)
+
+        build.assert_called_with(server, {"args": ["publish"], "cwd": self.basedir, "env": {}})
+        exit.assert_called_with(0)
+        self.daemon.server.close.assert_called_with()
+        client.close()
+
+
+class MainTest(unittest.TestCase):
+    @patch("pybuilder.daemon.send_request", return_value=0)
+    def test_should_stop_daemon_without_starting_one(self, send_request):
+        self.assertEqual(0, daemon.main("--stop-daemon", "-D", "/any/project"))
+
+        send_request.assert_called_with(os.path.abspath("/any/project"),
+                                        {"stop": True, "cwd": os.path.abspath("/any/project")}, start=False)
+
+    @patch("pybuilder.daemon.send_request", return_value=3)
+    def test_should_forward_arguments_without_daemon_option(self, send_request):
+        basedir = tempfile.mkdtemp(self.__class__.__name__)
+        try:
+            open(os.path.join(basedir, "build.py"), "w").close()
+
+            self.assertEqual(3, daemon.main("--daemon", "-D", basedir, "publish"))
+        finally:
+            shutil.rmtree(basedir)
+
+        request = send_request.call_args[0][1]
+        self.assertEqual(["-D", basedir, "publish"], request["args"])
+        self.assertEqual(os.getcwd(), request["cwd"])
+
+    @patch("pybuilder.daemon.send_request")
+    def test_should_fail_without_build_descriptor(self, send_request):
+        with patch("sys.stderr"):
+            self.assertEqual(1, daemon.main("--daemon", "-D", "/any/missing/project"))
+
+        self.assertFalse(send_request.called)
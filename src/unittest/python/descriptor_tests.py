@@ -0,0 +1,99 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of PyBuilder
+#
+#   Copyright 2011-2015 PyBuilder Team
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from pybuilder.descriptor import code_cache_file, compile_descriptor, load_descriptor
+from test_utils import patch
+
+
+class LoadDescriptorTest(unittest.TestCase):
+    def setUp(self):
+        self.basedir = tempfile.mkdtemp(self.__class__.__name__)
+        self.cache_home = patch.dict("os.environ", {"XDG_CACHE_HOME": os.path.join(self.basedir, "cache")})
+        self.cache_home.start()
+        self.dont_write_bytecode = sys.dont_write_bytecode
+        sys.dont_write_bytecode = False
+        self.descriptor = os.path.join(self.basedir, "build.py")
+        self.write_descriptor("name = 'spam'\n")
+
+    def tearDown(self):
+        self.cache_home.stop()
+        sys.dont_write_bytecode = self.dont_write_bytecode
+        sys.modules.pop("any_build", None)
+        shutil.rmtree(self.basedir)
+
+    def write_descriptor(self, content):
+        with open(self.descriptor, "w") as descriptor_file:
+            descriptor_file.write(content)
+
+    def test_should_execute_descriptor_as_module(self):
+        module = load_descriptor(self.descriptor, "any_build")
+
+        self.assertEqual("spam", module.name)
+        self.assertEqual(self.descriptor, module.__file__)
+        self.assertTrue(sys.modules["any_build"] is module)
+
+    def test_should_cache_compiled_descriptor(self):
+        load_descriptor(self.descriptor, "any_build")
+
+        self.assertTrue(os.path.isfile(code_cache_file(self.descriptor)))
+        with patch("pybuilder.descriptor.compile") as compile_source:
+            self.assertEqual("spam", load_descriptor(self.descriptor, "any_build").name)
+        self.assertFalse(compile_source.called)
+
+    def test_should_recompile_changed_descriptor(self):
+        load_descriptor(self.descriptor, "any_build")
+        self.write_descriptor("name = 'eggs'\n")
+
+        self.assertEqual("eggs", load_descriptor(self.descriptor, "any_build").name)
+        self.assertEqual("eggs", load_descriptor(self.descriptor, "any_build").name)
+
+    def test_should_recompile_when_cache_is_corrupt(self):
+        compile_descriptor(self.descriptor)
+        with open(code_cache_file(self.descriptor), "r+b") as cache_file:
+            cache_file.seek(44)
+            cache_file.truncate()
+
+        self.assertEqual("spam", load_descriptor(self.descriptor, "any_build").name)
+
+    def test_should_not_write_cache_when_bytecode_is_disabled(self):
+        sys.dont_write_bytecode = True
+
+        self.assertEqual("spam", load_descriptor(self.descriptor, "any_build").name)
+
+        self.assertFalse(os.path.exists(code_cache_file(self.descriptor)))
+
+    def test_should_report_errors_at_their_line_in_the_descriptor(self):
+        self.write_descriptor("name = 'spam'\nraise ValueError('eggs')\n")
+        compile_descriptor(self.descriptor)
+
+        try:
+            load_descriptor(self.descriptor, "any_build")
+            self.fail("ValueError expected")
+        except ValueError:
+            traceback = sys.exc_info()[2]
+            while traceback.tb_next:
+                traceback = traceback.tb_next
+            self.assertEqual(self.descriptor, traceback.tb_frame.f_code.co_filename)
+            self.assertEqual(2, traceback.tb_lineno)
+        self.assertFalse("any_build" in sys.modules)
@@ -0,0 +1,139 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of PyBuilder
+#
+#   Copyright 2011-2015 PyBuilder Team
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from pybuilder import events
+
+
+class RecordingSink(object):
+    def __init__(self):
+        self.events = []
+        self.closed = False
+        self.writing = threading.Event()
+        self.resume = threading.Event()
+        self.resume.set()
+
+    def write(self, written_events):
+        self.writing.set()
+        self.resume.wait()
+        self.events.extend(written_events)
+
+    def close(self):
+        self.closed = True
+
+
+class EventStreamTest(unittest.TestCase):
+    def setUp(self):
+        self.sink = RecordingSink()
+
+    def test_should_write_events_in_order_and_close_sinks(self):
+        stream = events.EventStream([self.sink])
+        for index in range(100):
+            stream.emit({"event": "spam", "index": index})
+        stream.close()
+
+        self.assertEqual(list(range(100)), [event["index"] for event in self.sink.events])
+        self.assertTrue(self.sink.closed)
+        self.assertEqual(0, stream.dropped)
+
+    def test_should_drop_events_instead_of_blocking_when_queue_is_full(self):
+        self.sink.resume.clear()
+        stream = events.EventStream([self.sink], queue_size=2)
+        stream.emit({"event": "first"})
+        self.sink.writing.wait(5)
+        for _ in range(5):
+            stream.emit({"event": "spam"})
+        self.sink.resume.set()
+        stream.close()
+
+        self.assertEqual(3, stream.dropped)
+        self.assertEqual(["first", "spam", "spam", events.EVENTS_DROPPED],
+                         [event["event"] for event in self.sink.events])
+        self.assertEqual(3, self.sink.events[-1]["count"])
+
+    def test_should_keep_writing_after_sink_failed(self):
+        class FailingSink(object):
+            def write(self, written_events):
+                raise IOError("disk full")
+
+            def close(self):
+                pass
+
+        stream = events.EventStream([FailingSink(), self.sink])
+        stream.emit({"event": "spam"})
+        stream.close()
+
+        self.assertEqual("disk full", str(stream.error))
+        self.assertEqual(["spam"], [event["event"] for event in self.sink.events])
+
+
+class EmitTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_directory = tempfile.mkdtemp()
+        self.events_file = os.path.join(self.tmp_directory, "events.jsonl")
+
+    def tearDown(self):
+        events.stop_events()
+        shutil.rmtree(self.tmp_directory)
+
+    def read_events(self):
+        with open(self.events_file) as events_file:
+            return [json.loads(line) for line in events_file]
+
+    def test_should_not_emit_when_events_are_disabled(self):
+        self.assertFalse(events.events_enabled())
+
+        events.emit(events.TASK_STARTED, task="spam")
+
+        self.assertEqual(None, events.stop_events())
+
+    def test_should_write_events_as_json_lines(self):
+        events.start_events(self.events_file)
+        events.emit(events.TASK_STARTED, task="spam")
+        events.emit_event(events.create_event(events.LOG, level="info", message="eggs"))
+        events.stop_events()
+
+        task_started, log = self.read_events()
+        self.assertEqual(events.TASK_STARTED, task_started["event"])
+        self.assertEqual("spam", task_started["task"])
+        self.assertEqual(os.getpid(), task_started["pid"])
+        self.assertEqual(threading.current_thread().name, task_started["thread"])
+        self.assertEqual({"event": "log", "level": "info", "message": "eggs"},
+                         dict((key, log[key]) for key in ("event", "level", "message")))
+
+    def test_should_collect_events_in_fork_and_emit_them_in_parent(self):
+        stream = events.start_events(self.events_file)
+
+        collecting_stream = events.collect_events_in_fork()
+        events.emit(events.TEST_FINISHED, test="spam")
+        events._stream = stream
+        events.emit_all(collecting_stream.events)
+        events.stop_events()
+
+        self.assertEqual(["spam"], [event["test"] for event in self.read_events()])
+
+    def test_should_not_collect_events_in_fork_when_disabled(self):
+        self.assertEqual(None, events.collect_events_in_fork())
+        self.assertFalse(events.events_enabled())
@@ -0,0 +1,135 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of PyBuilder
+#
+#   Copyright 2011-2015 PyBuilder Team
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+"""
+    Scaling test of the ExecutionManager on synthetic task graphs. Instead of timing the operations, which
+    is unreliable on shared machines, it counts the task lookups and dependency checks they perform.
+"""
+
+import unittest
+
+from pybuilder.core import Logger
+from pybuilder.execution import Action, ExecutionManager, Task, TaskDependency
+
+LAYER_WIDTH = 20
+SMALL_GRAPH = 500
+LARGE_GRAPH = 4000
+# Linear scaling takes 8 times as many steps for a graph 8 times as large, quadratic scaling 64 times
+MAX_SCALING_FACTOR = 9
+
+
+class CountingExecutionManager(ExecutionManager):
+    """
+        Counts the task lookups and dependency checks, the steps the graph operations perform per task
+        or dependency.
+    """
+
+    def __init__(self, logger):
+        super(CountingExecutionManager, self).__init__(logger)
+        self.steps = 0
+
+    def get_task(self, name):
+        self.steps += 1
+        return super(CountingExecutionManager, self).get_task(name)
+
+    def has_task(self, name):
+        self.steps += 1
+        return super(CountingExecutionManager, self).has_task(name)
+
+    def _should_omit_dependency(self, task, dependency):
+        self.steps += 1
+        return super(CountingExecutionManager, self)._should_omit_dependency(task, dependency)
+
+
+def any_callable():
+    pass
+
+
+def synthetic_execution_manager(number_of_tasks):
+    """
+    Returns an execution manager with the given number of tasks in layers of LAYER_WIDTH tasks, each task
+    depending on three tasks of the previous layer (one of them optionally and one twice), one before and
+    one after action per task, and a task "all" depending on the last layer.
+    """
+    execution_manager = CountingExecutionManager(Logger())
+
+    tasks = []
+    for index in range(number_of_tasks):
+        dependencies = []
+        if index >= LAYER_WIDTH:
+            layer_start = (index // LAYER_WIDTH - 1) * LAYER_WIDTH
+            position = index % LAYER_WIDTH
+            dependencies = [TaskDependency("task_%d" % (layer_start + position)),
+                            TaskDependency("task_%d" % (layer_start + (position + 1) % LAYER_WIDTH), True),
+                            TaskDependency("task_%d" % (layer_start + (position + 7) % LAYER_WIDTH)),
+                            TaskDependency("task_%d" % (layer_start + position))]
+        tasks.append(Task("task_%d" % index, any_callable, dependencies))
+        execution_manager.register_action(Action("before_%d" % index, any_callable, before="task_%d" % index))
+        execution_manager.register_action(Action("after_%d" % index, any_callable, after="task_%d" % index,
+                                                 only_once=True))
+
+    last_layer = tasks[-LAYER_WIDTH:]
+    tasks.append(Task("all", any_callable, [TaskDependency(task.name) for task in last_layer]))
+    execution_manager.register_task(*tasks)
+    return execution_manager
+
+
+def count_steps(execution_manager, operation):
+    execution_manager.steps = 0
+    operation()
+    return execution_manager.steps
+
+
+def steps(number_of_tasks):
+    """
+    Returns the steps of resolving the dependencies, building the execution plan and building the shortest
+    execution plan with half of the tasks executed for a synthetic graph.
+    """
+    execution_manager = synthetic_execution_manager(number_of_tasks)
+
+    resolve_steps = count_steps(execution_manager, execution_manager.resolve_dependencies)
+    plan_steps = count_steps(execution_manager, lambda: execution_manager.build_execution_plan("all"))
+
+    execution_plan = execution_manager.build_execution_plan("all")
+    execution_manager._tasks_executed.extend(execution_plan[:len(execution_plan) // 2])
+    shortest_plan_steps = count_steps(execution_manager, lambda: execution_manager.build_shortest_execution_plan("all"))
+
+    return resolve_steps, plan_steps, shortest_plan_steps
+
+
+class ExecutionManagerScalingTest(unittest.TestCase):
+    def test_should_scale_linearly_with_number_of_tasks(self):
+        small = steps(SMALL_GRAPH)
+        large = steps(LARGE_GRAPH)
+
+        for operation, small_steps, large_steps in zip(("resolve_dependencies",
+                                                        "build_execution_plan",
+                                                        "build_shortest_execution_plan"), small, large):
+            self.assertTrue(0 < large_steps <= MAX_SCALING_FACTOR * small_steps,
+                            "%s took %d steps for %d tasks but %d steps for %d tasks" %
+                            (operation, small_steps, SMALL_GRAPH, large_steps, LARGE_GRAPH))
+
+    def test_should_build_execution_plan_of_synthetic_graph(self):
+        execution_manager = synthetic_execution_manager(100)
+        execution_manager.resolve_dependencies()
+
+        execution_plan = execution_manager.build_execution_plan("all")
+
+        self.assertEqual(101, len(execution_plan))
+        self.assertEqual("all", execution_plan[-1].name)
+        self.assertEqual(3, len(execution_manager._task_dependencies["task_20"]))
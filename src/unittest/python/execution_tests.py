@@ -16,14 +16,16 @@
 #   See the License for the specific language governing permissions and
 #   limitations under the License.
 
+import threading
 import unittest
 
-from pybuilder.core import Logger
+from pybuilder.core import Logger, Project
 from pybuilder.errors import MissingTaskDependencyException, CircularTaskDependencyException, NoSuchTaskException, \
     MissingActionDependencyException, InvalidNameException, RequiredTaskExclusionException
 from pybuilder.execution import as_task_name_list, Action, Executable, ExecutionManager, Task, \
-    DependenciesNotResolvedException, Initializer, TaskDependency
-from test_utils import Mock, ANY, call
+    DependenciesNotResolvedException, Initializer, ParallelDependencyExecutor, TaskDependency
+from pybuilder.utils import odict
+from test_utils import Mock, ANY, call, patch
 
 
 class AsTaskNameList(unittest.TestCase):
@@ -156,6 +158,61 @@ class TaskTest(unittest.TestCase):
         executable = Task("callable", callable)
         self.assertRaises(ValueError, executable.execute, Mock(), {})
 
+    def test_should_be_incremental_when_outputs_are_declared(self):
+        def callable(project):
+            pass
+
+        task = Task("callable", callable, inputs=["**"], outputs=["$dir_dist"])
+
+        self.assertEquals(["**"], task.inputs)
+        self.assertEquals(["$dir_dist"], task.outputs)
+        self.assertTrue(task.incremental)
+
+    def test_should_not_be_incremental_when_outputs_are_not_declared(self):
+        def callable(project):
+            pass
+
+        self.assertFalse(Task("callable", callable, inputs=["**"]).incremental)
+
+    def test_should_not_be_incremental_when_extended_by_task_without_declared_outputs(self):
+        def callable_one(project):
+            pass
+
+        def callable_two(project):
+            pass
+
+        task = Task("task", callable_one, outputs=["$dir_dist"])
+        task.extend(Task("task", callable_two))
+
+        self.assertFalse(task.incremental)
+
+    def test_should_stay_incremental_when_extended_by_task_without_arguments(self):
+        def callable_one(project):
+            pass
+
+        def callable_two():
+            pass
+
+        task = Task("task", callable_one, outputs=["$dir_dist"])
+        task.extend(Task("task", callable_two))
+
+        self.assertTrue(task.incremental)
+
+    def test_should_be_incremental_only_when_incremental_property_is_enabled(self):
+        def callable_one(project):
+            pass
+
+        def callable_two():
+            pass
+
+        task = Task("task", callable_one, outputs=["$dir_dist"], incremental="task_incremental")
+        task.extend(Task("task", callable_two))
+        project = Project(".")
+
+        self.assertFalse(task.is_incremental(project))
+        project.set_property("task_incremental", "true")
+        self.assertTrue(task.is_incremental(project))
+
 
 class TaskExtensionTest(unittest.TestCase):
     def test_should_extend_task_with_values_from_other_task(self):
@@ -312,6 +369,116 @@ class ExecutionManagerTaskTest(ExecutionManagerTestBase):
 
         task.execute.assert_called_with(ANY, {"a": 1})
 
+    @patch("pybuilder.execution.events.emit")
+    def test_should_emit_events_of_task_and_actions(self, emit):
+        task = Mock(dependencies=[])
+        task.name = "spam"
+        action = Mock(execute_before=["spam"], execute_after=[], only_once=False, teardown=False)
+        action.name = "eggs"
+
+        self.execution_manager.register_action(action)
+        self.execution_manager.register_task(task)
+        self.execution_manager.resolve_dependencies()
+
+        self.execution_manager.execute_task(task)
+
+        self.assertEquals([("task_started", "spam"), ("action_started", "eggs"), ("action_finished", "eggs"),
+                           ("task_finished", "spam")],
+                          [(call_args[0][0], call_args[1].get("task", call_args[1].get("action")))
+                           for call_args in emit.call_args_list])
+        self.assertEquals("executed", emit.call_args[1]["status"])
+
+    @patch("pybuilder.execution.events.emit")
+    def test_should_emit_event_of_failed_task(self, emit):
+        task = Mock(dependencies=[])
+        task.name = "spam"
+        task.execute.side_effect = ValueError("boom")
+
+        self.execution_manager.register_task(task)
+        self.execution_manager.resolve_dependencies()
+
+        self.assertRaises(ValueError, self.execution_manager.execute_task, task)
+
+        emit.assert_called_with("task_finished", task="spam", status="failed", duration=ANY, failure="boom")
+
+    @patch("pybuilder.execution.TaskUpToDateCheck")
+    def test_ensure_task_is_not_executed_when_up_to_date(self, up_to_date_check):
+        task = Mock(name="spam", dependencies=[], incremental=True)
+        project = Mock()
+        up_to_date_check.return_value.is_up_to_date.return_value = True
+        action = Mock(name="action", execute_before=["spam"], execute_after=[])
+
+        self.execution_manager.register_action(action)
+        self.execution_manager.register_task(task)
+        self.execution_manager.resolve_dependencies()
+
+        summary = self.execution_manager.execute_task(task, project=project)
+
+        up_to_date_check.assert_called_with(project, task, self.execution_manager, self.execution_manager.logger)
+        action.execute.assert_called_with({"project": project})
+        task.execute.assert_not_called()
+        up_to_date_check.return_value.record.assert_called_with()
+        self.assertTrue(summary.up_to_date)
+
+    @patch("pybuilder.execution.TaskUpToDateCheck")
+    def test_ensure_task_is_executed_and_recorded_when_not_up_to_date(self, up_to_date_check):
+        task = Mock(name="spam", dependencies=[], incremental=True)
+        project = Mock()
+        up_to_date_check.return_value.is_up_to_date.return_value = False
+        up_to_date_check.return_value.restore_from_cache.return_value = False
+
+        self.execution_manager.register_task(task)
+        self.execution_manager.resolve_dependencies()
+
+        summary = self.execution_manager.execute_task(task, project=project)
+
+        task.execute.assert_called_with(ANY, {"project": project})
+        up_to_date_check.return_value.record.assert_called_with()
+        self.assertFalse(summary.up_to_date)
+
+    @patch("pybuilder.execution.TaskUpToDateCheck")
+    def test_ensure_up_to_date_state_is_not_recorded_when_task_fails(self, up_to_date_check):
+        task = Mock(name="spam", dependencies=[], incremental=True)
+        task.execute.side_effect = ValueError("simulated")
+        up_to_date_check.return_value.is_up_to_date.return_value = False
+        up_to_date_check.return_value.restore_from_cache.return_value = False
+
+        self.execution_manager.register_task(task)
+        self.execution_manager.resolve_dependencies()
+
+        self.assertRaises(ValueError, self.execution_manager.execute_task, task, project=Mock())
+        up_to_date_check.return_value.record.assert_not_called()
+
+    @patch("pybuilder.execution.TaskUpToDateCheck")
+    def test_ensure_task_is_not_executed_when_restored_from_build_cache(self, up_to_date_check):
+        task = Mock(name="spam", dependencies=[], incremental=True)
+        up_to_date_check.return_value.is_up_to_date.return_value = False
+        up_to_date_check.return_value.restore_from_cache.return_value = True
+
+        self.execution_manager.register_task(task)
+        self.execution_manager.resolve_dependencies()
+
+        summary = self.execution_manager.execute_task(task, project=Mock())
+
+        task.execute.assert_not_called()
+        up_to_date_check.return_value.record.assert_called_with()
+        self.assertTrue(summary.from_cache)
+
+    @patch("pybuilder.execution.TaskUpToDateCheck")
+    def test_ensure_task_executed_again_is_not_checked_for_being_up_to_date(self, up_to_date_check):
+        task = Mock(name="spam", dependencies=[], incremental=True)
+        up_to_date_check.return_value.is_up_to_date.return_value = False
+        up_to_date_check.return_value.restore_from_cache.return_value = False
+
+        self.execution_manager.register_task(task)
+        self.execution_manager.resolve_dependencies()
+
+        self.execution_manager.execute_task(task, project=Mock())
+        self.execution_manager.execute_task(task, project=Mock())
+
+        self.assertEqual(1, up_to_date_check.call_count)
+        self.assertEqual(2, task.execute.call_count)
+
     def test_ensure_before_action_is_executed_when_task_is_executed(self):
         task = Mock(name="task", dependencies=[])
         action = Mock(name="action", execute_before=["task"], execute_after=[])
@@ -489,6 +656,41 @@ class ExecutionManagerActionTest(ExecutionManagerTestBase):
 
         action.execute.assert_called_with(ANY)
 
+    def test_ensure_only_once_action_is_executed_again_after_failure(self):
+        action = Mock(name="action", only_once=True)
+        action.execute.side_effect = [ValueError("simulated action error"), None]
+
+        self.assertRaises(ValueError, self.execution_manager.execute_action, action, {})
+        self.assertTrue(self.execution_manager.execute_action(action, {}))
+        self.assertFalse(self.execution_manager.execute_action(action, {}))
+
+        self.assertEquals(2, action.execute.call_count)
+
+    def test_ensure_only_once_action_running_concurrently_is_awaited(self):
+        started = threading.Event()
+        proceed = threading.Event()
+        action = Mock(name="action", only_once=True)
+        action.execute.side_effect = lambda arguments: started.set() or proceed.wait()
+        results = []
+
+        def execute_action():
+            results.append(self.execution_manager.execute_action(action, {}))
+
+        first = threading.Thread(target=execute_action)
+        first.start()
+        started.wait()
+        second = threading.Thread(target=execute_action)
+        second.start()
+        second.join(0.1)
+        self.assertTrue(second.is_alive())
+
+        proceed.set()
+        first.join()
+        second.join()
+
+        self.assertEquals([True, False], results)
+        action.execute.assert_called_once_with({})
+
 
 class ExecutionManagerResolveDependenciesTest(ExecutionManagerTestBase):
     def test_ensure_that_dependencies_are_resolved_when_no_task_is_given(self):
@@ -838,6 +1040,20 @@ class ExecutionManagerBuildExecutionPlanTest(ExecutionManagerTestBase):
         self.assertEquals([two, three], self.execution_manager.build_shortest_execution_plan(("three", "two")))
         self.assertEquals([one, two, three], self.execution_manager.build_shortest_execution_plan(("three", "one")))
 
+    def test_shortest_execution_plan_includes_tasks_marked_outdated(self):
+        one = Task("one", lambda: None)
+        two = Task("two", lambda: None, [TaskDependency("one")])
+        three = Task("three", lambda: None, [TaskDependency("two")])
+
+        self.execution_manager.register_task(one, two, three)
+        self.execution_manager.resolve_dependencies()
+
+        self.execution_manager._tasks_executed.extend([one, two, three])
+        self.execution_manager.mark_tasks_outdated(["two"])
+
+        self.assertEquals([one, three], list(self.execution_manager._tasks_executed))
+        self.assertEquals([two, three], self.execution_manager.build_shortest_execution_plan("three"))
+
     def test_ensure_that_optional_tasks_are_excluded(self):
         one = Mock(name="one", dependencies=[])
         two = Mock(name="two", dependencies=[TaskDependency("one", True)])
@@ -917,6 +1133,16 @@ class ExecutionManagerBuildExecutionPlanTest(ExecutionManagerTestBase):
         self.assertTrue(self.execution_manager.is_task_in_current_execution_plan("one"))
         self.assertFalse(self.execution_manager.is_task_in_current_execution_plan("four"))
 
+    def test_is_task_executed(self):
+        one = Task("one", lambda: None)
+        two = Task("two", lambda: None, [TaskDependency("one")])
+
+        self.execution_manager.register_task(one, two)
+        self.execution_manager._tasks_executed.append(one)
+
+        self.assertTrue(self.execution_manager.is_task_executed("one"))
+        self.assertFalse(self.execution_manager.is_task_executed("two"))
+
 
 class ExecutionManagerExecuteExecutionPlanTest(ExecutionManagerTestBase):
     def test_should_raise_exception_when_dependencies_are_not_resolved(self):
@@ -957,3 +1183,165 @@ class ExecutionManagerExecuteExecutionPlanTest(ExecutionManagerTestBase):
         one.execute.assert_has_calls([call(ANY, {})])
         two.execute.assert_has_calls([call(ANY, {})])
         three.execute.assert_has_calls([call(ANY, {}), call(ANY, {})])
+
+    def test_should_skip_completed_tasks_only_after_their_skipped_dependencies(self):
+        one = Mock(name="one", dependencies=[])
+        two = Mock(name="two", dependencies=[TaskDependency("one")])
+        three = Mock(name="three", dependencies=[])
+        four = Mock(name="four", dependencies=[TaskDependency("three")])
+
+        self.execution_manager.register_task(one, two, three, four)
+        self.execution_manager.resolve_dependencies()
+        execution_plan = self.execution_manager.build_execution_plan(["two", "four"])
+
+        self.assertEqual([three, four],
+                         self.execution_manager.skip_completed_tasks(execution_plan, ["one", "two", "four"]))
+
+    def test_should_count_skipped_tasks_as_executed_in_shortest_execution_plan(self):
+        one = Mock(name="one", dependencies=[])
+        two = Mock(name="two", dependencies=[TaskDependency("one")])
+        three = Mock(name="three", dependencies=[TaskDependency("two")])
+
+        self.execution_manager.register_task(one, two, three)
+        self.execution_manager.resolve_dependencies()
+        self.execution_manager.skip_completed_tasks(self.execution_manager.build_execution_plan("two"),
+                                                    ["one", "two"])
+
+        self.assertEqual([three], self.execution_manager.build_shortest_execution_plan("three"))
+
+    def test_should_checkpoint_completed_and_failed_tasks(self):
+        one = Mock(name="one", dependencies=[])
+        two = Mock(name="two", dependencies=[TaskDependency("one")])
+        two.execute.side_effect = ValueError("boom")
+
+        self.execution_manager.register_task(one, two)
+        self.execution_manager.resolve_dependencies()
+        self.execution_manager.checkpoint = Mock()
+
+        self.assertRaises(ValueError, self.execution_manager.execute_execution_plan,
+                          self.execution_manager.build_execution_plan("two"))
+
+        self.execution_manager.checkpoint.task_completed.assert_called_once_with("one")
+        self.execution_manager.checkpoint.task_failed.assert_called_once_with("two")
+
+
+class ExecutionManagerExecuteExecutionPlanInParallelTest(ExecutionManagerTestBase):
+    def test_should_raise_exception_when_dependencies_are_not_resolved(self):
+        self.assertRaises(DependenciesNotResolvedException,
+                          self.execution_manager.execute_execution_plan_in_parallel, ["boom"], 2)
+
+    def test_ensure_tasks_are_executed(self):
+        one = Mock(name="one", dependencies=[])
+        two = Mock(name="two", dependencies=[])
+        three = Mock(name="three", dependencies=[])
+
+        self.execution_manager.register_task(one, two, three)
+        self.execution_manager.resolve_dependencies()
+
+        summaries = self.execution_manager.execute_execution_plan_in_parallel([one, two, three], 2)
+
+        one.execute.assert_called_with(ANY, {})
+        two.execute.assert_called_with(ANY, {})
+        three.execute.assert_called_with(ANY, {})
+        self.assertEquals(["one", "three", "two"], sorted(summary.task for summary in summaries))
+
+    def test_ensure_dependencies_are_executed_before_dependents(self):
+        executed = []
+        one = Mock(name="one", dependencies=[])
+        two = Mock(name="two", dependencies=[TaskDependency("one")])
+        three = Mock(name="three", dependencies=[TaskDependency("one")])
+        four = Mock(name="four", dependencies=[TaskDependency("two"), TaskDependency("three")])
+        for task in (one, two, three, four):
+            task.execute.side_effect = lambda logger, arguments, name=task.name: executed.append(name)
+
+        self.execution_manager.register_task(one, two, three, four)
+        self.execution_manager.resolve_dependencies()
+
+        plan = self.execution_manager.build_execution_plan("four")
+        self.execution_manager.execute_execution_plan_in_parallel(plan, 4)
+
+        self.assertEquals("one", executed[0])
+        self.assertEquals(["three", "two"], sorted(executed[1:3]))
+        self.assertEquals("four", executed[3])
+
+    def test_should_return_plan_dependencies_within_plan(self):
+        one = Mock(name="one", dependencies=[])
+        two = Mock(name="two", dependencies=[TaskDependency("one")])
+        three = Mock(name="three", dependencies=[TaskDependency("two"), TaskDependency("one", True)])
+
+        self.execution_manager.register_task(one, two, three)
+        self.execution_manager.resolve_dependencies()
+
+        self.assertEquals({"two": [], "three": ["two"]},
+                          self.execution_manager.get_plan_dependencies([two, three]))
+
+    def test_should_return_plan_graph(self):
+        one = Mock(name="one", dependencies=[])
+        two = Mock(name="two", dependencies=[TaskDependency("one")])
+        three = Mock(name="three", dependencies=[TaskDependency("two"), TaskDependency("one")])
+
+        self.execution_manager.register_task(one, two, three)
+        self.execution_manager.resolve_dependencies()
+
+        plan_graph = self.execution_manager.get_plan_graph([one, two, three])
+
+        self.assertEquals([["one"], ["two"], ["three"]], plan_graph.topological_levels())
+        self.assertTrue(plan_graph.is_reachable("three", "one"))
+        self.assertFalse(plan_graph.is_reachable("one", "three"))
+
+    def test_should_not_start_dependents_of_failed_task_and_reraise(self):
+        one = Mock(name="one", dependencies=[])
+        one.execute.side_effect = ValueError("simulated task error")
+        two = Mock(name="two", dependencies=[TaskDependency("one")])
+
+        self.execution_manager.register_task(one, two)
+        self.execution_manager.resolve_dependencies()
+
+        self.assertRaises(ValueError, self.execution_manager.execute_execution_plan_in_parallel, [one, two], 2)
+        two.execute.assert_not_called()
+
+    def test_ensure_only_once_action_is_executed_once_for_parallel_tasks(self):
+        spam = Mock(name="spam", dependencies=[])
+        eggs = Mock(name="eggs", dependencies=[])
+        self.execution_manager.register_task(spam, eggs)
+
+        action = Mock(name="action",
+                      execute_before=[],
+                      execute_after=["spam", "eggs"],
+                      only_once=True)
+        self.execution_manager.register_action(action)
+
+        self.execution_manager.resolve_dependencies()
+
+        self.execution_manager.execute_execution_plan_in_parallel([spam, eggs], 2)
+
+        action.execute.assert_called_once_with(ANY)
+
+    def test_should_execute_serially_when_single_job_given(self):
+        one = Mock(name="one", dependencies=[])
+
+        self.execution_manager.register_task(one)
+        self.execution_manager.resolve_dependencies()
+        self.execution_manager.execute_execution_plan = Mock()
+
+        self.execution_manager.execute_execution_plan_in_parallel([one], 1, a=1)
+
+        self.execution_manager.execute_execution_plan.assert_called_with([one], a=1)
+
+
+class ParallelDependencyExecutorTest(unittest.TestCase):
+    def test_should_pass_items_to_callable_after_their_dependencies(self):
+        executed = []
+
+        def execute_item(item):
+            executed.append(item)
+            return item.upper()
+
+        executor = ParallelDependencyExecutor(odict([("one", "spam"), ("two", "eggs"), ("three", "ham")]),
+                                              {"one": [], "two": ["one"], "three": ["one"]},
+                                              2, execute_item)
+        summaries = executor.execute()
+
+        self.assertEquals("spam", executed[0])
+        self.assertEquals(["eggs", "ham"], sorted(executed[1:]))
+        self.assertEquals(["EGGS", "HAM", "SPAM"], sorted(summaries))
@@ -16,8 +16,14 @@
 #   See the License for the specific language governing permissions and
 #   limitations under the License.
 
+import json
+import os
+import shutil
+import sys
+import tempfile
 from unittest import TestCase
-from pybuilder.graph_utils import Graph, GraphHasCycles
+
+from pybuilder.graph_utils import Graph, GraphHasCycles, tarjan_scc
 
 
 class GraphUtilsTests(TestCase):
@@ -53,3 +59,122 @@ class GraphUtilsTests(TestCase):
     def test_should_find_long_nontrivial_cycle_in_graph_when_there_are_two(self):
         graph_with_long_cycle = Graph({"a": "b", "b": "c", "c": "a", "d": "e", "e": "f", "f": "d"})
         self.assertRaises(GraphHasCycles, graph_with_long_cycle.assert_no_cycles_present)
+
+    def test_should_find_cycles_in_chain_longer_than_recursion_limit(self):
+        length = sys.getrecursionlimit() * 2
+        edges = dict(("node_%d" % index, ["node_%d" % (index + 1)]) for index in range(length))
+        Graph(edges).assert_no_cycles_present()
+
+        edges["node_%d" % length] = ["node_0"]
+        self.assertRaises(GraphHasCycles, Graph(edges).assert_no_cycles_present)
+
+
+class TarjanSccTests(TestCase):
+    def test_should_return_components_after_the_components_they_reach(self):
+        components = tarjan_scc({"a": ["b", "c"], "b": ["c"], "c": ["d"], "d": ["c"], "e": []})
+
+        self.assertEqual([("d", "c"), ("b",), ("a",), ("e",)], components)
+
+
+class GraphTests(TestCase):
+    def setUp(self):
+        # edges point from tasks to their dependencies
+        self.graph = Graph({"publish": ["package", "run_unit_tests", "prepare"],
+                            "package": ["run_unit_tests", "compile_sources"],
+                            "run_unit_tests": ["compile_sources"],
+                            "analyze": ["prepare"],
+                            "compile_sources": ["prepare"]})
+
+    def test_should_return_all_nodes(self):
+        self.assertEqual(["publish", "package", "run_unit_tests", "analyze", "compile_sources", "prepare"],
+                         self.graph.nodes)
+
+    def test_should_return_topological_levels(self):
+        self.assertEqual([["prepare"],
+                          ["analyze", "compile_sources"],
+                          ["run_unit_tests"],
+                          ["package"],
+                          ["publish"]], self.graph.topological_levels())
+
+    def test_should_refuse_topological_levels_of_cyclic_graph(self):
+        self.assertRaises(GraphHasCycles, Graph({"a": ["b"], "b": ["a"]}).topological_levels)
+
+    def test_should_answer_reachability_queries(self):
+        self.assertTrue(self.graph.is_reachable("publish", "prepare"))
+        self.assertTrue(self.graph.is_reachable("package", "prepare"))
+        self.assertFalse(self.graph.is_reachable("prepare", "publish"))
+        self.assertFalse(self.graph.is_reachable("analyze", "compile_sources"))
+        self.assertFalse(self.graph.is_reachable("publish", "publish"))
+        self.assertFalse(self.graph.is_reachable("publish", "unknown"))
+        self.assertEqual(["run_unit_tests", "compile_sources", "prepare"], self.graph.reachable_from("package"))
+
+    def test_should_answer_reachability_queries_within_cycles(self):
+        graph = Graph({"a": ["b"], "b": ["c"], "c": ["b", "d"]})
+
+        self.assertTrue(graph.is_reachable("b", "b"))
+        self.assertTrue(graph.is_reachable("c", "b"))
+        self.assertTrue(graph.is_reachable("a", "d"))
+        self.assertFalse(graph.is_reachable("a", "a"))
+
+    def test_should_return_heaviest_path_in_order_of_execution(self):
+        weights = {"prepare": 1, "compile_sources": 5, "run_unit_tests": 20, "analyze": 10, "package": 2,
+                   "publish": 1}
+
+        self.assertEqual((["prepare", "compile_sources", "run_unit_tests", "package", "publish"], 29),
+                         self.graph.critical_path(weights))
+
+    def test_should_return_empty_critical_path_of_empty_graph(self):
+        self.assertEqual(([], 0), Graph({}).critical_path({}))
+
+    def test_should_bound_minimum_duration_by_critical_path_and_total_weight(self):
+        weights = {"prepare": 1, "compile_sources": 5, "run_unit_tests": 20, "analyze": 10, "package": 2,
+                   "publish": 1}
+
+        self.assertEqual(39, self.graph.minimum_duration(weights, 1))
+        self.assertEqual(29, self.graph.minimum_duration(weights, 4))
+
+    def test_should_remove_implied_edges_in_transitive_reduction(self):
+        reduced = self.graph.transitive_reduction()
+
+        self.assertEqual({"publish": ["package"],
+                          "package": ["run_unit_tests"],
+                          "run_unit_tests": ["compile_sources"],
+                          "analyze": ["prepare"],
+                          "compile_sources": ["prepare"],
+                          "prepare": []}, reduced.edges)
+
+    def test_should_describe_graph_with_levels_and_redundant_edges(self):
+        description = Graph({"b": ["a"], "c": ["b", "a", "a"]}).to_dict()
+
+        self.assertEqual([{"name": "a", "level": 0}, {"name": "b", "level": 1}, {"name": "c", "level": 2}],
+                         description["nodes"])
+        self.assertEqual([{"from": "b", "to": "a", "redundant": False},
+                          {"from": "c", "to": "b", "redundant": False},
+                          {"from": "c", "to": "a", "redundant": True}], description["edges"])
+        self.assertEqual(1, description["width"])
+        self.assertEqual(3, description["depth"])
+
+    def test_should_export_graph_in_dot_format(self):
+        dot = Graph({"b": ["a"], 'say "c"': ["b", "a"]}).to_dot("spam")
+
+        self.assertTrue(dot.startswith('digraph "spam" {\n'))
+        self.assertTrue('        "a";\n' in dot)
+        self.assertTrue('    "say \\"c\\"" -> "b";\n' in dot)
+        self.assertTrue('    "say \\"c\\"" -> "a" [style=dashed, color=gray];\n' in dot)
+        self.assertTrue(dot.endswith("}\n"))
+
+    def test_should_write_graph_to_file(self):
+        basedir = tempfile.mkdtemp(self.__class__.__name__)
+        try:
+            json_file = os.path.join(basedir, "graph.json")
+            dot_file = os.path.join(basedir, "graph.dot")
+
+            self.graph.write(json_file, "json")
+            self.graph.write(dot_file, "dot", "spam")
+
+            with open(json_file) as graph_file:
+                self.assertEqual(5, json.load(graph_file)["depth"])
+            with open(dot_file) as graph_file:
+                self.assertEqual(self.graph.to_dot("spam"), graph_file.read())
+        finally:
+            shutil.rmtree(basedir)
@@ -0,0 +1,230 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of PyBuilder
+#
+#   Copyright 2011-2015 PyBuilder Team
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from pybuilder.execution import TaskExecutionSummary
+from pybuilder.history import (ACTION, PHASE, TASK, TEST, BuildHistory, expected_task_durations, history_for,
+                               history_properties, median, record_build, reported_test_durations)
+from test_utils import Mock, patch
+
+
+class BuildHistoryTest(unittest.TestCase):
+    def setUp(self):
+        self.basedir = tempfile.mkdtemp(self.__class__.__name__)
+        self.history = BuildHistory(os.path.join(self.basedir, "history", "build_history.db"), 30)
+
+    def tearDown(self):
+        shutil.rmtree(self.basedir)
+
+    def record(self, durations, project_name="spam", successful=True):
+        return self.history.record(project_name, time.time(), 100, successful, None if successful else "failure",
+                                   "abc123", ["publish"], ["ci"], durations)
+
+    def test_should_return_no_builds_when_nothing_was_recorded(self):
+        self.assertEqual([], self.history.builds())
+
+    def test_should_return_recorded_builds_latest_first(self):
+        self.record([])
+        self.record([], successful=False)
+
+        builds = self.history.builds()
+
+        self.assertEqual([False, True], [build.successful for build in builds])
+        self.assertEqual("failure", builds[0].failure)
+        self.assertEqual("abc123", builds[0].revision)
+        self.assertEqual(["publish"], builds[0].tasks)
+        self.assertEqual(["ci"], builds[0].environments)
+
+    def test_should_only_return_builds_of_given_project(self):
+        self.record([], project_name="spam")
+        self.record([], project_name="eggs")
+
+        self.assertEqual(["spam"], [build.project for build in self.history.builds(project_name="spam")])
+
+    def test_should_keep_only_max_builds(self):
+        for _ in range(35):
+            self.record([(TASK, "compile", 10, "executed")])
+
+        self.assertEqual(30, len(self.history.builds(100)))
+        self.assertEqual(30, len(self.history.durations(TASK, 100)["compile"]))
+
+    def test_should_return_durations_latest_first(self):
+        self.record([(TASK, "compile", 10, "executed"), (ACTION, "prepare", 1, "executed")])
+        self.record([(TASK, "compile", 20, "executed")])
+
+        self.assertEqual({"compile": [20, 10]}, dict(self.history.durations(TASK)))
+        self.assertEqual({"prepare": [1]}, dict(self.history.durations(ACTION)))
+
+    def test_should_ignore_durations_of_tasks_not_executed(self):
+        self.record([(TASK, "compile", 10, "executed")])
+        self.record([(TASK, "compile", 0, "up_to_date")])
+        self.record([(TASK, "compile", 1, "from_cache")])
+
+        self.assertEqual({"compile": 10}, dict(self.history.median_durations(TASK)))
+
+    def test_should_compare_recent_with_earlier_medians(self):
+        for duration in (10, 10, 12, 30, 30, 50):
+            self.record([(TASK, "compile", duration, "executed"), (TASK, "package", 5, "executed")])
+
+        trends = self.history.trends(TASK, window=3)
+
+        self.assertEqual(["compile", "package"], [trend.name for trend in trends])
+        self.assertEqual(10, trends[0].earlier_median)
+        self.assertEqual(30, trends[0].recent_median)
+        self.assertEqual(20, trends[0].growth)
+        self.assertEqual(2.0, trends[0].relative_growth)
+        self.assertEqual(0, trends[1].growth)
+
+    def test_should_not_report_growth_without_earlier_builds(self):
+        self.record([(TEST, "unittest:test_spam", 10, "passed")])
+
+        trend = self.history.trends(TEST)[0]
+
+        self.assertEqual(0, trend.growth)
+        self.assertEqual(None, trend.relative_growth)
+
+
+class MedianTest(unittest.TestCase):
+    def test_should_return_none_without_values(self):
+        self.assertEqual(None, median([]))
+
+    def test_should_return_middle_value(self):
+        self.assertEqual(2, median([3, 1, 2]))
+
+    def test_should_return_mean_of_middle_values(self):
+        self.assertEqual(2.5, median([4, 1, 2, 3]))
+
+
+class ReportedTestDurationsTest(unittest.TestCase):
+    def setUp(self):
+        self.reports_dir = tempfile.mkdtemp(self.__class__.__name__)
+
+    def tearDown(self):
+        shutil.rmtree(self.reports_dir)
+
+    def write_report(self, name, report):
+        with open(os.path.join(self.reports_dir, name), "w") as report_file:
+            json.dump(report, report_file)
+
+    def test_should_collect_tests_from_reports(self):
+        self.write_report("integrationtest.json", {"tests": [{"test": "should_spam_tests", "time": 1200,
+                                                              "success": False}]})
+        self.write_report("unittest.json", {"tests-run": 1, "tests": [{"test": "spam_tests.test_eggs", "time": 3}]})
+        self.write_report("flake8.json", {"warnings": []})
+        self.write_report("coverage.json", [])
+
+        self.assertEqual([(TEST, "integrationtest:should_spam_tests", 1200, "failed"),
+                          (TEST, "unittest:spam_tests.test_eggs", 3, "passed")],
+                         reported_test_durations(self.reports_dir, 0))
+
+    def test_should_mark_tests_reported_from_cache(self):
+        self.write_report("unittest.json", {"tests": [{"test": "spam_tests.test_eggs", "time": 3, "success": True,
+                                                       "cached": True}]})
+
+        self.assertEqual([(TEST, "unittest:spam_tests.test_eggs", 3, "from_cache")],
+                         reported_test_durations(self.reports_dir, 0))
+
+    def test_should_ignore_reports_written_before_build(self):
+        self.write_report("unittest.json", {"tests": [{"test": "spam_tests.test_eggs", "time": 3}]})
+
+        self.assertEqual([], reported_test_durations(self.reports_dir, time.time() + 10))
+
+    def test_should_return_no_tests_when_reports_directory_is_missing(self):
+        self.assertEqual([], reported_test_durations(os.path.join(self.reports_dir, "missing"), 0))
+
+
+class RecordBuildTest(unittest.TestCase):
+    def setUp(self):
+        self.basedir = tempfile.mkdtemp(self.__class__.__name__)
+        self.properties = {"build_history_enabled": True,
+                           "build_history_file": os.path.join(self.basedir, "build_history.db"),
+                           "build_history_max_builds": 10}
+        self.project = Mock()
+        self.project.name = "spam"
+        self.project.basedir = self.basedir
+        self.project.get_property.side_effect = lambda name, default=None: self.properties.get(name, default)
+        self.project.has_property.return_value = False
+        self.project.expand.side_effect = lambda format_string: format_string
+        self.project.expand_path.side_effect = lambda format_string: os.path.join(self.basedir, format_string)
+        self.execution_manager = Mock()
+        self.execution_manager.task_summaries = [
+            TaskExecutionSummary("compile", 1, 40, action_times={"prepare_sources": 15}),
+            TaskExecutionSummary("package", 0, 0, up_to_date=True)]
+        self.logger = Mock()
+
+    def tearDown(self):
+        shutil.rmtree(self.basedir)
+
+    def test_should_not_create_history_when_disabled(self):
+        self.properties["build_history_enabled"] = "false"
+
+        self.assertEqual(None, history_for(self.project))
+
+    def test_should_resolve_relative_history_file_in_project(self):
+        self.properties["build_history_file"] = "target/build_history.db"
+
+        self.assertEqual(os.path.join(self.basedir, "target", "build_history.db"), history_for(self.project).file_name)
+        self.assertEqual(os.path.join(self.basedir, "target", "build_history.db"),
+                         history_properties(self.project)["build_history_file"])
+
+    @patch("pybuilder.history.current_revision", return_value="abc123")
+    def test_should_return_expected_task_durations(self, _):
+        record_build(self.project, self.execution_manager, time.time(), {}, True, None, [], [], self.logger)
+
+        self.assertEqual({"compile": 40}, dict(expected_task_durations(self.project)))
+
+    def test_should_return_no_expected_task_durations_when_disabled(self):
+        self.properties["build_history_enabled"] = False
+
+        self.assertEqual({}, dict(expected_task_durations(self.project)))
+
+    @patch("pybuilder.history.current_revision", return_value="abc123")
+    def test_should_record_phases_tasks_and_actions(self, _):
+        record_build(self.project, self.execution_manager, time.time(), {"load": 5, "build": 45}, True, None,
+                     ["package"], [], self.logger)
+
+        history = history_for(self.project)
+        build = history.builds()[0]
+        self.assertEqual(50, build.duration)
+        self.assertEqual("abc123", build.revision)
+        self.assertEqual({"load": 5, "build": 45}, dict(history.median_durations(PHASE)))
+        self.assertEqual({"compile": 40}, dict(history.median_durations(TASK)))
+        self.assertEqual({"prepare_sources": 15}, dict(history.median_durations(ACTION)))
+
+    @patch("pybuilder.history.current_revision", return_value=None)
+    def test_should_sum_task_times_without_phases(self, _):
+        record_build(self.project, self.execution_manager, time.time(), {}, False, "failure", [], [], self.logger)
+
+        self.assertEqual(40, history_for(self.project).builds()[0].duration)
+
+    @patch("pybuilder.history.current_revision", return_value=None)
+    def test_should_warn_when_history_cannot_be_written(self, _):
+        self.properties["build_history_file"] = os.path.join(self.basedir, "build_history.db", "history.db")
+        with open(os.path.join(self.basedir, "build_history.db"), "w"):
+            pass
+
+        record_build(self.project, self.execution_manager, time.time(), {}, True, None, [], [], self.logger)
+
+        self.assertTrue(self.logger.warn.called)
@@ -0,0 +1,84 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of PyBuilder
+#
+#   Copyright 2011-2015 PyBuilder Team
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import sys
+import unittest
+
+from pybuilder import importprofile
+from pybuilder.importprofile import ImportTime, format_import_profile, parse_import_times, profile_imports
+from test_utils import Mock, patch
+
+IMPORT_TIME_REPORT = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |     _weakrefset
+import time:       800 |        920 |   abc
+import time:      3000 |       3920 | pybuilder.cli
+Traceback (most recent call last):
+"""
+
+
+class ParseImportTimesTest(unittest.TestCase):
+    def test_should_parse_modules_with_their_depth(self):
+        import_times, _ = parse_import_times(IMPORT_TIME_REPORT.splitlines(True))
+
+        self.assertEqual(["_weakrefset", "abc", "pybuilder.cli"], [import_time.module for import_time in import_times])
+        self.assertEqual([120, 800, 3000], [import_time.self_time for import_time in import_times])
+        self.assertEqual([120, 920, 3920], [import_time.cumulative_time for import_time in import_times])
+        self.assertEqual([2, 1, 0], [import_time.depth for import_time in import_times])
+
+    def test_should_keep_lines_not_belonging_to_the_report(self):
+        _, other_lines = parse_import_times(IMPORT_TIME_REPORT.splitlines(True))
+
+        self.assertEqual(["Traceback (most recent call last):\n"], other_lines)
+
+
+class FormatImportProfileTest(unittest.TestCase):
+    def test_should_list_the_slowest_modules_first(self):
+        profile = format_import_profile([ImportTime("abc", 800, 920, 1),
+                                         ImportTime("pybuilder.cli", 3000, 3920, 0),
+                                         ImportTime("_weakrefset", 120, 120, 2)], limit=2)
+
+        self.assertEqual("Imported 3 modules in 0.004 seconds, the 2 slowest:\n"
+                         " self [ms]  cumul. [ms]  module\n"
+                         "       3.0          3.9  pybuilder.cli\n"
+                         "       0.8          0.9  abc\n", profile)
+
+
+class ImportProfileMainTest(unittest.TestCase):
+    @patch("pybuilder.importprofile.profile_imports", return_value=(0, []))
+    @patch("pybuilder.importprofile.sys")
+    def test_should_require_python_3_7(self, mock_sys, profile_imports):
+        mock_sys.version_info = (3, 6, 9)
+
+        self.assertEqual(1, importprofile.main("--import-profile", "clean"))
+        self.assertFalse(profile_imports.called)
+
+    @patch("pybuilder.importprofile.profile_imports", return_value=(2, []))
+    @patch("pybuilder.importprofile.sys")
+    def test_should_run_build_without_the_import_profile_option(self, mock_sys, profile_imports):
+        mock_sys.version_info = (3, 7, 0)
+        mock_sys.stdout = Mock()
+
+        self.assertEqual(2, importprofile.main("-v", "--import-profile", "clean"))
+        profile_imports.assert_called_with(["-v", "clean"])
+
+    @unittest.skipIf(sys.version_info < (3, 7), "-X importtime requires Python 3.7")
+    def test_should_profile_imports_of_child(self):
+        exit_code, import_times = profile_imports(["--version"])
+
+        self.assertEqual(0, exit_code)
+        self.assertTrue("pybuilder.cli" in [import_time.module for import_time in import_times])
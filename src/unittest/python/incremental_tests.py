@@ -0,0 +1,320 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of PyBuilder
+#
+#   Copyright 2011-2015 PyBuilder Team
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from pybuilder.core import Project, input_properties, outputs_of
+from pybuilder.execution import Task
+from pybuilder.incremental import BuildCheckpoint, TaskUpToDateCheck, expand_glob, glob_to_regex, matches_glob
+from test_utils import Mock, patch
+
+
+class GlobToRegexTest(unittest.TestCase):
+    def test_should_match_any_number_of_directories_with_double_star(self):
+        regex = glob_to_regex("**/*.py")
+
+        self.assertTrue(regex.match("spam.py"))
+        self.assertTrue(regex.match("spam/eggs/ham.py"))
+        self.assertFalse(regex.match("spam/eggs/ham.txt"))
+
+    def test_should_not_cross_directories_with_single_star(self):
+        regex = glob_to_regex("*.py")
+
+        self.assertTrue(regex.match("spam.py"))
+        self.assertFalse(regex.match("spam/eggs.py"))
+
+    def test_should_match_single_character_with_question_mark(self):
+        regex = glob_to_regex("spam?.py")
+
+        self.assertTrue(regex.match("spam1.py"))
+        self.assertFalse(regex.match("spam.py"))
+
+
+class IncrementalTestBase(unittest.TestCase):
+    def setUp(self):
+        self.basedir = tempfile.mkdtemp(self.__class__.__name__)
+        self.project = Project(self.basedir)
+        self.project.set_property("dir_target", "target")
+        self.project.set_property("dir_source_main_python", "src")
+        self.project.set_property("dir_dist", "$dir_target/dist")
+
+    def tearDown(self):
+        shutil.rmtree(self.basedir)
+
+    def write_file(self, relative_name, content):
+        file_name = os.path.join(self.basedir, relative_name)
+        if not os.path.exists(os.path.dirname(file_name)):
+            os.makedirs(os.path.dirname(file_name))
+        with open(file_name, "w") as file_handle:
+            file_handle.write(content)
+        return file_name
+
+
+class ExpandGlobTest(IncrementalTestBase):
+    def test_should_expand_directory_to_all_files_below(self):
+        spam = self.write_file("src/spam.py", "spam")
+        eggs = self.write_file("src/pkg/eggs.py", "eggs")
+        self.write_file("src/pkg/eggs.pyc", "compiled")
+        self.write_file("src/.hidden", "hidden")
+        self.write_file("src/__pycache__/eggs.cpython.pyc", "compiled")
+
+        self.assertEqual(sorted([spam, eggs]), sorted(expand_glob(os.path.join(self.basedir, "src"), ignore_compiled=True)))
+
+    def test_should_expand_directory_to_compiled_files_below(self):
+        compiled = self.write_file("target/compiled/spam.pyc", "compiled")
+
+        self.assertEqual([compiled], expand_glob(os.path.join(self.basedir, "target")))
+
+    def test_should_expand_wildcards(self):
+        self.write_file("src/spam.txt", "spam")
+        eggs = self.write_file("src/pkg/eggs.py", "eggs")
+
+        self.assertEqual([eggs], expand_glob(os.path.join(self.basedir, "src", "**", "*.py")))
+
+    def test_should_expand_to_nothing_when_path_does_not_exist(self):
+        self.assertEqual([], expand_glob(os.path.join(self.basedir, "spam", "*")))
+
+    def test_should_match_files_covered_by_glob(self):
+        src = os.path.join(self.basedir, "src")
+
+        self.assertTrue(matches_glob(src, os.path.join(src, "pkg", "spam.py")))
+        self.assertTrue(matches_glob(os.path.join(src, "**", "*.py"), os.path.join(src, "spam.py")))
+        self.assertFalse(matches_glob(os.path.join(src, "**", "*.py"), os.path.join(src, "spam.txt")))
+        self.assertFalse(matches_glob(src, os.path.join(self.basedir, "build.py")))
+        self.assertFalse(matches_glob(src, os.path.join(src, "spam.pyc"), ignore_compiled=True))
+        self.assertFalse(matches_glob(src, os.path.join(src, ".spam.py.swp")))
+
+
+class TaskUpToDateCheckTest(IncrementalTestBase):
+    def setUp(self):
+        super(TaskUpToDateCheckTest, self).setUp()
+        self.write_file("src/spam.py", "spam")
+
+        def package(project):
+            pass
+
+        self.task = Task("package", package, inputs=["**", input_properties("any_property")], outputs="$dir_dist")
+        self.execution_manager = Mock()
+
+    def execute(self, outputs=None):
+        check = TaskUpToDateCheck(self.project, self.task, self.execution_manager)
+        up_to_date = check.is_up_to_date()
+        if not up_to_date:
+            for name, content in (outputs or {"target/dist/spam.py": "spam"}).items():
+                self.write_file(name, content)
+        check.record()
+        return up_to_date
+
+    def test_should_not_be_up_to_date_when_never_executed(self):
+        self.assertFalse(self.execute())
+
+    def test_should_be_up_to_date_when_nothing_changed(self):
+        self.execute()
+
+        self.assertTrue(self.execute())
+
+    def test_should_be_affected_by_changed_source_inputs(self):
+        check = TaskUpToDateCheck(self.project, self.task, self.execution_manager)
+
+        self.assertTrue(check.is_affected_by([os.path.join(self.basedir, "src", "removed.py")]))
+        self.assertFalse(check.is_affected_by([os.path.join(self.basedir, "docs", "index.rst")]))
+
+    def test_should_not_be_up_to_date_when_input_changed(self):
+        self.execute()
+        self.write_file("src/spam.py", "eggs")
+
+        self.assertFalse(self.execute())
+
+    def test_should_not_be_up_to_date_when_input_was_added(self):
+        self.execute()
+        self.write_file("src/eggs.py", "eggs")
+
+        self.assertFalse(self.execute())
+
+    def test_should_be_up_to_date_when_input_was_touched_only(self):
+        self.execute()
+        self.write_file("src/spam.py", "spam")
+
+        self.assertTrue(self.execute())
+
+    def test_should_not_be_up_to_date_when_property_changed(self):
+        self.execute()
+        self.project.set_property("any_property", ["spam"])
+
+        self.assertFalse(self.execute())
+
+    def test_should_not_be_up_to_date_when_output_was_removed(self):
+        self.execute()
+        os.remove(os.path.join(self.basedir, "target", "dist", "spam.py"))
+
+        self.assertFalse(self.execute())
+
+    def test_should_not_be_up_to_date_when_output_was_modified(self):
+        self.execute()
+        self.write_file("target/dist/spam.py", "modified")
+
+        self.assertFalse(self.execute())
+
+    def test_should_ignore_inputs_below_outputs(self):
+        self.project.set_property("dir_dist", "src/dist")
+        self.execute({"src/dist/spam.py": "spam"})
+
+        self.assertTrue(self.execute())
+
+    def test_should_not_be_up_to_date_when_outputs_of_other_task_changed(self):
+        def compile(project):
+            pass
+
+        self.task.inputs.append(outputs_of("compile"))
+        self.execution_manager.get_task.return_value = Task("compile", compile, outputs="compiled")
+        self.write_file("target/compiled/spam.pyc", "compiled")
+        self.execute()
+        self.write_file("target/compiled/spam.pyc", "recompiled")
+
+        self.assertFalse(self.execute())
+        self.execution_manager.get_task.assert_called_with("compile")
+
+
+class TaskUpToDateCheckBuildCacheTest(IncrementalTestBase):
+    def setUp(self):
+        super(TaskUpToDateCheckBuildCacheTest, self).setUp()
+        self.project.set_property("build_cache_enabled", True)
+        self.project.set_property("build_cache_dir", os.path.join(self.basedir, "cache"))
+        self.write_file("src/spam.py", "spam")
+
+        def package(project):
+            pass
+
+        self.task = Task("package", package, inputs=["**"], outputs="$dir_dist")
+
+    def execute(self, content):
+        check = TaskUpToDateCheck(self.project, self.task, Mock())
+        if check.is_up_to_date():
+            return "up to date"
+        if check.restore_from_cache():
+            check.record()
+            return "restored"
+        shutil.rmtree(os.path.join(self.basedir, "target", "dist"), ignore_errors=True)
+        self.write_file("target/dist/spam.py", content)
+        check.record()
+        return "executed"
+
+    def read_output(self):
+        with open(os.path.join(self.basedir, "target", "dist", "spam.py")) as output:
+            return output.read()
+
+    def test_should_restore_outputs_of_previous_inputs_from_cache(self):
+        self.assertEqual("executed", self.execute("first"))
+        self.write_file("src/spam.py", "eggs")
+        self.assertEqual("executed", self.execute("second"))
+        self.write_file("src/spam.py", "spam")
+
+        self.assertEqual("restored", self.execute("third"))
+        self.assertEqual("first", self.read_output())
+        self.assertEqual("up to date", self.execute("fourth"))
+
+    def test_should_remove_stale_outputs_when_restoring(self):
+        self.execute("first")
+        self.write_file("target/dist/stale.py", "stale")
+
+        self.assertEqual("restored", self.execute("second"))
+        self.assertFalse(os.path.exists(os.path.join(self.basedir, "target", "dist", "stale.py")))
+        self.assertEqual("first", self.read_output())
+
+    def test_should_not_restore_outputs_when_restoring_from_cache_fails(self):
+        self.execute("first")
+        manifest = {"files": {"target/dist/spam.py": ["0123456789abcdef0123456789abcdef01234567", 0o644]},
+                    "metadata": {}}
+        check = TaskUpToDateCheck(self.project, self.task, Mock())
+        self.write_file("src/spam.py", "eggs")
+        self.assertFalse(check.is_up_to_date())
+
+        with patch("pybuilder.cache.LocalBuildCache.get", return_value=manifest):
+            self.assertFalse(check.restore_from_cache())
+
+        self.assertEqual(None, check.restored_metadata)
+        self.assertFalse(os.path.exists(os.path.join(self.basedir, "target", "dist", "spam.py")))
+
+
+class BuildCheckpointTest(IncrementalTestBase):
+    def setUp(self):
+        super(BuildCheckpointTest, self).setUp()
+        self.descriptor = self.write_file("build.py", "build")
+        self.write_file("src/spam.py", "spam")
+
+    def complete_tasks(self, *task_names, **keyword_arguments):
+        checkpoint = BuildCheckpoint(self.project, self.descriptor)
+        checkpoint.begin(keyword_arguments.get("resume", False))
+        for task_name in task_names:
+            checkpoint.task_completed(task_name)
+        return checkpoint
+
+    def test_should_not_return_completed_tasks_unless_resuming(self):
+        self.complete_tasks("prepare", "compile")
+
+        self.assertEqual([], BuildCheckpoint(self.project, self.descriptor).begin())
+
+    def test_should_return_tasks_completed_by_previous_build_when_resuming(self):
+        self.complete_tasks("prepare", "compile").task_failed("run_unit_tests")
+
+        self.assertEqual(["prepare", "compile"], BuildCheckpoint(self.project, self.descriptor).begin(resume=True))
+
+    def test_should_keep_completed_tasks_of_resumed_build(self):
+        self.complete_tasks("prepare")
+        self.complete_tasks("compile", resume=True)
+
+        self.assertEqual(["prepare", "compile"], BuildCheckpoint(self.project, self.descriptor).begin(resume=True))
+
+    def test_should_not_rewrite_file_states_when_task_completed(self):
+        checkpoint = self.complete_tasks()
+        os.remove(checkpoint.files_file)
+
+        checkpoint.task_completed("prepare")
+        checkpoint.task_failed("compile")
+
+        self.assertFalse(os.path.exists(checkpoint.files_file))
+        self.assertEqual(["prepare"], BuildCheckpoint(self.project, self.descriptor).begin(resume=True))
+
+    def test_should_not_resume_when_source_changed(self):
+        self.complete_tasks("prepare")
+        self.write_file("src/spam.py", "changed spam")
+
+        self.assertEqual([], BuildCheckpoint(self.project, self.descriptor).begin(resume=True))
+
+    def test_should_not_resume_when_build_descriptor_changed(self):
+        self.complete_tasks("prepare")
+        self.write_file("build.py", "changed build")
+
+        self.assertEqual([], BuildCheckpoint(self.project, self.descriptor).begin(resume=True))
+
+    def test_should_not_resume_when_property_changed(self):
+        self.complete_tasks("prepare")
+        self.project.set_property("spam", "eggs")
+
+        self.assertEqual([], BuildCheckpoint(self.project, self.descriptor).begin(resume=True))
+
+    def test_should_resume_with_properties_holding_functions(self):
+        self.project.set_property("runner", lambda stream: stream)
+        self.complete_tasks("prepare")
+        self.project.set_property("runner", lambda stream: stream)
+
+        self.assertEqual(["prepare"], BuildCheckpoint(self.project, self.descriptor).begin(resume=True))
@@ -0,0 +1,114 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of PyBuilder
+#
+#   Copyright 2011-2015 PyBuilder Team
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+import unittest
+
+from pybuilder.core import Author, Project
+from pybuilder.execution import ExecutionManager, TaskDependency
+from pybuilder.pluginmanifest import BUILTIN_PLUGIN_MANIFESTS, ManifestAction, ManifestTask, PluginManifest
+from pybuilder.reactor import Reactor
+from test_utils import Mock
+
+
+class PluginManifestTest(unittest.TestCase):
+    def setUp(self):
+        self.manifest = PluginManifest(
+            tasks=[ManifestTask("compile_docs", dependencies=["compile_sources"],
+                                dependents=[TaskDependency("publish", True)])],
+            actions=[ManifestAction("check_docs", after="verify")],
+            properties={"docs_formats": ["html"]},
+            plugin_dependencies=["docs_tool"])
+
+    def test_should_return_dependency_edges_including_dependents(self):
+        self.assertEqual({"compile_docs": ["compile_sources"], "publish": ["compile_docs"]},
+                         self.manifest.dependency_edges())
+
+    def test_should_be_needed_by_plan_containing_task(self):
+        self.assertTrue(self.manifest.is_needed_by({"prepare", "compile_docs"}))
+
+    def test_should_be_needed_by_plan_containing_task_of_action(self):
+        self.assertTrue(self.manifest.is_needed_by({"prepare", "verify"}))
+
+    def test_should_not_be_needed_by_unrelated_plan(self):
+        self.assertFalse(self.manifest.is_needed_by({"clean"}))
+
+    def test_should_initialize_project_with_copies_of_property_defaults(self):
+        project = Project("/any/dir")
+        project.set_property("docs_formats", ["pdf"])
+        other_project = Project("/any/dir")
+
+        self.manifest.initialize(project)
+        self.manifest.initialize(other_project)
+        other_project.get_property("docs_formats").append("epub")
+
+        self.assertEqual(["pdf"], project.get_property("docs_formats"))
+        self.assertEqual(["html"], self.manifest.properties["docs_formats"])
+        self.assertEqual(["docs_tool"], [dependency.name for dependency in project.plugin_dependencies])
+
+    def test_should_initialize_project_with_defaults_derived_from_project(self):
+        project = Project("/any/dir", name="spam")
+
+        PluginManifest(properties={"docs_title": lambda project: project.name.upper()}).initialize(project)
+
+        self.assertEqual("SPAM", project.get_property("docs_title"))
+
+
+class BuiltinPluginManifestsTest(unittest.TestCase):
+    def initialized_project(self, plugins):
+        execution_manager = ExecutionManager(Mock())
+        reactor = Reactor(Mock(), execution_manager, plugin_manifests={})
+        reactor.project = Project("/any/dir", name="spam", version="1.0")
+        reactor.project.authors = [Author("Any Author"), Author("Other Author")]
+        for plugin in plugins:
+            reactor.require_plugin(plugin)
+        execution_manager.execute_initializers(project=reactor.project, logger=Mock())
+        return reactor.project
+
+    def test_should_declare_all_properties_set_by_initializers_of_plugins(self):
+        for plugin, manifest in BUILTIN_PLUGIN_MANIFESTS.items():
+            required_properties = set(self.initialized_project(manifest.requires).properties)
+            plugin_properties = set(self.initialized_project([plugin]).properties) - required_properties
+
+            self.assertEqual(sorted(plugin_properties), sorted(set(manifest.properties) - required_properties),
+                             plugin)
+
+    def test_should_match_tasks_and_initializers_of_plugins(self):
+        for plugin, manifest in BUILTIN_PLUGIN_MANIFESTS.items():
+            execution_manager = ExecutionManager(Mock())
+            reactor = Reactor(Mock(), execution_manager, plugin_manifests={})
+            reactor.project = Project("/any/dir", name="spam", version="1.0")
+            reactor.project.authors = [Author("Any Author"), Author("Other Author")]
+            reactor.require_plugin(plugin)
+            plugin_task_names = set(execution_manager.task_names)
+            plugin_action_names = set(action.name for action in execution_manager.actions)
+
+            for task in manifest.tasks:
+                self.assertTrue(task.name in plugin_task_names, "%s: %s" % (plugin, task.name))
+            for action in manifest.actions:
+                self.assertTrue(action.name in plugin_action_names, "%s: %s" % (plugin, action.name))
+
+            manifest_project = Project("/any/dir", name="spam", version="1.0")
+            manifest_project.authors = [Author("Any Author"), Author("Other Author")]
+            manifest.initialize(manifest_project)
+            execution_manager.execute_initializers(project=reactor.project, logger=Mock())
+            for name in manifest.properties:
+                self.assertEqual(reactor.project.get_property(name), manifest_project.get_property(name),
+                                 "%s: %s" % (plugin, name))
+            for dependency in manifest_project.plugin_dependencies:
+                self.assertTrue(dependency in reactor.project.plugin_dependencies, "%s: %s" % (plugin, dependency))
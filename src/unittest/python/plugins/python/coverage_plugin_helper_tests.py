@@ -0,0 +1,115 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of PyBuilder
+#
+#   Copyright 2011-2015 PyBuilder Team
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from pybuilder.core import Project
+from pybuilder.plugins.python.coverage_plugin_helper import (collects_coverage,
+                                                             combine_coverage_data,
+                                                             coverage_data_file,
+                                                             discard_coverage_data,
+                                                             start_collecting_coverage)
+from test_utils import Mock, patch
+
+
+class CollectsCoverageTests(unittest.TestCase):
+    def setUp(self):
+        self.project = Project("basedir")
+        self.project.set_property("coverage_single_pass", True)
+        self.reactor = Mock()
+        self.planned_tasks = ["verify"]
+        self.reactor.execution_manager.is_task_in_current_execution_plan.side_effect = \
+            lambda task_name: task_name in self.planned_tasks
+
+    def test_should_collect_coverage_when_single_pass_and_coverage_is_verified(self):
+        self.assertTrue(collects_coverage(self.project, self.reactor))
+
+    def test_should_not_collect_coverage_when_not_single_pass(self):
+        self.project.set_property("coverage_single_pass", False)
+
+        self.assertFalse(collects_coverage(self.project, self.reactor))
+
+    def test_should_not_collect_coverage_when_single_pass_is_not_configured(self):
+        self.assertFalse(collects_coverage(Project("basedir"), self.reactor))
+
+    def test_should_not_collect_coverage_when_coverage_plugin_runs_the_tests(self):
+        self.project.set_property("__running_coverage", True)
+
+        self.assertFalse(collects_coverage(self.project, self.reactor))
+
+    def test_should_not_collect_coverage_when_coverage_is_not_verified(self):
+        self.planned_tasks = ["run_unit_tests"]
+
+        self.assertFalse(collects_coverage(self.project, self.reactor))
+
+
+class CoverageDataTests(unittest.TestCase):
+    def setUp(self):
+        self.basedir = tempfile.mkdtemp()
+        self.project = Project(self.basedir)
+        self.project.set_property("dir_reports", "reports")
+        os.mkdir(os.path.join(self.basedir, "reports"))
+
+    def tearDown(self):
+        shutil.rmtree(self.basedir)
+
+    def test_should_name_data_file_after_execution_prefix(self):
+        self.assertEqual(os.path.join(self.basedir, "reports", "unittest.coverage"),
+                         coverage_data_file(self.project, "unittest"))
+
+    def test_should_discard_existing_coverage_data(self):
+        data_file = coverage_data_file(self.project, "unittest")
+        with open(data_file, "w") as data:
+            data.write("stale")
+
+        self.assertEqual(data_file, discard_coverage_data(self.project, "unittest"))
+        self.assertFalse(os.path.exists(data_file))
+
+    def test_should_discard_missing_coverage_data(self):
+        discard_coverage_data(self.project, "unittest")
+
+        self.assertFalse(os.path.exists(coverage_data_file(self.project, "unittest")))
+
+    @patch("pybuilder.plugins.python.coverage_plugin_helper.create_coverage")
+    def test_should_collect_coverage_with_data_suffix(self, create_coverage):
+        data_file = coverage_data_file(self.project, "unittest")
+        with open(data_file + ".worker-1", "w") as data:
+            data.write("stale")
+
+        coverage = start_collecting_coverage(self.project, "unittest", "worker-1")
+
+        create_coverage.assert_called_with(self.project, data_file, "worker-1")
+        self.assertFalse(os.path.exists(data_file + ".worker-1"))
+        coverage.start.assert_called_with()
+        self.assertFalse(coverage.erase.called)
+
+    @patch("pybuilder.plugins.python.coverage_plugin_helper.create_coverage")
+    def test_should_combine_existing_coverage_data_with_data_suffixes(self, create_coverage):
+        data_file = coverage_data_file(self.project, "unittest")
+        for data_suffix in ("loader", "worker-0"):
+            with open(data_file + "." + data_suffix, "w") as data:
+                data.write("data")
+
+        combine_coverage_data(self.project, "unittest", ["loader", "worker-0", "worker-1"])
+
+        create_coverage.assert_called_with(self.project, data_file)
+        create_coverage.return_value.combine.assert_called_with([data_file + ".loader", data_file + ".worker-0"])
+        create_coverage.return_value.save.assert_called_with()
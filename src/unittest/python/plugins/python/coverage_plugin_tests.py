@@ -19,13 +19,14 @@
 import sys
 from unittest import TestCase
 
-from test_utils import patch, MagicMock, Mock
+from test_utils import patch, MagicMock, Mock, ANY
 
 from pybuilder.core import Project, Logger
 from pybuilder.plugins.python.coverage_plugin import (init_coverage_properties,
                                                       _list_all_covered_modules,
                                                       _build_module_report,
                                                       _build_coverage_report,
+                                                      verify_coverage,
                                                       )
 
 if sys.version_info[0] < 3:  # if major is less than 3
@@ -64,6 +65,48 @@ class CoveragePluginTests(TestCase):
             self.assertEquals(self.project.get_property("coverage_exceptions"), ["foo"])
             self.assertEquals(self.project.get_property("coverage_fork"), True)
 
+    @patch("pybuilder.plugins.python.coverage_plugin.run_coverage")
+    @patch("pybuilder.plugins.python.coverage_plugin.report_coverage")
+    def test_should_run_unit_tests_under_coverage_by_default(self, report_coverage, run_coverage):
+        init_coverage_properties(self.project)
+        reactor = Mock()
+
+        verify_coverage(self.project, Mock(), reactor)
+
+        run_coverage.assert_called_with(self.project, ANY, reactor, "coverage", "coverage", "run_unit_tests")
+        report_coverage.assert_not_called()
+
+    @patch("pybuilder.plugins.python.coverage_plugin.os.path.exists", return_value=True)
+    @patch("pybuilder.plugins.python.coverage_plugin.run_coverage")
+    @patch("pybuilder.plugins.python.coverage_plugin.report_coverage")
+    def test_should_report_coverage_collected_in_single_pass(self, report_coverage, run_coverage, exists):
+        self.project.set_property("coverage_single_pass", True)
+        self.project.set_property("dir_reports", "reports")
+        reactor = Mock()
+        reactor.execution_manager.is_task_executed.return_value = True
+
+        verify_coverage(self.project, Mock(), reactor)
+
+        report_coverage.assert_called_with(self.project, ANY, "coverage", "coverage",
+                                           self.project.expand_path("reports/unittest.coverage"))
+        reactor.execution_manager.is_task_executed.assert_called_with("run_unit_tests")
+        run_coverage.assert_not_called()
+
+    @patch("pybuilder.plugins.python.coverage_plugin.os.path.exists", return_value=False)
+    @patch("pybuilder.plugins.python.coverage_plugin.run_coverage")
+    @patch("pybuilder.plugins.python.coverage_plugin.report_coverage")
+    def test_should_run_unit_tests_again_when_single_pass_collected_nothing(self, report_coverage, run_coverage,
+                                                                            exists):
+        self.project.set_property("coverage_single_pass", True)
+        self.project.set_property("dir_reports", "reports")
+        reactor = Mock()
+        reactor.execution_manager.is_task_executed.return_value = True
+
+        verify_coverage(self.project, Mock(), reactor)
+
+        run_coverage.assert_called_with(self.project, ANY, reactor, "coverage", "coverage", "run_unit_tests")
+        report_coverage.assert_not_called()
+
     def test_list_all_covered_modules_all_loaded(self):
         module_a_val = MagicMock(__name__='module_a', __file__='module_a.py')
         module_b_val = MagicMock(__name__='module_b', __file__='module_b.py')
@@ -0,0 +1,181 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of PyBuilder
+#
+#   Copyright 2011-2015 PyBuilder Team
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from pybuilder.core import Project
+from pybuilder.plugins.python.test_impact_plugin_helper import (ImportGraph,
+                                                                affected_test_modules,
+                                                                import_graph,
+                                                                parse_imports,
+                                                                record_successful_run,
+                                                                select_affected_tests,
+                                                                source_modules)
+from test_utils import Mock, patch
+
+
+class ParseImportsTests(unittest.TestCase):
+    def test_should_parse_absolute_imports(self):
+        self.assertEquals(["os", "os.path", "pkg", "pkg.mod", "pkg.mod.name"],
+                          parse_imports("import os, os.path\nfrom pkg.mod import name\nimport pkg", "tests"))
+
+    def test_should_resolve_relative_imports_of_module(self):
+        self.assertEquals(["pkg", "pkg.other", "pkg.sub", "pkg.sub.sibling"],
+                          parse_imports("from . import sibling\nfrom .. import other", "pkg.sub.mod"))
+
+    def test_should_resolve_relative_imports_of_package(self):
+        self.assertEquals(["pkg.mod", "pkg.mod.name"],
+                          parse_imports("from .mod import name", "pkg", is_package=True))
+
+    def test_should_parse_imports_in_functions_but_ignore_star(self):
+        self.assertEquals(["pkg"], parse_imports("def f():\n    from pkg import *\n", "tests"))
+
+
+class ImportGraphTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp_directory = tempfile.mkdtemp()
+        self.main = os.path.join(self.tmp_directory, "main")
+        self.tests = os.path.join(self.tmp_directory, "tests")
+        self.write("main/pkg/__init__.py", "")
+        self.write("main/pkg/core.py", "import os\n")
+        self.write("main/pkg/api.py", "from .core import run\n")
+        self.write("main/pkg/other.py", "")
+        self.write("tests/api_tests.py", "from pkg.api import call\n")
+        self.write("tests/other_tests.py", "import pkg.other\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_directory)
+
+    def write(self, file_name, content):
+        file_name = os.path.join(self.tmp_directory, file_name)
+        if not os.path.isdir(os.path.dirname(file_name)):
+            os.makedirs(os.path.dirname(file_name))
+        with open(file_name, "w") as source_file:
+            source_file.write(content)
+        return file_name
+
+    def file(self, file_name):
+        return os.path.join(self.tmp_directory, file_name)
+
+    def test_should_find_source_modules(self):
+        self.assertEquals(["pkg", "pkg.api", "pkg.core", "pkg.other"], sorted(source_modules(self.main)))
+
+    def test_should_find_transitive_dependencies_with_packages(self):
+        graph = ImportGraph([self.main, self.tests])
+
+        self.assertEquals(set(["api_tests", "pkg", "pkg.api", "pkg.core"]), graph.dependencies("api_tests"))
+
+    def test_should_select_tests_depending_on_changed_module(self):
+        graph = ImportGraph([self.main, self.tests])
+
+        self.assertEquals(["api_tests"],
+                          affected_test_modules(graph, ["api_tests", "other_tests"], [self.file("main/pkg/core.py")]))
+        self.assertEquals(["api_tests", "other_tests"],
+                          affected_test_modules(graph, ["api_tests", "other_tests"],
+                                                [self.file("main/pkg/__init__.py")]))
+        self.assertEquals(["other_tests"],
+                          affected_test_modules(graph, ["api_tests", "other_tests"],
+                                                [self.file("tests/other_tests.py")]))
+
+    def test_should_select_tests_importing_deleted_module(self):
+        os.remove(self.file("main/pkg/other.py"))
+        graph = ImportGraph([self.main, self.tests])
+
+        self.assertEquals(["other_tests"],
+                          affected_test_modules(graph, ["api_tests", "other_tests"],
+                                                [self.file("main/pkg/other.py")]))
+
+    def test_should_not_select_when_impact_of_changed_file_is_unknown(self):
+        graph = ImportGraph([self.main, self.tests])
+
+        self.assertEquals(None, affected_test_modules(graph, ["api_tests"], [self.file("main/pkg/data.json")]))
+        self.assertEquals(None, affected_test_modules(graph, ["api_tests"], [self.file("build.py")]))
+
+    @patch("pybuilder.plugins.python.test_impact_plugin_helper.parse_imports")
+    def test_should_reuse_imports_of_unchanged_files(self, parse):
+        parse.return_value = []
+        file_states = ImportGraph([self.main]).file_states
+        self.assertEquals(4, parse.call_count)
+
+        ImportGraph([self.main], file_states)
+        self.assertEquals(4, parse.call_count)
+
+        self.write("main/pkg/core.py", "import sys\n")
+        ImportGraph([self.main], file_states)
+        self.assertEquals(5, parse.call_count)
+
+
+class SelectAffectedTestsTests(ImportGraphTests):
+    def setUp(self):
+        super(SelectAffectedTestsTests, self).setUp()
+        self.project = Project(self.tmp_directory)
+        self.project.set_property("dir_target", "target")
+        self.logger = Mock()
+        self.test_modules = ["api_tests", "other_tests"]
+
+    def select(self):
+        graph = import_graph(self.project, "unittest", [self.main, self.tests])
+        return select_affected_tests(self.project, self.logger, "unittest", self.test_modules, graph)
+
+    def test_should_select_all_tests_without_successful_run(self):
+        self.assertEquals(self.test_modules, self.select()[0])
+
+    def test_should_select_tests_affected_since_successful_run(self):
+        record_successful_run(self.project, "unittest", self.select()[1])
+        self.assertEquals([], self.select()[0])
+
+        self.write("main/pkg/other.py", "VALUE = 1\n")
+        self.assertEquals(["other_tests"], self.select()[0])
+
+    def test_should_select_all_tests_when_other_source_file_changed_since_successful_run(self):
+        self.write("main/pkg/data.json", "{}")
+        record_successful_run(self.project, "unittest", self.select()[1])
+        self.assertEquals([], self.select()[0])
+
+        self.write("main/pkg/data.json", "[]")
+        self.assertEquals(self.test_modules, self.select()[0])
+
+    def test_should_select_all_tests_when_test_properties_changed_since_successful_run(self):
+        record_successful_run(self.project, "unittest", self.select()[1])
+        self.project.set_property("unittest_test_method_prefix", "check")
+
+        self.assertEquals(self.test_modules, self.select()[0])
+
+    def test_should_select_all_tests_when_full_run_is_forced(self):
+        record_successful_run(self.project, "unittest", self.select()[1])
+        self.project.set_property("unittest_impact_full_run", "true")
+
+        self.assertEquals(self.test_modules, self.select()[0])
+
+    @patch("pybuilder.plugins.python.test_impact_plugin_helper.vcs_changed_files")
+    def test_should_select_tests_affected_by_git_changes(self, changed_files):
+        self.project.set_property("unittest_impact_changes", "git")
+        changed_files.return_value = [self.file("main/pkg/api.py")]
+
+        self.assertEquals(["api_tests"], self.select()[0])
+        changed_files.assert_called_with(self.tmp_directory, "HEAD")
+
+    @patch("pybuilder.plugins.python.test_impact_plugin_helper.vcs_changed_files")
+    def test_should_select_all_tests_when_git_changes_are_unknown(self, changed_files):
+        self.project.set_property("unittest_impact_changes", "git")
+        changed_files.return_value = None
+
+        self.assertEquals(self.test_modules, self.select()[0])
@@ -0,0 +1,116 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of PyBuilder
+#
+#   Copyright 2011-2015 PyBuilder Team
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from pybuilder.core import Project
+from pybuilder.plugins.python.test_impact_plugin_helper import ImportGraph
+from pybuilder.plugins.python.test_result_cache_plugin_helper import TestResultCache, module_of_test
+from test_utils import Mock
+
+
+class TestResultCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp_directory = tempfile.mkdtemp()
+        self.project = Project(self.tmp_directory)
+        self.project.set_property("dir_target", "target")
+        self.write("main/spam.py", "")
+        self.write("main/eggs.py", "")
+        self.write("tests/spam_tests.py", "import spam\n")
+        self.write("tests/eggs_tests.py", "import eggs\n")
+        self.test_modules = ["eggs_tests", "spam_tests"]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_directory)
+
+    def write(self, file_name, content):
+        file_name = os.path.join(self.tmp_directory, file_name)
+        if not os.path.isdir(os.path.dirname(file_name)):
+            os.makedirs(os.path.dirname(file_name))
+        with open(file_name, "w") as source_file:
+            source_file.write(content)
+
+    def cache(self):
+        graph = ImportGraph([os.path.join(self.tmp_directory, "main"), os.path.join(self.tmp_directory, "tests")])
+        return TestResultCache(self.project, "unittest", graph)
+
+    def result(self, test_ids, failed_test_ids=()):
+        def test(test_id):
+            test = Mock()
+            test.id.return_value = test_id
+            return test
+
+        result = Mock()
+        result.test_names = [test(test_id) for test_id in test_ids]
+        result.test_timers = {}
+        result.errors = []
+        result.failures = [(test(test_id), "traceback") for test_id in failed_test_ids]
+        result.unexpectedSuccesses = []
+        return result
+
+    def run_tests(self, failed_test_ids=()):
+        cache = self.cache()
+        executed, cached = cache.partition(self.test_modules)
+        cache.record(executed, self.result(["%s.Test.test" % module for module in executed], failed_test_ids))
+        return executed, cached
+
+    def test_should_execute_all_modules_without_cached_results(self):
+        self.assertEqual((self.test_modules, {}), self.run_tests())
+
+    def test_should_report_passed_unchanged_modules_from_cache(self):
+        self.run_tests()
+
+        self.assertEqual(([], {"eggs_tests": [{"test": "eggs_tests.Test.test", "time": 0, "cpu_time": 0}],
+                               "spam_tests": [{"test": "spam_tests.Test.test", "time": 0, "cpu_time": 0}]}),
+                         self.run_tests())
+
+    def test_should_execute_modules_whose_imports_changed(self):
+        self.run_tests()
+        self.write("main/spam.py", "VALUE = 1\n")
+
+        self.assertEqual(["spam_tests"], self.run_tests()[0])
+
+    def test_should_execute_modules_when_properties_changed(self):
+        self.run_tests()
+        self.project.set_property("unittest_test_method_prefix", "should")
+
+        self.assertEqual(self.test_modules, self.run_tests()[0])
+
+    def test_should_always_execute_failed_modules(self):
+        self.run_tests(failed_test_ids=["spam_tests.Test.test"])
+
+        self.assertEqual(["spam_tests"], self.run_tests(failed_test_ids=["spam_tests.Test.test"])[0])
+        self.assertEqual(["spam_tests"], self.run_tests()[0])
+        self.assertEqual([], self.run_tests()[0])
+
+    def test_should_execute_modules_with_failed_fixture(self):
+        self.run_tests(failed_test_ids=["setUpClass (spam_tests.Test)"])
+
+        self.assertEqual(["spam_tests"], self.run_tests()[0])
+
+    def test_should_cache_no_module_after_failure_of_unknown_module(self):
+        self.run_tests(failed_test_ids=["unittest.loader._FailedTest.ham_tests"])
+
+        self.assertEqual(self.test_modules, self.run_tests()[0])
+
+    def test_should_find_module_of_test(self):
+        self.assertEqual("pkg.spam_tests", module_of_test("pkg.spam_tests.Test.test", ["pkg", "pkg.spam_tests"]))
+        self.assertEqual(None, module_of_test("eggs_tests.Test.test", ["pkg", "pkg.spam_tests"]))
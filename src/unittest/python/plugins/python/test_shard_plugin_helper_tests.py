@@ -0,0 +1,104 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of PyBuilder
+#
+#   Copyright 2011-2015 PyBuilder Team
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from pybuilder.core import Project
+from pybuilder.errors import BuildFailedException
+from pybuilder.plugins.python.test_shard_plugin_helper import (module_weights,
+                                                               parse_shard,
+                                                               recorded_module_durations,
+                                                               select_shard,
+                                                               split_into_shards)
+from test_utils import Mock
+
+
+class ParseShardTests(unittest.TestCase):
+    def test_should_parse_shard(self):
+        self.assertEqual((3, 8), parse_shard("3/8"))
+        self.assertEqual((1, 1), parse_shard("1/1"))
+
+    def test_should_raise_when_shard_is_invalid(self):
+        self.assertRaises(BuildFailedException, parse_shard, "3")
+        self.assertRaises(BuildFailedException, parse_shard, "a/b")
+        self.assertRaises(BuildFailedException, parse_shard, "0/8")
+        self.assertRaises(BuildFailedException, parse_shard, "9/8")
+
+
+class SplitIntoShardsTests(unittest.TestCase):
+    def test_should_balance_shards_by_weight(self):
+        weights = {"a": 7, "b": 5, "c": 4, "d": 3, "e": 1}
+
+        self.assertEqual([["a"], ["b", "e"], ["c", "d"]], split_into_shards(weights, 3))
+
+    def test_should_cover_every_module_exactly_once(self):
+        weights = dict(("module_%d" % index, index % 5) for index in range(50))
+
+        shards = split_into_shards(weights, 8)
+
+        self.assertEqual(8, len(shards))
+        self.assertEqual(sorted(weights), sorted(module for shard in shards for module in shard))
+
+    def test_should_leave_shards_empty_when_there_are_fewer_modules(self):
+        self.assertEqual([["a"], [], []], split_into_shards({"a": 1}, 3))
+
+
+class ShardWeightTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp_directory = tempfile.mkdtemp()
+        self.module_files = {}
+        for module, size in (("spam_tests", 100), ("eggs_tests", 300)):
+            self.module_files[module] = os.path.join(self.tmp_directory, module + ".py")
+            with open(self.module_files[module], "w") as module_file:
+                module_file.write("#" * size)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_directory)
+
+    def write_report(self, name, modules):
+        with open(os.path.join(self.tmp_directory, name), "w") as report_file:
+            json.dump({"tests-run": 1, "modules": modules}, report_file)
+        return os.path.join(self.tmp_directory, name)
+
+    def test_should_weight_by_file_size_without_durations(self):
+        self.assertEqual({"spam_tests": 100, "eggs_tests": 300}, module_weights(self.module_files, {}))
+
+    def test_should_weight_by_durations_and_scaled_file_size(self):
+        self.assertEqual({"spam_tests": 50, "eggs_tests": 150.0},
+                         module_weights(self.module_files, {"spam_tests": 50}))
+
+    def test_should_read_durations_of_modules_from_reports(self):
+        reports = [self.write_report("node1.json", [{"module": "spam_tests", "tests": 1, "time": 5}]),
+                   self.write_report("node2.json", [{"module": "eggs_tests", "tests": 1, "time": 7}]),
+                   os.path.join(self.tmp_directory, "missing.json")]
+
+        self.assertEqual({"spam_tests": 5, "eggs_tests": 7}, recorded_module_durations(reports))
+
+    def test_should_select_modules_of_shard(self):
+        project = Project(self.tmp_directory)
+        project.set_property("unittest_shard", "2/2")
+        project.set_property("unittest_shard_durations", ["node*.json"])
+        self.write_report("node1.json", [{"module": "spam_tests", "tests": 1, "time": 500},
+                                         {"module": "eggs_tests", "tests": 1, "time": 10}])
+
+        self.assertEqual(["eggs_tests"], select_shard(project, Mock(), "unittest", self.tmp_directory,
+                                                      ["eggs_tests", "spam_tests"]))
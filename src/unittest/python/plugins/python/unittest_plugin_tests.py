@@ -18,17 +18,34 @@
 
 from __future__ import unicode_literals
 
+import os
+import shutil
+import sys
+import tempfile
+import unittest
 from unittest import TestCase, TextTestRunner
 
-from test_utils import Mock, patch
+from test_utils import Mock, call, patch
 
-from pybuilder.core import Project
+from pybuilder.core import Project, INCREMENTAL_ATTRIBUTE, INPUTS_ATTRIBUTE, OUTPUTS_ATTRIBUTE
+from pybuilder.errors import BuildFailedException
+from pybuilder.execution import Task
+from pybuilder.incremental import TaskUpToDateCheck
 from pybuilder.plugins.python.unittest_plugin import (execute_tests, execute_tests_matching,
+                                                      execute_tests_in_parallel,
+                                                      log_slowest_tests,
+                                                      module_times,
+                                                      preload_test_dependencies,
+                                                      split_tests,
+                                                      MergedTestResult,
                                                       _register_test_and_source_path_and_return_test_dir,
                                                       _instrument_result,
                                                       _create_runner,
                                                       _get_make_result_method_name,
-                                                      report_to_ci_server)
+                                                      _select_test_modules,
+                                                      report_to_ci_server,
+                                                      init_test_source_directory,
+                                                      run_unit_tests)
 
 __author__ = 'Michael Gruber'
 
@@ -128,6 +145,134 @@ class ExecuteTestsTests(TestCase):
         self.assertEqual('should_', mock_unittest.defaultTestLoader.testMethodPrefix)
 
 
+class SpamTest(TestCase):
+    def test_spam(self):
+        pass
+
+    def test_eggs(self):
+        pass
+
+
+class EggsTest(TestCase):
+    def test_spam(self):
+        pass
+
+
+class SplitTestsTests(TestCase):
+    def setUp(self):
+        self.tests = unittest.TestSuite([unittest.defaultTestLoader.loadTestsFromTestCase(SpamTest),
+                                         unittest.defaultTestLoader.loadTestsFromTestCase(EggsTest)])
+
+    def test_should_split_tests_by_module(self):
+        shards = split_tests(self.tests, "module")
+
+        self.assertEqual([3], [shard.countTestCases() for shard in shards])
+
+    def test_should_split_tests_by_class(self):
+        shards = split_tests(self.tests, "class")
+
+        self.assertEqual([["test_eggs", "test_spam"], ["test_spam"]],
+                         [[test._testMethodName for test in shard] for shard in shards])
+        self.assertEqual([SpamTest, EggsTest], [list(shard)[0].__class__ for shard in shards])
+
+    def test_should_raise_when_granularity_is_unknown(self):
+        self.assertRaises(BuildFailedException, split_tests, self.tests, "method")
+
+
+class MergedTestResultTests(TestCase):
+    def shard_report(self, shard, tests, errors=(), failures=()):
+        return {"shard": shard,
+                "tests_run": len(tests),
+                "tests": tests,
+                "errors": list(errors),
+                "failures": list(failures),
+                "skipped": [],
+                "expected_failures": [],
+                "unexpected_successes": [],
+                "console": "",
+                "events": []}
+
+    def test_should_merge_shard_reports(self):
+        result = MergedTestResult()
+        spam = ("test_spam (spam_tests.SpamTest)", "spam_tests.SpamTest.test_spam")
+        eggs = ("test_eggs (eggs_tests.EggsTest)", "eggs_tests.EggsTest.test_eggs")
+        result.add_shard_report(self.shard_report(0, [spam + ("spam_tests", 12, 10, None)]))
+        result.add_shard_report(self.shard_report(1, [eggs + ("eggs_tests", 3, 2, "AssertionError: eggs")],
+                                                  failures=[eggs + ("Traceback",)]))
+
+        self.assertEqual(2, result.testsRun)
+        self.assertEqual(["test_spam (spam_tests.SpamTest)", "test_eggs (eggs_tests.EggsTest)"],
+                         [str(test) for test in result.test_names])
+        self.assertEqual([12, 3], [result.test_timers[test].get_millis() for test in result.test_names])
+        self.assertEqual([10, 2], [result.test_timers[test].get_cpu_millis() for test in result.test_names])
+        self.assertEqual(["spam_tests", "eggs_tests"], [test.module for test in result.test_names])
+        self.assertEqual([("eggs_tests.EggsTest.test_eggs", "Traceback")],
+                         [(test.id(), traceback) for test, traceback in result.failures])
+        self.assertTrue(result.failures[0][0] is result.test_names[1])
+        self.assertEqual({result.test_names[1]: "AssertionError: eggs"}, result.failed_test_names_and_reasons)
+        self.assertFalse(result.wasSuccessful())
+
+    def test_should_be_successful_without_errors_and_failures(self):
+        result = MergedTestResult()
+        result.add_shard_report(self.shard_report(0, [("test_spam", "spam_tests.SpamTest.test_spam", "spam_tests",
+                                                       1, 1, None)]))
+
+        self.assertTrue(result.wasSuccessful())
+
+
+PARALLEL_TESTS = """
+import os
+import unittest
+
+
+class %(name)sTest(unittest.TestCase):
+    def test_%(name)s(self):
+        self.assertNotEqual(os.getpid(), %(parent_pid)d)
+
+    def test_%(name)s_again(self):
+        self.assertEqual("%(name)s", "%(expected)s")
+"""
+
+
+class ExecuteTestsInParallelTests(TestCase):
+    def setUp(self):
+        self.test_source = tempfile.mkdtemp(self.__class__.__name__)
+        sys.path.insert(0, self.test_source)
+        for name, expected in (("spam", "spam"), ("eggs", "eggs"), ("ham", "spam")):
+            with open(os.path.join(self.test_source, "parallel_%s_tests.py" % name), "w") as test_file:
+                test_file.write(PARALLEL_TESTS % {"name": name, "expected": expected, "parent_pid": os.getpid()})
+        self.project = Project(self.test_source)
+        self.project.set_property("unittest_parallel_workers", 2)
+
+    def tearDown(self):
+        sys.path.remove(self.test_source)
+        for name in ("spam", "eggs", "ham"):
+            sys.modules.pop("parallel_%s_tests" % name, None)
+        shutil.rmtree(self.test_source)
+
+    def execute_tests(self):
+        return execute_tests_in_parallel(self.project, Mock(), (TextTestRunner, "_makeResult"), self.test_source,
+                                         "parallel_*_tests", None, "unittest")
+
+    def test_should_run_tests_in_worker_processes_and_merge_results(self):
+        result, console_out = self.execute_tests()
+
+        self.assertEqual(6, result.testsRun)
+        self.assertEqual(["parallel_ham_tests.hamTest.test_ham_again"], [test.id() for test, _ in result.failures])
+        self.assertEqual([], result.errors)
+        self.assertEqual(6, len(result.test_names))
+        self.assertEqual(6, len(result.test_timers))
+        self.assertEqual(3, console_out.count("Ran 2 tests"))
+
+    def test_should_split_tests_by_class(self):
+        self.project.set_property("unittest_parallel_granularity", "class")
+
+        result, _ = self.execute_tests()
+
+        self.assertEqual(6, result.testsRun)
+        self.assertEqual(1, len(result.failures))
+
+
 class CIServerInteractionTests(TestCase):
     @patch('pybuilder.ci_server_interaction.TestProxy')
     @patch('pybuilder.ci_server_interaction._is_running_on_teamcity')
@@ -141,6 +286,7 @@ class CIServerInteractionTests(TestCase):
         mock_proxy.__exit__ = Mock(return_value=False)
         result = Mock()
         result.test_names = ['test1', 'test2', 'test3']
+        result.cached_tests = []
         result.failed_test_names_and_reasons = {}
 
         report_to_ci_server(project, result)
@@ -159,6 +305,7 @@ class CIServerInteractionTests(TestCase):
         mock_proxy.__exit__ = Mock(return_value=False)
         result = Mock()
         result.test_names = ['test1', 'test2', 'test3']
+        result.cached_tests = []
         result.failed_test_names_and_reasons = {
             'test2': 'Something went very wrong'
         }
@@ -167,6 +314,157 @@ class CIServerInteractionTests(TestCase):
 
         mock_proxy.fails.assert_called_with('Something went very wrong')
 
+    @patch('pybuilder.ci_server_interaction.TestProxy')
+    @patch('pybuilder.ci_server_interaction._is_running_on_teamcity')
+    def test_should_report_cached_tests_to_ci_server(self, teamcity, proxy):
+        teamcity.return_value = False
+        project = Project('basedir')
+        mock_proxy = Mock()
+        proxy.return_value = mock_proxy
+        mock_proxy.and_test_name.return_value = mock_proxy
+        mock_proxy.__enter__ = Mock(return_value=mock_proxy)
+        mock_proxy.__exit__ = Mock(return_value=False)
+        result = Mock()
+        result.test_names = []
+        result.failed_test_names_and_reasons = {}
+        result.cached_tests = [{"test": "spam_tests.Test.test_spam", "time": 3}]
+
+        report_to_ci_server(project, result)
+
+        mock_proxy.and_test_name.assert_called_with("spam_tests.Test.test_spam")
+        mock_proxy.cached.assert_called_with()
+
+
+class TimingReportTests(TestCase):
+    def test_should_sum_times_of_modules(self):
+        tests = [{"test": "spam_tests.Test.test_spam", "module": "spam_tests", "time": 10, "cpu_time": 8},
+                 {"test": "eggs_tests.Test.test_eggs", "module": "eggs_tests", "time": 5, "cpu_time": 5},
+                 {"test": "spam_tests.Test.test_spam_again", "module": "spam_tests", "time": 2, "cpu_time": None}]
+
+        self.assertEqual([{"module": "spam_tests", "tests": 2, "time": 12, "cpu_time": 8},
+                          {"module": "eggs_tests", "tests": 1, "time": 5, "cpu_time": 5}], module_times(tests))
+
+    def test_should_log_slowest_executed_tests(self):
+        logger = Mock()
+        tests = [{"test": "fast", "time": 1, "cpu_time": 1},
+                 {"test": "slow", "time": 30, "cpu_time": 20},
+                 {"test": "cached", "time": 50, "cpu_time": 50, "cached": True},
+                 {"test": "medium", "time": 10, "cpu_time": 2}]
+
+        log_slowest_tests(logger, tests, 2)
+
+        self.assertEqual([call("The %d slowest tests (wall and CPU time):", 2),
+                          call("%8d ms %8d ms  %s", 30, 20, "slow"),
+                          call("%8d ms %8d ms  %s", 10, 2, "medium")], logger.info.call_args_list)
+
+    def test_should_not_log_slowest_tests_when_disabled(self):
+        logger = Mock()
+
+        log_slowest_tests(logger, [{"test": "slow", "time": 30, "cpu_time": 20}], 0)
+
+        logger.info.assert_not_called()
+
+
+class PreloadTestDependenciesTests(TestCase):
+    @patch("pybuilder.plugins.python.unittest_plugin.preload_modules")
+    def test_should_preload_modules_and_report_saved_import_time(self, preload):
+        project = Project("basedir")
+        project.set_property("unittest_preload_modules", "numpy,sqlalchemy")
+        logger = Mock()
+        preload.return_value.imported = {"sqlalchemy": 0.5}
+        preload.return_value.import_time = 0.5
+        preload.return_value.preloaded = {"numpy": 1.5}
+        preload.return_value.saved_time = 1.5
+
+        preload_test_dependencies(project, logger, "unittest", "unit tests")
+
+        preload.assert_called_with(["numpy", "sqlalchemy"], logger)
+        self.assertEqual([call("Preloaded %d modules for %s in %.2f s", 1, "unit tests", 0.5),
+                          call("Forking %s with %d preloaded modules, saving %.2f s of imports", "unit tests", 1,
+                               1.5)], logger.info.call_args_list)
+
+    @patch("pybuilder.plugins.python.unittest_plugin.preload_modules")
+    def test_should_not_preload_without_modules(self, preload):
+        preload_test_dependencies(Project("basedir"), Mock(), "unittest", "unit tests")
+
+        preload.assert_not_called()
+
+
+class SelectTestModulesTests(TestCase):
+    def setUp(self):
+        self.project = Project("basedir")
+        self.project.set_property("unittest_impact_analysis", True)
+        self.project.set_property("unittest_result_cache", True)
+        self.logger = Mock()
+
+    def select(self, collect_coverage):
+        return _select_test_modules(self.project, self.logger, "unittest", "unit tests", "basedir/tests", "*_tests",
+                                    collect_coverage)
+
+    def test_should_select_all_modules_when_collecting_coverage(self):
+        self.assertEqual((None, None, None, {}), self.select(True))
+        self.logger.info.assert_called_with("Executing all %s, as their coverage is measured", "unit tests")
+
+    def test_should_select_all_modules_when_coverage_plugin_runs_tests(self):
+        self.project.set_property("__running_coverage", True)
+
+        self.assertEqual((None, None, None, {}), self.select(False))
+
+    def test_should_refuse_to_measure_coverage_of_shard(self):
+        self.project.set_property("unittest_shard", "1/2")
+
+        self.assertRaises(BuildFailedException, self.select, True)
+
+
+class RunUnitTestsInputsTests(TestCase):
+    def setUp(self):
+        self.basedir = tempfile.mkdtemp()
+        self.project = self.create_project()
+        self.task = Task("run_unit_tests", run_unit_tests, inputs=getattr(run_unit_tests, INPUTS_ATTRIBUTE),
+                         outputs=getattr(run_unit_tests, OUTPUTS_ATTRIBUTE),
+                         incremental=getattr(run_unit_tests, INCREMENTAL_ATTRIBUTE))
+
+    def tearDown(self):
+        shutil.rmtree(self.basedir)
+
+    def create_project(self):
+        project = Project(self.basedir)
+        project.set_property("dir_target", "$basedir/target")
+        project.set_property("dir_source_main_python", "src/main/python")
+        project.set_property("dir_reports", "$dir_target/reports")
+        init_test_source_directory(project)
+        return project
+
+    def execute(self):
+        check = TaskUpToDateCheck(self.project, self.task, Mock())
+        up_to_date = check.is_up_to_date()
+        check.record()
+        return up_to_date
+
+    def test_should_be_incremental_only_when_enabled(self):
+        self.assertFalse(self.task.is_incremental(self.project))
+        self.project.set_property("unittest_incremental", True)
+        self.assertTrue(self.task.is_incremental(self.project))
+
+    def test_should_be_up_to_date_when_runner_is_created_anew(self):
+        self.execute()
+        self.project = self.create_project()
+
+        self.assertTrue(self.execute())
+
+    def test_should_not_be_up_to_date_when_shard_changed(self):
+        self.project.set_property("unittest_shard", "1/2")
+        self.execute()
+        self.project.set_property("unittest_shard", "2/2")
+
+        self.assertFalse(self.execute())
+
+    def test_should_not_be_up_to_date_when_parallel_execution_changed(self):
+        self.execute()
+        self.project.set_property("unittest_parallel", True)
+
+        self.assertFalse(self.execute())
+
 
 class TestNameAwareTestResult(TestCase):
     class TestResult(object):
@@ -176,6 +474,9 @@ class TestNameAwareTestResult(TestCase):
         def startTest(self, test):
             pass
 
+        def stopTest(self, test):
+            pass
+
         def addError(self, test, err):
             pass
 
@@ -190,6 +491,12 @@ class TestNameAwareTestResult(TestCase):
 
         self.assertEqual(self.mock_test_result.test_names, ["any_test_name"])
 
+    def test_should_time_test_when_running_test(self):
+        self.mock_test_result.startTest("any_test_name")
+        self.mock_test_result.stopTest("any_test_name")
+
+        self.assertTrue(self.mock_test_result.test_timers["any_test_name"].get_millis() >= 0)
+
     def test_should_save_exception_details_when_test_failure_occurs(self):
         self.mock_test_result.addFailure(
             "test_with_failure",
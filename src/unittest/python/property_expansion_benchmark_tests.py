@@ -0,0 +1,85 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of PyBuilder
+#
+#   Copyright 2011-2015 PyBuilder Team
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+"""
+    Tests of the property expansion of Project.expand_path against expanding string.Template until a
+    fixpoint is reached, as Project.expand used to, on projects with many properties. Instead of timing
+    the expansions, which is unreliable on shared machines, they check that repeated expansions are
+    served from the cache without parsing templates again.
+"""
+
+import os
+import string
+import unittest
+
+from pybuilder.core import Project
+from test_utils import patch
+
+SUBDIRECTORIES = 8
+
+
+def synthetic_project(number_of_properties):
+    """
+    Returns a project with the given number of directory properties forming a tree of directories with
+    SUBDIRECTORIES subdirectories each, e.g. $dir_9 is "$dir_1/dir_9" and $dir_1 is "$dir_0/dir_1".
+    """
+    project = Project("/benchmark")
+    project.set_property("dir_0", "target")
+    for index in range(1, number_of_properties):
+        project.set_property("dir_%d" % index, "$dir_%d/dir_%d" % ((index - 1) // SUBDIRECTORIES, index))
+    return project
+
+
+def template_expand_path(project, format_string):
+    previous = None
+    result = format_string
+    while previous != result:
+        previous = result
+        result = string.Template(result).substitute(project.properties)
+    return os.path.join(project.basedir, *result.split(os.sep))
+
+
+class PropertyExpansionBenchmarkTest(unittest.TestCase):
+    def test_should_expand_like_string_template(self):
+        project = synthetic_project(100)
+
+        for index in range(100):
+            format_string = "$dir_%d/${dir_%d}_report.json" % (index, index // 2)
+            self.assertEqual(template_expand_path(project, format_string), project.expand_path(format_string))
+
+    def test_should_expand_repeatedly_without_parsing_templates_again(self):
+        project = synthetic_project(1000)
+        format_strings = ["$dir_%d/report.json" % index for index in range(1000)]
+        expanded = [project.expand_path(format_string) for format_string in format_strings]
+
+        with patch("pybuilder.core._compile_template") as compile_template:
+            with patch("pybuilder.core.string.Template") as template:
+                self.assertEqual(expanded, [project.expand_path(format_string) for format_string in format_strings])
+
+        compile_template.assert_not_called()
+        template.assert_not_called()
+
+    def test_should_expand_again_after_property_changed(self):
+        project = synthetic_project(100)
+        project.expand_path("$dir_9/report.json")
+
+        project.set_property("dir_1", "changed")
+
+        self.assertEqual(os.path.join("/benchmark", "changed", "dir_9", "report.json"),
+                         project.expand_path("$dir_9/report.json"))
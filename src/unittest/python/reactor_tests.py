@@ -16,10 +16,13 @@
 #   See the License for the specific language governing permissions and
 #   limitations under the License.
 
+import sys
+import threading
 import unittest
 from types import ModuleType
 
-from pybuilder.core import (ENVIRONMENTS_ATTRIBUTE,
+from pybuilder.core import (DEPENDENTS_ATTRIBUTE,
+                            ENVIRONMENTS_ATTRIBUTE,
                             INITIALIZER_ATTRIBUTE,
                             NAME_ATTRIBUTE,
                             TASK_ATTRIBUTE,
@@ -33,6 +36,7 @@ from pybuilder.core import (ENVIRONMENTS_ATTRIBUTE,
 from pybuilder.errors import MissingPluginException, PyBuilderException, ProjectValidationFailedException
 from pybuilder.execution import Task, TaskDependency, Action, ExecutionManager, Initializer
 from pybuilder.pluginloader import PluginLoader
+from pybuilder.pluginmanifest import ManifestTask, PluginManifest
 from pybuilder.reactor import Reactor
 from test_utils import Mock, ANY, call, patch
 
@@ -158,14 +162,14 @@ class ReactorTest(unittest.TestCase):
 
             self.reactor.collect_tasks_and_actions_and_initializers(module)
 
-            pybuilder.reactor.Task.assert_has_calls([call("task1", task1, [], ''),
-                                                     call("task2", task2, [TaskDependency(task1)], ''),
-                                                     call("task3", task3, [TaskDependency(task5, True)], ''),
-                                                     call("task4", task4, [TaskDependency(task3, True)], ''),
-                                                     call("task5", task5, [], ''),
+            pybuilder.reactor.Task.assert_has_calls([call("task1", task1, [], '', None, None, None),
+                                                     call("task2", task2, [TaskDependency(task1)], '', None, None, None),
+                                                     call("task3", task3, [TaskDependency(task5, True)], '', None, None, None),
+                                                     call("task4", task4, [TaskDependency(task3, True)], '', None, None, None),
+                                                     call("task5", task5, [], '', None, None, None),
                                                      call("task6", task6,
                                                           [TaskDependency(task1), TaskDependency(task2, True),
-                                                           TaskDependency(task4), TaskDependency(task5)], '')])
+                                                           TaskDependency(task4), TaskDependency(task5)], '', None, None, None)])
 
     def test_task_dependencies_with_post_definition_injections(self):
         import pybuilder.reactor
@@ -194,11 +198,11 @@ class ReactorTest(unittest.TestCase):
             module2.task3 = task3
 
             self.reactor.collect_tasks_and_actions_and_initializers(module1)
-            pybuilder.reactor.Task.assert_has_calls([call("task1", task1, [], ''),
-                                                     call("task2", task2, [TaskDependency(task1)], '')])
+            pybuilder.reactor.Task.assert_has_calls([call("task1", task1, [], '', None, None, None),
+                                                     call("task2", task2, [TaskDependency(task1)], '', None, None, None)])
 
             self.reactor.collect_tasks_and_actions_and_initializers(module2)
-            pybuilder.reactor.Task.assert_has_calls([call("task3", task3, [TaskDependency(task1)], '')])
+            pybuilder.reactor.Task.assert_has_calls([call("task3", task3, [TaskDependency(task1)], '', None, None, None)])
             self.execution_manager.register_late_task_dependencies.assert_has_calls(
                 [call({}), call({"task2": [TaskDependency(task3)]})])
 
@@ -229,11 +233,11 @@ class ReactorTest(unittest.TestCase):
             module2.task3 = task3
 
             self.reactor.collect_tasks_and_actions_and_initializers(module1)
-            pybuilder.reactor.Task.assert_has_calls([call("task1", task1, [], ''),
-                                                     call("task2", task2, [TaskDependency(task1)], '')])
+            pybuilder.reactor.Task.assert_has_calls([call("task1", task1, [], '', None, None, None),
+                                                     call("task2", task2, [TaskDependency(task1)], '', None, None, None)])
 
             self.reactor.collect_tasks_and_actions_and_initializers(module2)
-            pybuilder.reactor.Task.assert_has_calls([call("task_3", task3, [TaskDependency(task1)], '')])
+            pybuilder.reactor.Task.assert_has_calls([call("task_3", task3, [TaskDependency(task1)], '', None, None, None)])
             self.execution_manager.register_late_task_dependencies.assert_has_calls(
                 [call({}), call({"task2": [TaskDependency("task_3")]})])
 
@@ -413,18 +417,18 @@ class ReactorTest(unittest.TestCase):
         os_path_join.assert_called_with("/spam", "eggs")
         os_path_isfile.assert_called_with("/spam/eggs")
 
-    @patch("pybuilder.reactor.imp.load_source", side_effect=ImportError("spam"))
-    def test_should_raise_when_loading_project_module_and_import_raises_exception(self, imp_load_source):
+    @patch("pybuilder.reactor.load_descriptor", side_effect=ImportError("spam"))
+    def test_should_raise_when_loading_project_module_and_import_raises_exception(self, load_descriptor):
         self.assertRaises(
             PyBuilderException, self.reactor.load_project_module, "spam")
 
-        imp_load_source.assert_called_with("build", "spam")
+        load_descriptor.assert_called_with("spam")
 
-    @patch("pybuilder.reactor.imp.load_source", return_value=Mock())
-    def test_should_return_module_when_loading_project_module_and_import_raises_exception(self, imp_load_source):
-        self.assertTrue(imp_load_source.return_value is self.reactor.load_project_module("spam"))
+    @patch("pybuilder.reactor.load_descriptor", return_value=Mock())
+    def test_should_return_module_when_loading_project_module_and_import_raises_exception(self, load_descriptor):
+        self.assertTrue(load_descriptor.return_value is self.reactor.load_project_module("spam"))
 
-        imp_load_source.assert_called_with("build", "spam")
+        load_descriptor.assert_called_with("spam")
 
     def test_ensure_project_attributes_are_set_when_instantiating_project(self):
         module = ModuleType("mock_module")
@@ -492,3 +496,244 @@ class ReactorTest(unittest.TestCase):
         self.reactor.project.validate.return_value = ["spam"]
 
         self.assertRaises(ProjectValidationFailedException, self.reactor.build)
+
+    @patch("pybuilder.reactor.BuildCheckpoint")
+    def test_should_checkpoint_build_only_when_enabled(self, build_checkpoint):
+        self.reactor.project = Project("/any/project")
+        self.reactor.project.set_property("dir_target", "target")
+        self.reactor.create_execution_plan = Mock(return_value=[])
+        self.reactor.build_execution_plan = Mock()
+
+        self.reactor.build(["spam"])
+        build_checkpoint.assert_not_called()
+
+        self.reactor.project.set_property("build_checkpoint_enabled", True)
+        self.reactor.build(["spam"])
+        build_checkpoint.assert_called_with(self.reactor.project, self.reactor.project_descriptor, self.logger)
+        build_checkpoint.return_value.begin.assert_called_with(False)
+
+    @patch("pybuilder.reactor.BuildCheckpoint")
+    def test_should_checkpoint_resumed_build(self, build_checkpoint):
+        self.reactor.project = Project("/any/project")
+        self.reactor.project.set_property("dir_target", "target")
+        self.reactor.create_execution_plan = Mock(return_value=[])
+        self.reactor.build_execution_plan = Mock()
+
+        self.reactor.build(["spam"], resume=True)
+
+        build_checkpoint.return_value.begin.assert_called_with(True)
+
+    def test_should_execute_plan_in_parallel_when_multiple_jobs_given(self):
+        self.reactor.project = Mock(name="spam", version="1.0", dist_version="1.0")
+        execution_plan = [Mock(name="one")]
+
+        self.reactor.build_execution_plan(["one"], execution_plan, 4)
+
+        self.execution_manager.execute_execution_plan_in_parallel.assert_called_with(
+            execution_plan, 4, logger=self.logger, project=self.reactor.project, reactor=self.reactor)
+        self.execution_manager.execute_execution_plan.assert_not_called()
+
+    def test_should_execute_plan_serially_by_default(self):
+        self.reactor.project = Mock(name="spam", version="1.0", dist_version="1.0")
+        execution_plan = [Mock(name="one")]
+
+        self.reactor.build_execution_plan(["one"], execution_plan)
+
+        self.execution_manager.execute_execution_plan.assert_called_with(
+            execution_plan, logger=self.logger, project=self.reactor.project, reactor=self.reactor)
+        self.execution_manager.execute_execution_plan_in_parallel.assert_not_called()
+
+    def test_should_execute_tasks_affected_by_changed_files_again(self):
+        execution_manager = ExecutionManager(self.logger)
+        reactor = Reactor(self.logger, execution_manager, self.plugin_loader_mock)
+        reactor.project = Project("/any/project")
+        reactor.project.set_property("dir_source_main_python", "src")
+        reactor.project.set_property("dir_target", "target")
+        reactor.build_execution_plan = Mock()
+
+        prepare = Task("prepare", lambda: None)
+        compile_sources = Task("compile_sources", lambda: None, [TaskDependency("prepare")], inputs="**")
+        run_tests = Task("run_tests", lambda: None, [TaskDependency("compile_sources")])
+        execution_manager.register_task(prepare, compile_sources, run_tests)
+        execution_manager.resolve_dependencies()
+        execution_manager._tasks_executed.extend([prepare, compile_sources, run_tests])
+
+        reactor.build_affected_tasks("run_tests", ["/any/project/src/spam.py"])
+        reactor.build_execution_plan.assert_called_with(["run_tests"], [compile_sources, run_tests], 1)
+        self.assertEquals([prepare], list(execution_manager._tasks_executed))
+
+        execution_manager._tasks_executed.extend([compile_sources, run_tests])
+        reactor.build_affected_tasks("run_tests", ["/any/project/docs/index.rst"])
+        reactor.build_execution_plan.assert_called_with(["run_tests"], [run_tests], 1)
+
+    def test_should_execute_only_once_actions_of_affected_tasks_again(self):
+        execution_manager = ExecutionManager(self.logger)
+        reactor = Reactor(self.logger, execution_manager, self.plugin_loader_mock)
+        reactor.project = Project("/any/project")
+        reactor.project.set_property("dir_source_main_python", "src")
+        reactor.project.set_property("dir_target", "target")
+        filtered = []
+
+        execution_manager.register_task(Task("package", lambda: None, inputs="**"))
+        execution_manager.register_action(Action("filter_resources", lambda: filtered.append("package"),
+                                                 after="package", only_once=True))
+        execution_manager.resolve_dependencies()
+
+        reactor.build_execution_plan(["package"], execution_manager.build_execution_plan("package"))
+        reactor.build_affected_tasks("package", ["/any/project/src/spam.py"])
+
+        self.assertEquals(["package", "package"], filtered)
+
+    def test_should_unload_plugin_modules(self):
+        plugin_module = ModuleType("any_reactor_plugin")
+        self.plugin_loader_mock.load_plugin.return_value = plugin_module
+        self.reactor.import_plugin("any")
+        sys.modules["any_reactor_plugin"] = plugin_module
+
+        self.reactor.unload_plugin_modules()
+
+        self.assertEquals(["any_reactor_plugin"], self.reactor.plugin_modules)
+        self.assertFalse("any_reactor_plugin" in sys.modules)
+
+    def test_should_defer_plugin_with_manifest(self):
+        reactor = Reactor(self.logger, ExecutionManager(self.logger), self.plugin_loader_mock,
+                          {"docs": PluginManifest(tasks=[ManifestTask("compile_docs")], properties={"spam": "eggs"})})
+        reactor.project = Project("/any/project")
+
+        reactor.require_plugin("docs")
+        reactor.execution_manager.execute_initializers(project=reactor.project, logger=self.logger)
+
+        self.assertEquals(["docs"], reactor.get_plugins())
+        self.assertEquals(["docs"], list(reactor.deferred_plugins))
+        self.assertEquals("eggs", reactor.project.get_property("spam"))
+        self.plugin_loader_mock.load_plugin.assert_not_called()
+
+    def test_should_import_plugin_with_manifest_when_version_given(self):
+        self.plugin_loader_mock.load_plugin.return_value = ModuleType("mock_module")
+        reactor = Reactor(self.logger, ExecutionManager(self.logger), self.plugin_loader_mock,
+                          {"docs": PluginManifest(tasks=[ManifestTask("compile_docs")])})
+
+        reactor.require_plugin("docs", "1.0")
+
+        self.assertEquals([], list(reactor.deferred_plugins))
+        self.plugin_loader_mock.load_plugin.assert_called_with(ANY, "docs", "1.0", None)
+
+    def test_should_load_only_deferred_plugins_needed_by_plan(self):
+        def compile_docs(project):
+            project.set_property("docs_compiled", True)
+
+        def initialize_docs(project):
+            project.set_property("docs_initialized", True)
+
+        setattr(compile_docs, TASK_ATTRIBUTE, True)
+        setattr(compile_docs, DEPENDENTS_ATTRIBUTE, "publish")
+        setattr(initialize_docs, INITIALIZER_ATTRIBUTE, True)
+        docs_module = ModuleType("docs_module")
+        docs_module.compile_docs = compile_docs
+        docs_module.initialize_docs = initialize_docs
+        self.plugin_loader_mock.load_plugin.return_value = docs_module
+
+        execution_manager = ExecutionManager(self.logger)
+        execution_manager.register_task(Task("clean", lambda: None), Task("publish", lambda: None))
+        reactor = Reactor(self.logger, execution_manager, self.plugin_loader_mock,
+                          {"docs": PluginManifest(tasks=[ManifestTask("compile_docs", dependents=["publish"])])})
+        reactor.project = Project("/any/project")
+        reactor.require_plugin("docs")
+        execution_manager.resolve_dependencies()
+
+        reactor.create_execution_plan(["clean"], [])
+        self.plugin_loader_mock.load_plugin.assert_not_called()
+
+        execution_plan = reactor.create_execution_plan(["publish"], [])
+        self.plugin_loader_mock.load_plugin.assert_called_with(ANY, "docs", None, None)
+        self.assertEquals(["compile_docs", "publish"], [task.name for task in execution_plan])
+        self.assertEquals([], list(reactor.deferred_plugins))
+        self.assertTrue(reactor.project.get_property("docs_initialized"))
+
+    def test_should_load_deferred_plugin_contributing_task_referenced_by_loaded_task(self):
+        def analyze():
+            pass
+
+        setattr(analyze, TASK_ATTRIBUTE, True)
+        lint_module = ModuleType("lint_module")
+        lint_module.analyze = analyze
+        self.plugin_loader_mock.load_plugin.return_value = lint_module
+        execution_manager = ExecutionManager(self.logger)
+        execution_manager.register_task(Task("publish", lambda: None, [TaskDependency("analyze")]))
+        reactor = Reactor(self.logger, execution_manager, self.plugin_loader_mock,
+                          {"lint": PluginManifest(tasks=[ManifestTask("analyze")])})
+        reactor.require_plugin("lint")
+
+        reactor.load_deferred_plugins([])
+
+        self.plugin_loader_mock.load_plugin.assert_called_with(ANY, "lint", None, None)
+        self.assertEquals(["analyze", "publish"],
+                          [task.name for task in execution_manager.build_execution_plan(["publish"])])
+
+    @patch("pybuilder.reactor.TaskGraphSnapshot")
+    def test_should_capture_task_graph_snapshot_with_tasks_of_deferred_plugins(self, task_graph_snapshot):
+        def compile_docs():
+            pass
+
+        setattr(compile_docs, TASK_ATTRIBUTE, True)
+        docs_module = ModuleType("any_docs_plugin")
+        docs_module.compile_docs = compile_docs
+        self.plugin_loader_mock.load_plugin.return_value = docs_module
+        execution_manager = ExecutionManager(self.logger)
+        reactor = Reactor(self.logger, execution_manager, self.plugin_loader_mock,
+                          {"docs": PluginManifest(tasks=[ManifestTask("compile_docs")])})
+        reactor.project = Project("/any/project")
+        reactor.require_plugin("docs")
+
+        snapshot = reactor.capture_task_graph_snapshot(["build"])
+
+        self.assertEquals(task_graph_snapshot.capture.return_value, snapshot)
+        task_graph_snapshot.capture.assert_called_with(None, reactor.project, execution_manager,
+                                                       set(["build", "any_docs_plugin"]))
+        self.assertEquals(["compile_docs"], execution_manager.task_names)
+
+    def test_should_keep_current_instance_per_thread(self):
+        subproject_reactor = Mock(Reactor)
+        current_instances = []
+
+        def build_subproject():
+            Reactor._set_current_instance(subproject_reactor)
+            current_instances.append(Reactor.current_instance())
+
+        def execute_task():
+            current_instances.append(Reactor.current_instance())
+
+        Reactor._set_current_instance(self.reactor)
+        for target in (build_subproject, execute_task):
+            thread = threading.Thread(target=target)
+            thread.start()
+            thread.join()
+
+        self.assertEquals([subproject_reactor, self.reactor], current_instances)
+        self.assertEquals(self.reactor, Reactor.current_instance())
+
+    def test_should_require_plugins_required_by_plugin_loaded_by_other_reactor(self):
+        loaded_plugins = {}
+
+        def load_plugin(project, name, version, plugin_module_name):
+            if name == "python.spam":
+                Reactor.current_instance().require_plugin("spam")
+            return ModuleType(name)
+
+        self.plugin_loader_mock.load_plugin.side_effect = load_plugin
+        for reactor in (Reactor(self.logger, ExecutionManager(self.logger), self.plugin_loader_mock, {},
+                                loaded_plugins),
+                        Reactor(self.logger, ExecutionManager(self.logger), self.plugin_loader_mock, {},
+                                loaded_plugins)):
+            Reactor._set_current_instance(reactor)
+            reactor.require_plugin("python.spam")
+
+            self.assertEquals(["python.spam", "spam"], reactor.get_plugins())
+        self.assertEquals(2, self.plugin_loader_mock.load_plugin.call_count)
+
+    def test_should_require_subprojects(self):
+        self.reactor.require_subproject("libs/spam")
+        self.reactor.require_subproject("apps/eggs/", depends_on="libs/spam")
+        self.reactor.require_subproject("apps/eggs", depends_on=["libs/ham"])
+
+        self.assertEquals({"libs/spam": [], "apps/eggs": ["libs/spam", "libs/ham"]}, dict(self.reactor.subprojects))
@@ -0,0 +1,164 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of PyBuilder
+#
+#   Copyright 2011-2015 PyBuilder Team
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+import types
+import unittest
+
+from pybuilder.core import Project
+from pybuilder.execution import Action, ExecutionManager, Task, TaskDependency
+from pybuilder.reactor import Reactor
+from pybuilder.snapshot import TaskGraphSnapshot
+from test_utils import Mock, patch
+
+
+def any_callable(project):
+    pass
+
+
+class TaskGraphSnapshotTest(unittest.TestCase):
+    def setUp(self):
+        self.basedir = tempfile.mkdtemp(self.__class__.__name__)
+        self.cache_home = patch.dict("os.environ", {"XDG_CACHE_HOME": os.path.join(self.basedir, "cache")})
+        self.cache_home.start()
+        self.descriptor = self.write_file("build.py", "name = 'spam'\n")
+        self.plugin_file = self.write_file("any_plugin.py", "# plugin\n")
+        self.plugin_module = types.ModuleType("any_snapshot_plugin")
+        self.plugin_module.__file__ = self.plugin_file
+        sys.modules["any_snapshot_plugin"] = self.plugin_module
+
+        self.project = Project(self.basedir, name="spam")
+        self.project.default_task = "publish"
+        self.execution_manager = ExecutionManager(Mock())
+        self.execution_manager.register_task(Task("compile", any_callable, description="Compiles"),
+                                             Task("publish", any_callable,
+                                                  [TaskDependency("compile"), TaskDependency("verify", True)]),
+                                             Task("verify", any_callable))
+        self.execution_manager.register_action(Action("announce", any_callable, before="publish",
+                                                      only_once=True))
+
+    def tearDown(self):
+        del sys.modules["any_snapshot_plugin"]
+        self.cache_home.stop()
+        shutil.rmtree(self.basedir)
+
+    def write_file(self, name, content):
+        file_name = os.path.join(self.basedir, name)
+        with open(file_name, "w") as file_handle:
+            file_handle.write(content)
+        return file_name
+
+    def save_snapshot(self):
+        snapshot = TaskGraphSnapshot.capture(self.descriptor, self.project, self.execution_manager,
+                                             ["any_snapshot_plugin", "not_loaded_module"])
+        snapshot.save()
+        return snapshot
+
+    def test_should_load_saved_snapshot(self):
+        self.save_snapshot()
+
+        snapshot = TaskGraphSnapshot.load(self.descriptor)
+
+        self.assertEqual("spam", snapshot.project_name)
+        self.assertEqual("publish", snapshot.default_task())
+
+    def test_should_not_load_missing_snapshot(self):
+        self.assertEqual(None, TaskGraphSnapshot.load(self.descriptor))
+
+    def test_should_not_load_snapshot_when_descriptor_changed(self):
+        self.save_snapshot()
+        self.write_file("build.py", "name = 'eggs'\n")
+
+        self.assertEqual(None, TaskGraphSnapshot.load(self.descriptor))
+
+    def test_should_not_load_snapshot_when_plugin_changed(self):
+        self.save_snapshot()
+        self.write_file("any_plugin.py", "# changed\n")
+
+        self.assertEqual(None, TaskGraphSnapshot.load(self.descriptor))
+
+    def test_should_load_snapshot_when_plugin_was_touched_only(self):
+        self.save_snapshot()
+        os.utime(self.plugin_file, (time.time() + 10, time.time() + 10))
+
+        self.assertNotEqual(None, TaskGraphSnapshot.load(self.descriptor))
+
+    def test_should_not_load_snapshot_of_other_pybuilder_version(self):
+        self.save_snapshot()
+
+        with patch("pybuilder.snapshot.__version__", new_callable=lambda: "0.0.1"):
+            self.assertEqual(None, TaskGraphSnapshot.load(self.descriptor))
+
+    def test_should_record_default_task_per_environments(self):
+        snapshot = self.save_snapshot()
+        snapshot.record_default_task(["ci"], "verify")
+
+        self.assertTrue(snapshot.has_default_task(["ci"]))
+        self.assertFalse(snapshot.has_default_task([]))
+        self.assertEqual("verify", snapshot.default_task(["ci"]))
+        self.assertEqual("publish", snapshot.default_task([]))
+
+    def test_should_record_default_task_per_property_overrides(self):
+        snapshot = self.save_snapshot()
+        snapshot.record_default_task([], "verify", {"spam": "eggs"})
+
+        self.assertTrue(snapshot.has_default_task([], {"spam": "eggs"}))
+        self.assertFalse(snapshot.has_default_task([]))
+        self.assertFalse(snapshot.has_default_task([], {"spam": "ham"}))
+        self.assertEqual("verify", snapshot.default_task([], {"spam": "eggs"}))
+        self.assertEqual("publish", snapshot.default_task([]))
+
+    def test_should_prepare_build_from_snapshot(self):
+        self.save_snapshot()
+        reactor = Reactor(Mock(), ExecutionManager(Mock()))
+
+        reactor.prepare_build_from_snapshot(TaskGraphSnapshot.load(self.descriptor), self.basedir,
+                                            exclude_optional_tasks=["verify"])
+
+        self.assertEqual("spam", reactor.project.name)
+        self.assertEqual(["compile", "publish", "verify"], reactor.execution_manager.task_names)
+        self.assertEqual(["Compiles"], reactor.execution_manager.get_task("compile").description)
+        self.assertEqual(["compile", "publish"],
+                         [task.name for task in reactor.execution_manager.build_execution_plan(["publish"])])
+        self.assertEqual(["announce"], [action.name for action in reactor.execution_manager.actions])
+
+    def test_should_restore_recorded_properties(self):
+        snapshot = self.save_snapshot()
+        snapshot.record_properties([], {"build_history_file": "/any/build_history.db"})
+        reactor = Reactor(Mock(), ExecutionManager(Mock()))
+
+        reactor.prepare_build_from_snapshot(snapshot, self.basedir)
+
+        self.assertEqual("/any/build_history.db", reactor.project.get_property("build_history_file"))
+        self.assertEqual({}, snapshot.properties(["ci"]))
+
+    def test_should_restore_properties_recorded_with_property_overrides(self):
+        snapshot = self.save_snapshot()
+        snapshot.record_properties([], {"build_history_enabled": False}, {"spam": "eggs"})
+        reactor = Reactor(Mock(), ExecutionManager(Mock()))
+
+        reactor.prepare_build_from_snapshot(snapshot, self.basedir, property_overrides={"spam": "eggs"})
+
+        self.assertEqual(False, reactor.project.get_property("build_history_enabled"))
+        self.assertEqual("eggs", reactor.project.get_property("spam"))
+        self.assertEqual({}, snapshot.properties([]))
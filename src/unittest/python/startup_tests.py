@@ -0,0 +1,60 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of PyBuilder
+#
+#   Copyright 2011-2015 PyBuilder Team
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+# Seconds a fresh interpreter may take to import the command line interface. This is generous, so that
+# slow machines pass; the modules which must not be imported catch the regressions this budget would miss.
+STARTUP_BUDGET = 1.0
+
+LAZILY_IMPORTED_MODULES = ("pip", "pkg_resources", "tblib", "multiprocessing", "urllib.request",
+                           "pybuilder.pip_common", "pybuilder.importprofile", "pybuilder.daemon")
+
+STARTUP_SCRIPT = """
+import json, sys, time
+started = time.time()
+import pybuilder.cli
+import pybuilder.pip_utils
+import pybuilder.plugins.core_plugin
+duration = time.time() - started
+json.dump({"duration": duration, "imported": [module for module in %r if module in sys.modules]}, sys.stdout)
+""" % (LAZILY_IMPORTED_MODULES,)
+
+
+def measure_startup():
+    environment = dict(os.environ)
+    environment["PYTHONPATH"] = os.pathsep.join(path for path in sys.path if path)
+    output = subprocess.check_output([sys.executable, "-c", STARTUP_SCRIPT], env=environment)
+    return json.loads(output.decode("utf-8"))
+
+
+class StartupTest(unittest.TestCase):
+    def test_should_import_heavy_modules_on_first_use_only(self):
+        self.assertEqual([], measure_startup()["imported"])
+
+    def test_should_import_command_line_interface_within_budget(self):
+        # the fastest of a few attempts, as a busy machine slows down single attempts
+        duration = min(measure_startup()["duration"] for _ in range(3))
+
+        self.assertTrue(duration < STARTUP_BUDGET,
+                        "Importing pybuilder.cli took %.3f seconds, the budget is %.3f seconds" %
+                        (duration, STARTUP_BUDGET))
@@ -0,0 +1,130 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of PyBuilder
+#
+#   Copyright 2011-2015 PyBuilder Team
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from pybuilder import trace
+
+
+class TraceTest(unittest.TestCase):
+    def setUp(self):
+        self.tracer = trace.start_tracing()
+
+    def tearDown(self):
+        trace.stop_tracing()
+
+    def spans_by_name(self):
+        return dict((span["name"], span) for span in self.tracer.spans)
+
+    def test_should_not_record_spans_when_not_tracing(self):
+        trace.stop_tracing()
+
+        with trace.span("spam", "test") as span:
+            span.set_attribute("any", "value")
+
+        self.assertEqual([], self.tracer.spans)
+
+    def test_should_record_nested_spans(self):
+        with trace.span("outer", "test", any="value"):
+            with trace.span("inner", "test"):
+                pass
+
+        spans = self.spans_by_name()
+        self.assertEqual(None, spans["outer"]["parent_id"])
+        self.assertEqual(spans["outer"]["span_id"], spans["inner"]["parent_id"])
+        self.assertEqual({"any": "value"}, spans["outer"]["attributes"])
+        self.assertTrue(spans["outer"]["start"] <= spans["inner"]["start"] <= spans["inner"]["end"])
+
+    def test_should_attach_spans_of_other_threads_to_outermost_span(self):
+        def worker():
+            with trace.span("worker", "test"):
+                pass
+
+        with trace.span("outer", "test"):
+            with trace.span("inner", "test"):
+                thread = threading.Thread(target=worker)
+                thread.start()
+                thread.join()
+
+        spans = self.spans_by_name()
+        self.assertEqual(spans["outer"]["span_id"], spans["worker"]["parent_id"])
+        self.assertNotEqual(spans["outer"]["tid"], spans["worker"]["tid"])
+
+    def test_should_record_error_of_span(self):
+        try:
+            with trace.span("failing", "test"):
+                raise ValueError("simulated")
+        except ValueError:
+            pass
+
+        self.assertEqual("ValueError: simulated", self.spans_by_name()["failing"]["attributes"]["error"])
+
+    def test_should_export_chrome_trace(self):
+        with trace.span("spam", "test", any="value"):
+            pass
+
+        events = self.tracer.to_chrome_trace()["traceEvents"]
+        complete_events = [event for event in events if event["ph"] == "X"]
+        metadata_events = [event for event in events if event["ph"] == "M"]
+
+        self.assertEqual(1, len(complete_events))
+        self.assertEqual("spam", complete_events[0]["name"])
+        self.assertEqual("test", complete_events[0]["cat"])
+        self.assertEqual({"any": "value"}, complete_events[0]["args"])
+        self.assertEqual(os.getpid(), complete_events[0]["pid"])
+        self.assertEqual(set(["process_name", "thread_name"]), set(event["name"] for event in metadata_events))
+
+    def test_should_export_otlp_json(self):
+        with trace.span("outer", "test", count=1):
+            with trace.span("inner", "test"):
+                pass
+
+        resource_spans = self.tracer.to_otlp_json()["resourceSpans"]
+        spans = dict((span["name"], span) for span in resource_spans[0]["scopeSpans"][0]["spans"])
+
+        self.assertEqual(self.tracer.trace_id, spans["outer"]["traceId"])
+        self.assertEqual(32, len(spans["outer"]["traceId"]))
+        self.assertEqual(16, len(spans["outer"]["spanId"]))
+        self.assertFalse("parentSpanId" in spans["outer"])
+        self.assertEqual(spans["outer"]["spanId"], spans["inner"]["parentSpanId"])
+        self.assertTrue(int(spans["outer"]["startTimeUnixNano"]) <= int(spans["outer"]["endTimeUnixNano"]))
+        self.assertTrue({"key": "count", "value": {"intValue": "1"}} in spans["outer"]["attributes"])
+
+    def test_should_write_trace_in_given_format(self):
+        directory = tempfile.mkdtemp(self.__class__.__name__)
+        try:
+            with trace.span("spam", "test"):
+                pass
+            chrome_file = os.path.join(directory, "chrome.json")
+            otlp_file = os.path.join(directory, "otlp.json")
+
+            self.tracer.write(chrome_file, trace.CHROME_FORMAT)
+            self.tracer.write(otlp_file, trace.OTLP_FORMAT)
+
+            with open(chrome_file) as chrome:
+                self.assertTrue("traceEvents" in json.load(chrome))
+            with open(otlp_file) as otlp:
+                self.assertTrue("resourceSpans" in json.load(otlp))
+        finally:
+            shutil.rmtree(directory)
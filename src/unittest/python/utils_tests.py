@@ -26,8 +26,10 @@ import time
 import unittest
 from json import loads
 
+from pybuilder import events, trace
 from pybuilder.errors import PyBuilderException
 from pybuilder.utils import (GlobExpression,
+                             OrderedSet,
                              Timer,
                              apply_on_files,
                              as_list,
@@ -60,6 +62,15 @@ class TimerTest(unittest.TestCase):
         timer.stop()
         self.assertTrue(timer.get_millis() > 0)
 
+    def test_should_return_number_of_cpu_millis(self):
+        timer = Timer.start()
+        deadline = time.time() + 0.1
+        while time.time() < deadline:
+            pass
+        timer.stop()
+        self.assertTrue(timer.get_cpu_millis() > 0)
+        self.assertTrue(timer.get_cpu_millis() <= timer.get_millis() + 20)
+
 
 class RenderReportTest(unittest.TestCase):
     def test_should_render_report(self):
@@ -135,6 +146,25 @@ class AsListTest(unittest.TestCase):
         self.assertEquals([foo], as_list(foo))
 
 
+class OrderedSetTest(unittest.TestCase):
+    def test_should_keep_insertion_order_without_duplicates(self):
+        ordered_set = OrderedSet(["spam", "eggs"])
+        ordered_set.append("ham")
+        ordered_set.extend(["eggs", "bacon"])
+
+        self.assertEquals(["spam", "eggs", "ham", "bacon"], list(ordered_set))
+        self.assertEquals(4, len(ordered_set))
+        self.assertTrue("ham" in ordered_set)
+
+    def test_should_discard_items(self):
+        ordered_set = OrderedSet(["spam", "eggs", "ham"])
+        ordered_set.discard("eggs")
+        ordered_set.discard("bacon")
+
+        self.assertEquals(["spam", "ham"], list(ordered_set))
+        self.assertFalse("eggs" in ordered_set)
+
+
 class TimedeltaInMillisTest(unittest.TestCase):
     def assertMillis(self, expected_millis, **timedelta_constructor_args):
         self.assertEquals(expected_millis, timedelta_in_millis(
@@ -349,6 +379,42 @@ class ForkTest(unittest.TestCase):
         self.assertEquals(val[0], 0)
         self.assertEquals(val[1], "foo20")
 
+    def testForkTracesChildSpans(self):
+        def test_func():
+            with trace.span("in_child", "test"):
+                return os.getpid()
+
+        tracer = trace.start_tracing()
+        try:
+            _, child_pid = fork_process(Mock(), target=test_func)
+        finally:
+            trace.stop_tracing()
+
+        fork_span, child_span = sorted(tracer.spans, key=lambda span: span["category"])
+        self.assertEquals("test_func", fork_span["name"])
+        self.assertEquals(os.getpid(), fork_span["pid"])
+        self.assertEquals("in_child", child_span["name"])
+        self.assertEquals(child_pid, child_span["pid"])
+        self.assertEquals(fork_span["span_id"], child_span["parent_id"])
+
+    def testForkEmitsChildEvents(self):
+        def test_func():
+            events.emit(events.TEST_FINISHED, test="in_child")
+            return os.getpid()
+
+        stream = events.EventStream([])
+        events._stream = stream
+        emitted = []
+        stream.emit = emitted.append
+        try:
+            _, child_pid = fork_process(Mock(), target=test_func)
+        finally:
+            events._stream = None
+            stream.close()
+
+        self.assertEquals(["in_child"], [event["test"] for event in emitted])
+        self.assertEquals(child_pid, emitted[0]["pid"])
+
     def testForkWithException(self):
         def test_func():
             raise PyBuilderException("Test failure message")
@@ -435,3 +501,17 @@ class CommandExecutionTest(unittest.TestCase):
         self.assertEquals(execute_command(["test", "commands"], outfile_name="test.out"), 0)
         self.assertEquals(
             execute_command(["test", "commands"], outfile_name="test.out", error_file_name="test.out.err"), 0)
+
+    @patch("pybuilder.utils.Popen")
+    def test_should_trace_executed_command(self, popen):
+        popen.return_value.wait.return_value = 1
+        tracer = trace.start_tracing()
+        try:
+            execute_command(["test", "commands"])
+        finally:
+            trace.stop_tracing()
+
+        self.assertEquals(1, len(tracer.spans))
+        self.assertEquals("test", tracer.spans[0]["name"])
+        self.assertEquals("command", tracer.spans[0]["category"])
+        self.assertEquals({"command": "test commands", "exit_code": 1}, tracer.spans[0]["attributes"])
@@ -16,12 +16,13 @@
 #   See the License for the specific language governing permissions and
 #   limitations under the License.
 
+import os
 import unittest
 
-from test_utils import patch
+from test_utils import Mock, patch
 
 from pybuilder.errors import PyBuilderException
-from pybuilder.vcs import VCSRevision
+from pybuilder.vcs import VCSRevision, changed_files
 
 
 class VCSRevisionTest(unittest.TestCase):
@@ -95,3 +96,40 @@ class VCSRevisionTest(unittest.TestCase):
     def test_should_not_detect_git_when_status_fails(self):
         self.execute_command.return_value = 1, "", ""
         self.assertFalse(VCSRevision().is_a_git_repo())
+
+
+class ChangedFilesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.popen = patch("pybuilder.vcs.Popen").start()
+        self.outputs = []
+
+        def process(*args, **kwargs):
+            returncode, stdout = self.outputs.pop(0)
+            process = Mock(returncode=returncode)
+            process.communicate.return_value = stdout, b""
+            return process
+
+        self.popen.side_effect = process
+
+    def tearDown(self):
+        patch.stopall()
+
+    def test_should_return_changed_and_untracked_files_below_directory(self):
+        self.outputs = [(0, b"src/changed.py\n"), (0, b"src/new.py\n\n")]
+
+        self.assertEquals([os.path.join(os.sep, "project", "src", "changed.py"),
+                           os.path.join(os.sep, "project", "src", "new.py")],
+                          changed_files(os.path.join(os.sep, "project"), "origin/master"))
+        self.assertEquals(("git", "diff", "--name-only", "--relative", "origin/master", "--", "."),
+                          self.popen.call_args_list[0][0][0])
+
+    def test_should_return_none_when_git_fails(self):
+        self.outputs = [(128, b"")]
+
+        self.assertEquals(None, changed_files("/project"))
+
+    def test_should_return_none_when_git_is_not_installed(self):
+        self.popen.side_effect = OSError("No such file or directory")
+
+        self.assertEquals(None, changed_files("/project"))
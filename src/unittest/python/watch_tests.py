@@ -0,0 +1,120 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of PyBuilder
+#
+#   Copyright 2011-2015 PyBuilder Team
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from pybuilder.core import Project
+from pybuilder.watch import (InotifyWatcher, PollingWatcher, _load_inotify, create_watcher, is_ignored,
+                             wait_for_changes, watched_directories)
+from test_utils import Mock
+
+
+class WatcherTestBase(unittest.TestCase):
+    def setUp(self):
+        self.basedir = tempfile.mkdtemp(self.__class__.__name__)
+        self.src = os.path.join(self.basedir, "src")
+        self.spam = self.write_file("src/spam.py", "spam")
+        self.descriptor = self.write_file("build.py", "name = 'spam'\n")
+        self.write_file("README", "readme")
+
+    def tearDown(self):
+        shutil.rmtree(self.basedir)
+
+    def write_file(self, relative_name, content):
+        file_name = os.path.join(self.basedir, relative_name)
+        if not os.path.exists(os.path.dirname(file_name)):
+            os.makedirs(os.path.dirname(file_name))
+        with open(file_name, "w") as file_handle:
+            file_handle.write(content)
+        return file_name
+
+
+class WatchedDirectoriesTest(WatcherTestBase):
+    def test_should_return_existing_source_directories(self):
+        project = Project(self.basedir)
+        project.set_property("dir_source_main_python", "src")
+        project.set_property("dir_source_unittest_python", "src/unittest/python")
+        project.set_property("watch_directories", ["src", "resources"])
+        os.makedirs(os.path.join(self.basedir, "resources"))
+
+        self.assertEqual([self.src, os.path.join(self.basedir, "resources")], watched_directories(project))
+
+    def test_should_ignore_hidden_and_compiled_files(self):
+        self.assertTrue(is_ignored(".spam.py.swp"))
+        self.assertTrue(is_ignored("spam.pyc"))
+        self.assertTrue(is_ignored("spam.py~"))
+        self.assertTrue(is_ignored("__pycache__"))
+        self.assertFalse(is_ignored("spam.py"))
+
+
+class WatcherTestMixin(object):
+    def test_should_report_changed_created_and_removed_files(self):
+        watcher = self.create_watcher()
+        try:
+            self.write_file("src/spam.py", "changed spam")
+            eggs = self.write_file("src/pkg/eggs.py", "eggs")
+
+            changed = wait_for_changes(watcher, 0.3)
+            self.assertTrue(self.spam in changed)
+            self.assertTrue(eggs in changed)
+
+            os.remove(self.spam)
+            self.assertEqual(set([self.spam]), wait_for_changes(watcher, 0.3))
+        finally:
+            watcher.close()
+
+    def test_should_report_watched_files_only(self):
+        watcher = self.create_watcher()
+        try:
+            self.write_file("README", "changed readme")
+            self.write_file("src/.spam.py.swp", "swap")
+            self.assertEqual(set(), watcher.wait(0.3))
+
+            self.write_file("build.py", "name = 'eggs'\n")
+            self.assertEqual(set([self.descriptor]), wait_for_changes(watcher, 0.3))
+        finally:
+            watcher.close()
+
+
+class PollingWatcherTest(WatcherTestBase, WatcherTestMixin):
+    def create_watcher(self):
+        return PollingWatcher([self.src], [self.descriptor], interval=0.05)
+
+
+@unittest.skipUnless(_load_inotify(), "inotify is not available")
+class InotifyWatcherTest(WatcherTestBase, WatcherTestMixin):
+    def create_watcher(self):
+        return InotifyWatcher([self.src], [self.descriptor])
+
+    def test_should_create_inotify_watcher_when_available(self):
+        watcher = create_watcher([self.src], [self.descriptor])
+        watcher.close()
+
+        self.assertTrue(isinstance(watcher, InotifyWatcher))
+
+
+class WaitForChangesTest(unittest.TestCase):
+    def test_should_collect_burst_of_changes(self):
+        watcher = Mock()
+        watcher.wait.side_effect = [set(["spam"]), set(["eggs"]), set(["spam", "ham"]), set()]
+
+        self.assertEqual(set(["spam", "eggs", "ham"]), wait_for_changes(watcher, 0.1))
+        self.assertEqual(4, watcher.wait.call_count)
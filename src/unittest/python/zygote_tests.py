@@ -0,0 +1,87 @@
+#   -*- coding: utf-8 -*-
+#
+#   This file is part of PyBuilder
+#
+#   Copyright 2011-2015 PyBuilder Team
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from test_utils import Mock
+
+from pybuilder import zygote
+from pybuilder.core import Project
+from pybuilder.zygote import preload_module_names, preload_modules, project_preload_modules
+
+
+class PreloadModulesTest(unittest.TestCase):
+    def setUp(self):
+        self.module_directory = tempfile.mkdtemp(self.__class__.__name__)
+        sys.path.insert(0, self.module_directory)
+        with open(os.path.join(self.module_directory, "zygote_preloaded_module.py"), "w") as module_file:
+            module_file.write("VALUE = 42\n")
+        self.logger = Mock()
+
+    def tearDown(self):
+        sys.path.remove(self.module_directory)
+        sys.modules.pop("zygote_preloaded_module", None)
+        zygote._preload_times.pop("zygote_preloaded_module", None)
+        shutil.rmtree(self.module_directory)
+
+    def test_should_import_modules_and_remember_import_time(self):
+        report = preload_modules(["zygote_preloaded_module"], self.logger)
+
+        self.assertEqual(42, sys.modules["zygote_preloaded_module"].VALUE)
+        self.assertEqual(["zygote_preloaded_module"], list(report.imported))
+        self.assertEqual({}, report.preloaded)
+        self.assertEqual(report.import_time, zygote._preload_times["zygote_preloaded_module"])
+
+    def test_should_report_time_saved_by_earlier_preload(self):
+        imported = preload_modules(["zygote_preloaded_module"], self.logger)
+
+        report = preload_modules(["zygote_preloaded_module"], self.logger)
+
+        self.assertEqual({}, report.imported)
+        self.assertEqual(imported.import_time, report.saved_time)
+
+    def test_should_not_report_modules_loaded_otherwise(self):
+        report = preload_modules(["os"], self.logger)
+
+        self.assertEqual({}, report.imported)
+        self.assertEqual({}, report.preloaded)
+
+    def test_should_warn_about_modules_failing_to_import(self):
+        report = preload_modules(["zygote_missing_module"], self.logger)
+
+        self.assertEqual({}, report.imported)
+        self.assertTrue(self.logger.warn.called)
+
+
+class ProjectPreloadModulesTest(unittest.TestCase):
+    def test_should_collect_modules_of_preload_properties(self):
+        project = Project("basedir")
+        project.set_property("unittest_preload_modules", ["numpy", "sqlalchemy"])
+        project.set_property("integrationtest_preload_modules", "numpy, requests")
+        project.set_property("unittest_module_glob", "*_tests")
+
+        self.assertEqual(["numpy", "requests", "sqlalchemy"], project_preload_modules(project))
+
+    def test_should_split_comma_separated_module_names(self):
+        self.assertEqual(["numpy", "requests"], preload_module_names("numpy, requests"))
+        self.assertEqual(["numpy"], preload_module_names(["numpy"]))
+        self.assertEqual([], preload_module_names(None))